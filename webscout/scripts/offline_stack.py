@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+WebScout Offline Stand-in Stack
+Runs the local services needed to benchmark learningScrape on a single box
+without Browserbase, OpenAI embeddings, or Redis Cloud:
+
+  1. Fake embedding server  — OpenAI-compatible POST /v1/embeddings returning
+     deterministic 1536-dim vectors (hashed character trigrams, L2-normalised,
+     so similar texts stay similar and identical texts are bit-identical).
+  2. Redis Stack            — a local redis-stack-server (FT.SEARCH + KNN),
+     launched from PATH or via `docker compose up redis`.
+  3. Fixture site server    — replays the quotes/books/example.com pages from
+     scripts/fixtures/<host>/..., addressed by Host header as
+     http://<host>.localhost:8790/<path> so every site keeps its own hostname
+     (per-host KNN pre-filtering, settle estimates and host scheduling).
+     Browsers resolve *.localhost to loopback without any DNS setup.
+
+Point the Next.js server at it with:
+
+  OPENAI_BASE_URL=http://127.0.0.1:8787/v1
+  REDIS_URL=redis://127.0.0.1:6379
+  BROWSER_ENV=LOCAL
+
+and set WEBSCOUT_FIXTURE_BASE=http://localhost:8790 for the Python suites so
+they rewrite live site URLs onto the fixture server (see fixture_url()).
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import urlparse
+
+EMBEDDING_DIM = 1536
+EMBEDDING_PORT = 8787
+FIXTURE_PORT = 8790
+REDIS_PORT = 6379
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# ---------------------------------------------------------------------------
+# Helpers shared with the test suites
+# ---------------------------------------------------------------------------
+
+def fixture_url(url: str) -> str:
+    """
+    Rewrite a live site URL onto the fixture server when
+    WEBSCOUT_FIXTURE_BASE is set; otherwise return it unchanged.
+
+    https://quotes.toscrape.com/page/2/?tag=love
+        -> http://quotes.toscrape.com.localhost:8790/page/2/?tag=love
+    """
+    base = os.environ.get("WEBSCOUT_FIXTURE_BASE")
+    if not base:
+        return url
+    parsed = urlparse(url)
+    fixture = urlparse(base)
+    host = parsed.hostname.replace("www.", "", 1) if parsed.hostname else ""
+    port = f":{fixture.port}" if fixture.port else ""
+    return parsed._replace(
+        scheme=fixture.scheme or "http",
+        netloc=f"{host}.{fixture.hostname}{port}",
+        path=parsed.path or "/",
+    ).geturl()
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic bag-of-trigrams embedding, L2-normalised."""
+    vector = [0.0] * dim
+    normalized = " ".join(text.lower().split())
+    padded = f"  {normalized}  "
+    for i in range(len(padded) - 2):
+        digest = hashlib.md5(padded[i:i + 3].encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] += sign
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# ---------------------------------------------------------------------------
+# 1. Fake OpenAI embeddings server
+# ---------------------------------------------------------------------------
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    """Implements the subset of POST /v1/embeddings used by generateEmbedding(s)."""
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") not in ("/v1/embeddings", "/embeddings"):
+            self._send_json(404, {"error": {"message": f"Unknown route {self.path}"}})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dim = int(request.get("dimensions") or EMBEDDING_DIM)
+        use_base64 = request.get("encoding_format") == "base64"
+
+        data = []
+        tokens = 0
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(str(text), dim)
+            tokens += len(str(text).split())
+            if use_base64:
+                # The OpenAI SDK requests base64 by default and decodes little-endian float32
+                embedding = base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode("ascii")
+            else:
+                embedding = vector
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+# ---------------------------------------------------------------------------
+# 3. Static-site fixture server
+# ---------------------------------------------------------------------------
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves scripts/fixtures/<host>/<path>, mapping directories to index.html.
+    The site comes from the Host header (`<host>.localhost`); a bare host
+    falls back to the first path segment. Query strings are ignored.
+    """
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _site(self) -> str:
+        hostname = (self.headers.get("Host") or "").rsplit(":", 1)[0].lower()
+        return hostname[: -len(".localhost")] if hostname.endswith(".localhost") else ""
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path.lstrip("/")
+        site = self._site()
+        if site:
+            path = f"{site}/{path}"
+        candidate = os.path.normpath(os.path.join(FIXTURE_DIR, path))
+        if not candidate.startswith(FIXTURE_DIR):
+            self.send_error(403)
+            return
+        if os.path.isdir(candidate):
+            candidate = os.path.join(candidate, "index.html")
+        if not os.path.isfile(candidate):
+            self.send_error(404, f"No fixture for /{path}")
+            return
+        with open(candidate, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ---------------------------------------------------------------------------
+# 2. Local Redis Stack
+# ---------------------------------------------------------------------------
+
+def start_redis(port: int) -> Optional[subprocess.Popen]:
+    """Start redis-stack-server from PATH, falling back to docker compose."""
+    if shutil.which("redis-stack-server"):
+        print(f"🔴 Starting redis-stack-server on :{port}")
+        return subprocess.Popen(
+            ["redis-stack-server", "--port", str(port), "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+        )
+    if shutil.which("docker"):
+        print("🔴 Starting Redis Stack via docker compose (service: redis)")
+        compose_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run(["docker", "compose", "up", "-d", "redis"], cwd=compose_dir, check=False)
+        return None
+    print("⚠️ Neither redis-stack-server nor docker found — start Redis Stack manually")
+    return None
+
+
+def serve(server: ThreadingHTTPServer, name: str) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the WebScout offline stand-in stack")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--embedding-port", type=int, default=EMBEDDING_PORT)
+    parser.add_argument("--fixture-port", type=int, default=FIXTURE_PORT)
+    parser.add_argument("--redis-port", type=int, default=REDIS_PORT)
+    parser.add_argument("--no-redis", action="store_true", help="Don't start Redis Stack")
+    args = parser.parse_args()
+
+    embedding_server = ThreadingHTTPServer((args.host, args.embedding_port), EmbeddingHandler)
+    fixture_server = ThreadingHTTPServer((args.host, args.fixture_port), FixtureHandler)
+    serve(embedding_server, "embeddings")
+    serve(fixture_server, "fixtures")
+    redis_proc = None if args.no_redis else start_redis(args.redis_port)
+
+    print("\n🧪 WebScout offline stack running")
+    print("=" * 60)
+    print(f"  OPENAI_BASE_URL=http://{args.host}:{args.embedding_port}/v1")
+    print(f"  REDIS_URL=redis://{args.host}:{args.redis_port}")
+    print("  BROWSER_ENV=LOCAL")
+    print(f"  WEBSCOUT_FIXTURE_BASE=http://localhost:{args.fixture_port}")
+    print("=" * 60)
+    print("Press Ctrl+C to stop.")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        embedding_server.shutdown()
+        fixture_server.shutdown()
+        if redis_proc:
+            redis_proc.terminate()
+            redis_proc.wait(timeout=10)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
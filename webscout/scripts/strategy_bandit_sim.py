@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+WebScout Recovery Strategy Policy Simulator
+Replays recorded recovery outcomes offline to compare strategy-ordering
+policies on expected time-to-success.
+
+Outcomes come from the `strategy_outcomes` Redis stream (appended by
+recordStrategyOutcome in src/lib/engine/strategy-selector.ts), a JSONL file
+of {"url_pattern", "strategy", "success", "duration_ms"} rows, or a
+synthetic workload (--synthetic).
+
+Each recorded row is replayed as one recovery episode for its url_pattern.
+A policy orders the strategies; they are tried one after another, and each
+attempt's outcome is bootstrapped from the recorded outcomes for that
+strategy (url_pattern first, then hostname, then global). The episode ends
+at the first success or when the time budget runs out. Policies learn online
+from the simulated outcomes exactly as the live selector would.
+
+Policies (mirroring getOrderedStrategies):
+  default   fixed order agent → act → extract_refined → gemini
+  legacy    sort by raw success rate (0.01 tie band), then avg duration
+  greedy    pooled posterior mean success / expected duration
+  ucb       UCB1 bonus on the pooled mean, per unit time
+  thompson  Beta-posterior sample per unit time (live default)
+
+Usage:
+  python scripts/strategy_bandit_sim.py                 # read REDIS_URL stream
+  python scripts/strategy_bandit_sim.py --file outcomes.jsonl
+  python scripts/strategy_bandit_sim.py --synthetic --episodes 2000
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import sys
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+ALL_STRATEGIES = ["agent", "act", "extract_refined", "gemini"]
+PRIOR_STRENGTH = 4
+DEFAULT_DURATION_MS = 15000
+DEFAULT_BUDGET_MS = 40000
+STREAM_KEY = "strategy_outcomes"
+
+Outcome = Tuple[bool, float]  # (success, duration_ms)
+
+
+# ---------------------------------------------------------------------------
+# Loading recorded outcomes
+# ---------------------------------------------------------------------------
+
+def load_from_redis(url: str) -> List[dict]:
+    import redis
+
+    r = redis.Redis.from_url(url, decode_responses=True)
+    rows = []
+    last_id = "-"
+    while True:
+        batch = r.xrange(STREAM_KEY, min=last_id, count=1000)
+        if last_id != "-":
+            batch = batch[1:]
+        if not batch:
+            break
+        for entry_id, fields in batch:
+            rows.append({
+                "url_pattern": fields["url_pattern"],
+                "strategy": fields["strategy"],
+                "success": fields["success"] == "1",
+                "duration_ms": float(fields["duration_ms"]),
+            })
+        last_id = batch[-1][0]
+    return rows
+
+
+def load_from_file(path: str) -> List[dict]:
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                row["success"] = bool(row["success"]) and row["success"] not in ("0", "false")
+                row["duration_ms"] = float(row["duration_ms"])
+                rows.append(row)
+    return rows
+
+
+def synthetic_rows(episodes: int, seed: int) -> List[dict]:
+    """
+    A workload where the fastest reliable strategy differs per host, and the
+    default order (agent first) is slow: the case the bandit should win.
+    """
+    rng = random.Random(seed)
+    # (success probability, mean duration ms) per host per strategy
+    profiles = {
+        "quotes.toscrape.com": {"agent": (0.9, 25000), "act": (0.3, 8000), "extract_refined": (0.8, 4000), "gemini": (0.6, 6000)},
+        "books.toscrape.com": {"agent": (0.8, 22000), "act": (0.7, 7000), "extract_refined": (0.2, 4000), "gemini": (0.5, 6000)},
+        "shop.example.com": {"agent": (0.7, 30000), "act": (0.85, 9000), "extract_refined": (0.1, 4000), "gemini": (0.3, 7000)},
+    }
+    paths = ["", "page/*", "catalogue/*", "product/*"]
+    rows = []
+    for _ in range(episodes):
+        host = rng.choice(list(profiles))
+        url_pattern = f"{host}/{rng.choice(paths)}"
+        strategy = rng.choice(ALL_STRATEGIES)
+        p, mean = profiles[host][strategy]
+        rows.append({
+            "url_pattern": url_pattern,
+            "strategy": strategy,
+            "success": rng.random() < p,
+            "duration_ms": max(500.0, rng.gauss(mean, mean * 0.25)),
+        })
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Outcome model (bootstrap from recorded outcomes, pooled up the hierarchy)
+# ---------------------------------------------------------------------------
+
+def host_of(url_pattern: str) -> str:
+    return url_pattern.split("/")[0]
+
+
+class OutcomeModel:
+    def __init__(self, rows: List[dict]):
+        self.by_pattern: Dict[Tuple[str, str], List[Outcome]] = defaultdict(list)
+        self.by_host: Dict[Tuple[str, str], List[Outcome]] = defaultdict(list)
+        self.by_strategy: Dict[str, List[Outcome]] = defaultdict(list)
+        for row in rows:
+            outcome = (row["success"], row["duration_ms"])
+            self.by_pattern[(row["url_pattern"], row["strategy"])].append(outcome)
+            self.by_host[(host_of(row["url_pattern"]), row["strategy"])].append(outcome)
+            self.by_strategy[row["strategy"]].append(outcome)
+
+    def sample(self, rng: random.Random, url_pattern: str, strategy: str) -> Outcome:
+        for pool in (
+            self.by_pattern.get((url_pattern, strategy)),
+            self.by_host.get((host_of(url_pattern), strategy)),
+            self.by_strategy.get(strategy),
+        ):
+            if pool:
+                return rng.choice(pool)
+        return (False, DEFAULT_DURATION_MS)
+
+
+# ---------------------------------------------------------------------------
+# Policies (same pooling and scoring as strategy-selector.ts)
+# ---------------------------------------------------------------------------
+
+class Stats:
+    """attempts / successes / total duration at pattern, host and global level."""
+
+    def __init__(self):
+        self.levels: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0]))
+
+    def record(self, url_pattern: str, strategy: str, success: bool, duration_ms: float) -> None:
+        for level in (f"p:{url_pattern}", f"h:{host_of(url_pattern)}", "g"):
+            arm = self.levels[level][strategy]
+            arm[0] += 1
+            arm[1] += 1 if success else 0
+            arm[2] += duration_ms
+
+    def chain(self, url_pattern: str, strategy: str) -> List[List[float]]:
+        return [
+            self.levels["g"][strategy],
+            self.levels[f"h:{host_of(url_pattern)}"][strategy],
+            self.levels[f"p:{url_pattern}"][strategy],
+        ]
+
+
+def pool_arm(levels: List[List[float]]) -> Tuple[float, float, float, int]:
+    alpha, beta, duration = 1.0, 1.0, float(DEFAULT_DURATION_MS)
+    for attempts, successes, total_ms in levels:
+        mean = alpha / (alpha + beta)
+        alpha = PRIOR_STRENGTH * mean + successes
+        beta = PRIOR_STRENGTH * (1 - mean) + (attempts - successes)
+        duration = (PRIOR_STRENGTH * duration + total_ms) / (PRIOR_STRENGTH + attempts)
+    return alpha, beta, max(duration, 1.0), int(levels[-1][0])
+
+
+Policy = Callable[[Stats, str, random.Random], List[str]]
+
+
+def default_policy(stats: Stats, url_pattern: str, rng: random.Random) -> List[str]:
+    return list(ALL_STRATEGIES)
+
+
+def legacy_policy(stats: Stats, url_pattern: str, rng: random.Random) -> List[str]:
+    arms = []
+    for strategy in ALL_STRATEGIES:
+        attempts, successes, total_ms = stats.levels[f"p:{url_pattern}"][strategy]
+        if attempts:
+            arms.append((strategy, successes / attempts, total_ms / attempts))
+    if not arms:
+        return list(ALL_STRATEGIES)
+    # Emulate the old comparator: success rate desc unless within 0.01, then duration asc
+    def compare(a, b):
+        if abs(a[1] - b[1]) > 0.01:
+            return -1 if a[1] > b[1] else 1
+        return -1 if a[2] < b[2] else (1 if a[2] > b[2] else 0)
+
+    ordered = [a[0] for a in sorted(arms, key=functools.cmp_to_key(compare))]
+    return ordered + [s for s in ALL_STRATEGIES if s not in ordered]
+
+
+def scored_policy(mode: str) -> Policy:
+    def policy(stats: Stats, url_pattern: str, rng: random.Random) -> List[str]:
+        arms = {s: pool_arm(stats.chain(url_pattern, s)) for s in ALL_STRATEGIES}
+        total = sum(a[3] for a in arms.values())
+        scores = {}
+        for strategy, (alpha, beta, duration, attempts) in arms.items():
+            mean = alpha / (alpha + beta)
+            if mode == "thompson":
+                p = rng.betavariate(alpha, beta)
+            elif mode == "ucb":
+                p = min(1.0, mean + math.sqrt(2 * math.log(total + 1) / (attempts + 1)))
+            else:
+                p = mean
+            scores[strategy] = p / duration
+        return sorted(ALL_STRATEGIES, key=lambda s: -scores[s])
+    return policy
+
+
+POLICIES: Dict[str, Policy] = {
+    "default": default_policy,
+    "legacy": legacy_policy,
+    "greedy": scored_policy("greedy"),
+    "ucb": scored_policy("ucb"),
+    "thompson": scored_policy("thompson"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def simulate(policy: Policy, model: OutcomeModel, episodes: List[str], budget_ms: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    stats = Stats()
+    times: List[float] = []
+    successes = 0
+    attempts = 0
+    for url_pattern in episodes:
+        elapsed = 0.0
+        for strategy in policy(stats, url_pattern, rng):
+            if elapsed >= budget_ms:
+                break
+            success, duration = model.sample(rng, url_pattern, strategy)
+            duration = min(duration, budget_ms - elapsed)
+            elapsed += duration
+            attempts += 1
+            stats.record(url_pattern, strategy, success, duration)
+            if success:
+                successes += 1
+                break
+        times.append(elapsed)
+    n = len(episodes) or 1
+    return {
+        "success_rate": successes / n,
+        "mean_ms": sum(times) / n,
+        "p50_ms": percentile(times, 50),
+        "p95_ms": percentile(times, 95),
+        "attempts_per_episode": attempts / n,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare recovery strategy ordering policies offline")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", help="JSONL file of recorded outcomes")
+    source.add_argument("--synthetic", action="store_true", help="Use a synthetic workload")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--episodes", type=int, default=0, help="Episodes to replay (default: one per recorded row)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--seeds", type=int, default=5, help="Independent runs to average per policy")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="Comma-separated policy names")
+    args = parser.parse_args()
+
+    print("\n🎰 WebScout Recovery Strategy Policy Simulator")
+    print("=" * 60)
+
+    if args.synthetic:
+        rows = synthetic_rows(args.episodes or 2000, seed=0)
+        print(f"📦 Synthetic workload: {len(rows)} outcomes")
+    elif args.file:
+        rows = load_from_file(args.file)
+        print(f"📦 Loaded {len(rows)} outcomes from {args.file}")
+    else:
+        try:
+            rows = load_from_redis(args.redis_url)
+        except Exception as e:
+            print(f"❌ Could not read {STREAM_KEY} from {args.redis_url}: {e}")
+            sys.exit(1)
+        print(f"📦 Loaded {len(rows)} outcomes from {args.redis_url} ({STREAM_KEY})")
+
+    if not rows:
+        print("⚠️ No recorded outcomes — run some recoveries first or use --synthetic")
+        sys.exit(1)
+
+    model = OutcomeModel(rows)
+    episodes = [row["url_pattern"] for row in rows]
+    if args.episodes and args.episodes != len(episodes):
+        rng = random.Random(0)
+        episodes = [rng.choice(episodes) for _ in range(args.episodes)]
+    patterns = len(set(episodes))
+    print(f"🔁 Replaying {len(episodes)} episodes over {patterns} url pattern(s), budget {args.budget_ms / 1000:.0f}s")
+
+    names = [name.strip() for name in args.policies.split(",") if name.strip()]
+    unknown = [name for name in names if name not in POLICIES]
+    if unknown:
+        print(f"❌ Unknown policies: {', '.join(unknown)} (choose from {', '.join(POLICIES)})")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"{'policy':<10} {'success':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'tries':>6}")
+    print("=" * 60)
+    results: Dict[str, dict] = {}
+    for name in names:
+        runs = [simulate(POLICIES[name], model, episodes, args.budget_ms, seed) for seed in range(args.seeds)]
+        avg = {key: sum(run[key] for run in runs) / len(runs) for key in runs[0]}
+        results[name] = avg
+        print(
+            f"{name:<10} {avg['success_rate'] * 100:>7.1f}% {avg['mean_ms'] / 1000:>8.2f}s "
+            f"{avg['p50_ms'] / 1000:>8.2f}s {avg['p95_ms'] / 1000:>8.2f}s {avg['attempts_per_episode']:>6.2f}"
+        )
+
+    best: Optional[str] = min(results, key=lambda n: results[n]["mean_ms"]) if results else None
+    if best:
+        print("=" * 60)
+        print(f"🏆 Lowest mean time-to-success: {best}")
+
+
+if __name__ == "__main__":
+    main()
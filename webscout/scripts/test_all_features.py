@@ -2,17 +2,27 @@
 """
 WebScout Comprehensive Feature Test Suite
 Tests ALL API endpoints and edge cases.
+
+Load mode (--load) drives concurrent POST /api/tasks traffic through one
+pooled client, follows every task to completion via GET /api/tasks/{id},
+and prints live p50/p95/p99 latency and error rates per endpoint.
 """
 
+import argparse
 import asyncio
+import os
 import json
+import math
+import time
 import httpx
 import sys
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from offline_stack import fixture_url
+
 # Configuration
-BASE_URL = "http://localhost:3002"
+BASE_URL = os.environ.get("WEBSCOUT_BASE_URL", "http://localhost:3002")
 TIMEOUT = 120
 
 
@@ -315,7 +325,7 @@ class WebScoutTester:
                 start = datetime.now()
                 resp = await client.post(
                     f"{self.base_url}/api/tasks",
-                    json={"url": "https://example.com", "target": "main heading"}
+                    json={"url": fixture_url("https://example.com"), "target": "main heading"}
                 )
                 duration = (datetime.now() - start).total_seconds()
                 data = resp.json()
@@ -339,7 +349,7 @@ class WebScoutTester:
             try:
                 resp1 = await client.post(
                     f"{self.base_url}/api/tasks",
-                    json={"url": "https://quotes.toscrape.com/", "target": "first quote"}
+                    json={"url": fixture_url("https://quotes.toscrape.com/"), "target": "first quote"}
                 )
                 data1 = resp1.json()
                 first_cached = data1.get("used_cached_pattern", False)
@@ -347,7 +357,7 @@ class WebScoutTester:
                 # Second request should use cached pattern
                 resp2 = await client.post(
                     f"{self.base_url}/api/tasks",
-                    json={"url": "https://quotes.toscrape.com/", "target": "first quote"}
+                    json={"url": fixture_url("https://quotes.toscrape.com/"), "target": "first quote"}
                 )
                 data2 = resp2.json()
                 second_cached = data2.get("used_cached_pattern", False)
@@ -394,8 +404,262 @@ class WebScoutTester:
             sys.exit(0)
 
 
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples (0 for an empty list)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class EndpointStats:
+    """Latency samples and error count for one endpoint."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies) + self.errors
+
+    def record(self, seconds: float, ok: bool) -> None:
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+
+    def row(self) -> str:
+        error_rate = (self.errors / self.count * 100) if self.count else 0.0
+        return (
+            f"{self.name:<24} n={self.count:<6} "
+            f"p50={percentile(self.latencies, 50) * 1000:8.0f}ms "
+            f"p95={percentile(self.latencies, 95) * 1000:8.0f}ms "
+            f"p99={percentile(self.latencies, 99) * 1000:8.0f}ms "
+            f"err={error_rate:5.1f}%"
+        )
+
+
+class LoadTester:
+    """
+    Concurrent load generator for POST /api/tasks.
+
+    Closed-loop (rate=None): `concurrency` workers each submit a task, follow
+    it to completion, then submit the next one.
+    Open-loop (rate=N): tasks are submitted at N per second regardless of how
+    fast the server completes them; `concurrency` caps only the number of
+    tasks being polled at once. Open-loop latencies are measured from each
+    task's scheduled arrival, so a slow server cannot hide queueing delay
+    (no coordinated omission).
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        total: int = 50,
+        url: str = "https://example.com",
+        target: str = "main heading",
+        poll_interval: float = 1.0,
+        task_timeout: float = TIMEOUT,
+        report_interval: float = 5.0,
+    ):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.total = total
+        self.url = fixture_url(url)
+        self.target = target
+        self.poll_interval = poll_interval
+        self.task_timeout = task_timeout
+        self.report_interval = report_interval
+        self.stats: Dict[str, EndpointStats] = {
+            name: EndpointStats(name)
+            for name in ("POST /api/tasks", "GET /api/tasks/{id}", "task end-to-end")
+        }
+        self.outcomes: Dict[str, int] = {"success": 0, "failed": 0, "timeout": 0, "rejected": 0}
+        self.submitted = 0
+        self.in_flight = 0
+        self.started_at = 0.0
+
+    async def run(self) -> None:
+        mode = f"open-loop @ {self.rate}/s" if self.rate else "closed-loop"
+        print("\n" + "=" * 70)
+        print("  WebScout Load Test")
+        print("=" * 70)
+        print(f"Target: {self.base_url}")
+        print(f"Mode: {mode} | concurrency={self.concurrency} | tasks={self.total}")
+        print(f"Payload: {self.url} -> \"{self.target}\"")
+        print()
+
+        limits = httpx.Limits(
+            max_connections=self.concurrency * 2,
+            max_keepalive_connections=self.concurrency * 2,
+        )
+        self.started_at = time.perf_counter()
+        async with httpx.AsyncClient(timeout=self.task_timeout, limits=limits) as client:
+            reporter = asyncio.create_task(self._report_loop())
+            try:
+                if self.rate:
+                    await self._run_open_loop(client)
+                else:
+                    await self._run_closed_loop(client)
+            finally:
+                reporter.cancel()
+
+        self.print_report(final=True)
+
+    async def _run_closed_loop(self, client: httpx.AsyncClient) -> None:
+        async def worker() -> None:
+            while self.submitted < self.total:
+                self.submitted += 1
+                await self._run_task(client)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _run_open_loop(self, client: httpx.AsyncClient) -> None:
+        # Every task is submitted at its scheduled arrival time, however
+        # saturated the server is; only following tasks to completion is
+        # bounded. Latencies are measured from the scheduled arrival, so time
+        # spent waiting on the client or the server is never left out.
+        slots = asyncio.Semaphore(self.concurrency)
+        interval = 1.0 / self.rate
+        pending = []
+
+        async def arrive(scheduled: float) -> None:
+            self.in_flight += 1
+            try:
+                task_id = await self._submit(client, scheduled)
+                if task_id:
+                    async with slots:
+                        await self._follow(client, task_id, scheduled)
+            finally:
+                self.in_flight -= 1
+
+        next_arrival = time.perf_counter()
+        while self.submitted < self.total:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.submitted += 1
+            pending.append(asyncio.create_task(arrive(next_arrival)))
+            next_arrival += interval
+
+        await asyncio.gather(*pending)
+
+    async def _run_task(self, client: httpx.AsyncClient) -> None:
+        """Submit one task and poll it until it reaches a terminal status."""
+        self.in_flight += 1
+        try:
+            task_start = time.perf_counter()
+            task_id = await self._submit(client, task_start)
+            if task_id:
+                await self._follow(client, task_id, task_start)
+        finally:
+            self.in_flight -= 1
+
+    async def _submit(self, client: httpx.AsyncClient, task_start: float) -> Optional[str]:
+        """POST one task; latency counts from `task_start`. Returns its id, or None if rejected."""
+        try:
+            resp = await client.post(
+                f"{self.base_url}/api/tasks",
+                json={"url": self.url, "target": self.target},
+            )
+            ok = resp.status_code == 200
+            task_id = resp.json().get("id") if ok else None
+        except Exception:
+            ok, task_id = False, None
+        self.stats["POST /api/tasks"].record(time.perf_counter() - task_start, ok and bool(task_id))
+        if not task_id:
+            self.outcomes["rejected"] += 1
+        return task_id
+
+    async def _follow(self, client: httpx.AsyncClient, task_id: str, task_start: float) -> None:
+        """Poll a task until it reaches a terminal status or times out (measured from `task_start`)."""
+        deadline = task_start + self.task_timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            start = time.perf_counter()
+            try:
+                resp = await client.get(f"{self.base_url}/api/tasks/{task_id}")
+                ok = resp.status_code == 200
+                status = resp.json().get("status") if ok else None
+            except Exception:
+                ok, status = False, None
+            self.stats["GET /api/tasks/{id}"].record(time.perf_counter() - start, ok)
+
+            if status in ("success", "failed"):
+                self.outcomes[status] += 1
+                self.stats["task end-to-end"].record(
+                    time.perf_counter() - task_start, status == "success"
+                )
+                return
+
+        self.outcomes["timeout"] += 1
+        self.stats["task end-to-end"].record(time.perf_counter() - task_start, False)
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.print_report()
+
+    def print_report(self, final: bool = False) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        completed = self.outcomes["success"] + self.outcomes["failed"]
+        throughput = completed / elapsed if elapsed > 0 else 0.0
+
+        if final:
+            print("\n" + "=" * 70)
+            print("  LOAD TEST RESULTS")
+            print("=" * 70)
+        else:
+            print("-" * 70)
+        print(
+            f"[{elapsed:6.1f}s] submitted={self.submitted} in_flight={self.in_flight} "
+            f"success={self.outcomes['success']} failed={self.outcomes['failed']} "
+            f"timeout={self.outcomes['timeout']} rejected={self.outcomes['rejected']} "
+            f"throughput={throughput:.2f} tasks/s"
+        )
+        for stats in self.stats.values():
+            print(f"  {stats.row()}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="WebScout feature tests and load generator")
+    parser.add_argument("--base-url", default=BASE_URL, help="WebScout server URL")
+    parser.add_argument("--load", action="store_true", help="Run the concurrent load mode instead of the feature suites")
+    parser.add_argument("--concurrency", type=int, default=10, help="Workers (closed-loop) or max tasks in flight (open-loop)")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate in tasks/s (omit for closed-loop)")
+    parser.add_argument("--tasks", type=int, default=50, help="Total number of tasks to submit")
+    parser.add_argument("--url", default="https://example.com", help="URL submitted with every task")
+    parser.add_argument("--target", default="main heading", help="Target submitted with every task")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between GET /api/tasks/{id} polls")
+    parser.add_argument("--task-timeout", type=float, default=TIMEOUT, help="Seconds before a task counts as timed out")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds between live readouts")
+    return parser.parse_args()
+
+
 async def main():
-    tester = WebScoutTester()
+    args = parse_args()
+    if args.load:
+        load_tester = LoadTester(
+            base_url=args.base_url,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            total=args.tasks,
+            url=args.url,
+            target=args.target,
+            poll_interval=args.poll_interval,
+            task_timeout=args.task_timeout,
+            report_interval=args.report_interval,
+        )
+        await load_tester.run()
+        return
+
+    tester = WebScoutTester(base_url=args.base_url)
     await tester.run_all_tests()
 
 
@@ -5,12 +5,108 @@ Tests boundary conditions, error scenarios, and failure modes.
 """
 
 import asyncio
+import json
+import os
+import time
+import uuid
 import httpx
 import sys
 from datetime import datetime
 from typing import List, Tuple
 
-BASE_URL = "http://localhost:3002"
+BASE_URL = os.environ.get("WEBSCOUT_BASE_URL", "http://localhost:3002")
+
+# Seeding 10k tasks needs direct Redis access; the list-latency check only
+# runs when REDIS_URL points at the same Redis the server uses.
+REDIS_URL = os.environ.get("REDIS_URL")
+SEED_TASK_COUNT = int(os.environ.get("WEBSCOUT_SEED_TASKS", "10000"))
+LIST_LATENCY_BUDGET_S = 0.5
+# Nothing listens on the discard port, so navigation throws inside the scrape
+UNREACHABLE_URL = "http://127.0.0.1:9/"
+RECENT_OUTCOME_HALF_LIFE_MS = int(os.environ.get("RECENT_OUTCOME_HALF_LIFE_MS", "600000"))
+
+
+def seed_tasks(count: int) -> List[str]:
+    """Bulk-insert `count` completed tasks and keep tasks:stats consistent.
+
+    Call after the server has read the stats once (GET /api/tasks), so the
+    one-time stats migration has already run and cannot fold the seeded
+    tasks in a second time. Seeded tasks are marked counted in the live
+    stats generation, as storeTask() would mark them.
+    """
+    import redis
+
+    r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    if not r.exists("tasks:stats:migrated"):
+        raise RuntimeError("tasks:stats has not been migrated yet; GET /api/tasks first")
+    generation = r.hget("tasks:stats", "generation") or "1"
+    now_ms = int(time.time() * 1000)
+    ids = []
+    pipe = r.pipeline(transaction=False)
+    for i in range(count):
+        task_id = f"seed-{uuid.uuid4()}"
+        created_at = now_ms - (count - i) * 1000
+        task = {
+            "id": task_id, "url": "https://example.com/", "target": "seeded task",
+            "status": "success", "result": {"heading": "Example Domain"},
+            "used_cached_pattern": False, "recovery_attempted": False,
+            "screenshots": [], "steps": [], "created_at": created_at,
+            "completed_at": created_at + 500,
+        }
+        pipe.hset(f"task:{task_id}", mapping={
+            "data": json.dumps(task), "created_at": created_at, "status": "success",
+            "cached": "0", "recovered": "0", "counted": generation,
+        })
+        pipe.zadd("tasks:timeline", {task_id: created_at})
+        ids.append(task_id)
+        if len(pipe) >= 2000:
+            pipe.execute()
+    pipe.hincrby("tasks:stats", "total", count)
+    pipe.hincrby("tasks:stats", "successful", count)
+    pipe.execute()
+    return ids
+
+
+def remove_seeded_tasks(ids: List[str]) -> None:
+    """Delete seeded tasks, taking back only what the live stats generation counted."""
+    import redis
+
+    r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    generation = r.hget("tasks:stats", "generation") or "1"
+    counted = 0
+    pipe = r.pipeline(transaction=False)
+    for start in range(0, len(ids), 2000):
+        chunk = ids[start:start + 2000]
+        for task_id in chunk:
+            pipe.hget(f"task:{task_id}", "counted")
+        counted += sum(1 for value in pipe.execute() if value == generation)
+        pipe.delete(*[f"task:{task_id}" for task_id in chunk])
+        pipe.zrem("tasks:timeline", *chunk)
+        pipe.execute()
+    pipe.hincrby("tasks:stats", "total", -counted)
+    pipe.hincrby("tasks:stats", "successful", -counted)
+    pipe.execute()
+
+
+def recent_host_failures(host: str) -> float:
+    """The host rollup's decayed `recent:failures`, as the scheduler reads it now."""
+    import redis
+
+    r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    failures, at = r.hmget(f"strategy_rollup:host:{host}", ["recent:failures", "recent:at"])
+    if failures is None:
+        return 0.0
+    age_ms = max(time.time() * 1000 - float(at or 0), 0)
+    return float(failures) * 0.5 ** (age_ms / RECENT_OUTCOME_HALF_LIFE_MS)
+
+
+async def wait_for_task(client: httpx.AsyncClient, task_id: str, timeout_s: float = 120) -> dict:
+    deadline = time.monotonic() + timeout_s
+    while True:
+        task = (await client.get(f"{BASE_URL}/api/tasks/{task_id}")).json()
+        if task.get("status") in ("success", "failed") or time.monotonic() > deadline:
+            return task
+        await asyncio.sleep(1)
 
 
 async def test_edge_case(name: str, coro) -> Tuple[bool, str]:
@@ -152,6 +248,54 @@ async def run_edge_case_tests() -> None:
             results.append(("Protocol-less URL rejected", passed, f"Status: {resp.status_code}"))
         except Exception as e:
             results.append(("Protocol-less URL rejected", False, str(e)))
+
+        # 13. List latency with a large task history
+        if REDIS_URL:
+            seeded: List[str] = []
+            try:
+                # Reading the stats once runs the server's one-time stats migration
+                (await client.get(f"{BASE_URL}/api/tasks?limit=1")).raise_for_status()
+                seeded = seed_tasks(SEED_TASK_COUNT)
+                await client.get(f"{BASE_URL}/api/tasks?limit=100")  # warm-up
+                durations = []
+                for _ in range(10):
+                    start = time.perf_counter()
+                    resp = await client.get(f"{BASE_URL}/api/tasks?limit=100")
+                    durations.append(time.perf_counter() - start)
+                    resp.raise_for_status()
+                worst = max(durations)
+                total = resp.json().get("stats", {}).get("total", 0)
+                passed = worst < LIST_LATENCY_BUDGET_S and total >= SEED_TASK_COUNT
+                results.append((
+                    f"List latency ({SEED_TASK_COUNT} tasks)",
+                    passed,
+                    f"max {worst * 1000:.0f}ms over 10 calls (budget {LIST_LATENCY_BUDGET_S * 1000:.0f}ms), stats.total={total}",
+                ))
+            except Exception as e:
+                results.append((f"List latency ({SEED_TASK_COUNT} tasks)", False, str(e)))
+            finally:
+                if seeded:
+                    remove_seeded_tasks(seeded)
+
+        # 14. A scrape that throws (navigation error) counts against its host's backoff
+        if REDIS_URL:
+            try:
+                host = "127.0.0.1"
+                before = recent_host_failures(host)
+                resp = await client.post(
+                    f"{BASE_URL}/api/tasks",
+                    json={"url": f"{UNREACHABLE_URL}?run={uuid.uuid4().hex}", "target": "page heading"},
+                )
+                task = await wait_for_task(client, resp.json()["id"])
+                after = recent_host_failures(host)
+                passed = task.get("status") == "failed" and after > before + 0.5
+                results.append((
+                    "Thrown scrape error raises host failures",
+                    passed,
+                    f"status={task.get('status')}, recent failures {before:.2f} -> {after:.2f}",
+                ))
+            except Exception as e:
+                results.append(("Thrown scrape error raises host failures", False, str(e)))
     
     # Print results
     print("\n📊 EDGE CASE RESULTS")
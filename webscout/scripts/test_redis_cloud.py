@@ -2,8 +2,12 @@
 """
 WebScout Redis Cloud Connectivity Test
 Tests Redis Cloud connection and verifies RediSearch functionality.
+
+Set REDIS_URL (e.g. redis://127.0.0.1:6379 from scripts/offline_stack.py)
+to run the same checks against a local Redis Stack instead.
 """
 
+import os
 import redis
 import json
 import sys
@@ -18,6 +22,18 @@ REDIS_CONFIG = {
     'password': 'tQQSQLKiGNUlBEqlTd4wpR0eyw7aItos',
 }
 
+def connect() -> redis.Redis:
+    """Connect to REDIS_URL when set, otherwise to the Redis Cloud instance."""
+    url = os.environ.get("REDIS_URL")
+    if url:
+        return redis.Redis.from_url(url, decode_responses=True)
+    return redis.Redis(**REDIS_CONFIG)
+
+
+def describe_target() -> str:
+    return os.environ.get("REDIS_URL") or f"{REDIS_CONFIG['host']}:{REDIS_CONFIG['port']}"
+
+
 def test_basic_connection():
     """Test basic Redis connection"""
     print("=" * 60)
@@ -25,7 +41,7 @@ def test_basic_connection():
     print("=" * 60)
     
     try:
-        r = redis.Redis(**REDIS_CONFIG)
+        r = connect()
         
         # Test PING
         pong = r.ping()
@@ -169,7 +185,7 @@ def list_existing_data(r):
 def main():
     print("\n🔴 WebScout Redis Cloud Connectivity Test")
     print("=" * 60)
-    print(f"Target: {REDIS_CONFIG['host']}:{REDIS_CONFIG['port']}")
+    print(f"Target: {describe_target()}")
     print(f"Time: {datetime.now().isoformat()}")
     print()
     
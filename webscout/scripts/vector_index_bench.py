@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+WebScout Pattern Vector Index Benchmark
+Measures recall, query latency and memory of idx:page_patterns-style vector
+indexes on a local Redis Stack, for the settings read by
+src/lib/redis/vectors.ts (EMBEDDING_DIMENSIONS, VECTOR_TYPE,
+VECTOR_HNSW_M / VECTOR_HNSW_EF_CONSTRUCTION / VECTOR_HNSW_EF_RUNTIME).
+
+For every corpus size and every dimension/type configuration it loads the
+vectors into throwaway hashes, builds an HNSW index (and a FLAT index over
+the same field as the exact baseline), and reports:
+
+  recall@k   share of the true top-k (exact cosine KNN over the full-width
+             FLOAT32 vectors, computed brute-force in numpy) that the index
+             returns — so it includes the loss from shortening and FLOAT16
+  p50 / p99  FT.SEARCH KNN latency, one query at a time
+  index MB   vector_index_sz_mb from FT.INFO
+  mem MB     growth of Redis used_memory (hashes + both indexes)
+
+Vectors are synthetic: clustered "hosts" with variance concentrated in the
+leading dimensions, like text-embedding-3 outputs, which are trained so a
+prefix of the vector is itself a usable embedding. Shortened configurations
+take the prefix and re-normalize, which is what the `dimensions` API
+parameter does. How much recall shortening costs on synthetic data depends
+on the assumed spectrum (--decay); for a decision, pass --vectors to
+benchmark real embeddings (an .npy matrix of full-width vectors, e.g.
+exported from pattern hashes) instead.
+
+Requires numpy and redis-py. Memory: full-width FLOAT32 at 1M patterns is
+~6 GB of raw vectors per index; configurations above --max-vector-gb are
+skipped.
+
+Usage:
+  python scripts/vector_index_bench.py                        # 10k/100k/1M, default configs
+  python scripts/vector_index_bench.py --sizes 10000,100000 --configs 1536:FLOAT32,512:FLOAT16
+  python scripts/vector_index_bench.py --ef-runtime 10,50,200 --m 32 --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FULL_DIM = 1536
+DEFAULT_SIZES = "10000,100000,1000000"
+DEFAULT_CONFIGS = "1536:FLOAT32,1536:FLOAT16,512:FLOAT16,256:FLOAT16"
+CHUNK = 10000
+KEY_PREFIX = "bench:vec:"
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+class Corpus:
+    """
+    Deterministic chunked corpus, regenerated on demand so a million
+    full-width vectors never have to sit in memory at once.
+    """
+
+    def __init__(self, np, size: int, seed: int, vectors_path: Optional[str] = None, decay: float = 1.0):
+        self.np = np
+        self.size = size
+        self.seed = seed
+        self.matrix = None
+        if vectors_path:
+            self.matrix = np.load(vectors_path, mmap_mode="r")
+            if self.matrix.shape[1] != FULL_DIM:
+                raise ValueError(f"{vectors_path} has {self.matrix.shape[1]} dims, expected {FULL_DIM}")
+            self.size = min(size, self.matrix.shape[0])
+        rng = np.random.default_rng(seed)
+        # Matryoshka-like spectrum: leading dimensions carry most of the variance
+        self.scale = (1.0 + np.arange(FULL_DIM) / 128.0) ** -decay
+        self.clusters = max(self.size // 50, 10)
+        self.centers = self._normalize(rng.standard_normal((self.clusters, FULL_DIM)) * self.scale)
+
+    def _normalize(self, m):
+        return (m / self.np.linalg.norm(m, axis=1, keepdims=True)).astype(self.np.float32)
+
+    def chunks(self) -> Iterator[Tuple[int, "object"]]:
+        np = self.np
+        for start in range(0, self.size, CHUNK):
+            end = min(start + CHUNK, self.size)
+            if self.matrix is not None:
+                yield start, self._normalize(np.asarray(self.matrix[start:end], dtype=np.float32))
+                continue
+            rng = np.random.default_rng((self.seed, start))
+            assignment = rng.integers(0, self.clusters, end - start)
+            noise = rng.standard_normal((end - start, FULL_DIM)) * self.scale * 0.6
+            yield start, self._normalize(self.centers[assignment] + noise)
+
+    def queries(self, count: int):
+        """New pages on known hosts: a cluster center plus fresh noise."""
+        np = self.np
+        # Chunk streams are seeded by their start offset, always below size
+        rng = np.random.default_rng((self.seed, self.size + 1))
+        if self.matrix is not None:
+            picks = rng.integers(0, self.size, count)
+            base = self._normalize(np.asarray(self.matrix[np.sort(picks)], dtype=np.float32))
+            return self._normalize(base + rng.standard_normal(base.shape) * self.scale * 0.3)
+        assignment = rng.integers(0, self.clusters, count)
+        noise = rng.standard_normal((count, FULL_DIM)) * self.scale * 0.6
+        return self._normalize(self.centers[assignment] + noise)
+
+
+def project(np, vectors, dim: int, vtype: str):
+    """Shorten to `dim` (re-normalized prefix) and cast to the storage type."""
+    out = vectors[:, :dim]
+    out = out / np.linalg.norm(out, axis=1, keepdims=True)
+    return out.astype(np.float16 if vtype == "FLOAT16" else np.float32)
+
+
+def exact_topk(np, corpus: Corpus, queries, k: int):
+    """Brute-force cosine top-k over the full-width FLOAT32 corpus."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start, chunk in corpus.chunks():
+        sims = queries @ chunk.T
+        ids = np.broadcast_to(np.arange(start, start + len(chunk)), sims.shape)
+        scores = np.concatenate([best_scores, sims], axis=1)
+        cand = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(cand, top, axis=1)
+    return [set(row.tolist()) for row in best_ids]
+
+
+# ---------------------------------------------------------------------------
+# Redis
+# ---------------------------------------------------------------------------
+
+def ft_info(r, index: str) -> Dict[str, object]:
+    raw = r.execute_command("FT.INFO", index)
+    if isinstance(raw, dict):
+        return {str(k): v for k, v in raw.items()}
+    return {str(raw[i]): raw[i + 1] for i in range(0, len(raw) - 1, 2)}
+
+
+def used_memory_mb(r) -> float:
+    return r.info("memory")["used_memory"] / (1024 * 1024)
+
+
+def load_corpus(np, r, corpus: Corpus, prefix: str, dim: int, vtype: str) -> None:
+    for start, chunk in corpus.chunks():
+        blobs = project(np, chunk, dim, vtype)
+        pipe = r.pipeline(transaction=False)
+        for offset, vector in enumerate(blobs):
+            pipe.hset(f"{prefix}{start + offset}", mapping={"embedding": vector.tobytes()})
+        pipe.execute()
+        print(f"   📥 loaded {min(start + CHUNK, corpus.size):,}/{corpus.size:,}", end="\r", flush=True)
+    print()
+
+
+def create_index(r, name: str, prefix: str, algorithm: str, dim: int, vtype: str, m: int, ef_construction: int) -> float:
+    params = ["TYPE", vtype, "DIM", dim, "DISTANCE_METRIC", "COSINE"]
+    if algorithm == "HNSW":
+        params += ["M", m, "EF_CONSTRUCTION", ef_construction]
+    started = time.perf_counter()
+    r.execute_command(
+        "FT.CREATE", name, "ON", "HASH", "PREFIX", 1, prefix,
+        "SCHEMA", "embedding", "VECTOR", algorithm, len(params), *params,
+    )
+    while float(ft_info(r, name).get("percent_indexed", 1)) < 1.0:
+        time.sleep(0.2)
+    return time.perf_counter() - started
+
+
+def run_queries(r, index: str, queries, k: int, ef_runtime: Optional[int], prefix: str):
+    ef = f" EF_RUNTIME {ef_runtime}" if ef_runtime else ""
+    query = f"*=>[KNN {k} @embedding $B{ef} AS d]"
+    latencies, results = [], []
+    for vector in queries:
+        started = time.perf_counter()
+        reply = r.execute_command(
+            "FT.SEARCH", index, query, "PARAMS", 2, "B", vector.tobytes(),
+            "SORTBY", "d", "LIMIT", 0, k, "NOCONTENT", "DIALECT", 2,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids = reply[1:] if isinstance(reply, list) else [doc["id"] for doc in reply.get("results", [])]
+        keys = [key.decode() if isinstance(key, bytes) else str(key) for key in ids]
+        results.append({int(key[len(prefix):]) for key in keys})
+    return results, latencies
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def recall(found: List[set], truth: List[set], k: int) -> float:
+    return sum(len(f & t) for f, t in zip(found, truth)) / (k * len(truth))
+
+
+def drop(r, *indexes: str, prefix: str) -> None:
+    for index in indexes:
+        try:
+            r.execute_command("FT.DROPINDEX", index)
+        except Exception:
+            pass
+    batch = []
+    for key in r.scan_iter(match=f"{prefix}*", count=5000):
+        batch.append(key)
+        if len(batch) >= 5000:
+            r.unlink(*batch)
+            batch = []
+    if batch:
+        r.unlink(*batch)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pattern vector index settings on a local Redis Stack")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes")
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS, help="Comma-separated DIM:TYPE pairs")
+    parser.add_argument("--m", type=int, default=16, help="HNSW M")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW EF_CONSTRUCTION")
+    parser.add_argument("--ef-runtime", default="10,50", help="Comma-separated HNSW EF_RUNTIME values to sweep")
+    parser.add_argument("--k", type=int, default=3, help="Neighbours per query (the scraper asks for 3)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--no-flat", action="store_true", help="Skip the FLAT baseline index")
+    parser.add_argument("--max-vector-gb", type=float, default=8.0, help="Skip configs whose raw vectors exceed this")
+    parser.add_argument("--vectors", help=".npy matrix of real full-width embeddings to use instead of synthetic ones")
+    parser.add_argument("--decay", type=float, default=1.0,
+                        help="Synthetic spectrum decay; higher packs more signal into leading dims")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    try:
+        import numpy as np
+        import redis
+    except ImportError as e:
+        print(f"❌ {e.name} is required: pip install numpy redis")
+        sys.exit(1)
+
+    print("\n📐 WebScout Pattern Vector Index Benchmark")
+    print("=" * 60)
+
+    r = redis.Redis.from_url(args.redis_url)
+    try:
+        r.execute_command("FT._LIST")
+    except Exception as e:
+        print(f"❌ {args.redis_url} is not a Redis Stack with RediSearch: {e}")
+        print("   Start one with: python scripts/offline_stack.py")
+        sys.exit(1)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    configs = []
+    for item in args.configs.split(","):
+        dim, _, vtype = item.strip().partition(":")
+        vtype = (vtype or "FLOAT32").upper()
+        if vtype not in ("FLOAT32", "FLOAT16") or not dim.isdigit() or not 0 < int(dim) <= FULL_DIM:
+            print(f"❌ Bad config {item!r} — expected DIM:FLOAT32 or DIM:FLOAT16 with DIM <= {FULL_DIM}")
+            sys.exit(1)
+        configs.append((int(dim), vtype))
+    ef_values = [int(e) for e in args.ef_runtime.split(",") if e.strip()]
+
+    print(f"🎯 {args.redis_url} | k={args.k} | {args.queries} queries | M={args.m} EF_CONSTRUCTION={args.ef_construction}")
+    print(f"📦 {'real vectors from ' + args.vectors if args.vectors else 'synthetic clustered vectors'}")
+
+    rows = []
+    for size in sizes:
+        corpus = Corpus(np, size, args.seed, args.vectors, args.decay)
+        print(f"\n{'=' * 60}\n📚 {corpus.size:,} patterns\n{'=' * 60}")
+        queries_full = corpus.queries(args.queries)
+        started = time.perf_counter()
+        truth = exact_topk(np, corpus, queries_full, args.k)
+        print(f"   ✅ exact top-{args.k} ground truth in {time.perf_counter() - started:.1f}s")
+
+        for dim, vtype in configs:
+            raw_gb = corpus.size * dim * (2 if vtype == "FLOAT16" else 4) / 1e9
+            label = f"{dim}:{vtype}"
+            if raw_gb > args.max_vector_gb:
+                print(f"\n⏭️  {label}: {raw_gb:.1f} GB of raw vectors exceeds --max-vector-gb, skipped")
+                continue
+            print(f"\n🔧 {label} ({raw_gb * 1000:.0f} MB raw vectors)")
+            run = uuid.uuid4().hex[:8]
+            prefix = f"{KEY_PREFIX}{run}:"
+            hnsw, flat = f"idx:bench:{run}:hnsw", f"idx:bench:{run}:flat"
+            baseline_mb = used_memory_mb(r)
+            try:
+                load_corpus(np, r, corpus, prefix, dim, vtype)
+                queries = project(np, queries_full, dim, vtype)
+
+                indexes = [("HNSW", hnsw)] + ([] if args.no_flat else [("FLAT", flat)])
+                for algorithm, name in indexes:
+                    build_s = create_index(r, name, prefix, algorithm, dim, vtype, args.m, args.ef_construction)
+                    index_mb = float(ft_info(r, name).get("vector_index_sz_mb", 0) or 0)
+                    for ef in (ef_values if algorithm == "HNSW" else [None]):
+                        found, latencies = run_queries(r, name, queries, args.k, ef, prefix)
+                        row = {
+                            "patterns": corpus.size,
+                            "config": label,
+                            "index": algorithm if ef is None else f"HNSW ef={ef}",
+                            f"recall_at_{args.k}": round(recall(found, truth, args.k), 4),
+                            "p50_ms": round(percentile(latencies, 50), 3),
+                            "p99_ms": round(percentile(latencies, 99), 3),
+                            "index_mb": round(index_mb, 1),
+                            "build_s": round(build_s, 1),
+                        }
+                        rows.append(row)
+                        print(
+                            f"   {row['index']:<14} recall@{args.k} {row[f'recall_at_{args.k}']:.3f}  "
+                            f"p50 {row['p50_ms']:>7.2f}ms  p99 {row['p99_ms']:>7.2f}ms  "
+                            f"index {row['index_mb']:>8.1f} MB  build {row['build_s']:.1f}s"
+                        )
+                total_mb = used_memory_mb(r) - baseline_mb
+                print(f"   💾 Redis memory growth: {total_mb:,.0f} MB (hashes + indexes)")
+                for row in rows:
+                    if row["patterns"] == corpus.size and row["config"] == label:
+                        row["redis_mem_mb"] = round(total_mb, 1)
+            finally:
+                drop(r, hnsw, flat, prefix=prefix)
+
+    print("\n" + "=" * 60)
+    print("📊 SUMMARY")
+    print("=" * 60)
+    print(f"{'patterns':>9} {'config':<13} {'index':<14} {'recall':>7} {'p99 ms':>8} {'index MB':>9}")
+    for row in rows:
+        print(
+            f"{row['patterns']:>9,} {row['config']:<13} {row['index']:<14} "
+            f"{row[f'recall_at_{args.k}']:>7.3f} {row['p99_ms']:>8.2f} {row['index_mb']:>9.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"k": args.k, "m": args.m, "ef_construction": args.ef_construction, "results": rows}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
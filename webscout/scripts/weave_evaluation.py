@@ -2,58 +2,196 @@
 WebScout Weave Evaluation Test
 Uses Weave's Evaluation framework to test WebScout's scraping capabilities.
 Based on the Weave documentation patterns.
+
+Each prediction submits a task and follows it to completion over
+/api/tasks/{id}/stream, so scorers see the finished result rather than the
+queued placeholder. Rows run concurrently (bounded by --concurrency) over one
+pooled httpx.AsyncClient, each row --trials times, and the run ends with
+per-row latency distributions:
+
+  accept      POST /api/tasks → response (task queued)
+  first step  POST → first progress step from a worker
+  complete    POST → final result
+
+Pass --offline (or set WEAVE_DISABLED=1) to skip weave.init and score the
+dataset locally, e.g. against scripts/offline_stack.py.
+
+Usage:
+  python scripts/weave_evaluation.py --trials 3 --concurrency 4
+  python scripts/weave_evaluation.py --offline --trials 5
+  python scripts/weave_evaluation.py --quick
 """
 
+import argparse
 import asyncio
 import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
 import weave
 from weave import Model
 import httpx
 
+from offline_stack import fixture_url
+
+parser = argparse.ArgumentParser(description="Evaluate WebScout with Weave")
+parser.add_argument("--offline", action="store_true", help="Score locally without weave.init")
+parser.add_argument("--quick", action="store_true", help="Run a single prediction")
+parser.add_argument("--trials", type=int, default=1, help="Runs per dataset row")
+parser.add_argument("--concurrency", type=int, default=4, help="Tasks in flight at once")
+parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for one task to complete")
+ARGS, _ = parser.parse_known_args()
+
+OFFLINE = ARGS.offline or os.environ.get("WEAVE_DISABLED") == "1"
+
+# Weave runs evaluation rows in parallel; let it hand us enough rows to fill
+# the concurrency limit (the semaphore below is the actual bound)
+os.environ.setdefault("WEAVE_PARALLELISM", str(max(ARGS.concurrency, 1)))
 
 # Initialize Weave
-weave.init('alhinai/webscout')
+if not OFFLINE:
+    weave.init('alhinai/webscout')
+
+# One pooled client and one concurrency limit shared by every prediction
+_client: Optional[httpx.AsyncClient] = None
+_slots: Optional[asyncio.Semaphore] = None
+# Latency samples per (url, target), filled in by predict()
+LATENCIES: Dict[tuple, List[dict]] = defaultdict(list)
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        limits = httpx.Limits(max_connections=ARGS.concurrency * 2 + 2, max_keepalive_connections=ARGS.concurrency * 2)
+        # No read timeout: SSE streams are idle while a task waits in the queue
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None), limits=limits)
+    return _client
+
+
+def get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(ARGS.concurrency, 1))
+    return _slots
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def follow_task(client: httpx.AsyncClient, api_url: str, task: dict, started: float, timings: dict) -> dict:
+    """
+    Read /api/tasks/{id}/stream until the task is terminal. The stream closes
+    itself after a server-side timeout, so reconnect (getting a fresh
+    snapshot) until the caller's deadline cancels us.
+    """
+    accepted_steps = len(task.get("steps", []))
+    final = dict(task)
+    final["step_count"] = accepted_steps
+
+    def saw_step(count: int) -> None:
+        final["step_count"] = max(final["step_count"], count)
+        if count > accepted_steps and "first_step_ms" not in timings:
+            timings["first_step_ms"] = (time.perf_counter() - started) * 1000
+
+    while True:
+        event = None
+        async with client.stream("GET", f"{api_url}/api/tasks/{task['id']}/stream") as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"stream returned HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                    continue
+                if not line.startswith("data:"):
+                    event = None if line == "" else event
+                    continue
+                data = json.loads(line[len("data:"):].strip())
+                if event is None:
+                    # Snapshot: full task state on (re)connect
+                    final.update(data)
+                    saw_step(len(data.get("steps", [])))
+                elif event == "step":
+                    saw_step(data.get("index", 0) + 1)
+                elif event == "complete":
+                    final.update(data)
+                elif event == "done":
+                    if final.get("status") in ("success", "failed"):
+                        timings["complete_ms"] = (time.perf_counter() - started) * 1000
+                        return final
+        if final.get("status") in ("success", "failed"):
+            timings["complete_ms"] = (time.perf_counter() - started) * 1000
+            return final
+        # Server-side stream timeout or error event: reconnect for a fresh snapshot
+        await asyncio.sleep(1)
 
 
 class WebScoutModel(Model):
     """WebScout Model for Weave evaluation."""
-    
-    api_url: str = "http://localhost:3002"
-    timeout: int = 120
-    
+
+    api_url: str = os.environ.get("WEBSCOUT_BASE_URL", "http://localhost:3002")
+
     @weave.op()
     async def predict(self, url: str, target: str) -> dict:
-        """Submit a scraping task and wait for result."""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            # Submit task
-            response = await client.post(
-                f"{self.api_url}/api/tasks",
-                json={"url": url, "target": target}
-            )
-            data = response.json()
-            
-            if "error" in data:
-                return {
-                    "success": False,
-                    "result": None,
-                    "error": data.get("error"),
-                    "cached": False,
-                }
-            
+        """Submit a scraping task and follow it to completion."""
+        client = get_client()
+        async with get_slots():
+            started = time.perf_counter()
+            timings: dict = {}
+            try:
+                response = await client.post(
+                    f"{self.api_url}/api/tasks",
+                    json={"url": url, "target": target}
+                )
+                timings["accept_ms"] = (time.perf_counter() - started) * 1000
+                data = response.json()
+
+                if "error" in data:
+                    return {
+                        "success": False,
+                        "result": None,
+                        "error": data.get("error"),
+                        "cached": False,
+                        "latency": timings,
+                    }
+
+                if data.get("status") not in ("success", "failed"):
+                    remaining = ARGS.timeout - (time.perf_counter() - started)
+                    data = await asyncio.wait_for(
+                        follow_task(client, self.api_url, data, started, timings), timeout=max(remaining, 1)
+                    )
+                else:
+                    # Answered without running (e.g. a max_age result cache hit)
+                    timings["complete_ms"] = timings["accept_ms"]
+            except Exception as e:
+                error = f"timed out after {ARGS.timeout:.0f}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+                return {"success": False, "result": None, "error": error, "cached": False, "latency": timings}
+            finally:
+                LATENCIES[(url, target)].append(timings)
+
             # Handle result - can be string or dict
-            result_data = data.get("result", {})
-            if isinstance(result_data, str):
+            result_data = data.get("result")
+            if isinstance(result_data, dict) and "result" in result_data:
+                result_text = result_data.get("result")
+            elif isinstance(result_data, str):
                 result_text = result_data
-                cached = False
             else:
-                result_text = result_data.get("result") if isinstance(result_data, dict) else str(result_data)
-                cached = result_data.get("used_cached_pattern", False) if isinstance(result_data, dict) else False
-            
+                result_text = json.dumps(result_data) if result_data is not None else None
+
             return {
+                "task_id": data.get("id"),
                 "success": data.get("status") == "success",
                 "result": result_text,
-                "cached": cached,
-                "steps": len(data.get("steps", [])),
+                "cached": bool(data.get("used_cached_pattern", False)),
+                "served_from": data.get("served_from"),
+                "steps": data.get("step_count", len(data.get("steps", []))),
+                "latency": timings,
             }
 
 
@@ -82,68 +220,156 @@ def result_quality_score(output: dict, target: str) -> dict:
     """Score the quality of the result based on target keywords."""
     result = str(output.get("result", "")).lower()
     target_words = target.lower().split()
-    
+
     # Check if any target words appear in result
     matches = sum(1 for word in target_words if word in result)
     quality = matches / len(target_words) if target_words else 0
-    
+
     return {"result_quality": quality}
 
 
+@weave.op()
+def latency_score(output: dict) -> dict:
+    """Report the task's accept / first-step / complete latency in seconds."""
+    latency = output.get("latency", {})
+    return {
+        key.replace("_ms", "_s"): round(latency[key] / 1000, 3)
+        for key in ("accept_ms", "first_step_ms", "complete_ms")
+        if key in latency
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def print_latency_report(elapsed_s: float) -> None:
+    """Per-row latency distributions plus overall throughput."""
+    print("\n⏱️  Latency per row (seconds, p50 / p95 / max)")
+    print("-" * 60)
+    completed = 0
+    for (url, target), samples in LATENCIES.items():
+        print(f"{target[:40]} @ {url[:50]}  ({len(samples)} trial(s))")
+        for key, label in (("accept_ms", "accept"), ("first_step_ms", "first step"), ("complete_ms", "complete")):
+            values = [s[key] / 1000 for s in samples if key in s]
+            if not values:
+                print(f"   {label:<11} —")
+                continue
+            print(
+                f"   {label:<11} {percentile(values, 50):>7.2f} / {percentile(values, 95):>7.2f} / {max(values):>7.2f}"
+                f"  ({len(values)}/{len(samples)})"
+            )
+        completed += sum(1 for s in samples if "complete_ms" in s)
+    if elapsed_s > 0:
+        print(f"\n🚀 {completed} task(s) completed in {elapsed_s:.1f}s "
+              f"({completed / elapsed_s * 60:.1f}/min at concurrency {ARGS.concurrency})")
+
+
 async def run_evaluation():
     """Run the WebScout evaluation."""
     print("\n🔍 WebScout Weave Evaluation")
     print("=" * 60)
-    
+
     # Create model instance
     model = WebScoutModel()
-    
+
     # Define evaluation dataset
     dataset = [
         {
-            "url": "https://quotes.toscrape.com/",
+            "url": fixture_url("https://quotes.toscrape.com/"),
             "target": "first quote text and author",
             "expected_contains": ["quote", "author"],
         },
         {
-            "url": "https://books.toscrape.com/",
+            "url": fixture_url("https://books.toscrape.com/"),
             "target": "first book title and price",
             "expected_contains": ["book", "price"],
         },
         {
-            "url": "https://example.com/",
+            "url": fixture_url("https://example.com/"),
             "target": "main heading text",
             "expected_contains": ["example", "domain"],
         },
     ]
-    
+
+    scorers = [
+        success_score,
+        has_result_score,
+        cache_score,
+        result_quality_score,
+        latency_score,
+    ]
+
+    print(f"⚙️  {len(dataset)} rows × {ARGS.trials} trial(s), concurrency {ARGS.concurrency}")
+    started = time.perf_counter()
+    try:
+        if OFFLINE:
+            results = await run_offline_evaluation(model, dataset, scorers)
+        else:
+            results = await run_weave_evaluation(model, dataset, scorers)
+    finally:
+        await close_client()
+    print_latency_report(time.perf_counter() - started)
+    return results
+
+
+async def run_weave_evaluation(model: WebScoutModel, dataset: list, scorers: list) -> dict:
     # Create Weave Dataset
     weave_dataset = weave.Dataset(name='webscout_eval', rows=dataset)
     weave.publish(weave_dataset)
     print(f"✅ Published dataset with {len(dataset)} rows")
-    
+
     # Define evaluation
     evaluation = weave.Evaluation(
         name='webscout_scraping_eval',
         dataset=weave_dataset,
-        scorers=[
-            success_score,
-            has_result_score,
-            cache_score,
-            result_quality_score,
-        ],
+        scorers=scorers,
+        trials=ARGS.trials,
     )
-    
+
     print("🚀 Starting evaluation...")
-    print("   (This may take 1-2 minutes per test case)")
-    
+
     # Run evaluation
     results = await evaluation.evaluate(model)
-    
+
+    print("\n📊 Evaluation Results:")
+    print("-" * 40)
+    print(json.dumps(results, indent=2, default=str))
+
+    return results
+
+
+async def score_row(model: WebScoutModel, row: dict, trial: int, scorers: list) -> dict:
+    output = await model.predict(url=row["url"], target=row["target"])
+    scores = {}
+    for scorer in scorers:
+        if scorer is result_quality_score:
+            scores.update(scorer(output=output, target=row["target"]))
+        else:
+            scores.update(scorer(output=output))
+    return {"url": row["url"], "target": row["target"], "trial": trial, "scores": scores}
+
+
+async def run_offline_evaluation(model: WebScoutModel, dataset: list, scorers: list) -> dict:
+    """Score every row locally without publishing to Weave."""
+    print("🚀 Starting offline evaluation (Weave disabled)...")
+    rows = await asyncio.gather(*(
+        score_row(model, row, trial, scorers)
+        for trial in range(ARGS.trials)
+        for row in dataset
+    ))
+
+    summary = {}
+    keys = sorted({key for r in rows for key in r["scores"]})
+    for key in keys:
+        values = [float(r["scores"][key]) for r in rows if key in r["scores"]]
+        summary[key] = sum(values) / len(values)
+
+    results = {"rows": rows, "summary": summary}
     print("\n📊 Evaluation Results:")
     print("-" * 40)
     print(json.dumps(results, indent=2, default=str))
-    
     return results
 
 
@@ -151,27 +377,29 @@ async def quick_test():
     """Run a quick test of the model."""
     print("\n🧪 Quick Model Test")
     print("=" * 60)
-    
+
     model = WebScoutModel()
-    
+
     # Single test
-    result = await model.predict(
-        url="https://quotes.toscrape.com/",
-        target="first quote"
-    )
-    
+    try:
+        result = await model.predict(
+            url=fixture_url("https://quotes.toscrape.com/"),
+            target="first quote"
+        )
+    finally:
+        await close_client()
+
     print(f"Success: {result['success']}")
     print(f"Cached: {result['cached']}")
     print(f"Steps: {result.get('steps', 'N/A')}")
+    print(f"Latency: {json.dumps(result.get('latency', {}))}")
     print(f"Result: {str(result.get('result', ''))[:100]}...")
-    
+
     return result
 
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--quick":
+    if ARGS.quick:
         asyncio.run(quick_test())
     else:
         asyncio.run(run_evaluation())
@@ -1,5 +1,6 @@
 import { NextResponse } from "next/server";
 import { getRedisClient } from "@/lib/redis/client";
+import { deleteTask } from "@/lib/redis/tasks";
 
 
 export const dynamic = "force-dynamic";
@@ -16,13 +17,47 @@ export async function POST() {
     // Get all task IDs
     const taskIds = await client.zRange("tasks:timeline", 0, -1);
 
-    // Delete each task hash
+    // Delete each task with its step log and screenshot references
     for (const id of taskIds) {
-      await client.del(`task:${id}`);
+      await deleteTask(id);
     }
 
-    // Delete the timeline
-    await client.del("tasks:timeline");
+    // Delete the timeline, the incremental task counters and the metrics series
+    await client.del([
+      "tasks:timeline",
+      "tasks:stats",
+      "metrics:series",
+      "metrics:state",
+      "metrics:patterns",
+      "metrics:phases",
+      "embedding_cache:stats",
+      "tasks:queue:stats",
+      "task_dedup:stats",
+      "maintenance:patterns:cursor",
+      "maintenance:patterns:last_run",
+      "tasks:deferred",
+      "scheduler:hosts",
+      "scheduler:fair",
+      "scheduler:fair:finish",
+    ]);
+
+    // Clear in-flight coalescing state, cached results and screenshot blobs
+    try {
+      for (const match of [
+        "task_flight:*",
+        "task_result:*",
+        "batch:*",
+        "scheduler:host:*",
+        "screenshot:*",
+        "screenshot_refs:*",
+      ]) {
+        for await (const keys of client.scanIterator({ MATCH: match, COUNT: 100 })) {
+          if (keys.length > 0) await client.del(keys);
+        }
+      }
+    } catch (e) {
+      console.warn("[Demo] Task dedup cleanup failed:", e);
+    }
 
     // Clear all learned patterns using FT.SEARCH to find them reliably
     let patternsCleaned = 0;
@@ -48,6 +83,15 @@ export async function POST() {
       }
     }
 
+    // Clear the exact-match pattern keys
+    try {
+      for await (const key of client.scanIterator({ MATCH: "pattern_key:*", COUNT: 100 })) {
+        await client.del(key);
+      }
+    } catch (e) {
+      console.warn("[Demo] Pattern key cleanup failed:", e);
+    }
+
     // Drop and recreate the vector index so it's clean
     try {
       await client.ft.dropIndex("idx:page_patterns");
@@ -63,6 +107,10 @@ export async function POST() {
         await client.del(key);
         strategiesCleaned++;
       }
+      for await (const key of client.scanIterator({ MATCH: "strategy_rollup:*", COUNT: 100 })) {
+        await client.del(key);
+      }
+      await client.del("strategy_outcomes");
     } catch (e) {
       console.warn("[Demo] Strategy stats cleanup failed:", e);
     }
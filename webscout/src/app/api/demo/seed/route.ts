@@ -1,5 +1,7 @@
 import { NextResponse } from "next/server";
 import { getRedisClient } from "@/lib/redis/client";
+import { storeTask } from "@/lib/redis/tasks";
+import { recordTaskMetrics } from "@/lib/redis/metrics";
 import type { TaskResult } from "@/lib/utils/types";
 
 export const dynamic = "force-dynamic";
@@ -233,18 +235,12 @@ export async function POST() {
       tasks.push(task);
     }
 
-    // Store all tasks in Redis
+    // Store all tasks in Redis (storeTask keeps the stats counters in sync)
+    await Promise.all(tasks.map((task) => storeTask(task)));
+
+    // Append to the learning-curve series in creation order
     for (const task of tasks) {
-      const key = `task:${task.id}`;
-      await client.hSet(key, {
-        data: JSON.stringify(task),
-        created_at: task.created_at.toString(),
-        status: task.status,
-      });
-      await client.zAdd("tasks:timeline", {
-        score: task.created_at,
-        value: task.id,
-      });
+      await recordTaskMetrics(task);
     }
 
     // Compute summary stats
@@ -1,106 +1,53 @@
-import { NextResponse } from "next/server";
-import { getRedisClient } from "@/lib/redis/client";
+import { NextRequest, NextResponse } from "next/server";
 import { getPatternCount } from "@/lib/redis/patterns";
-import type { TaskResult } from "@/lib/utils/types";
+import { ensureMetricsSeries, getMetricsSeries, getPhaseTimingStats } from "@/lib/redis/metrics";
+import { getEmbeddingCacheStats } from "@/lib/embeddings/cache";
+import { getClusterPoolStats } from "@/lib/redis/pool-stats";
+import { getDedupStats } from "@/lib/redis/dedup";
 
 export const dynamic = "force-dynamic";
 
-interface TimelinePoint {
-  taskNumber: number;
-  timestamp: number;
-  success: boolean;
-  usedCache: boolean;
-  recoveryAttempted: boolean;
-  durationMs: number;
-  cumulativeCacheHits: number;
-  cumulativeSuccess: number;
-  cumulativePatterns: number;
-  cacheHitRate: number;
-  successRate: number;
-}
-
-export async function GET() {
+const DEFAULT_MAX_POINTS = 500;
+const MAX_POINTS_LIMIT = 2000;
+
+/**
+ * GET /api/metrics?since=<taskNumber>&points=<max>
+ *
+ * Serves the precomputed learning-curve series (appended once per completed
+ * task) instead of rescanning task history.
+ *   - since:  only return points with taskNumber > since (incremental polling)
+ *   - points: downsample the requested range to at most this many points
+ */
+export async function GET(request: NextRequest) {
   try {
-    const client = await getRedisClient();
-
-    // Get all task IDs from the timeline sorted set (oldest first)
-    const taskIds = await client.zRange("tasks:timeline", 0, -1);
-
-    // Fetch and parse each task
-    const tasks: TaskResult[] = [];
-    for (const id of taskIds) {
-      const data = await client.hGet(`task:${id}`, "data");
-      if (data) {
-        try {
-          tasks.push(JSON.parse(data) as TaskResult);
-        } catch {
-          console.error(`[Metrics] Failed to parse task ${id}`);
-        }
-      }
-    }
-
-    // Sort by created_at ascending
-    tasks.sort((a, b) => a.created_at - b.created_at);
-
-    // Build the time-series with cumulative metrics
-    let cumulativeCacheHits = 0;
-    let cumulativeSuccess = 0;
-    let totalDuration = 0;
-    const patternIds = new Set<string>();
-
-    const timeline: TimelinePoint[] = tasks.map((task, index) => {
-      const taskNumber = index + 1;
-      const success = task.status === "success";
-      const usedCache = task.used_cached_pattern;
-      const recoveryAttempted = task.recovery_attempted;
-      const durationMs =
-        task.completed_at && task.created_at
-          ? task.completed_at - task.created_at
-          : 0;
-
-      if (usedCache) cumulativeCacheHits++;
-      if (success) cumulativeSuccess++;
-      if (task.pattern_id) patternIds.add(task.pattern_id);
-      totalDuration += durationMs;
-
-      const cacheHitRate =
-        taskNumber > 0
-          ? Math.round((cumulativeCacheHits / taskNumber) * 10000) / 100
-          : 0;
-
-      const successRate =
-        taskNumber > 0
-          ? Math.round((cumulativeSuccess / taskNumber) * 10000) / 100
-          : 0;
+    const { searchParams } = new URL(request.url);
+    const since = Math.max(parseInt(searchParams.get("since") || "0", 10) || 0, 0);
+    const maxPoints = Math.min(
+      Math.max(parseInt(searchParams.get("points") || `${DEFAULT_MAX_POINTS}`, 10) || DEFAULT_MAX_POINTS, 1),
+      MAX_POINTS_LIMIT
+    );
 
-      return {
-        taskNumber,
-        timestamp: task.created_at,
-        success,
-        usedCache,
-        recoveryAttempted,
-        durationMs,
-        cumulativeCacheHits,
-        cumulativeSuccess,
-        cumulativePatterns: patternIds.size,
-        cacheHitRate,
-        successRate,
-      };
-    });
+    await ensureMetricsSeries();
 
-    // Get current pattern count from the search index
-    const patternsLearned = await getPatternCount();
+    const [{ timeline, state }, patternsLearned, embeddingCache, dedup, phaseTimings, browserPool] = await Promise.all([
+      getMetricsSeries(since, maxPoints),
+      getPatternCount(),
+      getEmbeddingCacheStats(),
+      getDedupStats(),
+      getPhaseTimingStats(),
+      getClusterPoolStats(),
+    ]);
 
-    const totalTasks = tasks.length;
+    const totalTasks = state.totalTasks;
     const avgDuration =
-      totalTasks > 0 ? Math.round(totalDuration / totalTasks) : 0;
+      totalTasks > 0 ? Math.round(state.totalDurationMs / totalTasks) : 0;
     const currentCacheHitRate =
       totalTasks > 0
-        ? Math.round((cumulativeCacheHits / totalTasks) * 10000) / 100
+        ? Math.round((state.cumulativeCacheHits / totalTasks) * 10000) / 100
         : 0;
     const currentSuccessRate =
       totalTasks > 0
-        ? Math.round((cumulativeSuccess / totalTasks) * 10000) / 100
+        ? Math.round((state.cumulativeSuccess / totalTasks) * 10000) / 100
         : 0;
 
     const summary = {
@@ -110,6 +57,10 @@ export async function GET() {
       currentCacheHitRate,
       currentSuccessRate,
       generation: patternsLearned,
+      embeddingCache,
+      browserPool,
+      dedup,
+      phaseTimings,
     };
 
     return NextResponse.json({ timeline, summary });
@@ -0,0 +1,54 @@
+import { NextRequest, NextResponse } from "next/server";
+import { initWeave } from "@/lib/tracing/weave";
+import { ensureVectorIndex } from "@/lib/redis/vectors";
+import { runPatternMaintenance, getLastMaintenanceReport } from "@/lib/engine/pattern-pruner";
+
+export const dynamic = "force-dynamic";
+
+/**
+ * GET /api/patterns/maintenance
+ * Report of the last pattern maintenance run (null if none has run yet).
+ */
+export async function GET() {
+  try {
+    return NextResponse.json({ report: await getLastMaintenanceReport() });
+  } catch (error) {
+    console.error("[API] Maintenance report error:", error);
+    return NextResponse.json(
+      { error: "Failed to read maintenance report", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
+
+/**
+ * POST /api/patterns/maintenance?budget_ms=10000
+ * Run one incremental maintenance pass now: prune dead patterns and merge
+ * same-host near-duplicates until the pass ends or the budget runs out.
+ * 409 while another run (e.g. a worker's scheduled one) holds the lock.
+ */
+export async function POST(request: NextRequest) {
+  try {
+    await initWeave();
+    await ensureVectorIndex();
+
+    const { searchParams } = new URL(request.url);
+    const budgetParam = searchParams.get("budget_ms");
+    const budgetMs = budgetParam ? Math.min(Math.max(parseInt(budgetParam, 10) || 0, 1000), 60000) : undefined;
+
+    const report = await runPatternMaintenance(budgetMs);
+    if (!report) {
+      return NextResponse.json(
+        { error: "Maintenance already running", detail: "Another run holds the maintenance lock" },
+        { status: 409 }
+      );
+    }
+    return NextResponse.json({ report });
+  } catch (error) {
+    console.error("[API] Pattern maintenance error:", error);
+    return NextResponse.json(
+      { error: "Pattern maintenance failed", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,24 @@
+import { NextResponse } from "next/server";
+import { getSchedulerStats } from "@/lib/engine/host-scheduler";
+import { getQueueStats } from "@/lib/redis/queue";
+
+export const dynamic = "force-dynamic";
+
+/**
+ * GET /api/scheduler
+ * Per-host limits, live state (running jobs, tokens, backoff, recent
+ * task failure rate) and queue wait — enqueue to start — for every host
+ * the scheduler has seen, plus the overall queue including deferred jobs.
+ */
+export async function GET() {
+  try {
+    const [hosts, queue] = await Promise.all([getSchedulerStats(), getQueueStats()]);
+    return NextResponse.json({ hosts, queue });
+  } catch (error) {
+    console.error("[API] Scheduler stats error:", error);
+    return NextResponse.json(
+      { error: "Failed to read scheduler stats", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
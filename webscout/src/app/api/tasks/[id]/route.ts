@@ -1,5 +1,6 @@
 import { NextRequest, NextResponse } from "next/server";
 import { getTask } from "@/lib/redis/tasks";
+import { settleStrandedFollower } from "@/lib/engine/task-runner";
 
 export const dynamic = "force-dynamic";
 
@@ -26,7 +27,9 @@ export async function GET(
       );
     }
 
-    return NextResponse.json(task);
+    // A coalesced task whose flight expired is settled from its leader here
+    const settled = await settleStrandedFollower(task).catch(() => null);
+    return NextResponse.json(settled ?? task);
   } catch (error) {
     console.error("[API] Get task error:", error);
     return NextResponse.json(
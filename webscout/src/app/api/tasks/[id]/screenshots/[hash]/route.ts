@@ -0,0 +1,41 @@
+import { NextRequest, NextResponse } from "next/server";
+import { getScreenshot, screenshotContentType } from "@/lib/redis/screenshots";
+
+export const dynamic = "force-dynamic";
+
+/**
+ * GET /api/tasks/{id}/screenshots/{hash}
+ * Lazily serves a screenshot referenced from a task step. Content-addressed,
+ * so responses are immutable and safe to cache indefinitely.
+ */
+export async function GET(
+  _request: NextRequest,
+  { params }: { params: Promise<{ id: string; hash: string }> }
+) {
+  try {
+    const { hash } = await params;
+    const bytes = await getScreenshot(hash);
+
+    if (!bytes) {
+      return NextResponse.json(
+        { error: "Screenshot not found", hash },
+        { status: 404 }
+      );
+    }
+
+    return new Response(new Uint8Array(bytes), {
+      status: 200,
+      headers: {
+        "Content-Type": screenshotContentType(bytes),
+        "Content-Length": bytes.length.toString(),
+        "Cache-Control": "public, max-age=31536000, immutable",
+      },
+    });
+  } catch (error) {
+    console.error("[API] Get screenshot error:", error);
+    return NextResponse.json(
+      { error: "Failed to get screenshot", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
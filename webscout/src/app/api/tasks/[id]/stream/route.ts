@@ -1,18 +1,52 @@
 import { NextRequest } from "next/server";
-import { getTask } from "@/lib/redis/tasks";
+import { getTask, getTaskStatus } from "@/lib/redis/tasks";
+import { subscribeToTask, type TaskEvent } from "@/lib/redis/task-events";
+import { settleStrandedFollower } from "@/lib/engine/task-runner";
+import type { TaskResult } from "@/lib/utils/types";
 
 export const dynamic = "force-dynamic";
 
 /** Maximum duration (ms) before the SSE stream closes itself. */
 const STREAM_TIMEOUT_MS = 120_000;
 
-/** Interval (ms) between Redis polls inside the stream. */
-const POLL_INTERVAL_MS = 500;
+/**
+ * Interval (ms) between fallback status checks. Updates are pushed via
+ * pub/sub; this only catches a terminal status whose publish was missed
+ * (e.g. the worker process died mid-task), and settles a coalesced task
+ * whose flight expired before its leader landed.
+ */
+const STATUS_CHECK_INTERVAL_MS = 10_000;
+
+/**
+ * How long the stream stays open after a successful task completes for its
+ * quality assessment, which the post-processor writes a few seconds later.
+ */
+const QUALITY_WAIT_MS = 15_000;
+
+function isTerminal(status: TaskResult["status"]): boolean {
+  return status === "success" || status === "failed";
+}
+
+/** Final task fields without the (already streamed) steps and screenshots. */
+function completionSummary(task: TaskResult): Omit<TaskResult, "steps" | "screenshots"> {
+  // eslint-disable-next-line @typescript-eslint/no-unused-vars
+  const { steps, screenshots, ...rest } = task;
+  return rest;
+}
 
 /**
  * SSE endpoint that streams task updates to the client.
  *
- * The connection stays open, polling Redis every 500 ms, until:
+ * Sends the full task snapshot once on connect (unnamed event), then pushes
+ * incremental events published by appendTaskProgress / storeTask:
+ *   - `step`     { index, step }  — new or replaced step at `index`
+ *   - `session`  { session_url }
+ *   - `complete` final task fields (no steps/screenshots), followed by `done`
+ *     once a successful task's quality assessment (a `step` plus a
+ *     `complete` with `quality_score` / `quality_summary`) has arrived, or
+ *     after QUALITY_WAIT_MS
+ *
+ * The connection stays open until:
  *   - The task reaches a terminal status ("success" | "failed"), or
  *   - 120 seconds elapse (safety timeout), or
  *   - The client disconnects.
@@ -49,7 +83,6 @@ export async function GET(
   }
 
   const encoder = new TextEncoder();
-  const startTime = Date.now();
 
   const stream = new ReadableStream({
     async start(controller) {
@@ -69,10 +102,21 @@ export async function GET(
 
       /** Track whether we already closed so we don't double-close. */
       let closed = false;
+      let unsubscribe: (() => Promise<void>) | null = null;
+      let statusCheckId: ReturnType<typeof setInterval> | null = null;
+      let timeoutId: ReturnType<typeof setTimeout> | null = null;
+      let qualityTimeoutId: ReturnType<typeof setTimeout> | null = null;
+      /** Terminal status seen; only a pending quality assessment keeps the stream open */
+      let finishing = false;
+      let qualityArrived = false;
 
       function closeStream(): void {
         if (closed) return;
         closed = true;
+        if (statusCheckId) clearInterval(statusCheckId);
+        if (timeoutId) clearTimeout(timeoutId);
+        if (qualityTimeoutId) clearTimeout(qualityTimeoutId);
+        unsubscribe?.().catch(() => {});
         try {
           controller.close();
         } catch {
@@ -80,62 +124,119 @@ export async function GET(
         }
       }
 
+      function done(): void {
+        sendEvent(JSON.stringify({ done: true }), "done");
+        closeStream();
+      }
+
+      /**
+       * Send the final task fields once the task is terminal, then close —
+       * after the quality assessment if a successful task has none yet.
+       */
+      async function finish(): Promise<void> {
+        if (closed || finishing) return;
+        finishing = true;
+        const task = await getTask(id).catch(() => null);
+        if (task) {
+          sendEvent(JSON.stringify(completionSummary(task)), "complete");
+        }
+        const qualityPending =
+          task?.status === "success" && !qualityArrived && !task.steps.some((step) => step.action === "quality_check");
+        if (qualityPending && !closed) {
+          if (statusCheckId) clearInterval(statusCheckId);
+          qualityTimeoutId = setTimeout(done, QUALITY_WAIT_MS);
+          return;
+        }
+        done();
+      }
+
       // Listen for client disconnect via the request signal.
       request.signal.addEventListener("abort", () => {
         closeStream();
       });
 
-      // Send the initial task state immediately.
-      sendEvent(JSON.stringify(initialTask));
+      // If the task is already in a terminal state, send it and close right away.
+      if (isTerminal(initialTask.status)) {
+        sendEvent(JSON.stringify(initialTask));
+        sendEvent(JSON.stringify({ done: true }), "done");
+        closeStream();
+        return;
+      }
+
+      // Subscribe BEFORE reading the snapshot so no event falls in between;
+      // step events carry their index, so a duplicate is just an overwrite.
+      try {
+        unsubscribe = await subscribeToTask(id, (event: TaskEvent) => {
+          if (closed) return;
+          switch (event.type) {
+            case "step":
+              sendEvent(JSON.stringify({ index: event.index, step: event.step }), "step");
+              break;
+            case "session":
+              sendEvent(JSON.stringify({ session_url: event.session_url }), "session");
+              break;
+            case "status":
+              if (isTerminal(event.status)) {
+                finish().catch(() => closeStream());
+              }
+              break;
+            case "quality":
+              sendEvent(JSON.stringify({ index: event.index, step: event.step }), "step");
+              sendEvent(
+                JSON.stringify({ quality_score: event.quality_score, quality_summary: event.quality_summary }),
+                "complete"
+              );
+              qualityArrived = true;
+              // Close only once finish() has sent the final fields
+              if (qualityTimeoutId) done();
+              break;
+          }
+        });
+      } catch (err) {
+        console.error("[SSE] Subscribe failed:", err);
+        sendEvent(JSON.stringify({ error: "Subscription failed" }), "error");
+        closeStream();
+        return;
+      }
 
-      // If the task is already in a terminal state, close right away.
-      if (initialTask.status === "success" || initialTask.status === "failed") {
+      // Send the full task state once.
+      const snapshot = (await getTask(id).catch(() => null)) ?? initialTask;
+      sendEvent(JSON.stringify(snapshot));
+      if (isTerminal(snapshot.status)) {
         sendEvent(JSON.stringify({ done: true }), "done");
         closeStream();
         return;
       }
 
-      // Poll Redis at the configured interval.
-      const intervalId = setInterval(async () => {
-        // Safety timeout: close the stream if it has been open too long.
-        if (Date.now() - startTime >= STREAM_TIMEOUT_MS) {
-          clearInterval(intervalId);
-          sendEvent(JSON.stringify({ error: "Stream timeout" }), "error");
-          closeStream();
-          return;
-        }
+      // Safety timeout: close the stream if it has been open too long.
+      timeoutId = setTimeout(() => {
+        sendEvent(JSON.stringify({ error: "Stream timeout" }), "error");
+        closeStream();
+      }, STREAM_TIMEOUT_MS);
 
-        // If the client already disconnected, stop polling.
+      // Cheap fallback: read only the status field, not the task document.
+      statusCheckId = setInterval(async () => {
         if (request.signal.aborted || closed) {
-          clearInterval(intervalId);
           closeStream();
           return;
         }
-
         try {
-          const task = await getTask(id);
-
-          if (!task) {
-            // Task disappeared from Redis -- close gracefully.
-            clearInterval(intervalId);
+          const status = await getTaskStatus(id);
+          if (!status) {
             sendEvent(JSON.stringify({ error: "Task not found" }), "error");
             closeStream();
-            return;
-          }
-
-          sendEvent(JSON.stringify(task));
-
-          // Terminal states: send a done event and shut down.
-          if (task.status === "success" || task.status === "failed") {
-            clearInterval(intervalId);
-            sendEvent(JSON.stringify({ done: true }), "done");
-            closeStream();
+          } else if (isTerminal(status)) {
+            await finish();
+          } else if (status === "pending") {
+            // Settling publishes the terminal status, which finishes the stream
+            const task = await getTask(id);
+            if (task) await settleStrandedFollower(task);
           }
         } catch (err) {
-          console.error("[SSE] Error polling task:", err);
+          console.error("[SSE] Status check failed:", err);
           // Don't close on transient errors; just skip this tick.
         }
-      }, POLL_INTERVAL_MS);
+      }, STATUS_CHECK_INTERVAL_MS);
     },
   });
 
@@ -0,0 +1,41 @@
+import { NextRequest, NextResponse } from "next/server";
+import { getBatch } from "@/lib/redis/batches";
+
+export const dynamic = "force-dynamic";
+
+/**
+ * GET /api/tasks/batch/[id]
+ * Overall progress of a batch and the status of each of its items.
+ */
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { id } = await params;
+
+    if (!id || id.length < 8) {
+      return NextResponse.json(
+        { error: "Invalid batch ID format" },
+        { status: 400 }
+      );
+    }
+
+    const batch = await getBatch(id);
+
+    if (!batch) {
+      return NextResponse.json(
+        { error: "Batch not found", id },
+        { status: 404 }
+      );
+    }
+
+    return NextResponse.json(batch);
+  } catch (error) {
+    console.error("[API] Get batch error:", error);
+    return NextResponse.json(
+      { error: "Failed to get batch", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
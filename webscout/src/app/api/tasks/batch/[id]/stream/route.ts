@@ -0,0 +1,160 @@
+import { NextRequest } from "next/server";
+import { getBatch, getBatchProgress } from "@/lib/redis/batches";
+import { subscribeToBatch, type BatchEvent, type BatchProgress } from "@/lib/redis/task-events";
+
+export const dynamic = "force-dynamic";
+
+/** Maximum duration (ms) before the SSE stream closes itself. */
+const STREAM_TIMEOUT_MS = 30 * 60 * 1000;
+
+/**
+ * Interval (ms) between fallback progress checks. Item events are pushed via
+ * pub/sub; this only catches a completion whose publish was missed.
+ */
+const PROGRESS_CHECK_INTERVAL_MS = 10_000;
+
+function isComplete(progress: BatchProgress): boolean {
+  return progress.completed >= progress.total;
+}
+
+/**
+ * SSE endpoint that streams a batch's progress.
+ *
+ * Sends the batch snapshot (overall progress and every item's status) once
+ * on connect (unnamed event), then:
+ *   - `item`  { item: { index, task_id, status, ... }, progress } — an item
+ *     started or finished, with the overall counts after that change
+ *   - `done`  once every item has finished
+ *
+ * Per-item steps stay on each task's own stream (/api/tasks/<id>/stream).
+ */
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  const { id } = await params;
+
+  if (!id || id.length < 8) {
+    return new Response(
+      JSON.stringify({ error: "Invalid batch ID format" }),
+      { status: 400, headers: { "Content-Type": "application/json" } }
+    );
+  }
+
+  const initialBatch = await getBatch(id);
+  if (!initialBatch) {
+    return new Response(
+      JSON.stringify({ error: "Batch not found", id }),
+      { status: 404, headers: { "Content-Type": "application/json" } }
+    );
+  }
+
+  const encoder = new TextEncoder();
+
+  const stream = new ReadableStream({
+    async start(controller) {
+      function sendEvent(data: string, event?: string): void {
+        try {
+          let message = "";
+          if (event) {
+            message += `event: ${event}\n`;
+          }
+          message += `data: ${data}\n\n`;
+          controller.enqueue(encoder.encode(message));
+        } catch {
+          // Controller may already be closed; swallow the error.
+        }
+      }
+
+      let closed = false;
+      let unsubscribe: (() => Promise<void>) | null = null;
+      let progressCheckId: ReturnType<typeof setInterval> | null = null;
+      let timeoutId: ReturnType<typeof setTimeout> | null = null;
+
+      function closeStream(): void {
+        if (closed) return;
+        closed = true;
+        if (progressCheckId) clearInterval(progressCheckId);
+        if (timeoutId) clearTimeout(timeoutId);
+        unsubscribe?.().catch(() => {});
+        try {
+          controller.close();
+        } catch {
+          // Already closed.
+        }
+      }
+
+      function finish(progress: BatchProgress): void {
+        if (closed) return;
+        sendEvent(JSON.stringify({ done: true, progress }), "done");
+        closeStream();
+      }
+
+      request.signal.addEventListener("abort", () => {
+        closeStream();
+      });
+
+      if (isComplete(initialBatch.progress)) {
+        sendEvent(JSON.stringify(initialBatch));
+        finish(initialBatch.progress);
+        return;
+      }
+
+      // Subscribe BEFORE reading the snapshot so no event falls in between;
+      // a duplicate item event is just a repeated status.
+      try {
+        unsubscribe = await subscribeToBatch(id, (event: BatchEvent) => {
+          if (closed) return;
+          sendEvent(JSON.stringify({ item: event.item, progress: event.progress }), "item");
+          if (isComplete(event.progress)) finish(event.progress);
+        });
+      } catch (err) {
+        console.error("[SSE] Batch subscribe failed:", err);
+        sendEvent(JSON.stringify({ error: "Subscription failed" }), "error");
+        closeStream();
+        return;
+      }
+
+      const snapshot = (await getBatch(id).catch(() => null)) ?? initialBatch;
+      if (closed) return; // Finished (or disconnected) while reading the snapshot
+      sendEvent(JSON.stringify(snapshot));
+      if (isComplete(snapshot.progress)) {
+        finish(snapshot.progress);
+        return;
+      }
+
+      timeoutId = setTimeout(() => {
+        sendEvent(JSON.stringify({ error: "Stream timeout" }), "error");
+        closeStream();
+      }, STREAM_TIMEOUT_MS);
+
+      progressCheckId = setInterval(async () => {
+        if (request.signal.aborted || closed) {
+          closeStream();
+          return;
+        }
+        try {
+          const progress = await getBatchProgress(id);
+          if (!progress) {
+            sendEvent(JSON.stringify({ error: "Batch not found" }), "error");
+            closeStream();
+          } else if (isComplete(progress)) {
+            finish(progress);
+          }
+        } catch (err) {
+          console.error("[SSE] Batch progress check failed:", err);
+        }
+      }, PROGRESS_CHECK_INTERVAL_MS);
+    },
+  });
+
+  return new Response(stream, {
+    status: 200,
+    headers: {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache, no-transform",
+      Connection: "keep-alive",
+      "X-Accel-Buffering": "no",
+    },
+  });
+}
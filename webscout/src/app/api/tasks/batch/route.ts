@@ -0,0 +1,158 @@
+import { NextRequest, NextResponse } from "next/server";
+import { storeTask } from "@/lib/redis/tasks";
+import { storeBatch, recordBatchItem, type BatchItem } from "@/lib/redis/batches";
+import { enqueueTaskGroup } from "@/lib/redis/queue";
+import { generateEmbeddings } from "@/lib/embeddings/openai";
+import { ensureInlineWorker } from "@/lib/engine/task-worker";
+import { assignFairTag, submitterFromHeaders } from "@/lib/engine/host-scheduler";
+import { failTask } from "@/lib/engine/task-runner";
+import { extractUrlPattern } from "@/lib/utils/url";
+import type { TaskResult } from "@/lib/utils/types";
+
+export const maxDuration = 60;
+export const dynamic = "force-dynamic";
+
+/** Most items accepted in one batch */
+const BATCH_MAX_ITEMS = parseInt(process.env.BATCH_MAX_ITEMS || "500", 10);
+/** Pages of one url pattern per shared session; larger groups are split so workers can run them side by side */
+const BATCH_GROUP_SIZE = Math.max(parseInt(process.env.BATCH_GROUP_SIZE || "25", 10), 1);
+
+/**
+ * POST /api/tasks/batch
+ * Body: { items: [{ url, target }, ...] }
+ *
+ * Stores one task per item, computes every item's pattern-lookup embedding
+ * in a single call, and queues the items grouped by url pattern: each group
+ * runs its pages in order in one browser session, reusing the pattern the
+ * first page resolved. Follow the whole batch at
+ * /api/tasks/batch/<batch_id>/stream, or any item at /api/tasks/<id>/stream.
+ */
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+    const rawItems = (body as { items?: unknown }).items;
+
+    if (!Array.isArray(rawItems) || rawItems.length === 0) {
+      return NextResponse.json(
+        { error: "'items' must be a non-empty array of { url, target }" },
+        { status: 400 }
+      );
+    }
+    if (rawItems.length > BATCH_MAX_ITEMS) {
+      return NextResponse.json(
+        { error: `A batch can hold at most ${BATCH_MAX_ITEMS} items (got ${rawItems.length})` },
+        { status: 400 }
+      );
+    }
+
+    const items: BatchItem[] = [];
+    for (const [index, raw] of rawItems.entries()) {
+      const { url, target } = (raw ?? {}) as { url?: unknown; target?: unknown };
+      if (typeof url !== "string" || typeof target !== "string" || target.trim().length === 0) {
+        return NextResponse.json(
+          { error: `Item ${index}: both 'url' and a non-empty 'target' are required` },
+          { status: 400 }
+        );
+      }
+      try {
+        new URL(url);
+      } catch {
+        return NextResponse.json(
+          { error: `Item ${index}: invalid URL format. Must be a valid absolute URL (e.g., https://example.com)` },
+          { status: 400 }
+        );
+      }
+      items.push({ index, task_id: crypto.randomUUID(), url, target, url_pattern: extractUrlPattern(url) });
+    }
+
+    const batchId = crypto.randomUUID();
+    console.log(`[API] New batch ${batchId}: ${items.length} item(s)`);
+
+    // One embedding call for the whole batch; workers find these in the
+    // shared embedding cache. A failure only means each page embeds itself.
+    const queryTexts = [...new Set(items.map((item) => `${item.url_pattern} ${item.target}`))];
+    await generateEmbeddings(queryTexts).catch((error) => {
+      console.warn("[API] Batch embedding failed, pages will embed individually:", (error as Error).message);
+    });
+
+    const groups = new Map<string, BatchItem[]>();
+    for (const item of items) {
+      const group = groups.get(item.url_pattern) ?? [];
+      group.push(item);
+      groups.set(item.url_pattern, group);
+    }
+    const jobs: BatchItem[][] = [];
+    for (const group of groups.values()) {
+      for (let i = 0; i < group.length; i += BATCH_GROUP_SIZE) {
+        jobs.push(group.slice(i, i + BATCH_GROUP_SIZE));
+      }
+    }
+
+    const now = Date.now();
+    await storeBatch(batchId, items, jobs.length);
+    await Promise.all(
+      items.map((item) =>
+        storeTask({
+          id: item.task_id,
+          url: item.url,
+          target: item.target,
+          status: "pending",
+          result: null,
+          used_cached_pattern: false,
+          recovery_attempted: false,
+          screenshots: [],
+          steps: [
+            {
+              action: "queued",
+              status: "info",
+              detail: `Queued in batch ${batchId} (item ${item.index + 1} of ${items.length}) — waiting for a worker...`,
+              timestamp: now,
+            },
+          ],
+          created_at: now,
+        } as TaskResult)
+      )
+    );
+
+    let queued = 0;
+    try {
+      // Each group is charged to the submitter's fair share by its page count
+      const submitter = submitterFromHeaders(request.headers);
+      for (const job of jobs) {
+        const fairTag = await assignFairTag(submitter, job.length);
+        await enqueueTaskGroup(
+          batchId,
+          job.map((item) => ({ index: item.index, taskId: item.task_id, url: item.url, target: item.target })),
+          { submitter, fairTag }
+        );
+        queued++;
+      }
+    } catch (error) {
+      // Groups already queued will still run; only the rest are failed
+      const unqueued = jobs.slice(queued).flat();
+      await Promise.all(
+        unqueued.map(async (item) => {
+          const task = await failTask(item.task_id, `Could not queue batch: ${(error as Error).message}`);
+          await recordBatchItem(batchId, item, task).catch(console.warn);
+        })
+      );
+      if (queued > 0) ensureInlineWorker();
+      throw error;
+    }
+    ensureInlineWorker();
+
+    return NextResponse.json({
+      batch_id: batchId,
+      total: items.length,
+      groups: jobs.map((job) => ({ url_pattern: job[0].url_pattern, task_ids: job.map((item) => item.task_id) })),
+      tasks: items.map((item) => ({ id: item.task_id, url: item.url, target: item.target })),
+      stream_url: `/api/tasks/batch/${batchId}/stream`,
+    });
+  } catch (error) {
+    console.error("[API] Batch submission error:", error);
+    return NextResponse.json(
+      { error: "Batch submission failed", detail: (error as Error).message },
+      { status: 500 }
+    );
+  }
+}
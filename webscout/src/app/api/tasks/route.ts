@@ -1,9 +1,12 @@
 import { NextRequest, NextResponse } from "next/server";
-import { learningScrape } from "@/lib/engine/scraper";
-import { storeTask, getTask, listTasks, getTaskStats } from "@/lib/redis/tasks";
+import { storeTask, listTasks, getTaskStats, appendTaskProgress } from "@/lib/redis/tasks";
 import { getPatternCount } from "@/lib/redis/patterns";
-import { addScoreToCall } from "@/lib/tracing/weave";
-import type { TaskRequest } from "@/lib/utils/types";
+import { enqueueTask, getQueueStats } from "@/lib/redis/queue";
+import { taskFingerprint, joinFlight, getCachedTaskResult } from "@/lib/redis/dedup";
+import { ensureInlineWorker } from "@/lib/engine/task-worker";
+import { assignFairTag, submitterFromHeaders } from "@/lib/engine/host-scheduler";
+import { failTask } from "@/lib/engine/task-runner";
+import type { TaskRequest, TaskResult } from "@/lib/utils/types";
 
 export const maxDuration = 60;
 export const dynamic = "force-dynamic";
@@ -11,7 +14,7 @@ export const dynamic = "force-dynamic";
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
-    const { url, target } = body as TaskRequest;
+    const { url, target, max_age: maxAge } = body as TaskRequest;
 
     if (!url || !target) {
       return NextResponse.json(
@@ -36,111 +39,108 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    if (maxAge !== undefined && (typeof maxAge !== "number" || !Number.isFinite(maxAge) || maxAge < 0)) {
+      return NextResponse.json(
+        { error: "'max_age' must be a non-negative number of seconds" },
+        { status: 400 }
+      );
+    }
+
     console.log(`[API] New task: extract "${target}" from ${url}`);
 
-    // Create a placeholder task immediately so the UI can track it
     const taskId = crypto.randomUUID();
+    const fingerprint = taskFingerprint(url, target);
+
+    // A caller that tolerates slightly stale data gets a recent identical
+    // result straight from Redis, without queueing or opening a browser
+    if (maxAge !== undefined) {
+      const cached = await getCachedTaskResult(fingerprint, maxAge * 1000);
+      if (cached) {
+        const now = Date.now();
+        const ageSeconds = Math.round((now - cached.completed_at) / 1000);
+        const cachedTask: TaskResult = {
+          id: taskId,
+          url,
+          target,
+          status: "success",
+          result: cached.result,
+          used_cached_pattern: cached.used_cached_pattern,
+          recovery_attempted: false,
+          pattern_id: cached.pattern_id,
+          served_from: "result_cache",
+          source_task_id: cached.task_id,
+          screenshots: [],
+          steps: [
+            {
+              action: "result_cache",
+              status: "success",
+              detail: `Reused the result of task ${cached.task_id} from ${ageSeconds}s ago (max_age ${maxAge}s)`,
+              timestamp: now,
+            },
+          ],
+          created_at: now,
+          completed_at: now,
+        };
+        await storeTask(cachedTask);
+        console.log(`[API] Task ${taskId} served from result cache (task ${cached.task_id})`);
+        return NextResponse.json(cachedTask);
+      }
+    }
+
+    // Create a placeholder task immediately so the UI can track it
     const pendingTask = {
       id: taskId,
       url,
       target,
-      status: "running" as const,
+      status: "pending" as const,
       result: null,
       used_cached_pattern: false,
       recovery_attempted: false,
       pattern_id: undefined,
       screenshots: [],
       steps: [
-        { action: "queued", status: "info" as const, detail: "Task queued — starting browser automation...", timestamp: Date.now() },
+        { action: "queued", status: "info" as const, detail: "Task queued — waiting for a worker...", timestamp: Date.now() },
       ],
       created_at: Date.now(),
       completed_at: undefined,
     };
 
-    await storeTask(pendingTask as import("@/lib/utils/types").TaskResult);
-
-    // Execute the scrape in the background (non-blocking)
-    // Use .invoke() to capture Weave call ID for the closed feedback loop
-    const executeTask = async () => {
-      if (typeof learningScrape.invoke === "function") {
-        const [result, call] = await learningScrape.invoke({ url, target, id: taskId });
-        result.trace_id = call?.traceId;
-        result.weave_call_id = call?.id;
-        return result;
-      }
-      return learningScrape({ url, target, id: taskId });
-    };
-
-    executeTask().then(async (result) => {
-      // The scraper's buildResult() strips large base64 data to prevent Weave
-      // serialization overflow. Merge the final status/metadata into the complete
-      // task data already flushed to Redis by flushProgress().
-      const existing = await getTask(taskId);
-      const finalTask = {
-        ...(existing || result),
-        status: result.status,
-        result: result.result,
-        used_cached_pattern: result.used_cached_pattern,
-        recovery_attempted: result.recovery_attempted,
-        pattern_id: result.pattern_id,
-        session_url: result.session_url || existing?.session_url,
-        trace_id: result.trace_id,
-        weave_call_id: result.weave_call_id,
-        quality_score: result.quality_score,
-        quality_summary: result.quality_summary,
-        completed_at: result.completed_at,
-        // Always prefer the full steps/screenshots from Redis (written by flushProgress)
-        // since buildResult() strips base64 data from the return value
-        steps: (existing?.steps && existing.steps.length >= result.steps.length)
-          ? existing.steps
-          : result.steps,
-        screenshots: (existing?.screenshots && existing.screenshots.length > 0)
-          ? existing.screenshots
-          : result.screenshots,
-      } as import("@/lib/utils/types").TaskResult;
-
-      await storeTask(finalTask);
-      console.log(
-        `[API] Task ${result.id} completed: ${result.status}` +
-        (result.used_cached_pattern ? " (cached)" : "") +
-        (result.recovery_attempted ? " (recovered)" : "") +
-        (result.trace_id ? ` (trace: ${result.trace_id.substring(0, 12)}...)` : "")
-      );
+    await storeTask(pendingTask as TaskResult);
+
+    // An identical task already in flight will hand its result to this one
+    // when it lands (see settleFlight in task-runner.ts) — no second browser.
+    // The placeholder is stored first so the leader can always find it.
+    const leaderId = await joinFlight(fingerprint, taskId);
+    if (leaderId) {
+      const coalescedStep = {
+        action: "coalesced",
+        status: "info" as const,
+        detail: `Identical task ${leaderId} is already running — waiting for its result`,
+        timestamp: Date.now(),
+      };
+      await appendTaskProgress(taskId, { steps: [coalescedStep] });
+      console.log(`[API] Task ${taskId} coalesced onto in-flight task ${leaderId}`);
+      return NextResponse.json({
+        ...pendingTask,
+        served_from: "coalesced",
+        source_task_id: leaderId,
+        steps: [...pendingTask.steps, coalescedStep],
+      });
+    }
 
-      // Attach retrospective scores to the Weave call (Phase 5 feedback loop)
-      if (result.weave_call_id) {
-        Promise.all([
-          addScoreToCall(result.weave_call_id, "success", result.status === "success"),
-          addScoreToCall(
-            result.weave_call_id,
-            "quality",
-            result.quality_score ?? 0,
-            result.quality_summary
-          ),
-          addScoreToCall(
-            result.weave_call_id,
-            "used_cache",
-            result.used_cached_pattern
-          ),
-          addScoreToCall(
-            result.weave_call_id,
-            "recovery_needed",
-            result.recovery_attempted
-          ),
-        ]).catch(console.warn);
-      }
-    }).catch(async (error) => {
-      console.error(`[API] Task ${taskId} failed:`, error);
-      // Merge error into existing Redis data (which has full steps from flushProgress)
-      const existing = await getTask(taskId).catch(() => null);
-      const errorStep = { action: "error", status: "failure" as const, detail: (error as Error).message, timestamp: Date.now() };
-      await storeTask({
-        ...(existing || pendingTask),
-        status: "failed",
-        steps: [...(existing?.steps || pendingTask.steps), errorStep],
-        completed_at: Date.now(),
-      } as import("@/lib/utils/types").TaskResult).catch(console.error);
-    });
+    // Hand the task to the durable queue; workers (npm run worker) run it
+    // with bounded concurrency, per-host limits and a fair share per
+    // submitter, and redeliver it if a worker dies mid-task
+    try {
+      const submitter = submitterFromHeaders(request.headers);
+      const fairTag = await assignFairTag(submitter, 1);
+      await enqueueTask({ id: taskId, url, target }, { submitter, fairTag });
+    } catch (error) {
+      // Fail the leader (and anything that already attached to it)
+      await failTask(taskId, `Could not queue task: ${(error as Error).message}`);
+      throw error;
+    }
+    ensureInlineWorker();
 
     return NextResponse.json(pendingTask);
   } catch (error) {
@@ -168,10 +168,11 @@ export async function GET(request: NextRequest) {
       0
     );
 
-    const [{ tasks, total }, stats, patternCount] = await Promise.all([
+    const [{ tasks, total }, stats, patternCount, queue] = await Promise.all([
       listTasks(limit, offset),
       getTaskStats(),
       getPatternCount(),
+      getQueueStats(),
     ]);
 
     const cacheHitRate =
@@ -196,6 +197,7 @@ export async function GET(request: NextRequest) {
         cache_hit_rate: cacheHitRate,
         recovery_rate: recoveryRate,
       },
+      queue,
     });
   } catch (error) {
     console.error("[API] List tasks error:", error);
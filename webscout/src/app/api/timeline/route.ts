@@ -1,6 +1,6 @@
 import { NextResponse } from "next/server";
 import { getRedisClient } from "@/lib/redis/client";
-import type { TaskResult } from "@/lib/utils/types";
+import { getTasks } from "@/lib/redis/tasks";
 
 export const dynamic = "force-dynamic";
 
@@ -15,19 +15,7 @@ export async function GET() {
       LIMIT: { offset: 0, count: 20 },
     });
 
-    const tasks: TaskResult[] = [];
-
-    for (const id of taskIds) {
-      const data = await client.hGet(`task:${id}`, "data");
-      if (data) {
-        try {
-          const parsed = JSON.parse(data) as TaskResult;
-          tasks.push(parsed);
-        } catch {
-          console.error(`[Timeline] Failed to parse task ${id}`);
-        }
-      }
-    }
+    const tasks = await getTasks(taskIds);
 
     return NextResponse.json({ tasks });
   } catch (error) {
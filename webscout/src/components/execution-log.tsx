@@ -24,6 +24,7 @@ interface ExecutionLogProps {
 // Map action names to icons
 const actionIcons: Record<string, React.ComponentType<{ className?: string }>> =
   {
+    exact_lookup: Zap,
     vector_search: Search,
     cache_hit: Zap,
     cache_miss: Search,
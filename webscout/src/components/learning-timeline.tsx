@@ -26,6 +26,7 @@ import {
   History,
 } from "lucide-react";
 import { EmptyState } from "./empty-state";
+import { screenshotSrc } from "@/lib/utils/screenshot";
 
 /* -------------------------------------------------------------------------- */
 /*  Helpers                                                                    */
@@ -70,6 +71,12 @@ interface ThoughtLine {
 }
 
 const thoughtMap: Record<string, ThoughtLine> = {
+  exact_lookup: {
+    icon: Zap,
+    label: "Recognised this exact task",
+    color: "text-blue-400",
+    bgColor: "bg-blue-500/20",
+  },
   vector_search: {
     icon: Search,
     label: "Searching memory...",
@@ -298,7 +305,7 @@ function StepRow({
           >
             <Camera className="w-3 h-3" />
             <img
-              src={`data:image/png;base64,${step.screenshot}`}
+              src={screenshotSrc(step.screenshot)}
               alt={`Screenshot: ${step.action}`}
               className="h-12 rounded border border-zinc-700 opacity-70 group-hover/ss:opacity-100 transition-opacity"
             />
@@ -463,7 +470,7 @@ function TimelineEntry({
                         className="shrink-0"
                       >
                         <img
-                          src={`data:image/png;base64,${ss}`}
+                          src={screenshotSrc(ss)}
                           alt={`Screenshot ${i + 1}`}
                           className="h-16 rounded border border-zinc-700 hover:border-zinc-500 transition-colors"
                         />
@@ -612,7 +619,7 @@ export function LearningTimeline() {
           onClick={() => setExpandedScreenshot(null)}
         >
           <img
-            src={`data:image/png;base64,${expandedScreenshot}`}
+            src={screenshotSrc(expandedScreenshot)}
             alt="Full screenshot"
             className="max-w-full max-h-full rounded-lg border border-zinc-700 shadow-2xl animate-in zoom-in-95 duration-200"
           />
@@ -14,6 +14,7 @@ import {
   Eye,
   Radio,
 } from "lucide-react";
+import { screenshotSrc } from "@/lib/utils/screenshot";
 
 interface LiveSessionViewerProps {
   task: TaskResult | null;
@@ -185,7 +186,7 @@ export function LiveSessionViewer({ task, isRunning, sessionUrl }: LiveSessionVi
             <div className="absolute inset-0 flex items-center justify-center bg-zinc-950 p-4 z-10">
               <div className="relative w-full h-full flex items-center justify-center">
                 <img
-                  src={`data:image/png;base64,${latestScreenshot}`}
+                  src={screenshotSrc(latestScreenshot)}
                   alt="Live browser session"
                   className="max-w-full max-h-full object-contain rounded-md shadow-2xl ring-1 ring-white/10"
                   onClick={() => setExpandedScreenshot(latestScreenshot)}
@@ -292,7 +293,7 @@ export function LiveSessionViewer({ task, isRunning, sessionUrl }: LiveSessionVi
         >
           <div className="relative max-w-[95vw] max-h-[95vh] group">
             <img
-              src={`data:image/png;base64,${expandedScreenshot}`}
+              src={screenshotSrc(expandedScreenshot)}
               alt="Full screenshot"
               className="max-w-full max-h-full rounded-lg border border-zinc-800 shadow-2xl"
             />
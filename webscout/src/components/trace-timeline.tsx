@@ -15,6 +15,7 @@ import {
   Zap,
 } from "lucide-react";
 import { useState } from "react";
+import { screenshotSrc } from "@/lib/utils/screenshot";
 
 interface TraceTimelineProps {
   steps: TaskStep[];
@@ -30,6 +31,7 @@ function formatActionName(action: string): string {
 
 // Map action names to icons
 const actionIcons: Record<string, React.ComponentType<{ className?: string }>> = {
+  exact_lookup: Zap,
   vector_search: Search,
   cache_hit: Zap,
   cache_miss: Search,
@@ -136,7 +138,7 @@ export function TraceTimeline({ steps }: TraceTimelineProps) {
                   <div className="mt-4 ml-12 relative group/image inline-block">
                     <div className="absolute inset-0 bg-emerald-500/10 opacity-0 group-hover/image:opacity-100 transition-opacity rounded border border-emerald-500/20 pointer-events-none" />
                     <img
-                      src={`data:image/png;base64,${step.screenshot}`}
+                      src={screenshotSrc(step.screenshot)}
                       alt={`Screenshot: ${step.action}`}
                       className="rounded border border-border max-w-[200px] h-auto cursor-pointer hover:brightness-110 transition-all shadow-lg"
                       onClick={() => setExpandedScreenshot(step.screenshot!)}
@@ -165,7 +167,7 @@ export function TraceTimeline({ steps }: TraceTimelineProps) {
             <div className="absolute bottom-0 right-0 w-4 h-4 border-r-2 border-b-2 border-emerald-500 translate-x-2 translate-y-2" />
 
             <img
-              src={`data:image/png;base64,${expandedScreenshot}`}
+              src={screenshotSrc(expandedScreenshot)}
               alt="Full screenshot"
               className="max-w-full max-h-[85vh] rounded-sm shadow-2xl"
             />
@@ -21,6 +21,34 @@ interface MetricsSummary {
   currentCacheHitRate: number;
   currentSuccessRate: number;
   generation: number;
+  embeddingCache?: {
+    memoryHits: number;
+    redisHits: number;
+    misses: number;
+    hitRate: number;
+    memoryEntries: number;
+  };
+  browserPool?: {
+    min: number;
+    max: number;
+    idle: number;
+    busy: number;
+    waiting: number;
+    leases: number;
+    reuses: number;
+    created: number;
+    recycled: number;
+    discarded: number;
+    avgWaitMs: number;
+    maxWaitMs: number;
+  };
+  dedup?: {
+    coalesced: number;
+    resultCacheHits: number;
+    resultCacheMisses: number;
+  };
+  /** Average ms per scrape phase, e.g. lookup_ms, browser_wait_ms */
+  phaseTimings?: Record<string, { avgMs: number; count: number }>;
 }
 
 interface MetricsResponse {
@@ -34,8 +62,29 @@ const fetcher = async (url: string) => {
   return res.json();
 };
 
+// Points already received, shared by every useMetrics() consumer (SWR dedupes
+// the key, so one fetcher serves them all). Each poll only asks the server
+// for points newer than the last one held here.
+let cachedTimeline: MetricsTimeline[] = [];
+
+const incrementalFetcher = async (url: string): Promise<MetricsResponse> => {
+  const since = cachedTimeline[cachedTimeline.length - 1]?.taskNumber ?? 0;
+  const data: MetricsResponse = await fetcher(`${url}?since=${since}`);
+
+  // History was reset (e.g. /api/demo/reset) — start again from scratch
+  if (data.summary.totalTasks < since) {
+    cachedTimeline = [];
+    const fresh: MetricsResponse = await fetcher(url);
+    cachedTimeline = fresh.timeline;
+    return fresh;
+  }
+
+  cachedTimeline = [...cachedTimeline, ...data.timeline];
+  return { ...data, timeline: cachedTimeline };
+};
+
 export function useMetrics() {
-  return useSWR<MetricsResponse>("/api/metrics", fetcher, {
+  return useSWR<MetricsResponse>("/api/metrics", incrementalFetcher, {
     refreshInterval: 5000,
     revalidateOnFocus: true,
   });
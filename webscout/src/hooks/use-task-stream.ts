@@ -1,5 +1,5 @@
 import { useState, useEffect, useRef, useCallback } from "react";
-import type { TaskResult } from "@/lib/utils/types";
+import type { TaskResult, TaskStep } from "@/lib/utils/types";
 
 interface UseTaskStreamReturn {
   task: TaskResult | null;
@@ -11,7 +11,9 @@ interface UseTaskStreamReturn {
  * React hook that subscribes to a task's SSE stream for real-time updates.
  *
  * Connects to `/api/tasks/${taskId}/stream` using the browser's EventSource
- * API. Automatically cleans up the connection on unmount or when the taskId
+ * API. The server sends one full snapshot, then incremental `step`,
+ * `session` and `complete` events that are merged into the held task.
+ * Automatically cleans up the connection on unmount or when the taskId
  * changes. Falls back gracefully (returns null task) if SSE fails.
  *
  * @param taskId - The task ID to stream, or null to stay idle.
@@ -45,6 +47,8 @@ export function useTaskStream(taskId: string | null): UseTaskStreamReturn {
     const url = `/api/tasks/${taskId}/stream`;
     const es = new EventSource(url);
     eventSourceRef.current = es;
+    /** Steps held so far (mirrors state synchronously; -1 until the snapshot) */
+    let heldSteps = -1;
 
     /** Handle normal data messages (unnamed events). */
     es.onmessage = (event: MessageEvent) => {
@@ -52,6 +56,7 @@ export function useTaskStream(taskId: string | null): UseTaskStreamReturn {
         const data = JSON.parse(event.data) as TaskResult;
         // Only update state if this looks like a valid task object.
         if (data && data.id && data.status) {
+          heldSteps = data.steps.length;
           setTask(data);
           setError(null);
         }
@@ -61,9 +66,80 @@ export function useTaskStream(taskId: string | null): UseTaskStreamReturn {
       }
     };
 
+    /** Re-read the whole task when the stream skipped ahead of what we hold. */
+    let refetching = false;
+    const refetch = () => {
+      if (refetching) return;
+      refetching = true;
+      fetch(`/api/tasks/${taskId}`)
+        .then((res) => (res.ok ? (res.json() as Promise<TaskResult>) : null))
+        .then((data) => {
+          if (data && data.id && eventSourceRef.current === es) {
+            heldSteps = data.steps.length;
+            setTask(data);
+          }
+        })
+        .catch(() => {
+          // The next event that skips ahead tries again.
+        })
+        .finally(() => {
+          refetching = false;
+        });
+    };
+
+    /**
+     * Handle an incremental step: replace the step at `index` (a repeated
+     * event is just an overwrite) or append it. An index past the end means
+     * steps were missed, so the task is refetched instead of leaving a gap.
+     */
+    es.addEventListener("step", ((event: MessageEvent) => {
+      try {
+        const { index, step } = JSON.parse(event.data) as { index: number; step: TaskStep };
+        // Before the snapshot arrives there is nothing to merge into; it will include this step
+        if (heldSteps < 0) return;
+        if (index > heldSteps) {
+          refetch();
+          return;
+        }
+        heldSteps = Math.max(heldSteps, index + 1);
+        setTask((prev) => {
+          if (!prev || index > prev.steps.length) return prev;
+          const steps = [...prev.steps];
+          steps[index] = step;
+          const screenshots =
+            step.screenshot && !prev.screenshots.includes(step.screenshot)
+              ? [...prev.screenshots, step.screenshot]
+              : prev.screenshots;
+          return { ...prev, steps, screenshots };
+        });
+      } catch {
+        // Ignore malformed step events.
+      }
+    }) as EventListener);
+
+    /** Handle the live session URL becoming available. */
+    es.addEventListener("session", ((event: MessageEvent) => {
+      try {
+        const { session_url } = JSON.parse(event.data) as { session_url: string };
+        setTask((prev) => (prev ? { ...prev, session_url } : prev));
+      } catch {
+        // Ignore malformed session events.
+      }
+    }) as EventListener);
+
+    /** Handle the final task fields (steps/screenshots were already streamed). */
+    es.addEventListener("complete", ((event: MessageEvent) => {
+      try {
+        const final = JSON.parse(event.data) as Omit<TaskResult, "steps" | "screenshots">;
+        setTask((prev) => (prev ? { ...prev, ...final } : prev));
+      } catch {
+        // Ignore malformed completion events.
+      }
+    }) as EventListener);
+
     /** Handle the custom "done" event -- server signals task is complete. */
     es.addEventListener("done", () => {
-      // The last task state was already set via onmessage; just close.
+      // The last task state was already merged from the stream; just close.
       closeEventSource();
     });
 
@@ -100,3 +100,94 @@ export const assessExtractionQuality = createTracedOp(
     }),
   }
 );
+
+export interface QualityAssessmentInput {
+  target: string;
+  result: unknown;
+  url: string;
+}
+
+/**
+ * Assess several extractions in one chat completion. Used by the async
+ * post-processor, where tasks finishing close together share a call. Any
+ * item the batched response does not cover is assessed on its own.
+ */
+export const assessExtractionQualityBatch = createTracedOp(
+  "assessExtractionQualityBatch",
+  async function assessExtractionQualityBatch(
+    items: QualityAssessmentInput[]
+  ): Promise<QualityAssessment[]> {
+    if (items.length === 1) {
+      return [await assessExtractionQuality(items[0].target, items[0].result, items[0].url)];
+    }
+
+    // Keep the prompt about the size of a single assessment's
+    const perItemChars = Math.max(500, Math.floor(8000 / items.length));
+    const response = await getOpenAI().chat.completions.create({
+      model: "gpt-4o-mini",
+      temperature: 0,
+      response_format: { type: "json_object" },
+      messages: [
+        {
+          role: "system",
+          content: [
+            "You are a data-quality evaluator for a web-scraping system.",
+            "You will receive several numbered items, each with a target description,",
+            "the URL that was scraped, and the extracted result.",
+            "Assess each item independently: how well does its result satisfy its target?",
+            "",
+            'Respond with ONLY a JSON object {"assessments": [...]} with one entry per item:',
+            '  "index": the item number,',
+            '  "quality_score": integer 0-100 (100 = perfect match),',
+            '  "summary": a one-sentence explanation of the assessment,',
+            '  "confidence": one of "high", "medium", "low".',
+          ].join("\n"),
+        },
+        {
+          role: "user",
+          content: items
+            .map((item, index) => {
+              const resultStr =
+                typeof item.result === "string" ? item.result : JSON.stringify(item.result, null, 2);
+              return [
+                `### Item ${index}`,
+                `URL: ${item.url}`,
+                `Target: ${item.target}`,
+                `Extracted result:\n${resultStr.substring(0, perItemChars)}`,
+              ].join("\n");
+            })
+            .join("\n\n"),
+        },
+      ],
+    });
+
+    const assessments: (QualityAssessment | null)[] = items.map(() => null);
+    try {
+      const text = response.choices[0]?.message?.content?.trim() || "{}";
+      const parsed = JSON.parse(text) as { assessments?: (QualityAssessment & { index: number })[] };
+      for (const entry of parsed.assessments ?? []) {
+        const index = Number(entry.index);
+        if (!Number.isInteger(index) || index < 0 || index >= items.length) continue;
+        assessments[index] = {
+          quality_score: Math.max(0, Math.min(100, Number(entry.quality_score) || 0)),
+          summary: entry.summary || "Unable to assess quality.",
+          confidence: entry.confidence || "low",
+        };
+      }
+    } catch {
+      // Fall through: every item is assessed individually below
+    }
+
+    return Promise.all(
+      assessments.map((assessment, i) =>
+        assessment ?? assessExtractionQuality(items[i].target, items[i].result, items[i].url)
+      )
+    );
+  },
+  {
+    callDisplayName: (items: QualityAssessmentInput[]) => `quality_batch:${items.length}`,
+    summarize: (results: QualityAssessment[]) => ({
+      "webscout.quality_batch_size": results.length,
+    }),
+  }
+);
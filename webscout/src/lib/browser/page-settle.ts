@@ -0,0 +1,139 @@
+import type { Page } from "@browserbasehq/stagehand";
+import { createTracedOp } from "../tracing/weave";
+
+/** Upper bound on any settle wait */
+const SETTLE_MAX_MS = parseInt(process.env.SETTLE_MAX_MS || "8000", 10);
+/** No new content and no finished requests for this long counts as settled */
+const SETTLE_QUIET_MS = parseInt(process.env.SETTLE_QUIET_MS || "500", 10);
+/** Budget for a host with no learned settle time yet — about the fixed sleep this replaced */
+const SETTLE_DEFAULT_BUDGET_MS = parseInt(process.env.SETTLE_DEFAULT_BUDGET_MS || "2000", 10);
+/** Floor for a learned budget, so one fast visit can't starve the next */
+const SETTLE_MIN_BUDGET_MS = 1000;
+/** Once the target region exists, wait only this long for it to stop changing */
+const TARGET_QUIET_MS = 150;
+
+export type SettleReason = "target" | "quiet" | "timeout" | "navigated";
+
+export interface SettleResult {
+  ms: number;
+  reason: SettleReason;
+  budgetMs: number;
+}
+
+export interface SettleOptions {
+  /** Stop as soon as this CSS selector matches (a pattern's learned target region) */
+  target?: string;
+  /** Learned settle time for the domain; sets the budget instead of SETTLE_MAX_MS */
+  estimateMs?: number | null;
+  quietMs?: number;
+  maxMs?: number;
+}
+
+/**
+ * Time budget for a page whose domain usually settles in `estimateMs`:
+ * twice the estimate, within [SETTLE_MIN_BUDGET_MS, SETTLE_MAX_MS].
+ * Without an estimate, SETTLE_DEFAULT_BUDGET_MS.
+ */
+export function settleBudgetMs(estimateMs?: number | null): number {
+  if (!estimateMs || estimateMs <= 0) return Math.min(SETTLE_DEFAULT_BUDGET_MS, SETTLE_MAX_MS);
+  return Math.round(Math.min(Math.max(estimateMs * 2, SETTLE_MIN_BUDGET_MS), SETTLE_MAX_MS));
+}
+
+/**
+ * Whether the wait measured how long the page takes to settle. A timeout
+ * only measures the budget, and a navigation cut the wait short, so
+ * neither should feed the learned estimate.
+ */
+export function isSettleSample(result: SettleResult): boolean {
+  return result.reason === "quiet" || result.reason === "target";
+}
+
+/**
+ * Wait until a freshly loaded page is ready to extract from, instead of a
+ * fixed sleep. With a `target`, resolves once it matches and the page has
+ * been stable briefly (or it has existed for `quietMs` on a page that never
+ * stops changing); quiescence alone doesn't count, since an SPA can sit
+ * quiet before it renders. Without one, resolves once the document has
+ * parsed and neither the DOM (nodes or text) nor the network (finished
+ * resource loads) has changed for `quietMs`. Either way the budget caps the
+ * wait. Static pages typically settle in about `quietMs`.
+ */
+export const settlePage = createTracedOp(
+  "settlePage",
+  async function settlePage(page: Page, options: SettleOptions = {}): Promise<SettleResult> {
+    const budgetMs = options.maxMs ?? settleBudgetMs(options.estimateMs);
+    const start = Date.now();
+    let reason: SettleReason;
+    try {
+      reason = await page.evaluate(waitForSettle, {
+        maxMs: budgetMs,
+        quietMs: options.quietMs ?? SETTLE_QUIET_MS,
+        targetQuietMs: TARGET_QUIET_MS,
+        target: options.target ?? null,
+      });
+    } catch {
+      // The page navigated (client-side redirect) and took the evaluation with it
+      reason = "navigated";
+    }
+    return { ms: Date.now() - start, reason, budgetMs };
+  },
+  {
+    summarize: (result: SettleResult) => ({
+      "webscout.settle_ms": result.ms,
+      "webscout.settle_reason": result.reason,
+    }),
+  }
+);
+
+// Runs in the page (serialized by page.evaluate) — must be self-contained
+function waitForSettle(args: {
+  maxMs: number;
+  quietMs: number;
+  targetQuietMs: number;
+  target: string | null;
+}): Promise<SettleReason> {
+  return new Promise((resolve) => {
+    const start = performance.now();
+    let lastChange = start;
+    let targetSeenAt: number | null = null;
+    const changed = () => {
+      lastChange = performance.now();
+    };
+
+    // Attribute churn (animations, carousels) doesn't count — only content
+    const mutations = new MutationObserver(changed);
+    mutations.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    let resources: PerformanceObserver | null = null;
+    try {
+      resources = new PerformanceObserver(changed);
+      resources.observe({ type: "resource" });
+    } catch {
+      // PerformanceObserver unsupported — DOM stability alone decides
+    }
+
+    const timer = setInterval(() => {
+      const now = performance.now();
+      let reason: SettleReason | null = null;
+      if (args.target) {
+        try {
+          if (!document.querySelector(args.target)) targetSeenAt = null;
+          else if (targetSeenAt === null) targetSeenAt = now;
+          if (targetSeenAt !== null && (now - lastChange >= args.targetQuietMs || now - targetSeenAt >= args.quietMs)) {
+            reason = "target";
+          }
+        } catch {
+          args.target = null; // Invalid selector — fall back to quiescence
+        }
+      } else if (document.readyState !== "loading" && now - lastChange >= args.quietMs) {
+        reason = "quiet";
+      }
+      if (!reason && now - start >= args.maxMs) reason = "timeout";
+      if (reason) {
+        clearInterval(timer);
+        mutations.disconnect();
+        resources?.disconnect();
+        resolve(reason);
+      }
+    }, 50);
+  });
+}
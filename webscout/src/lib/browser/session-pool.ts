@@ -0,0 +1,361 @@
+import type { Stagehand, Page } from "@browserbasehq/stagehand";
+import { createStagehand, closeStagehand } from "./stagehand-client";
+
+const POOL_MIN = parseInt(process.env.BROWSER_POOL_MIN || "1", 10);
+const POOL_MAX = Math.max(parseInt(process.env.BROWSER_POOL_MAX || "3", 10), 1);
+const MAX_TASKS_PER_SESSION = parseInt(process.env.BROWSER_POOL_MAX_TASKS || "20", 10);
+const IDLE_TIMEOUT_MS = parseInt(process.env.BROWSER_POOL_IDLE_MS || `${4 * 60 * 1000}`, 10);
+const HEALTH_CHECK_TIMEOUT_MS = 3000;
+const REAP_INTERVAL_MS = 30000;
+
+/**
+ * Pool of warm Stagehand sessions.
+ *
+ * Sessions are leased per task instead of created and closed per task, so
+ * only the first task on a session pays cloud-browser startup. A session is
+ * health-checked before each lease, has its context reset between tasks, and
+ * is recycled after BROWSER_POOL_MAX_TASKS tasks. At most BROWSER_POOL_MAX
+ * sessions exist at once (further leases queue); idle sessions above
+ * BROWSER_POOL_MIN are closed after BROWSER_POOL_IDLE_MS.
+ */
+
+interface PooledSession {
+  stagehand: Stagehand;
+  tasksServed: number;
+  createdAt: number;
+  lastUsedAt: number;
+}
+
+export interface SessionLease {
+  stagehand: Stagehand;
+  page: Page;
+  /** True when the session had already served a task */
+  reused: boolean;
+  /** How many tasks this session has served, including this one */
+  taskNumber: number;
+  /** Time spent waiting for a free session (includes creating one) */
+  waitMs: number;
+  /** Return the session to the pool; pass false to discard it instead */
+  release: (healthy?: boolean) => Promise<void>;
+}
+
+export interface SessionPoolStats {
+  min: number;
+  max: number;
+  idle: number;
+  busy: number;
+  waiting: number;
+  leases: number;
+  reuses: number;
+  created: number;
+  recycled: number;
+  discarded: number;
+  avgWaitMs: number;
+  maxWaitMs: number;
+}
+
+const idle: PooledSession[] = [];
+// Pooled session behind each outstanding lease, for holdSession()
+const leasedSessions = new WeakMap<SessionLease, PooledSession>();
+const busy = new Set<PooledSession>();
+const waiters: Array<{
+  resolve: (session: PooledSession) => void;
+  reject: (error: Error) => void;
+}> = [];
+let creating = 0;
+/** Idle sessions taken out for a health check, still counted towards BROWSER_POOL_MAX */
+let checking = 0;
+let draining = false;
+let reaper: ReturnType<typeof setInterval> | null = null;
+
+const stats = {
+  leases: 0,
+  reuses: 0,
+  created: 0,
+  recycled: 0,
+  discarded: 0,
+  totalWaitMs: 0,
+  maxWaitMs: 0,
+};
+
+function sessionCount(): number {
+  return idle.length + busy.size + creating + checking;
+}
+
+async function createSession(): Promise<PooledSession> {
+  creating++;
+  try {
+    const stagehand = await createStagehand();
+    stats.created++;
+    const now = Date.now();
+    return { stagehand, tasksServed: 0, createdAt: now, lastUsedAt: now };
+  } finally {
+    creating--;
+  }
+}
+
+async function destroySession(session: PooledSession): Promise<void> {
+  await closeStagehand(session.stagehand);
+}
+
+async function isHealthy(session: PooledSession): Promise<boolean> {
+  try {
+    const page = session.stagehand.context.pages()[0];
+    if (!page) return false;
+    await Promise.race([
+      page.evaluate(() => document.readyState),
+      new Promise((_, reject) =>
+        setTimeout(() => reject(new Error("health check timed out")), HEALTH_CHECK_TIMEOUT_MS)
+      ),
+    ]);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Clear per-task state so the next task starts from a blank page: extra tabs
+ * are closed, storage and cookies are cleared, and the first page is parked
+ * on about:blank.
+ */
+async function resetContext(session: PooledSession): Promise<void> {
+  const context = session.stagehand.context;
+  const [page, ...extra] = context.pages();
+  await Promise.all(extra.map((p) => p.close().catch(() => {})));
+  if (!page) throw new Error("Session has no page");
+  await page
+    .evaluate(() => {
+      try {
+        localStorage.clear();
+        sessionStorage.clear();
+      } catch {
+        // Opaque origins (e.g. about:blank) have no storage
+      }
+    })
+    .catch(() => {});
+  const clearCookies = (context as unknown as { clearCookies?: () => Promise<void> }).clearCookies;
+  if (clearCookies) await clearCookies.call(context);
+  await page.goto("about:blank");
+}
+
+function hand(session: PooledSession): void {
+  if (draining) {
+    destroySession(session).catch(() => {});
+    return;
+  }
+  const waiter = waiters.shift();
+  if (waiter) {
+    waiter.resolve(session);
+  } else {
+    session.lastUsedAt = Date.now();
+    idle.push(session);
+  }
+}
+
+/** Create a session for the next waiter (or the idle list) if there is room. */
+function growForWaiters(): void {
+  while (waiters.length > creating && sessionCount() < POOL_MAX) {
+    createSession().then(hand, (error) => {
+      console.warn("[SessionPool] Failed to create session:", (error as Error).message);
+      // Fail one waiter rather than leaving it queued behind a broken create
+      waiters.shift()?.reject(error as Error);
+    });
+  }
+}
+
+function ensureMinSessions(): void {
+  while (sessionCount() < Math.min(POOL_MIN, POOL_MAX)) {
+    createSession().then(hand, (error) => {
+      console.warn("[SessionPool] Failed to pre-warm session:", (error as Error).message);
+    });
+  }
+}
+
+function startReaper(): void {
+  if (reaper) return;
+  reaper = setInterval(() => {
+    const now = Date.now();
+    for (let i = idle.length - 1; i >= 0 && sessionCount() > POOL_MIN; i--) {
+      if (now - idle[i].lastUsedAt > IDLE_TIMEOUT_MS) {
+        const [session] = idle.splice(i, 1);
+        destroySession(session).catch(() => {});
+      }
+    }
+    ensureMinSessions();
+  }, REAP_INTERVAL_MS);
+  reaper.unref?.();
+}
+
+async function takeIdleHealthy(): Promise<PooledSession | null> {
+  while (idle.length > 0) {
+    // Most recently used first — it is the least likely to have timed out
+    const session = idle.pop()!;
+    checking++;
+    let healthy: boolean;
+    try {
+      healthy = await isHealthy(session);
+    } finally {
+      checking--;
+    }
+    if (healthy) {
+      // Counted as busy before this resolves, so the count has no gap
+      busy.add(session);
+      return session;
+    }
+    stats.discarded++;
+    console.warn("[SessionPool] Discarding unhealthy idle session");
+    destroySession(session).catch(() => {});
+  }
+  return null;
+}
+
+/**
+ * Lease a warm session, creating one if the pool has room, otherwise waiting
+ * for the next release. Always call `release()` when the task is done.
+ */
+export async function acquireSession(): Promise<SessionLease> {
+  const start = Date.now();
+  draining = false;
+  startReaper();
+
+  let session = await takeIdleHealthy();
+  if (!session) {
+    if (sessionCount() < POOL_MAX) {
+      session = await createSession();
+    } else {
+      session = await new Promise<PooledSession>((resolve, reject) => {
+        waiters.push({ resolve, reject });
+        growForWaiters();
+      });
+    }
+  }
+
+  busy.add(session);
+  session.tasksServed++;
+  const waitMs = Date.now() - start;
+  const reused = session.tasksServed > 1;
+  stats.leases++;
+  if (reused) stats.reuses++;
+  stats.totalWaitMs += waitMs;
+  stats.maxWaitMs = Math.max(stats.maxWaitMs, waitMs);
+  ensureMinSessions();
+
+  const leased = session;
+  let released = false;
+  const lease: SessionLease = {
+    stagehand: leased.stagehand,
+    page: leased.stagehand.context.pages()[0],
+    reused,
+    taskNumber: leased.tasksServed,
+    waitMs,
+    release: async (healthy: boolean = true) => {
+      if (released) return;
+      released = true;
+
+      let keep = healthy && leased.tasksServed < MAX_TASKS_PER_SESSION;
+      if (keep) {
+        try {
+          await resetContext(leased);
+        } catch (error) {
+          console.warn("[SessionPool] Context reset failed:", (error as Error).message);
+          keep = false;
+        }
+      }
+
+      // Stays counted as busy through the reset so the pool can't overshoot max
+      busy.delete(leased);
+      if (keep) {
+        hand(leased);
+        return;
+      }
+      if (healthy) stats.recycled++;
+      else stats.discarded++;
+      growForWaiters();
+      ensureMinSessions();
+      await destroySession(leased);
+    },
+  };
+  leasedSessions.set(lease, leased);
+  return lease;
+}
+
+export interface SessionHold {
+  /** Lease for the next task of the sequence; its release() is a no-op */
+  next: () => Promise<SessionLease>;
+  /** Return the held session to the pool (resetting its context) */
+  release: () => Promise<void>;
+}
+
+/**
+ * Keep one session for a sequence of tasks on the same site (a batch group).
+ * Each task gets a lease on the held browser without the context reset in
+ * between, so cookies and consent choices carry over from page to page.
+ * Before each further task the session is health-checked; a dead session is
+ * discarded and one that reached BROWSER_POOL_MAX_TASKS is recycled, and the
+ * sequence continues on a fresh lease.
+ */
+export function holdSession(): SessionHold {
+  let held: SessionLease | null = null;
+  return {
+    next: async () => {
+      const start = Date.now();
+      const session = held ? leasedSessions.get(held) : undefined;
+      if (held && session) {
+        if (session.tasksServed < MAX_TASKS_PER_SESSION && (await isHealthy(session))) {
+          session.tasksServed++;
+          const waitMs = Date.now() - start;
+          stats.leases++;
+          stats.reuses++;
+          stats.totalWaitMs += waitMs;
+          return {
+            ...held,
+            page: session.stagehand.context.pages()[0],
+            reused: true,
+            taskNumber: session.tasksServed,
+            waitMs,
+            release: async () => {},
+          };
+        }
+        // Worn out (recycled as healthy) or failed the check (discarded)
+        const wornOut = session.tasksServed >= MAX_TASKS_PER_SESSION;
+        await held.release(wornOut);
+        held = null;
+      }
+      held = await acquireSession();
+      return { ...held, release: async () => {} };
+    },
+    release: async () => {
+      await held?.release();
+      held = null;
+    },
+  };
+}
+
+export function getSessionPoolStats(): SessionPoolStats {
+  return {
+    min: POOL_MIN,
+    max: POOL_MAX,
+    idle: idle.length,
+    busy: busy.size,
+    waiting: waiters.length,
+    leases: stats.leases,
+    reuses: stats.reuses,
+    created: stats.created,
+    recycled: stats.recycled,
+    discarded: stats.discarded,
+    avgWaitMs: stats.leases > 0 ? Math.round(stats.totalWaitMs / stats.leases) : 0,
+    maxWaitMs: stats.maxWaitMs,
+  };
+}
+
+/** Close every pooled session (e.g. on shutdown). Busy sessions close on release. */
+export async function drainSessionPool(): Promise<void> {
+  draining = true;
+  if (reaper) {
+    clearInterval(reaper);
+    reaper = null;
+  }
+  const sessions = idle.splice(0, idle.length);
+  await Promise.all(sessions.map(destroySession));
+}
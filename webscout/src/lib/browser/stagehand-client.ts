@@ -10,7 +10,28 @@ export function getSessionDebugUrl(stagehand: Stagehand): string | undefined {
   return `https://www.browserbase.com/sessions/${sessionId}`;
 }
 
+/**
+ * BROWSER_ENV=LOCAL launches a local headless Chromium instead of a
+ * Browserbase session — used by the offline benchmark stack
+ * (scripts/offline_stack.py) so scrapes can run without cloud browsers.
+ */
+function isLocalBrowser(): boolean {
+  return process.env.BROWSER_ENV?.toUpperCase() === "LOCAL";
+}
+
 export async function createStagehand(): Promise<Stagehand> {
+  if (isLocalBrowser()) {
+    const stagehand = new Stagehand({
+      env: "LOCAL",
+      localBrowserLaunchOptions: { headless: true },
+      model: "google/gemini-2.0-flash",
+      verbose: 0,
+    });
+    await stagehand.init();
+    console.log("[Stagehand] Initialized with local browser");
+    return stagehand;
+  }
+
   if (!process.env.BROWSERBASE_API_KEY) {
     throw new Error(
       "BROWSERBASE_API_KEY is not set. Get your API key from https://www.browserbase.com/settings"
@@ -0,0 +1,219 @@
+import { createHash } from "crypto";
+import { RESP_TYPES } from "redis";
+import { getRedisClient } from "../redis/client";
+
+const CACHE_PREFIX = "embedding_cache:";
+const STATS_KEY = "embedding_cache:stats";
+const MEMORY_MAX_ENTRIES = parseInt(process.env.EMBEDDING_CACHE_SIZE || "1000", 10);
+const MEMORY_TTL_MS = parseInt(process.env.EMBEDDING_CACHE_TTL_MS || `${60 * 60 * 1000}`, 10);
+/** Entries kept per model in Redis (about 6 KB each at 1536 dims); least recently used go first */
+const REDIS_MAX_ENTRIES = parseInt(process.env.EMBEDDING_CACHE_REDIS_MAX_ENTRIES || "20000", 10);
+
+/**
+ * Two-tier embedding cache.
+ *
+ * Tier one is an in-process LRU (bounded by entry count and TTL); tier two is
+ * one Redis hash per model, `embedding_cache:<model>`, whose fields are the
+ * sha256 of the normalized text and whose values are the raw Float32 bytes.
+ * Embeddings are deterministic per model and text, so entries never go stale,
+ * but the Redis tier is capped: `embedding_cache:<model>:lru` scores every
+ * field by its last use, and writes trim the least recently used beyond
+ * EMBEDDING_CACHE_REDIS_MAX_ENTRIES.
+ */
+
+/**
+ * Store embeddings, mark them used and trim the oldest past the cap.
+ *
+ * KEYS[1] = cache hash, KEYS[2] = last-use zset
+ * ARGV[1] = now (ms), ARGV[2] = max entries, ARGV[3..] = field, bytes pairs
+ * Returns the number of entries evicted.
+ */
+const WRITE_SCRIPT = `
+for i = 3, #ARGV, 2 do
+  redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+  redis.call('ZADD', KEYS[2], ARGV[1], ARGV[i])
+end
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[2])
+if excess <= 0 then return 0 end
+local oldest = redis.call('ZRANGE', KEYS[2], 0, excess - 1)
+for _, field in ipairs(oldest) do
+  redis.call('HDEL', KEYS[1], field)
+  redis.call('ZREM', KEYS[2], field)
+end
+return excess
+`;
+
+function lruKey(model: string): string {
+  return `${CACHE_PREFIX}${model}:lru`;
+}
+
+interface MemoryEntry {
+  embedding: number[];
+  expiresAt: number;
+}
+
+const memory = new Map<string, MemoryEntry>();
+const localStats = { memoryHits: 0, redisHits: 0, misses: 0 };
+
+export interface EmbeddingCacheStats {
+  memoryHits: number;
+  redisHits: number;
+  misses: number;
+  hitRate: number;
+  memoryEntries: number;
+}
+
+/** Collapse whitespace and cap length — the text that is actually embedded. */
+export function normalizeEmbeddingText(text: string): string {
+  return text.trim().replace(/\s+/g, " ").substring(0, 8000);
+}
+
+function textHash(normalized: string): string {
+  return createHash("sha256").update(normalized).digest("hex");
+}
+
+function memoryKey(model: string, hash: string): string {
+  return `${model}:${hash}`;
+}
+
+function memoryGet(key: string): number[] | null {
+  const entry = memory.get(key);
+  if (!entry) return null;
+  if (entry.expiresAt < Date.now()) {
+    memory.delete(key);
+    return null;
+  }
+  // Re-insert to mark as most recently used
+  memory.delete(key);
+  memory.set(key, entry);
+  return entry.embedding;
+}
+
+function memorySet(key: string, embedding: number[]): void {
+  memory.delete(key);
+  memory.set(key, { embedding, expiresAt: Date.now() + MEMORY_TTL_MS });
+  while (memory.size > MEMORY_MAX_ENTRIES) {
+    const oldest = memory.keys().next().value;
+    if (oldest === undefined) break;
+    memory.delete(oldest);
+  }
+}
+
+function toBytes(embedding: number[]): Buffer {
+  return Buffer.from(new Float32Array(embedding).buffer);
+}
+
+function fromBytes(bytes: Buffer): number[] {
+  // Copy into an aligned ArrayBuffer — Buffer slices may start at any offset
+  const aligned = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.byteLength);
+  return Array.from(new Float32Array(aligned));
+}
+
+function recordStats(memoryHits: number, redisHits: number, misses: number): void {
+  localStats.memoryHits += memoryHits;
+  localStats.redisHits += redisHits;
+  localStats.misses += misses;
+  getRedisClient()
+    .then((client) => {
+      const pipeline = client.multi();
+      if (memoryHits) pipeline.hIncrBy(STATS_KEY, "memory_hits", memoryHits);
+      if (redisHits) pipeline.hIncrBy(STATS_KEY, "redis_hits", redisHits);
+      if (misses) pipeline.hIncrBy(STATS_KEY, "misses", misses);
+      return pipeline.execAsPipeline();
+    })
+    .catch(() => {});
+}
+
+/**
+ * Return embeddings for `texts`, computing only the ones missing from both
+ * tiers with a single call to `compute`. Redis failures degrade to a miss.
+ */
+export async function getCachedEmbeddings(
+  model: string,
+  texts: string[],
+  compute: (normalized: string[]) => Promise<number[][]>
+): Promise<number[][]> {
+  const normalized = texts.map(normalizeEmbeddingText);
+  const hashes = normalized.map(textHash);
+  const results: (number[] | null)[] = hashes.map((hash) => memoryGet(memoryKey(model, hash)));
+  const memoryHits = results.filter(Boolean).length;
+
+  let redisHits = 0;
+  const pending = results.flatMap((r, i) => (r ? [] : [i]));
+  if (pending.length > 0) {
+    try {
+      const client = await getRedisClient();
+      const stored = (await client
+        .withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer })
+        .hmGet(`${CACHE_PREFIX}${model}`, pending.map((i) => hashes[i]))) as (Buffer | null)[];
+      const used: { score: number; value: string }[] = [];
+      stored.forEach((bytes, j) => {
+        if (!bytes) return;
+        const i = pending[j];
+        results[i] = fromBytes(bytes);
+        memorySet(memoryKey(model, hashes[i]), results[i]!);
+        used.push({ score: Date.now(), value: hashes[i] });
+        redisHits++;
+      });
+      if (used.length > 0) {
+        client.zAdd(lruKey(model), used).catch(() => {});
+      }
+    } catch (error) {
+      console.warn("[Embeddings] Cache read failed:", (error as Error).message);
+    }
+  }
+
+  // Identical texts in one batch are computed once
+  const missing = [...new Set(results.flatMap((r, i) => (r ? [] : [normalized[i]])))];
+  if (missing.length > 0) {
+    const computed = await compute(missing);
+    const byText = new Map(missing.map((text, j) => [text, computed[j]]));
+    const fields = new Map<string, Buffer>();
+    results.forEach((r, i) => {
+      if (r) return;
+      results[i] = byText.get(normalized[i])!;
+      memorySet(memoryKey(model, hashes[i]), results[i]!);
+      fields.set(hashes[i], toBytes(results[i]!));
+    });
+    getRedisClient()
+      .then((client) =>
+        client.eval(WRITE_SCRIPT, {
+          keys: [`${CACHE_PREFIX}${model}`, lruKey(model)],
+          arguments: [
+            Date.now().toString(),
+            REDIS_MAX_ENTRIES.toString(),
+            ...[...fields].flatMap(([hash, bytes]) => [hash, bytes]),
+          ],
+        })
+      )
+      .catch((error) => console.warn("[Embeddings] Cache write failed:", (error as Error).message));
+  }
+
+  recordStats(memoryHits, redisHits, texts.length - memoryHits - redisHits);
+  return results as number[][];
+}
+
+/**
+ * Hit/miss counters shared across processes (falls back to this process's
+ * counters if Redis is unavailable). `memoryEntries` is per-process.
+ */
+export async function getEmbeddingCacheStats(): Promise<EmbeddingCacheStats> {
+  let counts = localStats;
+  try {
+    const client = await getRedisClient();
+    const data = await client.hGetAll(STATS_KEY);
+    counts = {
+      memoryHits: parseInt(data?.memory_hits || "0", 10),
+      redisHits: parseInt(data?.redis_hits || "0", 10),
+      misses: parseInt(data?.misses || "0", 10),
+    };
+  } catch {
+    // Use in-process counters
+  }
+  const lookups = counts.memoryHits + counts.redisHits + counts.misses;
+  return {
+    ...counts,
+    hitRate: lookups > 0 ? Math.round(((counts.memoryHits + counts.redisHits) / lookups) * 10000) / 100 : 0,
+    memoryEntries: memory.size,
+  };
+}
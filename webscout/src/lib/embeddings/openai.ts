@@ -1,5 +1,25 @@
 import OpenAI from "openai";
 import { createTracedOp } from "../tracing/weave";
+import { getCachedEmbeddings } from "./cache";
+
+const EMBEDDING_MODEL = "text-embedding-3-small";
+const NATIVE_DIMENSIONS = 1536;
+
+/**
+ * Embedding width. text-embedding-3 models return shortened (still
+ * normalized) vectors natively, trading a little recall for a much smaller
+ * vector index. Changing it requires `npm run reindex`.
+ */
+export const EMBEDDING_DIMENSIONS = parseInt(
+  process.env.EMBEDDING_DIMENSIONS || `${NATIVE_DIMENSIONS}`,
+  10
+);
+
+// Shortened vectors must not share cache entries with full-width ones
+const CACHE_NAMESPACE =
+  EMBEDDING_DIMENSIONS === NATIVE_DIMENSIONS
+    ? EMBEDDING_MODEL
+    : `${EMBEDDING_MODEL}@${EMBEDDING_DIMENSIONS}`;
 
 let openai: OpenAI | null = null;
 
@@ -28,14 +48,21 @@ export async function initOpenAITracing(): Promise<void> {
   }
 }
 
+// Cache misses only — inputs arrive already normalized by getCachedEmbeddings()
+async function requestEmbeddings(inputs: string[]): Promise<number[][]> {
+  const response = await getOpenAI().embeddings.create({
+    model: EMBEDDING_MODEL,
+    input: inputs,
+    ...(EMBEDDING_DIMENSIONS !== NATIVE_DIMENSIONS && { dimensions: EMBEDDING_DIMENSIONS }),
+  });
+  return response.data.map((d) => d.embedding);
+}
+
 export const generateEmbedding = createTracedOp(
   "generateEmbedding",
   async function generateEmbedding(text: string): Promise<number[]> {
-    const response = await getOpenAI().embeddings.create({
-      model: "text-embedding-3-small",
-      input: text.trim().substring(0, 8000),
-    });
-    return response.data[0].embedding;
+    const [embedding] = await getCachedEmbeddings(CACHE_NAMESPACE, [text], requestEmbeddings);
+    return embedding;
   },
   {
     callDisplayName: (text: string) =>
@@ -46,11 +73,8 @@ export const generateEmbedding = createTracedOp(
 export const generateEmbeddings = createTracedOp(
   "generateEmbeddings",
   async function generateEmbeddings(texts: string[]): Promise<number[][]> {
-    const response = await getOpenAI().embeddings.create({
-      model: "text-embedding-3-small",
-      input: texts.map((t) => t.trim().substring(0, 8000)),
-    });
-    return response.data.map((d) => d.embedding);
+    if (texts.length === 0) return [];
+    return getCachedEmbeddings(CACHE_NAMESPACE, texts, requestEmbeddings);
   }
 );
 
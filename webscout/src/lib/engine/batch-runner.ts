@@ -0,0 +1,86 @@
+import { holdSession } from "../browser/session-pool";
+import { generateEmbeddings } from "../embeddings/openai";
+import { getPattern } from "../redis/patterns";
+import { getTaskStatus, updateTaskStatus } from "../redis/tasks";
+import { recordBatchItem, type BatchItem } from "../redis/batches";
+import type { QueuedGroupItem } from "../redis/queue";
+import { extractUrlPattern } from "../utils/url";
+import { runTask, failTask } from "./task-runner";
+import type { PagePattern } from "../utils/types";
+
+function toBatchItem(item: QueuedGroupItem): BatchItem {
+  return {
+    index: item.index,
+    task_id: item.taskId,
+    url: item.url,
+    target: item.target,
+    url_pattern: extractUrlPattern(item.url),
+  };
+}
+
+/**
+ * Run one batch group (items sharing a url pattern) in order in a single
+ * held browser session.
+ *
+ * The group's query embeddings were computed in one call when the batch was
+ * submitted; one more batched cache read here pulls them into this
+ * process's memory tier, so each page's lookup (and pattern store) embeds
+ * for free. Once a page resolves or learns a pattern, later pages with the
+ * same target reuse it instead of looking it up again. Items that already
+ * finished (a redelivered group) are skipped. `pace` is awaited before
+ * every page after the first, so the host's rate limit applies per page.
+ * Never throws — failures are stored on the items.
+ */
+export async function runTaskGroup(
+  batchId: string,
+  group: QueuedGroupItem[],
+  pace?: () => Promise<void>
+): Promise<void> {
+  const statuses = await Promise.all(group.map((item) => getTaskStatus(item.taskId).catch(() => null)));
+  const pending = group.filter((_, i) => statuses[i] !== "success" && statuses[i] !== "failed");
+  if (pending.length === 0) return;
+
+  const queryTexts = [...new Set(pending.map((item) => `${extractUrlPattern(item.url)} ${item.target}`))];
+  await generateEmbeddings(queryTexts).catch((error) => {
+    console.warn("[Batch] Embedding warm-up failed:", (error as Error).message);
+  });
+
+  const hold = holdSession();
+  const resolved = new Map<string, PagePattern[]>();
+  console.log(`[Batch] ${batchId}: running ${pending.length} page(s) of ${extractUrlPattern(pending[0].url)}`);
+  try {
+    for (const [i, item] of pending.entries()) {
+      if (i > 0 && pace) await pace().catch(console.warn);
+      const batchItem = toBatchItem(item);
+      await updateTaskStatus(item.taskId, "running");
+      await recordBatchItem(batchId, batchItem).catch(console.warn);
+
+      const task = await runTask(
+        { id: item.taskId, url: item.url, target: item.target },
+        { lease: hold.next, patterns: resolved.get(item.target) }
+      );
+      await recordBatchItem(batchId, batchItem, task).catch(console.warn);
+
+      if (task?.pattern_id) {
+        // Re-read so the next page ranks it with up-to-date counts
+        const pattern = await getPattern(task.pattern_id).catch(() => null);
+        if (pattern) resolved.set(item.target, [{ ...pattern, score: 1 }]);
+      }
+    }
+  } finally {
+    await hold.release().catch(console.warn);
+  }
+}
+
+/**
+ * Fail every unfinished item of a group that will not be run again (e.g.
+ * it exceeded its delivery limit).
+ */
+export async function failTaskGroup(batchId: string, group: QueuedGroupItem[], message: string): Promise<void> {
+  for (const item of group) {
+    const status = await getTaskStatus(item.taskId).catch(() => null);
+    if (status === "success" || status === "failed") continue;
+    const task = await failTask(item.taskId, message);
+    await recordBatchItem(batchId, toBatchItem(item), task).catch(console.warn);
+  }
+}
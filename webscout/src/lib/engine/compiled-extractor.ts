@@ -0,0 +1,358 @@
+import type { Page } from "@browserbasehq/stagehand";
+import { createTracedOp } from "../tracing/weave";
+import type { CompiledExtractor, ExtractorField } from "../utils/types";
+
+/**
+ * Deterministic extractors compiled from a successful LLM extraction.
+ *
+ * A pattern's `working_selector` is a natural-language instruction, so
+ * replaying it means another `stagehand.extract` inference. After an LLM
+ * extraction succeeds we try to find the page elements that hold each
+ * extracted value and turn them into CSS selectors plus a field mapping.
+ * The compiled extractor is kept only if re-running it on the same page
+ * reproduces the LLM's result exactly. On a later cache hit it runs in a
+ * single `page.evaluate`; any output that does not have the learned shape
+ * sends the task back to the LLM path.
+ *
+ * Supported result shapes: a string, a record of strings/numbers, a list of
+ * strings/numbers, a list of such records, and any of those lists wrapped
+ * in a single-key object (`{"books": [...]}`).
+ */
+
+/** Most list items checked against the LLM's values when compiling */
+const VERIFY_ITEMS = 10;
+
+export const compileExtractor = createTracedOp(
+  "compileExtractor",
+  async function compileExtractor(page: Page, result: unknown): Promise<CompiledExtractor | null> {
+    try {
+      const spec = await page.evaluate(compileInPage, { sample: result, verifyItems: VERIFY_ITEMS });
+      if (!spec) return null;
+      // Keep it only if it reproduces what the LLM extracted on this very page
+      const replay = await page.evaluate(runInPage, spec);
+      return replay !== null && reproduces(spec, replay, result) ? spec : null;
+    } catch (error) {
+      console.warn("[Extractor] Compile failed:", (error as Error).message);
+      return null;
+    }
+  },
+  {
+    summarize: (spec: CompiledExtractor | null) => ({
+      "webscout.extractor_compiled": spec ? 1 : 0,
+    }),
+  }
+);
+
+/**
+ * Run a compiled extractor. Returns null when the output does not have the
+ * learned shape (the page changed), so the caller falls back to the LLM.
+ */
+export const runCompiledExtractor = createTracedOp(
+  "runCompiledExtractor",
+  async function runCompiledExtractor(page: Page, spec: CompiledExtractor): Promise<unknown | null> {
+    try {
+      return await page.evaluate(runInPage, spec);
+    } catch (error) {
+      console.warn("[Extractor] Run failed:", (error as Error).message);
+      return null;
+    }
+  },
+  {
+    summarize: (result: unknown | null) => ({
+      "webscout.extractor_hit": result !== null ? 1 : 0,
+    }),
+  }
+);
+
+/**
+ * CSS selector for the region a compiled extractor reads — present once the
+ * page has rendered the data, so page settling can wait for it.
+ */
+export function extractorTarget(spec: CompiledExtractor): string | undefined {
+  if (spec.root) return spec.root;
+  const selectors = spec.fields ? Object.values(spec.fields).map((f) => f.selector) : [spec.value.selector];
+  return selectors.find((selector) => selector !== "");
+}
+
+function reproduces(spec: CompiledExtractor, replay: unknown, sample: unknown): boolean {
+  const unwrap = (value: unknown) =>
+    spec.key ? (value as Record<string, unknown>)[spec.key] : value;
+  const got = unwrap(replay);
+  const want = unwrap(sample);
+  if (spec.kind !== "list") return JSON.stringify(got) === JSON.stringify(want);
+  if (!Array.isArray(got) || !Array.isArray(want) || got.length < Math.min(want.length, VERIFY_ITEMS)) {
+    return false;
+  }
+  return want
+    .slice(0, VERIFY_ITEMS)
+    .every((item, i) => JSON.stringify(got[i]) === JSON.stringify(item));
+}
+
+// ---------------------------------------------------------------------------
+// In-page functions. These are serialized by page.evaluate, so they must be
+// self-contained: no imports and no references to anything outside them
+// (types are fine — they are erased).
+// ---------------------------------------------------------------------------
+
+function runInPage(spec: CompiledExtractor): unknown | null {
+  const norm = (s: string | null | undefined) => (s || "").replace(/\s+/g, " ").trim();
+  const read = (el: Element | null, field: ExtractorField) => {
+    if (!el) return null;
+    let raw: string;
+    if (!field.attr) raw = norm(el.textContent);
+    else if (field.absolute) raw = norm(String((el as unknown as Record<string, unknown>)[field.attr] ?? ""));
+    else raw = norm(el.getAttribute(field.attr));
+    if (!raw) return null;
+    if (field.type !== "number") return raw;
+    const n = parseFloat(raw.replace(/[^0-9.-]/g, ""));
+    return Number.isFinite(n) ? n : null;
+  };
+  const pick = (scope: ParentNode, selector: string) => (selector ? scope.querySelector(selector) : scope as Element);
+
+  let output: unknown;
+  if (spec.kind === "list") {
+    let roots = Array.from(document.querySelectorAll(spec.root!)).slice(spec.skip ?? 0);
+    if (spec.limit) roots = roots.slice(0, spec.limit);
+    if (roots.length === 0) return null;
+    const items = roots.map((root) => {
+      if (!spec.fields) return read(pick(root, spec.value.selector), spec.value);
+      const item: Record<string, unknown> = {};
+      for (const [name, field] of Object.entries(spec.fields)) item[name] = read(pick(root, field.selector), field);
+      return item;
+    });
+    // Shape check: most values present, as they were when compiled
+    const values = items.flatMap((item) =>
+      item !== null && typeof item === "object" ? Object.values(item) : [item]
+    );
+    const present = values.filter((v) => v !== null).length;
+    if (present === 0 || present < values.length * 0.8) return null;
+    output = items;
+  } else if (spec.kind === "record") {
+    const record: Record<string, unknown> = {};
+    for (const [name, field] of Object.entries(spec.fields!)) {
+      record[name] = read(pick(document, field.selector), field);
+      if (record[name] === null) return null;
+    }
+    output = record;
+  } else {
+    output = read(pick(document, spec.value.selector), spec.value);
+    if (output === null) return null;
+  }
+  return spec.key ? { [spec.key]: output } : output;
+}
+
+function compileInPage({ sample, verifyItems }: { sample: unknown; verifyItems: number }): CompiledExtractor | null {
+  type Field = ExtractorField;
+  const norm = (s: string | null | undefined) => (s || "").replace(/\s+/g, " ").trim();
+  const toNumber = (s: string) => parseFloat(s.replace(/[^0-9.-]/g, ""));
+  const isScalar = (v: unknown): v is string | number =>
+    (typeof v === "string" && norm(v) !== "") || (typeof v === "number" && Number.isFinite(v));
+
+  // Innermost element under `scope` holding `value` as its text or an attribute
+  const locate = (value: string | number, scope: Element): { el: Element; field: Field } | null => {
+    const type = typeof value === "number" ? "number" as const : undefined;
+    const want = norm(String(value));
+    const matchesText = (el: Element) => {
+      const text = el.textContent;
+      // Whitespace collapsing can't shrink a much longer text down to `want`
+      if (!text || text.length < want.length || text.length > want.length * 20 + 1000) return false;
+      if (type) {
+        const t = norm(text);
+        return t.length <= 40 && toNumber(t) === value;
+      }
+      return norm(text) === want;
+    };
+    const all = [scope, ...Array.from(scope.querySelectorAll("*"))];
+    let el = all.find((candidate) => !["SCRIPT", "STYLE", "NOSCRIPT"].includes(candidate.tagName) && matchesText(candidate));
+    if (el) {
+      let inner: Element | undefined = el;
+      while (inner) {
+        el = inner;
+        inner = Array.from(el.children).find(matchesText);
+      }
+      return { el, field: { selector: "", type } };
+    }
+    if (type) return null;
+    for (const candidate of all) {
+      for (const attr of ["href", "src", "alt", "title", "content", "value", "datetime"]) {
+        const raw = candidate.getAttribute(attr);
+        if (raw === null) continue;
+        if (norm(raw) === want) return { el: candidate, field: { selector: "", attr } };
+        const resolved = (candidate as unknown as Record<string, unknown>)[attr];
+        if ((attr === "href" || attr === "src") && typeof resolved === "string" && resolved === want) {
+          return { el: candidate, field: { selector: "", attr, absolute: true } };
+        }
+      }
+    }
+    return null;
+  };
+
+  const simple = (el: Element) =>
+    el.tagName.toLowerCase() +
+    Array.from(el.classList)
+      .filter((c) => /^[A-Za-z_-][\w-]*$/.test(c))
+      .map((c) => `.${CSS.escape(c)}`)
+      .join("");
+  const nth = (el: Element) => {
+    const same = el.parentElement
+      ? Array.from(el.parentElement.children).filter((c) => c.tagName === el.tagName)
+      : [el];
+    return same.length > 1 ? `${simple(el)}:nth-of-type(${same.indexOf(el) + 1})` : simple(el);
+  };
+  const path = (scope: Element, el: Element, step: (e: Element) => string) => {
+    const parts: string[] = [];
+    for (let cur: Element | null = el; cur && cur !== scope; cur = cur.parentElement) parts.unshift(step(cur));
+    return parts.join(" > ");
+  };
+
+  // Selectors for `el` relative to `scope`, most general first
+  const candidates = (scope: Element, el: Element): string[] => {
+    if (el === scope) return [""];
+    const prefix = scope === document.body ? "body > " : ":scope > ";
+    const list = [simple(el), `${prefix}${path(scope, el, simple)}`, `${prefix}${path(scope, el, nth)}`];
+    if (el.id && scope === document.body) list.unshift(`#${CSS.escape(el.id)}`);
+    return list;
+  };
+
+  // A selector that resolves, under every scope, to the located element
+  const fieldSelector = (scopes: Element[], located: Element[]): string | null => {
+    for (const selector of candidates(scopes[0], located[0])) {
+      if (scopes.every((scope, i) => (selector ? scope.querySelector(selector) : scope) === located[i])) {
+        return selector;
+      }
+    }
+    return null;
+  };
+
+  const commonAncestor = (a: Element, b: Element): Element => {
+    let cur: Element | null = a;
+    while (cur && !cur.contains(b)) cur = cur.parentElement;
+    return cur || document.body;
+  };
+  const childOnPath = (ancestor: Element, el: Element): Element => {
+    let cur = el;
+    while (cur.parentElement && cur.parentElement !== ancestor) cur = cur.parentElement;
+    return cur;
+  };
+
+  const compileList = (items: unknown[]): Omit<CompiledExtractor, "key"> | null => {
+    const fieldNames =
+      items[0] !== null && typeof items[0] === "object" && !Array.isArray(items[0])
+        ? Object.keys(items[0] as object)
+        : null;
+    const sample = items.slice(0, verifyItems);
+    const valuesOf = (item: unknown): (string | number)[] | null => {
+      const values = fieldNames ? fieldNames.map((f) => (item as Record<string, unknown>)?.[f]) : [item];
+      return values.every(isScalar) ? (values as (string | number)[]) : null;
+    };
+    const rows = sample.map(valuesOf);
+    if (rows.some((row) => row === null) || (fieldNames && fieldNames.length === 0)) return null;
+
+    // Anchor each item on its most distinctive value: one that differs between items
+    const anchorIndex = rows[0]!.findIndex((_, f) => new Set(rows.map((row) => String(row![f]))).size === rows.length);
+    if (anchorIndex < 0 && rows.length > 1) return null;
+    const anchors = rows.map((row) => locate(row![Math.max(anchorIndex, 0)], document.body));
+    if (anchors.some((a) => a === null)) return null;
+    const anchorEls = anchors.map((a) => a!.el);
+
+    // Item roots: siblings under the anchors' common ancestor (or, for a
+    // single item, the smallest element holding all of its values)
+    let roots: Element[];
+    if (anchorEls.length > 1) {
+      const ancestor = anchorEls.slice(1).reduce(commonAncestor, anchorEls[0]);
+      roots = anchorEls.map((el) => childOnPath(ancestor, el));
+      if (new Set(roots).size !== roots.length) return null;
+    } else {
+      const located = rows[0]!.map((v) => locate(v, document.body));
+      if (located.some((l) => l === null)) return null;
+      const els = located.map((l) => l!.el);
+      roots = [els.slice(1).reduce(commonAncestor, els[0])];
+    }
+
+    // Root selector matching every item root, in order
+    const parent = roots[0].parentElement;
+    const rootCandidates = [simple(roots[0])];
+    if (parent) {
+      const parentPath = parent === document.body ? "body" : `body > ${path(document.body, parent, nth)}`;
+      rootCandidates.push(
+        `${simple(parent)} > ${simple(roots[0])}`,
+        `${parentPath} > ${roots[0].tagName.toLowerCase()}`
+      );
+    }
+    let root: string | null = null;
+    let skip = 0;
+    for (const candidate of rootCandidates) {
+      const matched = Array.from(document.querySelectorAll(candidate));
+      const start = matched.indexOf(roots[0]);
+      if (start >= 0 && roots.every((r, i) => matched[start + i] === r)) {
+        root = candidate;
+        skip = start;
+        break;
+      }
+    }
+    if (!root) return null;
+
+    let fields: Record<string, Field> | undefined;
+    let value: Field = { selector: "" };
+    if (fieldNames) {
+      fields = {};
+      for (const [f, name] of fieldNames.entries()) {
+        const located = rows.map((row, i) => locate(row![f], roots[i]));
+        if (located.some((l) => l === null)) return null;
+        const selector = fieldSelector(roots, located.map((l) => l!.el));
+        if (selector === null) return null;
+        fields[name] = Object.assign({}, located[0]!.field, { selector });
+      }
+    } else {
+      const selector = fieldSelector(roots, anchorEls);
+      if (selector === null) return null;
+      value = Object.assign({}, anchors[0]!.field, { selector });
+    }
+    const total = document.querySelectorAll(root).length - skip;
+    return {
+      version: 1,
+      kind: "list",
+      root,
+      skip: skip || undefined,
+      limit: total > items.length ? items.length : undefined,
+      fields,
+      value,
+    };
+  };
+
+  const compileScalar = (v: string | number): Field | null => {
+    const located = locate(v, document.body);
+    if (!located) return null;
+    for (const selector of candidates(document.body, located.el)) {
+      if (selector && document.querySelector(selector) === located.el) return Object.assign({}, located.field, { selector });
+    }
+    return null;
+  };
+
+  let key: string | undefined;
+  let body = sample;
+  if (body !== null && typeof body === "object" && !Array.isArray(body)) {
+    const entries = Object.entries(body as Record<string, unknown>);
+    if (entries.length === 1 && Array.isArray(entries[0][1])) {
+      key = entries[0][0];
+      body = entries[0][1];
+    }
+  }
+
+  let spec: Omit<CompiledExtractor, "key"> | null = null;
+  if (Array.isArray(body)) {
+    spec = body.length > 0 ? compileList(body) : null;
+  } else if (body !== null && typeof body === "object") {
+    const fields: Record<string, Field> = {};
+    for (const [name, v] of Object.entries(body as Record<string, unknown>)) {
+      const field = isScalar(v) ? compileScalar(v) : null;
+      if (!field) return null;
+      fields[name] = field;
+    }
+    spec = Object.keys(fields).length > 0 ? { version: 1, kind: "record", fields, value: { selector: "" } } : null;
+  } else if (isScalar(body)) {
+    const value = compileScalar(body);
+    spec = value ? { version: 1, kind: "text", value } : null;
+  }
+  return spec ? Object.assign(spec, { key }) : null;
+}
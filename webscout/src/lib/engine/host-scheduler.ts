@@ -0,0 +1,367 @@
+import { createHash } from "crypto";
+import { getRedisClient } from "../redis/client";
+import { hostRollupKey, RECENT_OUTCOME_HALF_LIFE_MS } from "./strategy-selector";
+import { extractUrlPattern, urlPatternScope } from "../utils/url";
+
+const HOST_PREFIX = "scheduler:host:";
+const HOSTS_KEY = "scheduler:hosts";
+const FAIR_KEY = "scheduler:fair";
+const FINISH_TAGS_KEY = "scheduler:fair:finish";
+const TASK_PREFIX = "task:";
+
+/** Scrapes of one host running at once, across all workers (0 = unlimited) */
+const HOST_CONCURRENCY = parseInt(process.env.SCHEDULER_HOST_CONCURRENCY || "2", 10);
+/** Pages per minute one host is sent on average (0 = unlimited) */
+const HOST_RATE_PER_MIN = parseFloat(process.env.SCHEDULER_HOST_RATE_PER_MIN || "30");
+/** Pages a host may be sent back to back before the rate applies */
+const HOST_BURST = parseInt(process.env.SCHEDULER_HOST_BURST || "5", 10);
+/** Recent recovery-failure rate at which a host is backed off */
+const BACKOFF_FAILURE_RATE = parseFloat(process.env.SCHEDULER_BACKOFF_FAILURE_RATE || "0.6");
+/** Recent outcomes (decayed) needed before the failure rate counts */
+const BACKOFF_MIN_SAMPLES = parseInt(process.env.SCHEDULER_BACKOFF_MIN_SAMPLES || "5", 10);
+/** First backoff; each consecutive one doubles up to SCHEDULER_BACKOFF_MAX_MS */
+const BACKOFF_BASE_MS = parseInt(process.env.SCHEDULER_BACKOFF_BASE_MS || "30000", 10);
+const BACKOFF_MAX_MS = parseInt(process.env.SCHEDULER_BACKOFF_MAX_MS || "600000", 10);
+
+/**
+ * Per-host politeness and fair share for scrape execution.
+ *
+ * Every host has a hash `scheduler:host:<host>` (token bucket, backoff state
+ * and wait statistics) and a sorted set `scheduler:host:<host>:active` of
+ * running jobs scored by lease expiry, so a worker that dies only holds its
+ * slots until the lease runs out. A job may start when the host is not
+ * backing off, has a free slot and has a token.
+ *
+ * Across submitters, jobs are ordered by start-time fair queuing: each job
+ * is tagged on enqueue with max(virtual time, the submitter's last finish
+ * tag), and its submitter's finish tag advances by pages / weight. Workers
+ * start the lowest admissible tag they hold and advance the virtual time to
+ * it, so a submitter with a large backlog cannot push a newcomer to the back.
+ * Finish tags live in the sorted set `scheduler:fair:finish`; a tag the
+ * virtual time has passed means the same as no tag, so those are trimmed.
+ */
+
+export type AdmissionDecision = "ok" | "busy" | "rate" | "backoff";
+
+export interface Admission {
+  decision: AdmissionDecision;
+  /** When to ask again (0 = when a running job of the host finishes) */
+  retryMs: number;
+}
+
+export interface HostSchedulerStats {
+  host: string;
+  active: number;
+  concurrency: number;
+  tokens: number;
+  backoffUntil: number | null;
+  backoffLevel: number;
+  backoffs: number;
+  /** Decayed task outcomes the backoff decision looks at */
+  recentAttempts: number;
+  recentFailureRate: number | null;
+  /** Jobs started, and how long they waited between enqueue and start */
+  started: number;
+  avgWaitMs: number;
+  maxWaitMs: number;
+  lastWaitMs: number;
+  /** Jobs set aside because the host was throttled */
+  deferred: number;
+}
+
+interface HostLimits {
+  concurrency: number;
+  ratePerMin: number;
+  burst: number;
+}
+
+/**
+ * SCHEDULER_HOST_LIMITS overrides the defaults per host:
+ * "example.com=4:60:10,slow.org=1:6" (concurrency:pages per minute[:burst]).
+ */
+const HOST_OVERRIDES = new Map<string, Partial<HostLimits>>(
+  (process.env.SCHEDULER_HOST_LIMITS || "")
+    .split(",")
+    .map((entry) => entry.trim().split("="))
+    .filter(([host, limits]) => host && limits)
+    .map(([host, limits]) => {
+      const [concurrency, ratePerMin, burst] = limits.split(":").map((v) => (v ? parseFloat(v) : NaN));
+      return [
+        host.replace(/^www\./, ""),
+        {
+          ...(Number.isFinite(concurrency) && { concurrency }),
+          ...(Number.isFinite(ratePerMin) && { ratePerMin }),
+          ...(Number.isFinite(burst) && { burst }),
+        },
+      ];
+    })
+);
+
+/** SCHEDULER_SUBMITTERS: X-Submitter names accepted as their own fair-share bucket */
+const NAMED_SUBMITTERS = new Set(
+  (process.env.SCHEDULER_SUBMITTERS || "")
+    .split(",")
+    .map((name) => name.trim())
+    .filter(Boolean)
+);
+
+/** SCHEDULER_WEIGHTS: "key:3f2a9c01b7de=4,batch-jobs=0.5"; unlisted submitters weigh 1 */
+const SUBMITTER_WEIGHTS = new Map<string, number>(
+  (process.env.SCHEDULER_WEIGHTS || "")
+    .split(",")
+    .map((entry) => entry.trim().split("="))
+    .filter(([id, weight]) => id && parseFloat(weight) > 0)
+    .map(([id, weight]) => [id, parseFloat(weight)])
+);
+
+function hostLimits(host: string): HostLimits {
+  return { concurrency: HOST_CONCURRENCY, ratePerMin: HOST_RATE_PER_MIN, burst: HOST_BURST, ...HOST_OVERRIDES.get(host) };
+}
+
+/** Scheduling host of a URL (the hostname its url pattern and strategy rollup use) */
+export function hostOf(url: string): string {
+  return urlPatternScope(extractUrlPattern(url)).host;
+}
+
+/**
+ * Who a submission is charged to for fair share: the `X-Api-Key` header as
+ * `key:<first 12 hex of its sha256>` (the key itself is never stored), else
+ * the `X-Submitter` header if SCHEDULER_SUBMITTERS lists it, else
+ * "anonymous". Unauthenticated traffic shares one bucket, so it cannot
+ * claim a fresh share per request by varying a header.
+ */
+export function submitterFromHeaders(headers: Headers): string {
+  const apiKey = headers.get("x-api-key");
+  if (apiKey) return `key:${createHash("sha256").update(apiKey).digest("hex").slice(0, 12)}`;
+  const submitter = headers.get("x-submitter")?.trim();
+  return submitter && NAMED_SUBMITTERS.has(submitter) ? submitter : "anonymous";
+}
+
+/**
+ * KEYS[1] = fair-share hash, KEYS[2] = finish tags; ARGV = submitter, pages / weight
+ * Returns the job's start tag.
+ */
+const FAIR_TAG_SCRIPT = `
+local vtime = tonumber(redis.call('HGET', KEYS[1], 'vtime') or '0')
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', vtime)
+local finish = tonumber(redis.call('ZSCORE', KEYS[2], ARGV[1]) or '0')
+local start = math.max(vtime, finish)
+redis.call('ZADD', KEYS[2], start + tonumber(ARGV[2]), ARGV[1])
+return tostring(start)
+`;
+
+/** Start tag for a job of `pages` pages from `submitter` */
+export async function assignFairTag(submitter: string, pages: number): Promise<number> {
+  const client = await getRedisClient();
+  const weight = SUBMITTER_WEIGHTS.get(submitter) ?? 1;
+  const tag = await client.eval(FAIR_TAG_SCRIPT, {
+    keys: [FAIR_KEY, FINISH_TAGS_KEY],
+    arguments: [submitter, (pages / weight).toString()],
+  });
+  return parseFloat(String(tag)) || 0;
+}
+
+/**
+ * Decide whether a job may start on its host now, and if so take a slot
+ * and a token. A lease that is already held (later pages of a batch group)
+ * skips the slot check and only takes a token.
+ *
+ * Backoff: when the host's decayed recent task outcomes (written by
+ * recordHostOutcome) reach the minimum sample count with a failure rate
+ * at or above the threshold, the host is paused for base * 2^(level - 1) ms
+ * and the recent window restarts, so the next decision is made on outcomes
+ * seen after the pause. A healthy window resets the level.
+ *
+ * KEYS[1] = host hash, KEYS[2] = active leases, KEYS[3] = host rollup,
+ * KEYS[4] = fair-share hash, KEYS[5] = host set
+ * ARGV[1] = now, ARGV[2] = lease id, ARGV[3] = lease expiry,
+ * ARGV[4] = concurrency, ARGV[5] = tokens per ms, ARGV[6] = burst,
+ * ARGV[7] = recent half-life, ARGV[8] = failure rate, ARGV[9] = min samples,
+ * ARGV[10] = backoff base, ARGV[11] = backoff max, ARGV[12] = fair tag, ARGV[13] = host
+ * Returns { decision, retry ms, 1 if this call started a backoff }.
+ */
+const ADMIT_SCRIPT = `
+local now = tonumber(ARGV[1])
+redis.call('SADD', KEYS[5], ARGV[13])
+local backoffUntil = tonumber(redis.call('HGET', KEYS[1], 'backoff_until') or '0')
+if backoffUntil > now then return {'backoff', math.ceil(backoffUntil - now), 0} end
+
+local at = tonumber(redis.call('HGET', KEYS[3], 'recent:at') or ARGV[1])
+local keep = 0.5 ^ (math.max(now - at, 0) / tonumber(ARGV[7]))
+local attempts = tonumber(redis.call('HGET', KEYS[3], 'recent:attempts') or '0') * keep
+local failures = tonumber(redis.call('HGET', KEYS[3], 'recent:failures') or '0') * keep
+if attempts >= tonumber(ARGV[9]) then
+  if failures / attempts >= tonumber(ARGV[8]) then
+    local level = redis.call('HINCRBY', KEYS[1], 'backoff_level', 1)
+    local ms = math.min(tonumber(ARGV[10]) * 2 ^ (level - 1), tonumber(ARGV[11]))
+    redis.call('HSET', KEYS[1], 'backoff_until', tostring(now + ms))
+    redis.call('HINCRBY', KEYS[1], 'backoffs', 1)
+    redis.call('HSET', KEYS[3], 'recent:attempts', '0', 'recent:failures', '0', 'recent:at', ARGV[1])
+    return {'backoff', math.ceil(ms), 1}
+  end
+  redis.call('HSET', KEYS[1], 'backoff_level', '0')
+end
+
+local held = redis.call('ZSCORE', KEYS[2], ARGV[2])
+if not held and tonumber(ARGV[4]) > 0 then
+  redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+  if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) then return {'busy', 0, 0} end
+end
+
+local rate = tonumber(ARGV[5])
+if rate > 0 then
+  local burst = tonumber(ARGV[6])
+  local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[6])
+  local last = tonumber(redis.call('HGET', KEYS[1], 'tokens_at') or ARGV[1])
+  tokens = math.min(burst, tokens + math.max(now - last, 0) * rate)
+  redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'tokens_at', ARGV[1])
+  if tokens < 1 then return {'rate', math.ceil((1 - tokens) / rate), 0} end
+  redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1))
+end
+
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+if tonumber(ARGV[12]) > tonumber(redis.call('HGET', KEYS[4], 'vtime') or '0') then
+  redis.call('HSET', KEYS[4], 'vtime', ARGV[12])
+end
+return {'ok', 0, 0}
+`;
+
+/** KEYS[1] = host hash; ARGV[1] = wait (ms). Keeps `max_wait_ms` the largest wait seen. */
+const MAX_WAIT_SCRIPT = `
+local max = tonumber(redis.call('HGET', KEYS[1], 'max_wait_ms') or '0')
+if tonumber(ARGV[1]) > max then redis.call('HSET', KEYS[1], 'max_wait_ms', ARGV[1]) end
+return 1
+`;
+
+function hostKey(host: string): string {
+  return `${HOST_PREFIX}${host}`;
+}
+
+function activeKey(host: string): string {
+  return `${HOST_PREFIX}${host}:active`;
+}
+
+/**
+ * Ask to start (or continue) job `leaseId` on `host`. The slot is held for
+ * `leaseMs` unless renewed with renewHostLeases().
+ */
+export async function admitToHost(host: string, leaseId: string, leaseMs: number, fairTag: number = 0): Promise<Admission> {
+  const client = await getRedisClient();
+  const limits = hostLimits(host);
+  const now = Date.now();
+  const reply = (await client.eval(ADMIT_SCRIPT, {
+    keys: [hostKey(host), activeKey(host), hostRollupKey(host), FAIR_KEY, HOSTS_KEY],
+    arguments: [
+      now.toString(),
+      leaseId,
+      (now + leaseMs).toString(),
+      limits.concurrency.toString(),
+      (limits.ratePerMin / 60000).toString(),
+      Math.max(limits.burst, 1).toString(),
+      RECENT_OUTCOME_HALF_LIFE_MS.toString(),
+      BACKOFF_FAILURE_RATE.toString(),
+      BACKOFF_MIN_SAMPLES.toString(),
+      BACKOFF_BASE_MS.toString(),
+      BACKOFF_MAX_MS.toString(),
+      fairTag.toString(),
+      host,
+    ],
+  })) as [string, number, number];
+  const [decision, retryMs, backoffStarted] = reply;
+  if (backoffStarted) {
+    console.log(`[Scheduler] Recovery failures spiked on ${host} — backing off ${Math.round(retryMs / 1000)}s`);
+  }
+  return { decision: decision as AdmissionDecision, retryMs: Number(retryMs) || 0 };
+}
+
+/**
+ * Record that a job started after waiting `waitMs` since it was enqueued:
+ * per-host wait statistics, and each task's `queue_wait_ms` (which the
+ * post-processor subtracts to get the run time).
+ */
+export async function recordHostWait(host: string, taskIds: string[], waitMs: number): Promise<void> {
+  const client = await getRedisClient();
+  const key = hostKey(host);
+  const pipeline = client.multi();
+  pipeline.hIncrBy(key, "started", 1);
+  pipeline.hIncrBy(key, "wait_ms_total", waitMs);
+  pipeline.hSet(key, "last_wait_ms", waitMs.toString());
+  pipeline.eval(MAX_WAIT_SCRIPT, { keys: [key], arguments: [waitMs.toString()] });
+  for (const taskId of taskIds) {
+    pipeline.hSet(`${TASK_PREFIX}${taskId}`, "queue_wait_ms", waitMs.toString());
+  }
+  await pipeline.execAsPipeline();
+}
+
+export async function countHostDeferral(host: string): Promise<void> {
+  const client = await getRedisClient();
+  await client.hIncrBy(hostKey(host), "deferred", 1);
+}
+
+export async function releaseHostLease(host: string, leaseId: string): Promise<void> {
+  const client = await getRedisClient();
+  await client.zRem(activeKey(host), leaseId);
+}
+
+/** Push out the expiry of leases still running (host → lease ids) */
+export async function renewHostLeases(leases: Map<string, string>, leaseMs: number): Promise<void> {
+  if (leases.size === 0) return;
+  const client = await getRedisClient();
+  const expiry = Date.now() + leaseMs;
+  const pipeline = client.multi();
+  for (const [leaseId, host] of leases) {
+    pipeline.zAdd(activeKey(host), { score: expiry, value: leaseId }, { condition: "XX" });
+  }
+  await pipeline.execAsPipeline();
+}
+
+/** Limits, live state and queue wait of every host the scheduler has seen. */
+export async function getSchedulerStats(): Promise<HostSchedulerStats[]> {
+  const client = await getRedisClient();
+  const hosts = (await client.sMembers(HOSTS_KEY)).sort();
+  if (hosts.length === 0) return [];
+  const now = Date.now();
+  const pipeline = client.multi();
+  for (const host of hosts) {
+    pipeline.hGetAll(hostKey(host));
+    pipeline.zCount(activeKey(host), now, "+inf");
+    pipeline.hmGet(hostRollupKey(host), ["recent:attempts", "recent:failures", "recent:at"]);
+  }
+  const replies = (await pipeline.execAsPipeline()) as unknown[];
+
+  return hosts.map((host, i) => {
+    const data = (replies[i * 3] ?? {}) as Record<string, string>;
+    const active = Number(replies[i * 3 + 1]) || 0;
+    const [attemptsRaw, failuresRaw, atRaw] = (replies[i * 3 + 2] ?? []) as (string | null)[];
+    const limits = hostLimits(host);
+
+    const keep = atRaw ? Math.pow(0.5, Math.max(now - parseInt(atRaw, 10), 0) / RECENT_OUTCOME_HALF_LIFE_MS) : 1;
+    const recentAttempts = parseFloat(attemptsRaw || "0") * keep;
+    const recentFailures = parseFloat(failuresRaw || "0") * keep;
+
+    const rate = limits.ratePerMin / 60000;
+    const burst = Math.max(limits.burst, 1);
+    const storedTokens = data.tokens !== undefined ? parseFloat(data.tokens) : burst;
+    const tokensAt = data.tokens_at ? parseInt(data.tokens_at, 10) : now;
+    const tokens = rate > 0 ? Math.min(burst, storedTokens + Math.max(now - tokensAt, 0) * rate) : burst;
+
+    const backoffUntil = parseInt(data.backoff_until || "0", 10);
+    const started = parseInt(data.started || "0", 10);
+    return {
+      host,
+      active,
+      concurrency: limits.concurrency,
+      tokens: Math.round(tokens * 100) / 100,
+      backoffUntil: backoffUntil > now ? backoffUntil : null,
+      backoffLevel: parseInt(data.backoff_level || "0", 10),
+      backoffs: parseInt(data.backoffs || "0", 10),
+      recentAttempts: Math.round(recentAttempts * 100) / 100,
+      recentFailureRate: recentAttempts > 0 ? Math.round((recentFailures / recentAttempts) * 1000) / 1000 : null,
+      started,
+      avgWaitMs: started > 0 ? Math.round(parseInt(data.wait_ms_total || "0", 10) / started) : 0,
+      maxWaitMs: parseInt(data.max_wait_ms || "0", 10),
+      lastWaitMs: parseInt(data.last_wait_ms || "0", 10),
+      deferred: parseInt(data.deferred || "0", 10),
+    };
+  });
+}
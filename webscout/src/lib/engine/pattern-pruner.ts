@@ -1,42 +1,199 @@
 import { createTracedOp } from "../tracing/weave";
-import { listPatterns, deletePattern } from "../redis/patterns";
+import { getRedisClient } from "../redis/client";
+import {
+  getPatternCount,
+  removePatterns,
+  foldPatternCounts,
+  type PatternRemoval,
+} from "../redis/patterns";
+import { scanPatterns, findNearDuplicates } from "../redis/vectors";
 import { computePatternFitness } from "./pattern-fitness";
+import type { PagePattern } from "../utils/types";
+
+/** Wall-clock budget for one maintenance run; the next run resumes the pass */
+const MAINTENANCE_BUDGET_MS = parseInt(process.env.PATTERN_MAINTENANCE_BUDGET_MS || "10000", 10);
+/** How often each worker attempts a run (0 disables the schedule) */
+const MAINTENANCE_INTERVAL_MS = parseInt(process.env.PATTERN_MAINTENANCE_INTERVAL_MS || "600000", 10);
+/** Same-host patterns at least this similar are merged into the fittest one */
+const MERGE_SIMILARITY = parseFloat(process.env.PATTERN_MERGE_SIMILARITY || "0.97");
+
+const SCAN_BATCH_SIZE = 100;
+const MERGE_NEIGHBOURS = 5;
+
+const CURSOR_KEY = "maintenance:patterns:cursor";
+const LOCK_KEY = "maintenance:patterns:lock";
+const LAST_RUN_KEY = "maintenance:patterns:last_run";
+
+export interface PatternMaintenanceReport {
+  /** Patterns examined by this run */
+  scanned: number;
+  /** Dead patterns removed: fitness < 0.05 AND failure_count >= 3 */
+  pruned: number;
+  /** Near-duplicates folded into a fitter pattern on the same host */
+  merged: number;
+  /** Partial hashes without a url_pattern that were removed */
+  orphans: number;
+  removed: number;
+  sizeBefore: number;
+  sizeAfter: number;
+  /** The run reached the end of the keyspace; the next run starts over */
+  passComplete: boolean;
+  durationMs: number;
+  completedAt: number;
+}
+
+function isDead(pattern: PagePattern): boolean {
+  return computePatternFitness(pattern) < 0.05 && pattern.failure_count >= 3;
+}
 
 /**
- * Remove dead patterns: fitness < 0.05 AND failure_count >= 3.
- * This prevents the vector cache from being polluted with unreliable patterns.
+ * Incremental maintenance of the pattern index.
+ *
+ * Walks every stored pattern with a SCAN cursor kept in Redis, so each run
+ * picks up where the last one stopped and a pass eventually covers the
+ * whole index however large it is. Per batch: dead patterns are pruned,
+ * and each live pattern's same-host KNN neighbours above MERGE_SIMILARITY
+ * are merged — their counts folded into the fittest of the group, their
+ * exact keys pointed at it — with all deletes for the batch in one script
+ * call. Stops at the end of the pass or when `budgetMs` runs out. Only one
+ * run at a time across workers; returns null when another holds the lock.
  */
-export const pruneDeadPatterns = createTracedOp(
-  "pruneDeadPatterns",
-  async function pruneDeadPatterns(): Promise<{
-    pruned: number;
-    remaining: number;
-    prunedIds: string[];
-  }> {
-    const { patterns } = await listPatterns(1000, 0);
-    const prunedIds: string[] = [];
-
-    for (const pattern of patterns) {
-      const fitness = computePatternFitness(pattern);
-      if (fitness < 0.05 && pattern.failure_count >= 3) {
-        await deletePattern(pattern.id);
-        prunedIds.push(pattern.id);
-        console.log(
-          `[Pruner] Removed dead pattern ${pattern.id} (fitness=${fitness.toFixed(3)}, failures=${pattern.failure_count})`
-        );
-      }
-    }
+export const runPatternMaintenance = createTracedOp(
+  "runPatternMaintenance",
+  async function runPatternMaintenance(
+    budgetMs: number = MAINTENANCE_BUDGET_MS
+  ): Promise<PatternMaintenanceReport | null> {
+    const client = await getRedisClient();
+    const token = crypto.randomUUID();
+    const locked = await client.set(LOCK_KEY, token, { NX: true, PX: budgetMs + 60000 });
+    if (!locked) return null;
 
-    return {
-      pruned: prunedIds.length,
-      remaining: patterns.length - prunedIds.length,
-      prunedIds,
+    const started = Date.now();
+    const deadline = started + budgetMs;
+    const report: PatternMaintenanceReport = {
+      scanned: 0,
+      pruned: 0,
+      merged: 0,
+      orphans: 0,
+      removed: 0,
+      sizeBefore: await getPatternCount(),
+      sizeAfter: 0,
+      passComplete: false,
+      durationMs: 0,
+      completedAt: 0,
     };
+
+    try {
+      let cursor = (await client.get(CURSOR_KEY)) ?? "0";
+      do {
+        const batch = await scanPatterns(cursor, SCAN_BATCH_SIZE);
+        cursor = batch.cursor;
+        report.scanned += batch.patterns.length;
+
+        const removed = new Set<string>(batch.orphans);
+        const removals: PatternRemoval[] = [];
+        const folds: { survivor: PagePattern; absorbed: PagePattern[] }[] = [];
+
+        for (const { pattern } of batch.patterns) {
+          if (!isDead(pattern)) continue;
+          removals.push({ pattern });
+          removed.add(pattern.id);
+          console.log(
+            `[Pruner] Removing dead pattern ${pattern.id} (fitness=${computePatternFitness(pattern).toFixed(3)}, failures=${pattern.failure_count})`
+          );
+        }
+
+        const live = batch.patterns.filter((s) => !removed.has(s.pattern.id));
+        const neighbours = await Promise.all(
+          live.map((s) => findNearDuplicates(s, MERGE_SIMILARITY, MERGE_NEIGHBOURS).catch(() => []))
+        );
+        // A pattern takes part in at most one merge per batch, so counts
+        // folded into a survivor are never lost by absorbing it later;
+        // dead neighbours are left for pruning rather than folded in
+        const merging = new Set<string>();
+        live.forEach(({ pattern }, i) => {
+          if (removed.has(pattern.id) || merging.has(pattern.id)) return;
+          const group = [
+            pattern,
+            ...neighbours[i].filter((p) => !removed.has(p.id) && !merging.has(p.id) && !isDead(p)),
+          ];
+          if (group.length < 2) return;
+          group.forEach((p) => merging.add(p.id));
+          const fitness = new Map(group.map((p) => [p.id, computePatternFitness(p)]));
+          const survivor = group.reduce((best, p) => (fitness.get(p.id)! > fitness.get(best.id)! ? p : best));
+          const absorbed = group.filter((p) => p.id !== survivor.id);
+          folds.push({ survivor, absorbed });
+          for (const p of absorbed) {
+            removals.push({ pattern: p, mergedInto: survivor.id });
+            removed.add(p.id);
+          }
+          console.log(`[Pruner] Merged ${absorbed.length} near-duplicate(s) into ${survivor.id} (${survivor.url_pattern})`);
+        });
+
+        await foldPatternCounts(folds);
+        await removePatterns(removals);
+        if (batch.orphans.length > 0) await client.del(batch.orphans);
+
+        report.orphans += batch.orphans.length;
+        report.pruned += removals.filter((r) => !r.mergedInto).length;
+        report.merged += removals.filter((r) => r.mergedInto).length;
+        await client.set(CURSOR_KEY, cursor);
+      } while (cursor !== "0" && Date.now() < deadline);
+
+      report.passComplete = cursor === "0";
+      report.removed = report.pruned + report.merged + report.orphans;
+      report.sizeAfter = await getPatternCount();
+      report.completedAt = Date.now();
+      report.durationMs = report.completedAt - started;
+      await client.set(LAST_RUN_KEY, JSON.stringify(report));
+      console.log(
+        `[Pruner] Scanned ${report.scanned} patterns in ${report.durationMs}ms: ` +
+        `${report.pruned} pruned, ${report.merged} merged, ${report.orphans} orphans; ` +
+        `index ${report.sizeBefore} → ${report.sizeAfter}` +
+        (report.passComplete ? " (pass complete)" : " (pass continues next run)")
+      );
+      return report;
+    } finally {
+      if ((await client.get(LOCK_KEY)) === token) await client.del(LOCK_KEY);
+    }
   },
   {
-    summarize: (result) => ({
-      "webscout.patterns_pruned": result.pruned,
-      "webscout.patterns_remaining": result.remaining,
+    summarize: (result: PatternMaintenanceReport | null) => ({
+      "webscout.patterns_scanned": result?.scanned ?? 0,
+      "webscout.patterns_pruned": result?.pruned ?? 0,
+      "webscout.patterns_merged": result?.merged ?? 0,
+      "webscout.index_size_before": result?.sizeBefore ?? 0,
+      "webscout.index_size_after": result?.sizeAfter ?? 0,
     }),
   }
 );
+
+/** Report of the most recent completed maintenance run, if any. */
+export async function getLastMaintenanceReport(): Promise<PatternMaintenanceReport | null> {
+  const client = await getRedisClient();
+  const raw = await client.get(LAST_RUN_KEY);
+  return raw ? (JSON.parse(raw) as PatternMaintenanceReport) : null;
+}
+
+/**
+ * Run pattern maintenance every PATTERN_MAINTENANCE_INTERVAL_MS. Every worker
+ * schedules it; the lock makes one of them do the work.
+ */
+export function schedulePatternMaintenance(): { stop: () => Promise<void> } {
+  if (MAINTENANCE_INTERVAL_MS <= 0) return { stop: async () => {} };
+  let running: Promise<unknown> | null = null;
+  const timer = setInterval(() => {
+    if (running) return;
+    running = runPatternMaintenance()
+      .catch((error) => console.warn("[Pruner] Maintenance run failed:", (error as Error).message))
+      .finally(() => {
+        running = null;
+      });
+  }, MAINTENANCE_INTERVAL_MS);
+  return {
+    stop: async () => {
+      clearInterval(timer);
+      await running;
+    },
+  };
+}
@@ -0,0 +1,121 @@
+import { assessExtractionQualityBatch, type QualityAssessment } from "../ai/openai-quality";
+import { logTaskAsEvalPrediction } from "../evaluation/weave-eval-logger";
+import { setTaskQuality } from "../redis/tasks";
+import { listPatterns } from "../redis/patterns";
+import { addScoreToCall, savePatternDataset } from "../tracing/weave";
+import type { TaskResult, TaskStep } from "../utils/types";
+
+/** Most tasks scored by one quality-assessment call */
+const QUALITY_BATCH_SIZE = parseInt(process.env.QUALITY_BATCH_SIZE || "8", 10);
+/** How long a finished task waits for others to share its assessment call */
+const QUALITY_BATCH_WAIT_MS = parseInt(process.env.QUALITY_BATCH_WAIT_MS || "2000", 10);
+
+/**
+ * Post-processing for finished tasks, off the scrape critical path.
+ *
+ * The task is stored as complete first; quality assessment, eval logging and
+ * the learned-patterns dataset save happen here afterwards. Tasks finishing
+ * within QUALITY_BATCH_WAIT_MS of each other are assessed in one LLM call,
+ * and each score is written back to the task document and its Weave call
+ * when ready. Work is in-process and best-effort: scores are lost if the
+ * process exits without drainPostProcessing().
+ */
+
+const pending: TaskResult[] = [];
+const running = new Set<Promise<void>>();
+let timer: ReturnType<typeof setTimeout> | null = null;
+
+export function schedulePostProcessing(task: TaskResult): void {
+  pending.push(task);
+  if (pending.length >= QUALITY_BATCH_SIZE) {
+    flush();
+  } else if (!timer) {
+    timer = setTimeout(flush, QUALITY_BATCH_WAIT_MS);
+  }
+}
+
+function flush(): void {
+  if (timer) {
+    clearTimeout(timer);
+    timer = null;
+  }
+  while (pending.length > 0) {
+    const batch = pending.splice(0, QUALITY_BATCH_SIZE);
+    const run = processBatch(batch)
+      .catch((error) => console.warn("[PostProcess] Batch failed:", (error as Error).message))
+      .finally(() => running.delete(run));
+    running.add(run);
+  }
+}
+
+/** Process everything scheduled so far; call before the process exits. */
+export async function drainPostProcessing(): Promise<void> {
+  flush();
+  await Promise.all(running);
+}
+
+async function processBatch(batch: TaskResult[]): Promise<void> {
+  const successes = batch.filter((task) => task.status === "success");
+  const assessments = new Map<string, QualityAssessment>();
+  let skipReason: string | null = null;
+
+  if (successes.length > 0) {
+    try {
+      const results = await assessExtractionQualityBatch(
+        successes.map((task) => ({ target: task.target, result: task.result, url: task.url }))
+      );
+      successes.forEach((task, i) => assessments.set(task.id, results[i]));
+    } catch (error) {
+      skipReason = (error as Error).message;
+    }
+    console.log(`[PostProcess] Assessed ${assessments.size}/${successes.length} task(s) in one batch`);
+  }
+
+  await Promise.all(
+    batch.map(async (task) => {
+      const qa = assessments.get(task.id);
+      if (task.status === "success") {
+        const step: TaskStep = qa
+          ? {
+              action: "quality_check",
+              status: qa.quality_score >= 50 ? "success" : "info",
+              detail: `Quality: ${qa.quality_score}/100 (${qa.confidence}) — ${qa.summary}`,
+              timestamp: Date.now(),
+            }
+          : {
+              action: "quality_check",
+              status: "info",
+              detail: `Quality check skipped: ${skipReason ?? "no assessment returned"}`,
+              timestamp: Date.now(),
+            };
+        await setTaskQuality(task.id, qa?.quality_score, qa?.summary, step).catch(console.warn);
+      }
+      if (task.weave_call_id) {
+        await addScoreToCall(task.weave_call_id, "quality", qa?.quality_score ?? 0, qa?.summary);
+      }
+
+      // Scrape time only — exclude the wait in the task queue
+      const durationMs = (task.completed_at ?? Date.now()) - task.created_at - (task.queue_wait_ms ?? 0);
+      await logTaskAsEvalPrediction({
+        taskId: task.id,
+        url: task.url,
+        target: task.target,
+        status: task.status === "success" ? "success" : "failed",
+        durationMs: Math.max(durationMs, 0),
+        usedCache: task.used_cached_pattern,
+        recoveryAttempted: task.recovery_attempted,
+        qualityScore: qa?.quality_score ?? 0,
+      }).catch(() => {});
+    })
+  );
+
+  // One dataset version per batch, however many patterns it learned
+  if (batch.some((task) => task.status === "success" && task.pattern_id && !task.used_cached_pattern)) {
+    try {
+      const { patterns } = await listPatterns(100, 0);
+      await savePatternDataset(patterns);
+    } catch {
+      // Non-critical
+    }
+  }
+}
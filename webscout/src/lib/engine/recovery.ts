@@ -5,10 +5,21 @@ import { createTracedOp, withWeaveAttributes } from "../tracing/weave";
 import { isGeminiAvailable, getGeminiRecoveryStrategy } from "../ai/gemini";
 import { getOrderedStrategies, recordStrategyOutcome } from "./strategy-selector";
 import { extractUrlPattern } from "../utils/url";
+import { settlePage } from "../browser/page-settle";
 import { z } from "zod";
 
+/** Settle after a blocker action that changed something (dismissed banners re-render fast) */
+const ACT_SETTLE_MAX_MS = 1500;
+const ACT_SETTLE_QUIET_MS = 300;
+/** Bounds how long a cancelled agent lane can keep driving its page */
+const AGENT_MAX_STEPS = parseInt(process.env.RECOVERY_AGENT_MAX_STEPS || "15", 10);
+
 /**
- * Execute a single recovery strategy by name.
+ * Execute a single recovery strategy by name against `page` (every Stagehand
+ * call targets it explicitly, so strategies can run side by side on separate
+ * pages of one session).
+ * `signal` aborts at the next step boundary once the race no longer needs
+ * this strategy, so a cancelled lane stops touching its page promptly.
  * Returns a RecoveryResult on success, or null if the strategy did not produce a result.
  */
 async function executeStrategy(
@@ -16,7 +27,9 @@ async function executeStrategy(
   stagehand: Stagehand,
   page: Page,
   task: TaskRequest,
-  failureContext: string
+  failureContext: string,
+  screenshot: boolean,
+  signal: AbortSignal
 ): Promise<RecoveryResult | null> {
   switch (strategy) {
     case "agent": {
@@ -25,20 +38,26 @@ async function executeStrategy(
         model: "openai/gpt-4o",
       });
 
-      const agentResult = await agent.execute(
-        `You are on ${task.url}. Find and extract: "${task.target}". ` +
-        `Dismiss any cookie banners or popups if needed. ` +
-        `Look through the entire page to find the requested data.`
-      );
+      const agentResult = await agent.execute({
+        instruction:
+          `You are on ${task.url}. Find and extract: "${task.target}". ` +
+          `Dismiss any cookie banners or popups if needed. ` +
+          `Look through the entire page to find the requested data.`,
+        maxSteps: AGENT_MAX_STEPS,
+        page,
+      });
+      if (signal.aborted) return null;
 
       if (agentResult && agentResult.success) {
-        const screenshot = await captureScreenshot(page);
+        // The winning page may be a hedge lane that closes once the race ends,
+        // so capture it here rather than leaving it to the caller
+        const shot = screenshot ? await captureScreenshot(page) : undefined;
         return {
           success: true,
           result: agentResult.message,
           strategy_used: "agent" as const,
           working_selector: `agent: find ${task.target}`,
-          screenshot,
+          screenshot: shot,
         };
       }
       return null;
@@ -54,27 +73,30 @@ async function executeStrategy(
       ];
 
       for (const action of blockerActions) {
+        if (signal.aborted) return null;
         try {
-          await stagehand.act(action);
-          await page.waitForTimeout(500);
+          const acted = await stagehand.act(action, { page });
+          // Only an action that actually did something can change the page
+          if (acted?.success) await settlePage(page, { maxMs: ACT_SETTLE_MAX_MS, quietMs: ACT_SETTLE_QUIET_MS });
         } catch {
           // Blocker not found — OK
         }
       }
 
+      if (signal.aborted) return null;
       const actSchema = z.object({
         data: z.string().describe(`The extracted information for: ${task.target}`),
       });
-      const result = await stagehand.extract(task.target, actSchema);
+      const result = await stagehand.extract(task.target, actSchema, { page });
 
       if (result && result.data && result.data.length > 0) {
-        const screenshot = await captureScreenshot(page);
+        const shot = screenshot ? await captureScreenshot(page) : undefined;
         return {
           success: true,
           result: result.data,
           strategy_used: "act" as const,
           working_selector: `act: remove blockers then extract ${task.target}`,
-          screenshot,
+          screenshot: shot,
         };
       }
       return null;
@@ -91,7 +113,7 @@ async function executeStrategy(
       const refinedSchema = z.object({
         data: z.string().describe(`The extracted information for: ${task.target}`),
       });
-      const result = await stagehand.extract(refinedInstruction, refinedSchema);
+      const result = await stagehand.extract(refinedInstruction, refinedSchema, { page });
 
       if (result && result.data && result.data.length > 0) {
         return {
@@ -119,20 +141,20 @@ async function executeStrategy(
         domSnippet
       );
 
-      if (geminiStrategy.suggestedSelector) {
+      if (geminiStrategy.suggestedSelector && !signal.aborted) {
         const geminiSchema = z.object({
           data: z.string().describe(`The extracted information for: ${task.target}`),
         });
-        const result = await stagehand.extract(geminiStrategy.suggestedSelector, geminiSchema);
+        const result = await stagehand.extract(geminiStrategy.suggestedSelector, geminiSchema, { page });
 
         if (result && result.data && result.data.length > 0) {
-          const screenshot = await captureScreenshot(page);
+          const shot = screenshot ? await captureScreenshot(page) : undefined;
           return {
             success: true,
             result: result.data,
             strategy_used: "gemini" as const,
             working_selector: geminiStrategy.suggestedSelector,
-            screenshot,
+            screenshot: shot,
           };
         }
       }
@@ -145,18 +167,165 @@ async function executeStrategy(
   }
 }
 
+/** How many strategies may run at once (1 = strictly sequential). */
+const HEDGE_WIDTH = Math.max(parseInt(process.env.RECOVERY_HEDGE_WIDTH || "2", 10), 1);
+/** Start the next strategy after this long even if the running ones haven't failed. */
+const HEDGE_DELAY_MS = parseInt(process.env.RECOVERY_HEDGE_DELAY_MS || "8000", 10);
+/** Give up on recovery after this long. */
+const RECOVERY_BUDGET_MS = parseInt(process.env.RECOVERY_BUDGET_MS || "40000", 10);
+
+export interface RecoveryOptions {
+  /** Max strategies running at once; defaults to RECOVERY_HEDGE_WIDTH */
+  hedgeWidth?: number;
+  /** Delay before hedging with the next strategy; defaults to RECOVERY_HEDGE_DELAY_MS */
+  hedgeDelayMs?: number;
+  /** Time budget for the whole recovery; defaults to RECOVERY_BUDGET_MS */
+  budgetMs?: number;
+  /** Screenshot the winning page (skip when the screenshot policy won't keep it); defaults to true */
+  screenshot?: boolean;
+}
+
+/**
+ * Run the ordered strategies as a hedged race.
+ *
+ * The first strategy starts immediately. The next one starts when a running
+ * strategy fails, or after `hedgeDelayMs` if fewer than `hedgeWidth` are
+ * running. Every strategy gets its own page in the session, navigated to
+ * `url`, so cancelling one is closing its page: nothing keeps running once
+ * the race has returned, and the task's own page is never driven by a lane.
+ * The first success wins and the others are cancelled (results arriving
+ * later are ignored). Every strategy's outcome — success, failure or
+ * cancelled — is reported to recordStrategyOutcome, timed from when its page
+ * was ready. Nothing new starts after `budgetMs`, and anything still running
+ * then is cancelled.
+ */
+async function raceStrategies(
+  order: string[],
+  stagehand: Stagehand,
+  url: string,
+  task: TaskRequest,
+  failureContext: string,
+  urlPat: string,
+  options: Required<RecoveryOptions>
+): Promise<RecoveryResult | null> {
+  const queue = [...order];
+  const deadline = Date.now() + options.budgetMs;
+  type Lane = { startMs: number; started: boolean; page: Page | null; abort: AbortController };
+  const running = new Map<string, Lane>();
+  let finished = false;
+
+  return new Promise<RecoveryResult | null>((resolve) => {
+    let hedgeTimer: ReturnType<typeof setTimeout> | null = null;
+
+    const finish = (result: RecoveryResult | null) => {
+      if (finished) return;
+      finished = true;
+      clearTimeout(budgetTimer);
+      if (hedgeTimer) clearTimeout(hedgeTimer);
+      for (const [strategy, lane] of running) {
+        console.log(`[Recovery] Cancelling ${strategy}`);
+        lane.abort.abort();
+        if (lane.started) {
+          recordStrategyOutcome(urlPat, strategy, false, Date.now() - lane.startMs, true).catch(console.warn);
+        }
+        lane.page?.close().catch(() => {});
+      }
+      running.clear();
+      resolve(result);
+    };
+
+    const scheduleHedge = () => {
+      if (hedgeTimer) clearTimeout(hedgeTimer);
+      hedgeTimer = null;
+      if (queue.length === 0 || running.size >= options.hedgeWidth) return;
+      hedgeTimer = setTimeout(launchNext, options.hedgeDelayMs);
+    };
+
+    const launchNext = (): void => {
+      if (finished) return;
+      if (queue.length === 0 || Date.now() >= deadline) {
+        if (running.size === 0) finish(null);
+        return;
+      }
+      if (running.size >= options.hedgeWidth) return;
+
+      const strategy = queue.shift()!;
+      // Registered before any await so the width check sees it immediately;
+      // its page is filled in (and its clock started) once it is ready.
+      const lane: Lane = { startMs: Date.now(), started: false, page: null, abort: new AbortController() };
+      running.set(strategy, lane);
+
+      (async () => {
+        console.log(`[Recovery] Running ${strategy} on a new page`);
+        const lanePage = await stagehand.context.newPage();
+        if (finished) {
+          await lanePage.close().catch(() => {});
+          return null;
+        }
+        lane.page = lanePage;
+        await lanePage.goto(url, { waitUntil: "domcontentloaded", timeoutMs: 30000 });
+        if (finished) return null;
+        lane.startMs = Date.now();
+        lane.started = true;
+        return executeStrategy(strategy, stagehand, lanePage, task, failureContext, options.screenshot, lane.abort.signal);
+      })()
+        .catch((error) => {
+          if (!finished) {
+            console.warn(`[Recovery] Strategy ${strategy} failed:`, (error as Error).message);
+          }
+          return null;
+        })
+        .then((result) => {
+          // Cancelled lanes were already reported by finish()
+          if (finished || running.get(strategy) !== lane) return;
+          running.delete(strategy);
+          lane.page?.close().catch(() => {});
+
+          // A lane whose page never loaded says nothing about the strategy
+          if (lane.started) {
+            recordStrategyOutcome(urlPat, strategy, !!result, Date.now() - lane.startMs).catch(console.warn);
+          }
+          if (result) {
+            finish(result);
+            return;
+          }
+          launchNext();
+        });
+
+      scheduleHedge();
+    };
+
+    const budgetTimer = setTimeout(() => {
+      console.log(`[Recovery] Time budget of ${options.budgetMs}ms exhausted`);
+      finish(null);
+    }, options.budgetMs);
+
+    launchNext();
+  });
+}
+
 export async function attemptRecovery(
   stagehand: Stagehand,
   page: Page,
   task: TaskRequest,
   failureContext: string,
-  strategyOrder?: string[]
+  strategyOrder?: string[],
+  options: RecoveryOptions = {}
 ): Promise<RecoveryResult | null> {
   try {
     console.log("[Recovery] Starting multi-strategy recovery...");
 
     const urlPat = extractUrlPattern(task.url);
-    const order = strategyOrder || await getOrderedStrategies(urlPat);
+    // A strategy that cannot run here (Gemini without a key) is left out rather than counted as a failure
+    const order = (strategyOrder || await getOrderedStrategies(urlPat)).filter(
+      (strategy) => strategy !== "gemini" || isGeminiAvailable()
+    );
+    const resolved: Required<RecoveryOptions> = {
+      hedgeWidth: Math.max(options.hedgeWidth ?? HEDGE_WIDTH, 1),
+      hedgeDelayMs: options.hedgeDelayMs ?? HEDGE_DELAY_MS,
+      budgetMs: options.budgetMs ?? RECOVERY_BUDGET_MS,
+      screenshot: options.screenshot ?? true,
+    };
 
     const steps: TaskStep[] = [];
     steps.push({
@@ -172,25 +341,18 @@ export async function attemptRecovery(
         failureContext,
         strategies: order,
         strategyOrder: order.join(" → "),
+        hedgeWidth: resolved.hedgeWidth,
+        hedgeDelayMs: resolved.hedgeDelayMs,
+        budgetMs: resolved.budgetMs,
         steps,
       },
       async () => {
-        for (const strategy of order) {
-          const startMs = Date.now();
-          try {
-            const result = await executeStrategy(strategy, stagehand, page, task, failureContext);
-            if (result) {
-              await recordStrategyOutcome(urlPat, strategy, true, Date.now() - startMs).catch(console.warn);
-              return result;
-            }
-          } catch (error) {
-            console.warn(`[Recovery] Strategy ${strategy} failed:`, (error as Error).message);
-          }
-          await recordStrategyOutcome(urlPat, strategy, false, Date.now() - startMs).catch(console.warn);
-        }
-
-        console.log("[Recovery] All strategies exhausted");
-        return null;
+        // Lanes open where the task's page ended up (after any redirects)
+        const pageUrl = page.url();
+        const laneUrl = /^https?:/.test(pageUrl) ? pageUrl : task.url;
+        const result = await raceStrategies(order, stagehand, laneUrl, task, failureContext, urlPat, resolved);
+        if (!result) console.log("[Recovery] All strategies exhausted");
+        return result;
       }
     );
   } catch (error) {
@@ -1,7 +1,9 @@
 import { z } from "zod";
-import { createStagehand, closeStagehand, getSessionDebugUrl } from "../browser/stagehand-client";
+import { getSessionDebugUrl } from "../browser/stagehand-client";
+import { acquireSession, type SessionLease } from "../browser/session-pool";
+import { settlePage, isSettleSample } from "../browser/page-settle";
 import {
-  searchSimilarPatterns,
+  searchPatternsForUrl,
   storePattern,
   incrementPatternFailure,
   updatePatternLastSuccess,
@@ -9,25 +11,84 @@ import {
 } from "../redis/vectors";
 import { computePatternFitness, computeCompositeScore } from "./pattern-fitness";
 import { attemptRecovery } from "./recovery";
+import { getSettleEstimate, recordSettleTime } from "./strategy-selector";
+import { compileExtractor, runCompiledExtractor, extractorTarget } from "./compiled-extractor";
 import { buildPattern, isConfidentMatch, getConfidenceThreshold, adjustConfidenceThreshold } from "./pattern-extractor";
 import { extractUrlPattern } from "../utils/url";
-import { initWeave, createTracedOp, createInvocableOp, withWeaveAttributes, savePatternDataset } from "../tracing/weave";
-import { captureScreenshot, captureDOMSnapshot } from "../tracing/trace-context";
+import { initWeave, createTracedOp, createInvocableOp, withWeaveAttributes } from "../tracing/weave";
+import { captureDOMSnapshot } from "../tracing/trace-context";
+import { createScreenshotRecorder, type CaptureMoment } from "../tracing/screenshot-policy";
 import { initOpenAITracing } from "../embeddings/openai";
-import { listPatterns } from "../redis/patterns";
-import { updateTaskProgress } from "../redis/tasks";
+import { findExactPattern, setPatternExtractor } from "../redis/patterns";
+import { appendTaskProgress } from "../redis/tasks";
 import { geminiAnalyzePage, isGeminiAvailable } from "../ai/gemini";
-import { assessExtractionQuality } from "../ai/openai-quality";
-import { logTaskAsEvalPrediction } from "../evaluation/weave-eval-logger";
-import type { TaskRequest, TaskResult, TaskStep } from "../utils/types";
+import type { PagePattern, TaskRequest, TaskResult, TaskStep } from "../utils/types";
+
+// Stay inside the tasks route's 60s maxDuration
+const TASK_TIME_BUDGET_MS = parseInt(process.env.TASK_TIME_BUDGET_MS || "50000", 10);
+const MIN_RECOVERY_BUDGET_MS = 5000;
+
+const SETTLE_REASONS = {
+  target: "cached pattern's target region appeared",
+  quiet: "DOM and network quiet",
+  timeout: "never went quiet",
+  navigated: "page redirected",
+} as const;
+
+let scraperReady: Promise<void> | null = null;
+
+/**
+ * Tracing and vector index setup, done once per process rather than per
+ * task. A failed attempt is forgotten so the next task retries it.
+ */
+function ensureScraperReady(): Promise<void> {
+  if (!scraperReady) {
+    scraperReady = Promise.all([
+      initWeave().then(() => initOpenAITracing()),
+      ensureVectorIndex(),
+    ]).then(() => undefined);
+    scraperReady.catch(() => {
+      scraperReady = null;
+    });
+  }
+  return scraperReady;
+}
+
+/** Forget the index check, e.g. after the index was dropped underneath us */
+function resetScraperReady(): void {
+  scraperReady = null;
+}
+
+/** Shared state a batch group hands to each of its scrapes */
+export interface ScrapeHints {
+  /** Lease the group's held browser session instead of one from the pool */
+  lease?: () => Promise<SessionLease>;
+  /** Patterns an earlier page of the group resolved; skips the lookup */
+  patterns?: PagePattern[];
+}
+
+const scrapeHints = new Map<string, ScrapeHints>();
+
+/**
+ * Attach hints to the scrape of `taskId` (undefined clears them). They are
+ * passed beside the op rather than as an argument so Weave never tries to
+ * serialize a browser session.
+ */
+export function setScrapeHints(taskId: string, hints: ScrapeHints | undefined): void {
+  if (hints) scrapeHints.set(taskId, hints);
+  else scrapeHints.delete(taskId);
+}
 
 /**
  * The core learning scrape function — THE HEART of WebScout.
  *
  * Algorithm:
- * 1. Search Redis for cached patterns (vector KNN)
- * 2. Launch cloud browser, navigate to URL
- * 3. If cache hit -> try cached extraction
+ * 1. Look up an exact url_pattern + target key; on a miss, search Redis for
+ *    cached patterns (vector KNN). The browser session is leased from the
+ *    pool at the same time, so its launch overlaps the lookup.
+ * 2. Navigate to URL
+ * 3. If cache hit -> run the pattern's compiled extractor (no LLM), else
+ *    cached LLM extraction
  * 4. If no cache / cache failed -> fresh extraction
  * 5. If fresh failed -> RECOVERY (agent, act, refined) -> LEARN
  * 6. Every step: traced with Weave, screenshotted, logged
@@ -35,31 +96,74 @@ import type { TaskRequest, TaskResult, TaskStep } from "../utils/types";
 export const learningScrape = createInvocableOp(
   "learningScrape",
   async function learningScrape(task: TaskRequest): Promise<TaskResult> {
-    await initWeave();
-    await initOpenAITracing();
-    await ensureVectorIndex();
+    const startTime = Date.now();
+    const phaseTimings: Record<string, number> = {};
+    const hints = task.id ? scrapeHints.get(task.id) : undefined;
+    const leaseSession = hints?.lease ?? acquireSession;
+
+    // The browser needs nothing from Redis or OpenAI, so start leasing it
+    // before any other setup; it is awaited only once the lookup is done
+    let prefetchedLease: Promise<SessionLease> | null = leaseSession();
+    prefetchedLease.then(
+      () => { phaseTimings.browser_ms = Date.now() - startTime; },
+      () => {} // Surfaced where the lease is awaited
+    );
+    const takeLease = (): Promise<SessionLease> => {
+      const lease = prefetchedLease ?? leaseSession();
+      prefetchedLease = null;
+      return lease;
+    };
+    // Give back a prefetched lease the scrape never took (setup failed first)
+    const releaseUntakenLease = () => {
+      prefetchedLease?.then((lease) => lease.release(), () => {});
+      prefetchedLease = null;
+    };
+
+    try {
+      await ensureScraperReady();
+    } catch (error) {
+      releaseUntakenLease();
+      throw error;
+    }
+    phaseTimings.init_ms = Date.now() - startTime;
 
     const steps: TaskStep[] = [];
     const screenshots: string[] = [];
     const taskId = task.id || crypto.randomUUID();
     const urlPattern = extractUrlPattern(task.url);
-    const startTime = Date.now();
+
+    const recorder = createScreenshotRecorder(taskId);
+    // Steps whose screenshot is still being captured in the background
+    const pendingSteps = new Set<TaskStep>();
 
     let patternId: string | undefined;
     let sessionUrl: string | undefined;
 
-    // Flush progress to Redis so the SSE live view can pick up intermediate steps
+    // Flush progress to Redis so the SSE live view can pick up intermediate steps.
+    // Only steps added since the last flush are sent, stopping short of any step
+    // still waiting for its screenshot; the cursor advances before the write so
+    // overlapping flushes never resend or skip a step.
+    let flushedSteps = 0;
     const flushProgress = () => {
-      updateTaskProgress(taskId, { steps, screenshots, session_url: sessionUrl }).catch(() => {});
+      let end = flushedSteps;
+      while (end < steps.length && !pendingSteps.has(steps[end])) end++;
+      const newSteps = steps.slice(flushedSteps, end);
+      flushedSteps = end;
+      appendTaskProgress(taskId, { steps: newSteps, session_url: sessionUrl }).catch(() => {});
     };
 
-    // Fetch dynamic confidence threshold
-    let confidenceThreshold: number;
-    try {
-      confidenceThreshold = await getConfidenceThreshold();
-    } catch {
-      confidenceThreshold = 0.85;
-    }
+    // Captures must be stored (and flushed) before the result is built and
+    // the lease hands the page back to the pool
+    const finishCaptures = async () => {
+      await recorder.drain();
+      phaseTimings.screenshot_ms = recorder.totalMs();
+      flushProgress();
+    };
+
+    // Fetch dynamic confidence threshold and the host's learned settle time
+    // alongside the pattern lookup
+    const confidenceThresholdPromise = getConfidenceThreshold().catch(() => 0.85);
+    const settleEstimatePromise = getSettleEstimate(urlPattern).catch(() => null);
 
     // Wrap the entire scrape with Weave attributes for rich filtering
     return withWeaveAttributes(
@@ -70,28 +174,66 @@ export const learningScrape = createInvocableOp(
         sessionType: "learning_scrape",
       },
       async () => {
-        // STEP 1: Search Redis for known patterns
+        // STEP 1: Exact key lookup, then semantic search for known patterns
 
-        steps.push({
-          action: "vector_search",
-          status: "info",
-          detail: `Searching Redis for patterns matching: "${urlPattern} ${task.target}"`,
-          timestamp: Date.now(),
-        });
+        const lookupStart = Date.now();
+        let cachedPatterns: Awaited<ReturnType<typeof searchPatternsForUrl>>["patterns"] = [];
+        const exactPattern = hints?.patterns
+          ? null
+          : await findExactPattern(urlPattern, task.target).catch(() => null);
 
-        let cachedPatterns: Awaited<ReturnType<typeof searchSimilarPatterns>> = [];
-        try {
-          const queryText = `${urlPattern} ${task.target}`;
-          cachedPatterns = await searchSimilarPatterns(queryText, 10);
-        } catch (error) {
-          console.warn("[Scraper] Redis search failed, proceeding without cache:", error);
+        if (hints?.patterns) {
+          // A batch group resolved this url pattern + target on an earlier page
+          cachedPatterns = hints.patterns;
           steps.push({
-            action: "cache_error",
+            action: "batch_lookup",
             status: "info",
-            detail: "Redis unavailable — proceeding without cache",
+            detail: "Reused the pattern resolved for an earlier page of this batch group — skipped pattern lookup",
             timestamp: Date.now(),
           });
+        } else if (exactPattern) {
+          // Exact repeat: skip the embedding call and KNN search entirely
+          cachedPatterns = [{ ...exactPattern, score: 1 }];
+          steps.push({
+            action: "exact_lookup",
+            status: "info",
+            detail: `Exact pattern key hit for "${urlPattern} ${task.target}" — skipped embedding + vector search`,
+            timestamp: Date.now(),
+          });
+        } else {
+          steps.push({
+            action: "vector_search",
+            status: "info",
+            detail: `No exact pattern key — searching Redis for patterns matching: "${urlPattern} ${task.target}"`,
+            timestamp: Date.now(),
+          });
+
+          try {
+            const queryText = `${urlPattern} ${task.target}`;
+            const search = await searchPatternsForUrl(urlPattern, queryText, 10);
+            cachedPatterns = search.patterns;
+            steps.push({
+              action: "vector_search",
+              status: "info",
+              detail: search.scope === "global"
+                ? `${search.patterns.length} candidate(s) from the whole index`
+                : `${search.patterns.length} candidate(s) from the ${search.scope === "path" ? "same host and path" : "same host"} (${urlPattern.split("/")[0]})`,
+              timestamp: Date.now(),
+            });
+          } catch (error) {
+            console.warn("[Scraper] Redis search failed, proceeding without cache:", error);
+            // The index may have been dropped since it was checked; re-check on the next task
+            resetScraperReady();
+            steps.push({
+              action: "cache_error",
+              status: "info",
+              detail: "Redis unavailable — proceeding without cache",
+              timestamp: Date.now(),
+            });
+          }
         }
+        const confidenceThreshold = await confidenceThresholdPromise;
+        phaseTimings.lookup_ms = Date.now() - lookupStart;
         flushProgress();
 
         // Re-rank by composite score: vector similarity * 0.6 + pattern fitness * 0.4
@@ -136,18 +278,63 @@ export const learningScrape = createInvocableOp(
           flushProgress();
         }
 
-        // STEP 2: Launch browser and navigate
+        // STEP 2: Take the browser leased at startup and navigate
+
+        const browserWaitStart = Date.now();
+        const lease = await takeLease();
+        phaseTimings.browser_wait_ms = Date.now() - browserWaitStart;
+        const { stagehand, page } = lease;
+        sessionUrl = getSessionDebugUrl(stagehand);
 
         steps.push({
           action: "browser_init",
           status: "info",
-          detail: "Launching cloud browser via Browserbase + Stagehand",
+          detail: lease.reused
+            ? `Leased warm browser session (task #${lease.taskNumber} on this session, waited ${lease.waitMs}ms)`
+            : `Launched cloud browser via Browserbase + Stagehand (${lease.waitMs}ms)`,
+          timestamp: Date.now(),
+        });
+        steps.push({
+          action: "startup",
+          status: "info",
+          detail: `Startup ${Date.now() - startTime}ms — init ${phaseTimings.init_ms}ms, ` +
+            `pattern lookup ${phaseTimings.lookup_ms}ms alongside browser ${phaseTimings.browser_ms ?? 0}ms ` +
+            `(waited ${phaseTimings.browser_wait_ms}ms for it after the lookup)`,
           timestamp: Date.now(),
         });
 
-        const stagehand = await createStagehand();
-        sessionUrl = getSessionDebugUrl(stagehand);
-        const page = stagehand.context.pages()[0];
+        // Push a step and, if the screenshot policy keeps this moment, capture
+        // the page in the background. The screenshot goes to the
+        // content-addressed blob store and the step gets its URL once stored.
+        const pushCaptured = (step: TaskStep, moment: CaptureMoment, options?: { failed?: boolean; base64?: string }) => {
+          steps.push(step);
+          const shot = recorder.capture(page, moment, options);
+          if (!shot) return;
+          const slot = screenshots.push("") - 1;
+          pendingSteps.add(step);
+          shot.then((url) => {
+            step.screenshot = url;
+            screenshots[slot] = url;
+            pendingSteps.delete(step);
+            flushProgress();
+          });
+        };
+
+        // After an LLM extraction succeeds, compile it into selectors so the
+        // next cache hit can skip the LLM; a result that can't be compiled
+        // leaves the pattern without an extractor
+        const learnExtractor = async (id: string, result: unknown) => {
+          const extractor = await compileExtractor(page, result);
+          await setPatternExtractor(id, extractor).catch(console.warn);
+          steps.push({
+            action: "extractor_compiled",
+            status: extractor ? "success" : "info",
+            detail: extractor
+              ? `Compiled a ${extractor.kind} extractor${extractor.root ? ` over "${extractor.root}"` : ""} — future cache hits skip the LLM`
+              : "Result could not be mapped to page elements — cache hits will use the LLM",
+            timestamp: Date.now(),
+          });
+        };
 
         if (sessionUrl) {
           steps.push({
@@ -160,22 +347,65 @@ export const learningScrape = createInvocableOp(
         }
 
         try {
+          const navigateStart = Date.now();
           await page.goto(task.url, { waitUntil: "domcontentloaded", timeoutMs: 30000 });
-          await page.waitForTimeout(2000);
-
-          const initialScreenshot = await captureScreenshot(page);
-          screenshots.push(initialScreenshot);
+          phaseTimings.navigate_ms = Date.now() - navigateStart;
+
+          // Wait for readiness rather than a fixed sleep: the cached pattern's
+          // target region appearing, or the page going quiet
+          const settleEstimate = await settleEstimatePromise;
+          const settle = await settlePage(page, {
+            target: bestMatch?.extractor && isConfidentMatch(bestMatch.compositeScore ?? bestMatch.score!, confidenceThreshold)
+              ? extractorTarget(bestMatch.extractor)
+              : undefined,
+            estimateMs: settleEstimate,
+          });
+          phaseTimings.settle_ms = settle.ms;
+          if (isSettleSample(settle)) recordSettleTime(urlPattern, settle.ms).catch(console.warn);
           steps.push({
+            action: "settle",
+            status: "info",
+            detail: `Page ready after ${settle.ms}ms (${SETTLE_REASONS[settle.reason]}; budget ${settle.budgetMs}ms` +
+              (settleEstimate ? ` from the host's learned ${Math.round(settleEstimate)}ms)` : ")"),
+            timestamp: Date.now(),
+          });
+
+          pushCaptured({
             action: "navigate",
             status: "success",
             detail: `Navigated to ${task.url}`,
-            screenshot: initialScreenshot,
             timestamp: Date.now(),
-          });
+          }, "navigate");
           flushProgress();
 
           // STEP 3: Try cached pattern (if confident match)
 
+          if (bestMatch?.extractor && isConfidentMatch(bestMatch.compositeScore ?? bestMatch.score!, confidenceThreshold)) {
+            const extractStart = Date.now();
+            const compiledResult = await runCompiledExtractor(page, bestMatch.extractor);
+            if (compiledResult !== null) {
+              await updatePatternLastSuccess(bestMatch.id);
+              await adjustConfidenceThreshold(true).catch(console.warn);
+
+              pushCaptured({
+                action: "compiled_extract",
+                status: "success",
+                detail: `Compiled extractor matched in ${Date.now() - extractStart}ms — no LLM call. Success count incremented.`,
+                timestamp: Date.now(),
+              }, "final");
+              await finishCaptures();
+
+              return buildResult(taskId, task, "success", compiledResult, steps, screenshots, true, false, bestMatch.id, startTime, sessionUrl);
+            }
+            steps.push({
+              action: "compiled_extract",
+              status: "info",
+              detail: "Compiled extractor output no longer has the learned shape — falling back to the LLM",
+              timestamp: Date.now(),
+            });
+            flushProgress();
+          }
+
           if (bestMatch && isConfidentMatch(bestMatch.compositeScore ?? bestMatch.score!, confidenceThreshold)) {
             try {
               steps.push({
@@ -201,56 +431,16 @@ export const learningScrape = createInvocableOp(
                 await updatePatternLastSuccess(bestMatch.id);
                 await adjustConfidenceThreshold(true).catch(console.warn);
 
-                const ss = await captureScreenshot(page);
-                screenshots.push(ss);
-                steps.push({
+                pushCaptured({
                   action: "cached_extract",
                   status: "success",
                   detail: "Cached pattern worked! Success count incremented.",
-                  screenshot: ss,
                   timestamp: Date.now(),
-                });
-                flushProgress();
-
-                // Quality check (non-critical)
-                let qualityScore: number | undefined;
-                let qualitySummary: string | undefined;
-                try {
-                  const qa = await assessExtractionQuality(task.target, parsedResult, task.url);
-                  qualityScore = qa.quality_score;
-                  qualitySummary = qa.summary;
-                  steps.push({
-                    action: "quality_check",
-                    status: qa.quality_score >= 50 ? "success" : "info",
-                    detail: `Quality: ${qa.quality_score}/100 (${qa.confidence}) — ${qa.summary}`,
-                    timestamp: Date.now(),
-                  });
-                } catch (qErr) {
-                  steps.push({
-                    action: "quality_check",
-                    status: "info",
-                    detail: `Quality check skipped: ${(qErr as Error).message}`,
-                    timestamp: Date.now(),
-                  });
-                }
-
-                const taskResult = buildResult(taskId, task, "success", parsedResult, steps, screenshots, true, false, bestMatch.id, startTime, sessionUrl);
-                taskResult.quality_score = qualityScore;
-                taskResult.quality_summary = qualitySummary;
+                }, "final");
+                await learnExtractor(bestMatch.id, parsedResult);
+                await finishCaptures();
 
-                // Log evaluation prediction (non-critical)
-                logTaskAsEvalPrediction({
-                  taskId,
-                  url: task.url,
-                  target: task.target,
-                  status: "success",
-                  durationMs: Date.now() - startTime,
-                  usedCache: true,
-                  recoveryAttempted: false,
-                  qualityScore: qualityScore ?? 0,
-                }).catch(() => {});
-
-                return taskResult;
+                return buildResult(taskId, task, "success", parsedResult, steps, screenshots, true, false, bestMatch.id, startTime, sessionUrl);
               }
             } catch (error) {
               await incrementPatternFailure(bestMatch.id).catch(console.warn);
@@ -338,82 +528,30 @@ export const learningScrape = createInvocableOp(
               const pattern = buildPattern(task.url, task.target, task.target, "extract");
               patternId = await storePattern(pattern);
 
-              // Save updated patterns to Weave Dataset
-              try {
-                const { patterns } = await listPatterns(100, 0);
-                await savePatternDataset(patterns);
-              } catch {
-                // Non-critical
-              }
-
-              const ss = await captureScreenshot(page);
-              screenshots.push(ss);
-              steps.push({
+              pushCaptured({
                 action: "fresh_extract",
                 status: "success",
                 detail: "Fresh extraction succeeded! Pattern stored for future use.",
-                screenshot: ss,
                 timestamp: Date.now(),
-              });
+              }, "final");
               steps.push({
                 action: "pattern_stored",
                 status: "success",
                 detail: `New pattern stored: ${patternId}`,
                 timestamp: Date.now(),
               });
-              flushProgress();
-
-              // Quality check (non-critical)
-              let qualityScore: number | undefined;
-              let qualitySummary: string | undefined;
-              try {
-                const qa = await assessExtractionQuality(task.target, parsedResult, task.url);
-                qualityScore = qa.quality_score;
-                qualitySummary = qa.summary;
-                steps.push({
-                  action: "quality_check",
-                  status: qa.quality_score >= 50 ? "success" : "info",
-                  detail: `Quality: ${qa.quality_score}/100 (${qa.confidence}) — ${qa.summary}`,
-                  timestamp: Date.now(),
-                });
-                flushProgress();
-              } catch (qErr) {
-                steps.push({
-                  action: "quality_check",
-                  status: "info",
-                  detail: `Quality check skipped: ${(qErr as Error).message}`,
-                  timestamp: Date.now(),
-                });
-              }
-
-              const taskResult = buildResult(taskId, task, "success", parsedResult, steps, screenshots, false, false, patternId, startTime, sessionUrl);
-              taskResult.quality_score = qualityScore;
-              taskResult.quality_summary = qualitySummary;
-
-              // Log evaluation prediction (non-critical)
-              logTaskAsEvalPrediction({
-                taskId,
-                url: task.url,
-                target: task.target,
-                status: "success",
-                durationMs: Date.now() - startTime,
-                usedCache: false,
-                recoveryAttempted: false,
-                qualityScore: qualityScore ?? 0,
-              }).catch(() => {});
+              await learnExtractor(patternId, parsedResult);
+              await finishCaptures();
 
-              return taskResult;
+              return buildResult(taskId, task, "success", parsedResult, steps, screenshots, false, false, patternId, startTime, sessionUrl);
             }
           } catch (error) {
-            const ss = await captureScreenshot(page);
-            screenshots.push(ss);
-            steps.push({
+            pushCaptured({
               action: "fresh_extract",
               status: "failure",
               detail: `Fresh extraction failed: ${(error as Error).message}`,
-              screenshot: ss,
               timestamp: Date.now(),
-            });
+            }, "failure");
             flushProgress();
           }
 
@@ -427,11 +565,17 @@ export const learningScrape = createInvocableOp(
           });
           flushProgress();
 
+          // Hedged recovery gets whatever is left of the task's time budget
           const recoveryResult = await attemptRecovery(
             stagehand,
             page,
             task,
-            `Extraction of "${task.target}" failed on ${urlPattern}`
+            `Extraction of "${task.target}" failed on ${urlPattern}`,
+            undefined,
+            {
+              budgetMs: Math.max(TASK_TIME_BUDGET_MS - (Date.now() - startTime), MIN_RECOVERY_BUDGET_MS),
+              screenshot: recorder.wants("final"),
+            }
           );
 
           if (recoveryResult && recoveryResult.success) {
@@ -442,105 +586,46 @@ export const learningScrape = createInvocableOp(
             const pattern = buildPattern(task.url, task.target, recoveryResult.working_selector, approach);
             patternId = await storePattern(pattern);
 
-            // Save updated patterns to Weave Dataset
-            try {
-              const { patterns } = await listPatterns(100, 0);
-              await savePatternDataset(patterns);
-            } catch {
-              // Non-critical
-            }
-
-            const ss = recoveryResult.screenshot || await captureScreenshot(page);
-            screenshots.push(ss);
-
-            steps.push({
+            // Strategies screenshot their own (possibly hedged) page
+            pushCaptured({
               action: "recovery_success",
               status: "success",
               detail: `Recovery succeeded via "${recoveryResult.strategy_used}". Pattern learned!`,
-              screenshot: ss,
               timestamp: Date.now(),
-            });
+            }, "final", { base64: recoveryResult.screenshot });
             steps.push({
               action: "pattern_learned",
               status: "success",
               detail: `Learned new pattern: ${patternId}`,
               timestamp: Date.now(),
             });
-            flushProgress();
-
-            // Quality check (non-critical)
-            let qualityScore: number | undefined;
-            let qualitySummary: string | undefined;
-            try {
-              const qa = await assessExtractionQuality(task.target, recoveryResult.result, task.url);
-              qualityScore = qa.quality_score;
-              qualitySummary = qa.summary;
-              steps.push({
-                action: "quality_check",
-                status: qa.quality_score >= 50 ? "success" : "info",
-                detail: `Quality: ${qa.quality_score}/100 (${qa.confidence}) — ${qa.summary}`,
-                timestamp: Date.now(),
-              });
-              flushProgress();
-            } catch (qErr) {
-              steps.push({
-                action: "quality_check",
-                status: "info",
-                detail: `Quality check skipped: ${(qErr as Error).message}`,
-                timestamp: Date.now(),
-              });
-            }
+            await finishCaptures();
 
-            const taskResult = buildResult(taskId, task, "success", recoveryResult.result, steps, screenshots, false, true, patternId, startTime, sessionUrl);
-            taskResult.quality_score = qualityScore;
-            taskResult.quality_summary = qualitySummary;
-
-            // Log evaluation prediction (non-critical)
-            logTaskAsEvalPrediction({
-              taskId,
-              url: task.url,
-              target: task.target,
-              status: "success",
-              durationMs: Date.now() - startTime,
-              usedCache: false,
-              recoveryAttempted: true,
-              qualityScore: qualityScore ?? 0,
-            }).catch(() => {});
-
-            return taskResult;
+            return buildResult(taskId, task, "success", recoveryResult.result, steps, screenshots, false, true, patternId, startTime, sessionUrl);
           }
 
           // ALL STRATEGIES FAILED
 
           const domSnapshot = await captureDOMSnapshot(page);
-          steps.push({
+          pushCaptured({
             action: "recovery_failed",
             status: "failure",
             detail: "All recovery strategies exhausted. Task failed.",
             dom_snapshot: domSnapshot,
             timestamp: Date.now(),
-          });
-          flushProgress();
-
-          // Log evaluation prediction (non-critical)
-          logTaskAsEvalPrediction({
-            taskId,
-            url: task.url,
-            target: task.target,
-            status: "failed",
-            durationMs: Date.now() - startTime,
-            usedCache: false,
-            recoveryAttempted: true,
-            qualityScore: 0,
-          }).catch(() => {});
+          }, "final", { failed: true });
+          await finishCaptures();
 
           return buildResult(taskId, task, "failed", null, steps, screenshots, false, true, undefined, startTime, sessionUrl);
 
         } finally {
-          await closeStagehand(stagehand);
+          await finishCaptures();
+          await lease.release();
         }
       }
-    );
+    )
+      .then((result) => ({ ...result, phase_timings: phaseTimings }))
+      .finally(releaseUntakenLease);
   },
   {
     // Custom Weave summary — these metrics show up in the Weave UI
@@ -550,8 +635,9 @@ export const learningScrape = createInvocableOp(
       "webscout.recovery_attempted": result.recovery_attempted ? 1 : 0,
       "webscout.recovery_succeeded": (result.recovery_attempted && result.status === "success") ? 1 : 0,
       "webscout.pattern_learned": result.pattern_id ? 1 : 0,
-      "webscout.quality_score": result.quality_score ?? -1,
       "webscout.duration_ms": (result.completed_at || Date.now()) - result.created_at,
+      "webscout.startup_ms": (result.phase_timings?.init_ms ?? 0) + (result.phase_timings?.lookup_ms ?? 0) +
+        (result.phase_timings?.browser_wait_ms ?? 0),
       "webscout.steps_count": result.steps.length,
     }),
     callDisplayName: (task: TaskRequest) => {
@@ -566,8 +652,8 @@ export const learningScrape = createInvocableOp(
 );
 
 // Helper: Build TaskResult
-// NOTE: Steps are stripped of large base64 data to prevent Weave serialization
-// stack overflow. The full step data is already flushed to Redis via flushProgress().
+// NOTE: Screenshots are URL references into the blob store, so they are kept;
+// DOM snapshots are still trimmed to keep the Weave trace small.
 
 function buildResult(
   id: string,
@@ -583,19 +669,16 @@ function buildResult(
   startTime: number,
   sessionUrl?: string
 ): TaskResult {
-  // Strip large base64 data from steps to prevent Weave serialization overflow.
+  // Trim DOM snapshots to prevent Weave serialization overflow.
   // The complete step data is already in Redis from flushProgress() calls.
   const safeSteps = steps.map(step => {
     const s = { ...step };
-    if (s.screenshot) s.screenshot = "[captured]";
     if (s.dom_snapshot) s.dom_snapshot = s.dom_snapshot.substring(0, 500) + "...";
     return s;
   });
 
-  // Keep only the last 3 screenshots in the top-level array (for Weave trace display)
-  const safeScreenshots = screenshots.slice(-3).map(s =>
-    s.length > 50000 ? s.substring(0, 50000) : s
-  );
+  // Keep only the last 3 screenshot references in the top-level array (for Weave trace display)
+  const safeScreenshots = screenshots.slice(-3);
 
   return {
     id,
@@ -10,11 +10,59 @@ interface StrategyStats {
 }
 
 const STRATEGY_PREFIX = "strategy_stats:";
+const ROLLUP_PREFIX = "strategy_rollup:";
+const GLOBAL_ROLLUP_KEY = `${ROLLUP_PREFIX}global`;
+const OUTCOME_STREAM_KEY = "strategy_outcomes";
+const OUTCOME_STREAM_MAXLEN = 10000;
 const ALL_STRATEGIES = ["agent", "act", "extract_refined", "gemini"];
 
+type StrategyPolicy = "thompson" | "ucb" | "greedy";
+const POLICY = (process.env.STRATEGY_POLICY || "thompson") as StrategyPolicy;
+/** Pseudo-observations a parent level (host, global) contributes as a prior */
+const PRIOR_STRENGTH = 4;
+/** Duration assumed for a strategy nobody has timed yet */
+const DEFAULT_DURATION_MS = 15000;
+/** Half-life of the host rollup's `recent:*` outcome counters */
+export const RECENT_OUTCOME_HALF_LIFE_MS = parseInt(process.env.RECENT_OUTCOME_HALF_LIFE_MS || "600000", 10);
+
+export function hostRollupKey(urlPattern: string): string {
+  return `${ROLLUP_PREFIX}host:${urlPattern.split("/")[0]}`;
+}
+
+/**
+ * Record one attempt at all three pooling levels in one round trip:
+ *   - `strategy_stats:<url_pattern>:<strategy>` (attempts/successes/avg_duration_ms)
+ *   - `strategy_rollup:host:<hostname>` and `strategy_rollup:global`
+ *     (`<strategy>:attempts|successes|duration_ms` fields)
+ * and append the raw outcome to the `strategy_outcomes` stream, which the
+ * offline policy simulator replays (scripts/strategy_bandit_sim.py).
+ *
+ * KEYS[1] = pattern stats, KEYS[2] = host rollup, KEYS[3] = global rollup, KEYS[4] = stream
+ * ARGV = strategy, success ("1"/"0"), durationMs, urlPattern, stream maxlen
+ */
+const RECORD_OUTCOME_SCRIPT = `
+local success = ARGV[2] == '1'
+local duration = tonumber(ARGV[3])
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if success then redis.call('HINCRBY', KEYS[1], 'successes', 1) end
+local old = tonumber(redis.call('HGET', KEYS[1], 'avg_duration_ms') or '0')
+redis.call('HSET', KEYS[1], 'avg_duration_ms', tostring(old + (duration - old) / attempts))
+for i = 2, 3 do
+  redis.call('HINCRBY', KEYS[i], ARGV[1] .. ':attempts', 1)
+  if success then redis.call('HINCRBY', KEYS[i], ARGV[1] .. ':successes', 1) end
+  redis.call('HINCRBYFLOAT', KEYS[i], ARGV[1] .. ':duration_ms', duration)
+end
+redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[5], '*',
+  'url_pattern', ARGV[4], 'strategy', ARGV[1], 'success', ARGV[2], 'duration_ms', ARGV[3])
+return attempts
+`;
+
 /**
  * Record the outcome of a recovery strategy attempt.
- * Stored per URL-pattern so the agent learns domain-specific preferences.
+ * Stored per URL-pattern so the agent learns domain-specific preferences,
+ * and rolled up per hostname and globally as priors for sparse patterns.
+ * A `cancelled` attempt (lost a hedged race before finishing) is counted
+ * separately and does not affect the success rate or average duration.
  */
 export const recordStrategyOutcome = createTracedOp(
   "recordStrategyOutcome",
@@ -22,23 +70,28 @@ export const recordStrategyOutcome = createTracedOp(
     urlPattern: string,
     strategy: string,
     success: boolean,
-    durationMs: number
+    durationMs: number,
+    cancelled: boolean = false
   ): Promise<void> {
     const client = await getRedisClient();
     const key = `${STRATEGY_PREFIX}${urlPattern}:${strategy}`;
 
-    // Increment counts first, then update running average using the committed values
-    await Promise.all([
-      client.hIncrBy(key, "attempts", 1),
-      ...(success ? [client.hIncrBy(key, "successes", 1)] : []),
-    ]);
+    if (cancelled) {
+      await client.hIncrBy(key, "cancelled", 1);
+      console.log(`[Strategy] Recorded ${strategy} cancelled for ${urlPattern} (${durationMs}ms)`);
+      return;
+    }
 
-    // Running average: new_avg = old_avg + (new_value - old_avg) / count
-    const data = await client.hGetAll(key);
-    const attempts = parseInt(data.attempts || "1", 10);
-    const oldAvg = parseFloat(data.avg_duration_ms || "0");
-    const newAvg = oldAvg + (durationMs - oldAvg) / attempts;
-    await client.hSet(key, "avg_duration_ms", newAvg.toString());
+    await client.eval(RECORD_OUTCOME_SCRIPT, {
+      keys: [key, hostRollupKey(urlPattern), GLOBAL_ROLLUP_KEY, OUTCOME_STREAM_KEY],
+      arguments: [
+        strategy,
+        success ? "1" : "0",
+        Math.round(durationMs).toString(),
+        urlPattern,
+        OUTCOME_STREAM_MAXLEN.toString(),
+      ],
+    });
 
     console.log(
       `[Strategy] Recorded ${strategy} ${success ? "success" : "failure"} for ${urlPattern} (${durationMs}ms)`
@@ -52,51 +105,206 @@ export const recordStrategyOutcome = createTracedOp(
 );
 
 /**
- * Get ordered strategies for a URL pattern based on historical success rates.
- * Falls back to default order if no history exists.
+ * The host rollup's `recent:attempts` / `recent:failures`: one outcome per
+ * finished task, decayed by half every half-life before each update
+ * (`recent:at` is the last update). The host scheduler reads them to back
+ * off a failing host. Counted per task rather than per recovery strategy,
+ * so one failed recovery racing several strategies is one failure.
+ *
+ * KEYS[1] = host rollup; ARGV = success ("1"/"0"), now (ms), half-life (ms)
+ */
+const RECORD_HOST_OUTCOME_SCRIPT = `
+local now = tonumber(ARGV[2])
+local at = tonumber(redis.call('HGET', KEYS[1], 'recent:at') or ARGV[2])
+local keep = 0.5 ^ (math.max(now - at, 0) / tonumber(ARGV[3]))
+local attempts = tonumber(redis.call('HGET', KEYS[1], 'recent:attempts') or '0') * keep + 1
+local failures = tonumber(redis.call('HGET', KEYS[1], 'recent:failures') or '0') * keep
+if ARGV[1] ~= '1' then failures = failures + 1 end
+redis.call('HSET', KEYS[1], 'recent:attempts', tostring(attempts),
+  'recent:failures', tostring(failures), 'recent:at', ARGV[2])
+return tostring(failures / attempts)
+`;
+
+/** Count a finished task's outcome towards its host's recent failure rate */
+export async function recordHostOutcome(urlPattern: string, success: boolean): Promise<void> {
+  const client = await getRedisClient();
+  await client.eval(RECORD_HOST_OUTCOME_SCRIPT, {
+    keys: [hostRollupKey(urlPattern)],
+    arguments: [success ? "1" : "0", Date.now().toString(), RECENT_OUTCOME_HALF_LIFE_MS.toString()],
+  });
+}
+
+/**
+ * Per-host settle time (how long pages take to become ready after
+ * navigation), kept in the host rollup hash as `settle:ewma_ms` and
+ * `settle:samples`. The first samples are averaged; after that the EWMA
+ * weights recent visits by SETTLE_EWMA_ALPHA so redesigns are picked up.
+ *
+ * KEYS[1] = host rollup; ARGV = observed ms, alpha
+ */
+const RECORD_SETTLE_SCRIPT = `
+local n = redis.call('HINCRBY', KEYS[1], 'settle:samples', 1)
+local observed = tonumber(ARGV[1])
+local old = tonumber(redis.call('HGET', KEYS[1], 'settle:ewma_ms') or ARGV[1])
+local alpha = math.max(tonumber(ARGV[2]), 1 / n)
+local estimate = old + alpha * (observed - old)
+redis.call('HSET', KEYS[1], 'settle:ewma_ms', tostring(estimate))
+return tostring(estimate)
+`;
+const SETTLE_EWMA_ALPHA = 0.2;
+
+export async function recordSettleTime(urlPattern: string, settleMs: number): Promise<void> {
+  const client = await getRedisClient();
+  await client.eval(RECORD_SETTLE_SCRIPT, {
+    keys: [hostRollupKey(urlPattern)],
+    arguments: [Math.round(settleMs).toString(), SETTLE_EWMA_ALPHA.toString()],
+  });
+}
+
+/** Learned settle time for the pattern's host, or null before the first visit */
+export async function getSettleEstimate(urlPattern: string): Promise<number | null> {
+  const client = await getRedisClient();
+  const value = await client.hGet(hostRollupKey(urlPattern), "settle:ewma_ms");
+  return value ? parseFloat(value) : null;
+}
+
+interface ArmCounts {
+  attempts: number;
+  successes: number;
+  durationMs: number; // total
+}
+
+interface ArmPosterior {
+  strategy: string;
+  alpha: number;
+  beta: number;
+  expectedDurationMs: number;
+  attempts: number; // at the most specific level, for UCB exploration
+}
+
+/**
+ * Shrink each level towards its parent: the parent's mean success rate and
+ * duration act as PRIOR_STRENGTH pseudo-observations, so a pattern with one
+ * early failure still inherits its host's (or the global) track record.
+ */
+function poolArm(strategy: string, levels: ArmCounts[]): ArmPosterior {
+  let alpha = 1;
+  let beta = 1;
+  let durationMs = DEFAULT_DURATION_MS;
+  // levels are ordered global → host → pattern
+  for (const level of levels) {
+    const mean = alpha / (alpha + beta);
+    alpha = PRIOR_STRENGTH * mean + level.successes;
+    beta = PRIOR_STRENGTH * (1 - mean) + (level.attempts - level.successes);
+    durationMs = (PRIOR_STRENGTH * durationMs + level.durationMs) / (PRIOR_STRENGTH + level.attempts);
+  }
+  return {
+    strategy,
+    alpha,
+    beta,
+    expectedDurationMs: Math.max(durationMs, 1),
+    attempts: levels[levels.length - 1].attempts,
+  };
+}
+
+// Marsaglia–Tsang gamma sampler (shape >= 1; boosted for shape < 1)
+function sampleGamma(shape: number): number {
+  if (shape < 1) return sampleGamma(shape + 1) * Math.pow(Math.random(), 1 / shape);
+  const d = shape - 1 / 3;
+  const c = 1 / Math.sqrt(9 * d);
+  for (;;) {
+    let x: number;
+    let v: number;
+    do {
+      // Box–Muller standard normal
+      x = Math.sqrt(-2 * Math.log(1 - Math.random())) * Math.cos(2 * Math.PI * Math.random());
+      v = 1 + c * x;
+    } while (v <= 0);
+    v = v * v * v;
+    const u = Math.random();
+    if (Math.log(u) < 0.5 * x * x + d - d * v + d * Math.log(v)) return d * v;
+  }
+}
+
+function sampleBeta(alpha: number, beta: number): number {
+  const x = sampleGamma(alpha);
+  return x / (x + sampleGamma(beta));
+}
+
+/**
+ * Score arms by success probability per millisecond. Trying strategies in
+ * descending p/t order minimises expected time-to-success for a sequential
+ * search, so that ratio is what the bandit optimises:
+ *   - thompson: p sampled from the pooled Beta posterior
+ *   - ucb:      posterior mean plus a UCB1 exploration bonus
+ *   - greedy:   posterior mean only
+ */
+function scoreArms(arms: ArmPosterior[], policy: StrategyPolicy): Map<string, number> {
+  const total = arms.reduce((sum, a) => sum + a.attempts, 0);
+  const scores = new Map<string, number>();
+  for (const arm of arms) {
+    const mean = arm.alpha / (arm.alpha + arm.beta);
+    let p: number;
+    if (policy === "thompson") {
+      p = sampleBeta(arm.alpha, arm.beta);
+    } else if (policy === "ucb") {
+      p = Math.min(1, mean + Math.sqrt((2 * Math.log(total + 1)) / (arm.attempts + 1)));
+    } else {
+      p = mean;
+    }
+    scores.set(arm.strategy, p / arm.expectedDurationMs);
+  }
+  return scores;
+}
+
+function parseRollup(data: Record<string, string>, strategy: string): ArmCounts {
+  return {
+    attempts: parseInt(data[`${strategy}:attempts`] || "0", 10),
+    successes: parseInt(data[`${strategy}:successes`] || "0", 10),
+    durationMs: parseFloat(data[`${strategy}:duration_ms`] || "0"),
+  };
+}
+
+/**
+ * Order recovery strategies for a URL pattern with a cost-aware bandit
+ * (STRATEGY_POLICY = thompson | ucb | greedy). All arms at all three pooling
+ * levels are fetched in one pipelined round trip.
  */
 export const getOrderedStrategies = createTracedOp(
   "getOrderedStrategies",
   async function getOrderedStrategies(urlPattern: string): Promise<string[]> {
     const client = await getRedisClient();
-    const stats: StrategyStats[] = [];
-
-    for (const strategy of ALL_STRATEGIES) {
-      const key = `${STRATEGY_PREFIX}${urlPattern}:${strategy}`;
-      try {
-        const data = await client.hGetAll(key);
-        if (data && data.attempts) {
-          const attempts = parseInt(data.attempts, 10);
-          const successes = parseInt(data.successes || "0", 10);
-          stats.push({
-            strategy,
-            attempts,
-            successes,
-            avgDurationMs: parseFloat(data.avg_duration_ms || "0"),
-            successRate: attempts > 0 ? successes / attempts : 0,
-          });
-        }
-      } catch {
-        // No data for this strategy — skip
+    let replies: Record<string, string>[];
+    try {
+      const pipeline = client.multi();
+      pipeline.hGetAll(GLOBAL_ROLLUP_KEY);
+      pipeline.hGetAll(hostRollupKey(urlPattern));
+      for (const strategy of ALL_STRATEGIES) {
+        pipeline.hGetAll(`${STRATEGY_PREFIX}${urlPattern}:${strategy}`);
       }
-    }
-
-    if (stats.length === 0) {
+      replies = (await pipeline.execAsPipeline()) as unknown as Record<string, string>[];
+    } catch {
       return ALL_STRATEGIES; // Default order
     }
 
-    // Sort by success rate (desc), break ties by avg duration (asc)
-    stats.sort((a, b) => {
-      if (Math.abs(a.successRate - b.successRate) > 0.01) {
-        return b.successRate - a.successRate;
-      }
-      return a.avgDurationMs - b.avgDurationMs;
+    const [globalData, hostData, ...patternData] = replies;
+    const arms = ALL_STRATEGIES.map((strategy, i) => {
+      const data = patternData[i] || {};
+      const attempts = parseInt(data.attempts || "0", 10);
+      return poolArm(strategy, [
+        parseRollup(globalData || {}, strategy),
+        parseRollup(hostData || {}, strategy),
+        {
+          attempts,
+          successes: parseInt(data.successes || "0", 10),
+          durationMs: parseFloat(data.avg_duration_ms || "0") * attempts,
+        },
+      ]);
     });
 
-    // Include strategies without history at the end
-    const ordered = stats.map(s => s.strategy);
-    const remaining = ALL_STRATEGIES.filter(s => !ordered.includes(s));
-    return [...ordered, ...remaining];
+    const scores = scoreArms(arms, POLICY);
+    // Stable sort keeps the default order for equal scores (e.g. no history)
+    return [...ALL_STRATEGIES].sort((a, b) => scores.get(b)! - scores.get(a)!);
   },
   {
     callDisplayName: (urlPattern: string) => `strategies:${urlPattern.substring(0, 30)}`,
@@ -0,0 +1,197 @@
+import { learningScrape, setScrapeHints, type ScrapeHints } from "./scraper";
+import { storeTask, getTask } from "../redis/tasks";
+import { recordTaskMetrics, recordPhaseTimings } from "../redis/metrics";
+import { addScoreToCall } from "../tracing/weave";
+import { taskFingerprint, landFlight, cacheTaskResult, getFlightLeader } from "../redis/dedup";
+import { schedulePostProcessing } from "./post-processor";
+import { recordHostOutcome } from "./strategy-selector";
+import { addScreenshotRefs, screenshotHashes } from "../redis/screenshots";
+import { extractUrlPattern } from "../utils/url";
+import type { TaskRequest, TaskResult } from "../utils/types";
+
+/**
+ * Run one queued task to completion and persist its final state.
+ * Shared by the queue worker (src/worker.ts) and any in-process worker;
+ * batch groups pass `hints` to share a session and a resolved pattern.
+ * Never throws — failures are stored on the task.
+ */
+export async function runTask(
+  task: TaskRequest & { id: string },
+  hints?: ScrapeHints
+): Promise<TaskResult | null> {
+  const { id: taskId, url, target } = task;
+  setScrapeHints(taskId, hints);
+
+  // Use .invoke() to capture Weave call ID for the closed feedback loop
+  const executeTask = async () => {
+    if (typeof learningScrape.invoke === "function") {
+      const [result, call] = await learningScrape.invoke({ url, target, id: taskId });
+      result.trace_id = call?.traceId;
+      result.weave_call_id = call?.id;
+      return result;
+    }
+    return learningScrape({ url, target, id: taskId });
+  };
+
+  try {
+    const result = await executeTask();
+    // The scraper's buildResult() trims large data to prevent Weave
+    // serialization overflow. Merge the final status/metadata into the complete
+    // task data already flushed to Redis by flushProgress().
+    const existing = await getTask(taskId);
+    const finalTask = {
+      ...(existing || result),
+      status: result.status,
+      result: result.result,
+      used_cached_pattern: result.used_cached_pattern,
+      recovery_attempted: result.recovery_attempted,
+      pattern_id: result.pattern_id,
+      session_url: result.session_url || existing?.session_url,
+      trace_id: result.trace_id,
+      weave_call_id: result.weave_call_id,
+      phase_timings: result.phase_timings,
+      completed_at: result.completed_at,
+      // Always prefer the full steps/screenshots from Redis (written by flushProgress)
+      // since buildResult() trims the return value
+      steps: (existing?.steps && existing.steps.length >= result.steps.length)
+        ? existing.steps
+        : result.steps,
+      screenshots: (existing?.screenshots && existing.screenshots.length > 0)
+        ? existing.screenshots
+        : result.screenshots,
+    } as TaskResult;
+
+    await storeTask(finalTask);
+    await recordTaskMetrics(finalTask).catch(console.warn);
+    await recordPhaseTimings(finalTask).catch(console.warn);
+    await recordHostOutcome(extractUrlPattern(url), finalTask.status === "success").catch(console.warn);
+    await settleFlight(finalTask).catch(console.warn);
+    // Quality assessment and eval logging run after the task is served
+    schedulePostProcessing(finalTask);
+    console.log(
+      `[Runner] Task ${result.id} completed: ${result.status}` +
+      (result.used_cached_pattern ? " (cached)" : "") +
+      (result.recovery_attempted ? " (recovered)" : "") +
+      (result.trace_id ? ` (trace: ${result.trace_id.substring(0, 12)}...)` : "")
+    );
+
+    // Attach retrospective scores to the Weave call (Phase 5 feedback loop);
+    // "quality" is added by the post-processor once assessed
+    if (result.weave_call_id) {
+      Promise.all([
+        addScoreToCall(result.weave_call_id, "success", result.status === "success"),
+        addScoreToCall(
+          result.weave_call_id,
+          "used_cache",
+          result.used_cached_pattern
+        ),
+        addScoreToCall(
+          result.weave_call_id,
+          "recovery_needed",
+          result.recovery_attempted
+        ),
+      ]).catch(console.warn);
+    }
+    return finalTask;
+  } catch (error) {
+    console.error(`[Runner] Task ${taskId} failed:`, error);
+    // Navigation timeouts, resets and browser errors land here; they are the
+    // failures host backoff exists for. Not in failTask, which also settles
+    // tasks that never ran.
+    await recordHostOutcome(extractUrlPattern(url), false).catch(console.warn);
+    return failTask(taskId, (error as Error).message);
+  } finally {
+    setScrapeHints(taskId, undefined);
+  }
+}
+
+/**
+ * Mark a task failed, keeping whatever steps it already has in Redis.
+ */
+export async function failTask(taskId: string, message: string): Promise<TaskResult | null> {
+  const existing = await getTask(taskId).catch(() => null);
+  if (!existing) return null;
+  const errorStep = { action: "error", status: "failure" as const, detail: message, timestamp: Date.now() };
+  const failedTask = {
+    ...existing,
+    status: "failed",
+    steps: [...existing.steps, errorStep],
+    completed_at: Date.now(),
+  } as TaskResult;
+  await storeTask(failedTask).catch(console.error);
+  await recordTaskMetrics(failedTask).catch(console.warn);
+  await settleFlight(failedTask).catch(console.warn);
+  return failedTask;
+}
+
+/**
+ * Publish a finished task's outcome to identical submissions: cache it for
+ * `max_age` requests and complete every follower that attached while it ran.
+ * Followers are not added to the learning-curve metrics — they never ran.
+ */
+async function settleFlight(task: TaskResult): Promise<void> {
+  const fingerprint = taskFingerprint(task.url, task.target);
+  await cacheTaskResult(fingerprint, task);
+  const followerIds = await landFlight(fingerprint, task.id);
+  if (followerIds.length === 0) return;
+
+  await Promise.all(
+    followerIds.map(async (followerId) => {
+      const follower = await getTask(followerId);
+      if (follower) await settleFollower(follower, task);
+    })
+  );
+  console.log(`[Runner] Task ${task.id} settled ${followerIds.length} coalesced task(s)`);
+}
+
+/** Copy a finished leader's outcome onto one of its followers. */
+async function settleFollower(follower: TaskResult, task: TaskResult): Promise<TaskResult> {
+  const settled = {
+    ...follower,
+    status: task.status,
+    result: task.result,
+    used_cached_pattern: task.used_cached_pattern,
+    recovery_attempted: task.recovery_attempted,
+    pattern_id: task.pattern_id,
+    session_url: task.session_url,
+    trace_id: task.trace_id,
+    quality_score: task.quality_score,
+    quality_summary: task.quality_summary,
+    served_from: "coalesced",
+    source_task_id: task.id,
+    screenshots: task.screenshots,
+    steps: [
+      ...follower.steps,
+      {
+        action: "coalesced_result",
+        status: task.status === "success" ? "success" : "failure",
+        detail: `Received the ${task.status === "success" ? "result" : "failure"} of task ${task.id}`,
+        timestamp: Date.now(),
+      },
+    ],
+    completed_at: Date.now(),
+  } as TaskResult;
+  // The copied URLs point at the leader's blobs; hold them for this task too
+  await addScreenshotRefs(follower.id, screenshotHashes(task.screenshots.join("\n")));
+  await storeTask(settled);
+  return settled;
+}
+
+/**
+ * Settle a coalesced task whose leader finished (or vanished) without
+ * handing it the result — its flight expired before the leader landed, so
+ * the leader no longer knew about it. Called when such a task is read;
+ * returns the settled task, or null if it is still legitimately waiting.
+ */
+export async function settleStrandedFollower(follower: TaskResult): Promise<TaskResult | null> {
+  if (follower.status !== "pending") return null;
+  const leaderId = await getFlightLeader(follower.id);
+  if (!leaderId) return null;
+  const leader = await getTask(leaderId);
+  if (!leader) {
+    return failTask(follower.id, `Identical task ${leaderId} this task was waiting on no longer exists`);
+  }
+  if (leader.status !== "success" && leader.status !== "failed") return null;
+  console.log(`[Runner] Settling stranded coalesced task ${follower.id} from ${leaderId}`);
+  return settleFollower(follower, leader);
+}
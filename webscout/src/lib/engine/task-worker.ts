@@ -0,0 +1,316 @@
+import os from "os";
+import {
+  ensureQueueGroup,
+  readTasks,
+  claimOrphanedTasks,
+  extendVisibility,
+  ackTask,
+  deadLetterTask,
+  removeConsumer,
+  deferTask,
+  promoteDeferredTasks,
+  type QueuedTask,
+} from "../redis/queue";
+import { updateTaskStatus, appendTaskProgress } from "../redis/tasks";
+import { publishPoolStats, removePoolStats } from "../redis/pool-stats";
+import { refreshFlights } from "../redis/dedup";
+import { getSessionPoolStats } from "../browser/session-pool";
+import { runTask, failTask } from "./task-runner";
+import { runTaskGroup, failTaskGroup } from "./batch-runner";
+import {
+  admitToHost,
+  recordHostWait,
+  countHostDeferral,
+  releaseHostLease,
+  renewHostLeases,
+  hostOf,
+  type Admission,
+} from "./host-scheduler";
+
+export interface TaskWorkerOptions {
+  /** Max tasks this worker runs at once */
+  concurrency?: number;
+  /** Unacknowledged jobs idle this long are reclaimed by any worker */
+  visibilityTimeoutMs?: number;
+  /** Jobs delivered more often than this are failed instead of retried */
+  maxDeliveries?: number;
+  /** Jobs read ahead of free capacity, to choose among by host and fair share */
+  lookahead?: number;
+  consumer?: string;
+}
+
+export interface TaskWorker {
+  consumer: string;
+  /** Stop taking jobs, wait for running tasks, then deregister */
+  stop: () => Promise<void>;
+}
+
+const READ_BLOCK_MS = 5000;
+/** A throttled job is kept in hand if its host is expected to accept it within this; otherwise deferred */
+const SCHEDULER_HOLD_MS = parseInt(process.env.SCHEDULER_HOLD_MS || "2000", 10);
+/** Browser pool stats are published this often and expire if a worker stops publishing */
+const POOL_STATS_INTERVAL_MS = 5000;
+const POOL_STATS_TTL_SECONDS = 15;
+
+const THROTTLE_REASONS: Record<Exclude<Admission["decision"], "ok">, string> = {
+  busy: "is at its concurrency limit",
+  rate: "is at its rate limit",
+  backoff: "is backing off after a spike in failures",
+};
+
+function sleep(ms: number): Promise<void> {
+  return new Promise((r) => setTimeout(r, ms));
+}
+
+/**
+ * Consume the durable task queue with at most `concurrency` tasks in flight.
+ *
+ * Each loop puts due deferred jobs back on the stream, reclaims orphaned
+ * jobs (idle past the visibility timeout), then reads new ones until it
+ * holds `lookahead` jobs. Held jobs start in fair-share order as their host
+ * admits them (see host-scheduler.ts); one whose host stays throttled
+ * longer than SCHEDULER_HOLD_MS is deferred so it does not block the rest.
+ * Held and running jobs get a heartbeat every third of the timeout so they
+ * are never reclaimed from a live worker. A job is acknowledged only after
+ * its final state is stored, so a crash mid-task means redelivery rather
+ * than a task stuck `running` forever.
+ */
+export async function startTaskWorker(options: TaskWorkerOptions = {}): Promise<TaskWorker> {
+  const concurrency = Math.max(options.concurrency ?? parseInt(process.env.WORKER_CONCURRENCY || "4", 10), 1);
+  const visibilityTimeoutMs =
+    options.visibilityTimeoutMs ?? parseInt(process.env.QUEUE_VISIBILITY_TIMEOUT_MS || "90000", 10);
+  const maxDeliveries = options.maxDeliveries ?? parseInt(process.env.QUEUE_MAX_DELIVERIES || "3", 10);
+  const lookahead = Math.max(
+    options.lookahead ?? parseInt(process.env.SCHEDULER_LOOKAHEAD || `${concurrency * 4}`, 10),
+    concurrency
+  );
+  const consumer = options.consumer ?? `${os.hostname()}-${process.pid}`;
+
+  await ensureQueueGroup();
+
+  const inFlight = new Map<string, Promise<void>>();
+  /** Running single-task jobs, whose coalescing flights the heartbeat keeps alive */
+  const running = new Map<string, QueuedTask>();
+  /** Jobs read but not yet admitted by their host */
+  const held: QueuedTask[] = [];
+  /** Running job → host slot it holds */
+  const hostLeases = new Map<string, string>();
+  let stopping = false;
+
+  const heartbeat = setInterval(() => {
+    extendVisibility(consumer, [...inFlight.keys(), ...held.map((job) => job.messageId)]).catch((error) => {
+      console.warn("[Worker] Heartbeat failed:", (error as Error).message);
+    });
+    renewHostLeases(hostLeases, visibilityTimeoutMs).catch((error) => {
+      console.warn("[Worker] Host lease renewal failed:", (error as Error).message);
+    });
+    refreshFlights([...running.values(), ...held].filter((job) => !job.group)).catch((error) => {
+      console.warn("[Worker] Flight refresh failed:", (error as Error).message);
+    });
+  }, Math.max(visibilityTimeoutMs / 3, 1000));
+
+  // The browser pool lives in this process; publish it so /api/metrics can sum every worker's
+  const publishPool = () =>
+    publishPoolStats(consumer, getSessionPoolStats(), POOL_STATS_TTL_SECONDS).catch((error) => {
+      console.warn("[Worker] Pool stats publish failed:", (error as Error).message);
+    });
+  publishPool();
+  const poolStatsTimer = setInterval(publishPool, POOL_STATS_INTERVAL_MS);
+
+  const handle = async (job: QueuedTask): Promise<void> => {
+    try {
+      if (job.group) {
+        await handleGroup(job);
+        return;
+      }
+      if (job.deliveries > maxDeliveries) {
+        console.warn(`[Worker] Task ${job.taskId} exceeded ${maxDeliveries} deliveries — failing it`);
+        await failTask(job.taskId, `Task abandoned after ${job.deliveries - 1} interrupted attempts`);
+        await deadLetterTask(job.messageId);
+        return;
+      }
+      await updateTaskStatus(job.taskId, "running");
+      if (job.deliveries > 1) {
+        await appendTaskProgress(job.taskId, {
+          steps: [{
+            action: "redelivered",
+            status: "info",
+            detail: `Previous worker stopped responding — retrying (attempt ${job.deliveries} of ${maxDeliveries})`,
+            timestamp: Date.now(),
+          }],
+        });
+      }
+      await runTask({ id: job.taskId, url: job.url, target: job.target });
+      await ackTask(job.messageId);
+    } catch (error) {
+      // Leave the job pending; it will be redelivered after the visibility timeout
+      console.error(`[Worker] Task ${job.taskId} could not be completed:`, error);
+    }
+  };
+
+  // A batch group holds one worker slot and one browser session for all its pages
+  const handleGroup = async (job: QueuedTask): Promise<void> => {
+    const group = job.group!;
+    if (job.deliveries > maxDeliveries) {
+      console.warn(`[Worker] Batch group ${job.messageId} exceeded ${maxDeliveries} deliveries — failing it`);
+      await failTaskGroup(job.batchId!, group, `Batch group abandoned after ${job.deliveries - 1} interrupted attempts`);
+      await deadLetterTask(job.messageId);
+      return;
+    }
+    // Later pages wait for their own token (and any backoff) on the slot the group holds
+    const host = hostOf(job.url);
+    const pace = async () => {
+      for (;;) {
+        const admission = await admitToHost(host, job.messageId, visibilityTimeoutMs, job.fairTag);
+        if (admission.decision === "ok") return;
+        await sleep(Math.max(admission.retryMs, 250));
+      }
+    };
+    await runTaskGroup(job.batchId!, group, pace);
+    await ackTask(job.messageId);
+  };
+
+  const start = (job: QueuedTask, host?: string) => {
+    if (host) hostLeases.set(job.messageId, host);
+    running.set(job.messageId, job);
+    const done = handle(job).finally(() => {
+      inFlight.delete(job.messageId);
+      running.delete(job.messageId);
+      if (!host) return;
+      hostLeases.delete(job.messageId);
+      releaseHostLease(host, job.messageId).catch((error) => {
+        console.warn(`[Worker] Could not release ${host} slot:`, (error as Error).message);
+      });
+    });
+    inFlight.set(job.messageId, done);
+  };
+
+  // A job of a full host has no retry estimate; each deferral waits longer (up to 16x)
+  const defer = async (job: QueuedTask, host: string, admission: Admission) => {
+    const retryMs = Math.max(admission.retryMs || SCHEDULER_HOLD_MS * 2 ** Math.min(job.deferrals, 4), SCHEDULER_HOLD_MS);
+    const reason = THROTTLE_REASONS[admission.decision as keyof typeof THROTTLE_REASONS];
+    await deferTask(job, Date.now() + retryMs);
+    await countHostDeferral(host).catch(() => {});
+    const taskIds = job.group ? job.group.map((item) => item.taskId) : [job.taskId];
+    const step = {
+      action: "throttled",
+      status: "info" as const,
+      detail: `${host} ${reason} — retrying in ${Math.ceil(retryMs / 1000)}s`,
+      timestamp: Date.now(),
+    };
+    await Promise.all(taskIds.map((taskId) => appendTaskProgress(taskId, { steps: [step] }).catch(() => {})));
+  };
+
+  /**
+   * Start held jobs in fair-share order while there is capacity. Returns how
+   * long until the soonest remaining job may start (0 = unknown, its host is
+   * full; null = nothing held).
+   */
+  const dispatch = async (): Promise<number | null> => {
+    held.sort((a, b) => a.fairTag - b.fairTag || a.enqueuedAt - b.enqueuedAt);
+    const denied = new Map<string, Admission>();
+    let startedAny = false;
+    for (const job of [...held]) {
+      if (stopping || inFlight.size >= concurrency) break;
+      const index = held.indexOf(job);
+      // Jobs past their delivery limit only get failed; no host to ask
+      if (job.deliveries > maxDeliveries) {
+        held.splice(index, 1);
+        start(job);
+        continue;
+      }
+      const host = hostOf(job.url);
+      let admission = denied.get(host);
+      if (!admission) {
+        admission = await admitToHost(host, job.messageId, visibilityTimeoutMs, job.fairTag);
+        if (admission.decision === "ok") {
+          held.splice(index, 1);
+          startedAny = true;
+          if (job.deliveries === 1) {
+            const taskIds = job.group ? job.group.map((item) => item.taskId) : [job.taskId];
+            recordHostWait(host, taskIds, Math.max(0, Date.now() - job.enqueuedAt)).catch(console.warn);
+          }
+          start(job, host);
+          continue;
+        }
+        denied.set(host, admission);
+      }
+      if (admission.decision === "backoff" || admission.retryMs > SCHEDULER_HOLD_MS) {
+        held.splice(index, 1);
+        await defer(job, host, admission);
+      }
+    }
+
+    // Holding only throttled jobs would stop this worker reading: defer them all
+    if (!startedAny && held.length >= lookahead) {
+      for (const job of held.splice(0)) {
+        const host = hostOf(job.url);
+        await defer(job, host, denied.get(host) ?? { decision: "busy", retryMs: 0 });
+      }
+    }
+    if (held.length === 0) return null;
+    const waits = held.map((job) => denied.get(hostOf(job.url))?.retryMs ?? 0).filter((ms) => ms > 0);
+    return waits.length > 0 ? Math.min(...waits) : 0;
+  };
+
+  const loop = (async () => {
+    console.log(`[Worker] ${consumer} consuming with concurrency ${concurrency} (lookahead ${lookahead})`);
+    while (!stopping) {
+      try {
+        await promoteDeferredTasks();
+        const room = lookahead - held.length - inFlight.size;
+        if (room > 0) {
+          held.push(...(await claimOrphanedTasks(consumer, visibilityTimeoutMs, room)));
+          const more = lookahead - held.length - inFlight.size;
+          // Block for new jobs only when there is nothing else to do
+          const blockMs = held.length === 0 && inFlight.size < concurrency ? READ_BLOCK_MS : 0;
+          if (more > 0 && !stopping) held.push(...(await readTasks(consumer, more, blockMs)));
+        }
+        const retryMs = await dispatch();
+        if (inFlight.size >= concurrency) {
+          await Promise.race(inFlight.values());
+        } else if (retryMs !== null) {
+          // Throttled jobs in hand: wake when the soonest may start, or a slot frees
+          await Promise.race([sleep(retryMs > 0 ? Math.max(retryMs, 100) : SCHEDULER_HOLD_MS), ...inFlight.values()]);
+        }
+      } catch (error) {
+        console.error("[Worker] Queue read failed:", (error as Error).message);
+        await sleep(1000);
+      }
+    }
+  })();
+
+  return {
+    consumer,
+    stop: async () => {
+      stopping = true;
+      await loop;
+      // Jobs still in hand go back on the stream for another worker
+      for (const job of held.splice(0)) {
+        await deferTask(job, Date.now()).catch(() => {});
+      }
+      await Promise.all(inFlight.values());
+      clearInterval(heartbeat);
+      clearInterval(poolStatsTimer);
+      await removePoolStats(consumer).catch(() => {});
+      await removeConsumer(consumer).catch(() => {});
+      console.log(`[Worker] ${consumer} stopped`);
+    },
+  };
+}
+
+let inlineWorker: Promise<TaskWorker> | null = null;
+
+/**
+ * TASK_WORKER_INLINE=1 runs a worker inside the web process — handy for
+ * `npm run dev` without a separate `npm run worker`. Production should run
+ * dedicated workers so the web tier never hosts browsers.
+ */
+export function ensureInlineWorker(): void {
+  if (inlineWorker || process.env.TASK_WORKER_INLINE !== "1") return;
+  inlineWorker = startTaskWorker({ consumer: `inline-${os.hostname()}-${process.pid}` });
+  inlineWorker.catch((error) => {
+    console.error("[Worker] Inline worker failed to start:", error);
+    inlineWorker = null;
+  });
+}
@@ -0,0 +1,147 @@
+import { getRedisClient } from "./client";
+import { batchChannel, type BatchProgress } from "./task-events";
+import type { TaskResult } from "../utils/types";
+
+const BATCH_PREFIX = "batch:";
+const TASK_PREFIX = "task:";
+
+/**
+ * A batch is a hash `batch:<id>` holding its items and live counters:
+ * `total`, `completed`, `succeeded`, `failed` and `running`, plus each
+ * counted item's state as `item:<task_id>` ("running" / "done") so a
+ * redelivered group cannot count an item twice. Items are plain tasks (each
+ * with its own `task:<id>` hash and stream); the batch only adds overall
+ * progress and one channel to follow it all.
+ */
+
+export interface BatchItem {
+  index: number;
+  task_id: string;
+  url: string;
+  target: string;
+  url_pattern: string;
+}
+
+export interface BatchSnapshot {
+  id: string;
+  created_at: number;
+  completed_at?: number;
+  groups: number;
+  progress: BatchProgress;
+  items: (BatchItem & { status: TaskResult["status"] | null })[];
+}
+
+export async function storeBatch(batchId: string, items: BatchItem[], groups: number): Promise<void> {
+  const client = await getRedisClient();
+  await client.hSet(`${BATCH_PREFIX}${batchId}`, {
+    items: JSON.stringify(items),
+    groups: groups.toString(),
+    created_at: Date.now().toString(),
+    total: items.length.toString(),
+    completed: "0",
+    succeeded: "0",
+    failed: "0",
+    running: "0",
+  });
+}
+
+function toProgress(fields: (string | null | undefined)[]): BatchProgress {
+  const [total, completed, succeeded, failed, running] = fields.map((v) => parseInt(v ?? "0", 10) || 0);
+  return { total, completed, succeeded, failed, running };
+}
+
+const PROGRESS_FIELDS = ["total", "completed", "succeeded", "failed", "running"];
+
+/** Just the batch's counters, or null if it doesn't exist. */
+export async function getBatchProgress(batchId: string): Promise<BatchProgress | null> {
+  const client = await getRedisClient();
+  const fields = (await client.hmGet(`${BATCH_PREFIX}${batchId}`, PROGRESS_FIELDS)) as (string | null)[];
+  return fields[0] === null ? null : toProgress(fields);
+}
+
+/**
+ * Batch metadata plus every item's current status (one pipelined read of
+ * the items' `status` fields, not their documents).
+ */
+export async function getBatch(batchId: string): Promise<BatchSnapshot | null> {
+  const client = await getRedisClient();
+  const data = await client.hGetAll(`${BATCH_PREFIX}${batchId}`);
+  if (!data || !data.items) return null;
+  const items = JSON.parse(data.items) as BatchItem[];
+  const pipeline = client.multi();
+  for (const item of items) pipeline.hGet(`${TASK_PREFIX}${item.task_id}`, "status");
+  const statuses = (await pipeline.execAsPipeline()) as unknown as (string | null)[];
+  return {
+    id: batchId,
+    created_at: parseInt(data.created_at, 10) || 0,
+    completed_at: data.completed_at ? parseInt(data.completed_at, 10) : undefined,
+    groups: parseInt(data.groups, 10) || 0,
+    progress: toProgress(PROGRESS_FIELDS.map((field) => data[field])),
+    items: items.map((item, i) => ({ ...item, status: (statuses[i] as TaskResult["status"] | null) ?? null })),
+  };
+}
+
+/**
+ * Count an item's status change and publish it with the overall progress,
+ * atomically, so every subscriber sees counters that match the events.
+ * Each item is counted running at most once and finished at most once;
+ * repeats (a redelivered group restarting an item) change nothing.
+ *
+ * KEYS[1] = batch hash
+ * ARGV[1] = channel, ARGV[2] = item event JSON, ARGV[3] = status,
+ * ARGV[4] = now (ms), ARGV[5] = item task id
+ */
+const RECORD_ITEM_SCRIPT = `
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local field = 'item:' .. ARGV[5]
+local state = redis.call('HGET', KEYS[1], field)
+if state == 'done' then return 0 end
+if ARGV[3] == 'running' then
+  if state == 'running' then return 0 end
+  redis.call('HSET', KEYS[1], field, 'running')
+  redis.call('HINCRBY', KEYS[1], 'running', 1)
+else
+  if state == 'running' then redis.call('HINCRBY', KEYS[1], 'running', -1) end
+  redis.call('HSET', KEYS[1], field, 'done')
+  redis.call('HINCRBY', KEYS[1], 'completed', 1)
+  redis.call('HINCRBY', KEYS[1], ARGV[3] == 'success' and 'succeeded' or 'failed', 1)
+end
+local c = redis.call('HMGET', KEYS[1], 'total', 'completed', 'succeeded', 'failed', 'running')
+local n = {}
+for i = 1, 5 do n[i] = tonumber(c[i] or '0') or 0 end
+if ARGV[3] ~= 'running' and n[2] >= n[1] then
+  redis.call('HSET', KEYS[1], 'completed_at', ARGV[4])
+end
+redis.call('PUBLISH', ARGV[1], '{"type":"item","item":' .. ARGV[2] ..
+  ',"progress":{"total":' .. n[1] .. ',"completed":' .. n[2] .. ',"succeeded":' .. n[3] ..
+  ',"failed":' .. n[4] .. ',"running":' .. n[5] .. '}}')
+return 1
+`;
+
+/**
+ * An item started running (`task` undefined) or finished (`task` is its
+ * final state; null when it could not be stored).
+ */
+export async function recordBatchItem(
+  batchId: string,
+  item: BatchItem,
+  task?: TaskResult | null
+): Promise<void> {
+  const status: TaskResult["status"] =
+    task === undefined ? "running" : task?.status === "success" ? "success" : "failed";
+  const event = {
+    index: item.index,
+    task_id: item.task_id,
+    status,
+    ...(task && {
+      used_cached_pattern: task.used_cached_pattern,
+      pattern_id: task.pattern_id,
+      duration_ms: task.completed_at ? task.completed_at - task.created_at : undefined,
+    }),
+  };
+  const client = await getRedisClient();
+  await client.eval(RECORD_ITEM_SCRIPT, {
+    keys: [`${BATCH_PREFIX}${batchId}`],
+    arguments: [batchChannel(batchId), JSON.stringify(event), status, Date.now().toString(), item.task_id],
+  });
+}
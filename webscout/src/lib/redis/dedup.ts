@@ -0,0 +1,191 @@
+import { createHash } from "crypto";
+import { getRedisClient } from "./client";
+import { normalizeUrl } from "../utils/url";
+import type { TaskResult } from "../utils/types";
+
+const TASK_PREFIX = "task:";
+const FLIGHT_PREFIX = "task_flight:";
+const RESULT_PREFIX = "task_result:";
+const DEDUP_STATS_KEY = "task_dedup:stats";
+
+/**
+ * How long a flight outlives its last sign of life: joins and the worker
+ * heartbeat for the leader's job push it out again, so only a flight whose
+ * leader sat unread in the queue this long expires (see settleStrandedFollower).
+ */
+const FLIGHT_TTL_SECONDS = parseInt(process.env.TASK_FLIGHT_TTL_SECONDS || "900", 10);
+/** How long successful results stay available to `max_age` requests */
+const RESULT_CACHE_TTL_SECONDS = parseInt(process.env.RESULT_CACHE_TTL_SECONDS || "3600", 10);
+
+/**
+ * Request coalescing and result reuse for identical submissions.
+ *
+ * Two tasks are identical when their normalized URL (tracking params
+ * stripped) and whitespace-normalized target match. The first submission
+ * becomes the flight leader and is queued; later ones attach to it as
+ * followers and receive a copy of its final result instead of opening a
+ * browser of their own. Successful results are also kept for
+ * RESULT_CACHE_TTL_SECONDS so a caller that passes `max_age` can be answered
+ * straight from Redis.
+ */
+
+export interface CachedTaskResult {
+  task_id: string;
+  status: TaskResult["status"];
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  result: any;
+  pattern_id?: string;
+  used_cached_pattern: boolean;
+  completed_at: number;
+}
+
+export interface DedupStats {
+  /** Submissions attached to an identical in-flight task */
+  coalesced: number;
+  /** Submissions answered from the result cache */
+  resultCacheHits: number;
+  /** `max_age` lookups that found nothing recent enough */
+  resultCacheMisses: number;
+}
+
+export function taskFingerprint(url: string, target: string): string {
+  const normalizedTarget = target.trim().replace(/\s+/g, " ").toLowerCase();
+  return createHash("sha256").update(`${normalizeUrl(url)}|${normalizedTarget}`).digest("hex");
+}
+
+/**
+ * The flight is a list: the leader's task id first, then its followers.
+ * Joining and landing are atomic, so a follower either attaches before the
+ * leader lands (and gets its result) or finds no flight and leads a new one.
+ * A follower also records its leader on its own task hash, so it can still
+ * be settled if the flight expires before the leader lands.
+ *
+ * KEYS[1] = flight list, KEYS[2] = joining task's hash; ARGV[1] = task id, ARGV[2] = TTL seconds
+ * Returns the leader's id when the task joined as a follower, else nil.
+ */
+const JOIN_FLIGHT_SCRIPT = `
+local leader = redis.call('LINDEX', KEYS[1], 0)
+redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if leader then
+  redis.call('HSET', KEYS[2], 'flight_leader', leader)
+  return leader
+end
+return false
+`;
+
+/**
+ * KEYS[1] = flight list; ARGV[1] = leader task id, ARGV[2] = TTL seconds
+ * Extends the flight's TTL if this task still leads it.
+ */
+const REFRESH_FLIGHT_SCRIPT = `
+if redis.call('LINDEX', KEYS[1], 0) ~= ARGV[1] then return 0 end
+return redis.call('EXPIRE', KEYS[1], ARGV[2])
+`;
+
+/**
+ * KEYS[1] = flight list; ARGV[1] = leader task id
+ * Returns the follower ids and ends the flight, if this task still leads it.
+ */
+const LAND_FLIGHT_SCRIPT = `
+if redis.call('LINDEX', KEYS[1], 0) ~= ARGV[1] then return {} end
+local followers = redis.call('LRANGE', KEYS[1], 1, -1)
+redis.call('DEL', KEYS[1])
+return followers
+`;
+
+/**
+ * Join the flight for this fingerprint. Returns the leader's task id when an
+ * identical task is already in flight, or null when `taskId` now leads.
+ */
+export async function joinFlight(fingerprint: string, taskId: string): Promise<string | null> {
+  const client = await getRedisClient();
+  const leader = (await client.eval(JOIN_FLIGHT_SCRIPT, {
+    keys: [`${FLIGHT_PREFIX}${fingerprint}`, `${TASK_PREFIX}${taskId}`],
+    arguments: [taskId, FLIGHT_TTL_SECONDS.toString()],
+  })) as string | null;
+  if (leader) {
+    await client.hIncrBy(DEDUP_STATS_KEY, "coalesced", 1);
+  }
+  return leader;
+}
+
+/**
+ * Keep the flights of tasks a worker holds or runs alive (called from the
+ * worker heartbeat). Tasks that do not lead a flight are left alone.
+ */
+export async function refreshFlights(tasks: { taskId: string; url: string; target: string }[]): Promise<void> {
+  if (tasks.length === 0) return;
+  const client = await getRedisClient();
+  await Promise.all(
+    tasks.map((task) =>
+      client.eval(REFRESH_FLIGHT_SCRIPT, {
+        keys: [`${FLIGHT_PREFIX}${taskFingerprint(task.url, task.target)}`],
+        arguments: [task.taskId, FLIGHT_TTL_SECONDS.toString()],
+      })
+    )
+  );
+}
+
+/**
+ * The leader a coalesced task attached to, or null if it led (or never joined) a flight.
+ */
+export async function getFlightLeader(taskId: string): Promise<string | null> {
+  const client = await getRedisClient();
+  return (await client.hGet(`${TASK_PREFIX}${taskId}`, "flight_leader")) ?? null;
+}
+
+/**
+ * End the leader's flight and return the tasks that attached to it.
+ */
+export async function landFlight(fingerprint: string, leaderId: string): Promise<string[]> {
+  const client = await getRedisClient();
+  return (await client.eval(LAND_FLIGHT_SCRIPT, {
+    keys: [`${FLIGHT_PREFIX}${fingerprint}`],
+    arguments: [leaderId],
+  })) as string[];
+}
+
+/**
+ * Remember a successful result for later `max_age` requests.
+ */
+export async function cacheTaskResult(fingerprint: string, task: TaskResult): Promise<void> {
+  if (task.status !== "success" || RESULT_CACHE_TTL_SECONDS <= 0) return;
+  const client = await getRedisClient();
+  const entry: CachedTaskResult = {
+    task_id: task.id,
+    status: task.status,
+    result: task.result,
+    pattern_id: task.pattern_id,
+    used_cached_pattern: task.used_cached_pattern,
+    completed_at: task.completed_at ?? Date.now(),
+  };
+  await client.set(`${RESULT_PREFIX}${fingerprint}`, JSON.stringify(entry), {
+    EX: RESULT_CACHE_TTL_SECONDS,
+  });
+}
+
+/**
+ * Most recent successful result completed within `maxAgeMs`, if any.
+ */
+export async function getCachedTaskResult(
+  fingerprint: string,
+  maxAgeMs: number
+): Promise<CachedTaskResult | null> {
+  const client = await getRedisClient();
+  const raw = await client.get(`${RESULT_PREFIX}${fingerprint}`);
+  const entry = raw ? (JSON.parse(raw) as CachedTaskResult) : null;
+  const fresh = entry !== null && Date.now() - entry.completed_at <= maxAgeMs;
+  await client.hIncrBy(DEDUP_STATS_KEY, fresh ? "result_cache_hits" : "result_cache_misses", 1);
+  return fresh ? entry : null;
+}
+
+export async function getDedupStats(): Promise<DedupStats> {
+  const client = await getRedisClient();
+  const stats = await client.hGetAll(DEDUP_STATS_KEY);
+  return {
+    coalesced: parseInt(stats?.coalesced || "0", 10),
+    resultCacheHits: parseInt(stats?.result_cache_hits || "0", 10),
+    resultCacheMisses: parseInt(stats?.result_cache_misses || "0", 10),
+  };
+}
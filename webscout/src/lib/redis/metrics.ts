@@ -0,0 +1,242 @@
+import { getRedisClient } from "./client";
+import { getTasks } from "./tasks";
+import type { TaskResult } from "../utils/types";
+
+const SERIES_KEY = "metrics:series";
+const STATE_KEY = "metrics:state";
+const PATTERNS_KEY = "metrics:patterns";
+const PHASES_KEY = "metrics:phases";
+const TASK_PREFIX = "task:";
+const TIMELINE_KEY = "tasks:timeline";
+const SERIES_MIGRATED_KEY = "metrics:series:migrated";
+const SERIES_MIGRATION_LOCK_KEY = "metrics:series:migrating";
+const SERIES_MIGRATION_LOCK_MS = 5 * 60 * 1000;
+
+export interface TimelinePoint {
+  taskNumber: number;
+  timestamp: number;
+  success: boolean;
+  usedCache: boolean;
+  recoveryAttempted: boolean;
+  durationMs: number;
+  cumulativeCacheHits: number;
+  cumulativeSuccess: number;
+  cumulativePatterns: number;
+  cacheHitRate: number;
+  successRate: number;
+}
+
+export interface MetricsState {
+  totalTasks: number;
+  cumulativeCacheHits: number;
+  cumulativeSuccess: number;
+  totalDurationMs: number;
+}
+
+/**
+ * Append one completed task to the learning-curve series.
+ *
+ * The cumulative counters live in `metrics:state`; each point is written to
+ * the `metrics:series` sorted set scored by taskNumber, so range reads are
+ * O(log n + m). The task hash's `metrics_recorded` field holds the series
+ * generation it was appended to, which makes the append idempotent; a
+ * rebuild starts a new generation, so each task is appended once per
+ * generation whether the rebuild or a live completion reaches it first.
+ *
+ * KEYS[1] = task hash, KEYS[2] = state hash, KEYS[3] = series zset, KEYS[4] = pattern set
+ * ARGV = success, usedCache, recoveryAttempted ("1"/"0"), durationMs, patternId|"", timestamp
+ */
+const APPEND_POINT_SCRIPT = `
+local generation = redis.call('HGET', KEYS[2], 'generation') or '1'
+if redis.call('HGET', KEYS[1], 'metrics_recorded') == generation then return 0 end
+redis.call('HSET', KEYS[1], 'metrics_recorded', generation)
+local n = redis.call('HINCRBY', KEYS[2], 'tasks', 1)
+local successes = redis.call('HINCRBY', KEYS[2], 'successes', tonumber(ARGV[1]))
+local hits = redis.call('HINCRBY', KEYS[2], 'cache_hits', tonumber(ARGV[2]))
+redis.call('HINCRBY', KEYS[2], 'duration_ms', tonumber(ARGV[4]))
+if ARGV[5] ~= '' then redis.call('SADD', KEYS[4], ARGV[5]) end
+local point = cjson.encode({
+  taskNumber = n,
+  timestamp = tonumber(ARGV[6]),
+  success = ARGV[1] == '1',
+  usedCache = ARGV[2] == '1',
+  recoveryAttempted = ARGV[3] == '1',
+  durationMs = tonumber(ARGV[4]),
+  cumulativeCacheHits = hits,
+  cumulativeSuccess = successes,
+  cumulativePatterns = redis.call('SCARD', KEYS[4]),
+  cacheHitRate = math.floor(hits / n * 10000 + 0.5) / 100,
+  successRate = math.floor(successes / n * 10000 + 0.5) / 100
+})
+redis.call('ZADD', KEYS[3], n, point)
+return n
+`;
+
+/**
+ * Record a task that reached a terminal status. Safe to call more than once
+ * per task — only the first call appends a point.
+ */
+export async function recordTaskMetrics(task: TaskResult): Promise<void> {
+  if (task.status !== "success" && task.status !== "failed") return;
+  const client = await getRedisClient();
+  // Scrape time only — exclude the wait in the task queue, as eval logging does
+  const durationMs =
+    task.completed_at && task.created_at
+      ? Math.max(0, Math.round(task.completed_at - task.created_at - (task.queue_wait_ms ?? 0)))
+      : 0;
+  await client.eval(APPEND_POINT_SCRIPT, {
+    keys: [`${TASK_PREFIX}${task.id}`, STATE_KEY, SERIES_KEY, PATTERNS_KEY],
+    arguments: [
+      task.status === "success" ? "1" : "0",
+      task.used_cached_pattern ? "1" : "0",
+      task.recovery_attempted ? "1" : "0",
+      durationMs.toString(),
+      task.pattern_id || "",
+      task.created_at.toString(),
+    ],
+  });
+}
+
+export interface PhaseTimingStats {
+  avgMs: number;
+  count: number;
+}
+
+/**
+ * Add a task's per-phase scrape timings (TaskResult.phase_timings) to the
+ * running totals in `metrics:phases`.
+ */
+export async function recordPhaseTimings(task: TaskResult): Promise<void> {
+  const phases = Object.entries(task.phase_timings ?? {});
+  if (phases.length === 0) return;
+  const client = await getRedisClient();
+  const pipeline = client.multi();
+  for (const [phase, ms] of phases) {
+    pipeline.hIncrBy(PHASES_KEY, `${phase}:total`, Math.round(ms));
+    pipeline.hIncrBy(PHASES_KEY, `${phase}:count`, 1);
+  }
+  await pipeline.execAsPipeline();
+}
+
+/** Average duration per scrape phase, keyed by phase name (e.g. `lookup_ms`) */
+export async function getPhaseTimingStats(): Promise<Record<string, PhaseTimingStats>> {
+  const client = await getRedisClient();
+  const data = await client.hGetAll(PHASES_KEY);
+  const stats: Record<string, PhaseTimingStats> = {};
+  for (const [field, value] of Object.entries(data ?? {})) {
+    const [phase, kind] = field.split(":");
+    if (kind !== "count") continue;
+    const count = parseInt(value, 10);
+    const total = parseInt(data[`${phase}:total`] || "0", 10);
+    stats[phase] = { avgMs: count > 0 ? Math.round(total / count) : 0, count };
+  }
+  return stats;
+}
+
+export async function getMetricsState(): Promise<MetricsState> {
+  const client = await getRedisClient();
+  const data = await client.hGetAll(STATE_KEY);
+  return {
+    totalTasks: parseInt(data?.tasks || "0", 10),
+    cumulativeCacheHits: parseInt(data?.cache_hits || "0", 10),
+    cumulativeSuccess: parseInt(data?.successes || "0", 10),
+    totalDurationMs: parseInt(data?.duration_ms || "0", 10),
+  };
+}
+
+/**
+ * Read series points with taskNumber > `since`, downsampled to at most
+ * `maxPoints` evenly spaced points (the latest point is always included).
+ * Cost depends on `maxPoints`, not on the length of the history.
+ */
+export async function getMetricsSeries(
+  since: number = 0,
+  maxPoints: number = 500
+): Promise<{ timeline: TimelinePoint[]; state: MetricsState }> {
+  const client = await getRedisClient();
+  const state = await getMetricsState();
+  const first = since + 1;
+  const last = state.totalTasks;
+  if (last < first || maxPoints <= 0) return { timeline: [], state };
+
+  const count = last - first + 1;
+  let raw: string[];
+  if (count <= maxPoints) {
+    raw = await client.zRangeByScore(SERIES_KEY, first, last);
+  } else {
+    const stride = count / maxPoints;
+    const taskNumbers = new Set<number>();
+    for (let i = 0; i < maxPoints; i++) {
+      taskNumbers.add(Math.min(last, first + Math.floor(i * stride)));
+    }
+    taskNumbers.add(last);
+    const pipeline = client.multi();
+    for (const n of taskNumbers) {
+      pipeline.zRangeByScore(SERIES_KEY, n, n);
+    }
+    const replies = (await pipeline.execAsPipeline()) as unknown as string[][];
+    raw = replies.flat();
+  }
+
+  const timeline: TimelinePoint[] = [];
+  for (const entry of raw) {
+    try {
+      timeline.push(JSON.parse(entry) as TimelinePoint);
+    } catch {
+      console.error("[Metrics] Failed to parse series point");
+    }
+  }
+  return { timeline, state };
+}
+
+/**
+ * Empty the series and move it to the next generation.
+ * KEYS[1] = state hash, KEYS[2] = series zset, KEYS[3] = pattern set
+ */
+const RESET_SERIES_SCRIPT = `
+local generation = tonumber(redis.call('HGET', KEYS[1], 'generation') or '1') + 1
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('HSET', KEYS[1], 'generation', tostring(generation))
+return generation
+`;
+
+/**
+ * Backfill the series from the full task history (oldest first) — e.g.
+ * tasks completed before the series existed. Completions landing meanwhile
+ * are appended once, in whatever order they arrive.
+ */
+export async function rebuildMetricsSeries(batchSize: number = 500): Promise<void> {
+  const client = await getRedisClient();
+  await client.eval(RESET_SERIES_SCRIPT, { keys: [STATE_KEY, SERIES_KEY, PATTERNS_KEY] });
+  const total = await client.zCard(TIMELINE_KEY);
+  for (let start = 0; start < total; start += batchSize) {
+    const ids = await client.zRange(TIMELINE_KEY, start, start + batchSize - 1);
+    // Commands on one connection execute in send order, so issuing the
+    // appends together keeps taskNumbers in creation order while pipelining
+    const tasks = await getTasks(ids);
+    await Promise.all(tasks.map((task) => recordTaskMetrics(task)));
+  }
+  // Mark the series as initialised even if no task has completed yet
+  await client.hSetNX(STATE_KEY, "tasks", "0");
+  console.log(`[Metrics] Rebuilt learning-curve series from ${total} task(s)`);
+}
+
+/**
+ * Backfill the series from existing history once, gated on the
+ * `metrics:series:migrated` marker rather than on `metrics:state` (which
+ * the first completion after a deploy creates). An NX lock keeps concurrent
+ * callers from backfilling at once.
+ */
+export async function ensureMetricsSeries(): Promise<void> {
+  const client = await getRedisClient();
+  if (await client.exists(SERIES_MIGRATED_KEY)) return;
+  const locked = await client.set(SERIES_MIGRATION_LOCK_KEY, "1", { NX: true, PX: SERIES_MIGRATION_LOCK_MS });
+  if (!locked) return;
+  try {
+    if (await client.exists(SERIES_MIGRATED_KEY)) return;
+    if ((await client.zCard(TIMELINE_KEY)) > 0) await rebuildMetricsSeries();
+    await client.set(SERIES_MIGRATED_KEY, Date.now().toString());
+  } finally {
+    await client.del(SERIES_MIGRATION_LOCK_KEY);
+  }
+}
@@ -1,6 +1,37 @@
+import { createHash } from "crypto";
 import type { SearchReply } from "@redis/search";
 import { getRedisClient } from "./client";
-import type { PagePattern } from "../utils/types";
+import type { CompiledExtractor, PagePattern } from "../utils/types";
+
+const PATTERN_KEY_PREFIX = "pattern_key:";
+
+/**
+ * Exact-match secondary index: `pattern_key:<sha256(url_pattern|target)>`
+ * holds the id of the pattern with that identity (the same identity
+ * storePattern() dedups on), so exact repeats resolve with one GET + HGETALL
+ * instead of an embedding call and a KNN search.
+ */
+export function patternKey(urlPattern: string, target: string): string {
+  const hash = createHash("sha256").update(`${urlPattern}|${target}`).digest("hex");
+  return `${PATTERN_KEY_PREFIX}${hash}`;
+}
+
+export async function findExactPattern(
+  urlPattern: string,
+  target: string
+): Promise<PagePattern | null> {
+  const client = await getRedisClient();
+  const key = patternKey(urlPattern, target);
+  const patternId = await client.get(key);
+  if (!patternId) return null;
+  const pattern = await getPattern(patternId);
+  if (!pattern) {
+    // Pattern was removed without its key — drop the stale pointer
+    await client.del(key);
+    return null;
+  }
+  return pattern;
+}
 
 export async function listPatterns(
   limit: number = 50,
@@ -41,23 +72,126 @@ export async function getPattern(patternId: string): Promise<PagePattern | null>
   const client = await getRedisClient();
   const data = await client.hGetAll(patternId);
   if (!data || !data.url_pattern) return null;
+  return parsePatternHash(patternId, data);
+}
+
+/** PagePattern from a pattern hash's fields (as returned by HGETALL). */
+export function parsePatternHash(patternId: string, data: Record<string, string | undefined>): PagePattern {
   return {
     id: patternId,
-    url_pattern: data.url_pattern,
-    target: data.target,
-    working_selector: data.working_selector,
+    url_pattern: data.url_pattern ?? "",
+    target: data.target ?? "",
+    working_selector: data.working_selector ?? "",
     approach: data.approach as "extract" | "act" | "agent",
-    success_count: parseInt(data.success_count, 10) || 0,
-    failure_count: parseInt(data.failure_count, 10) || 0,
-    created_at: parseInt(data.created_at, 10) || 0,
+    success_count: parseInt(data.success_count ?? "", 10) || 0,
+    failure_count: parseInt(data.failure_count ?? "", 10) || 0,
+    created_at: parseInt(data.created_at ?? "", 10) || 0,
     last_succeeded_at: data.last_succeeded_at ? parseInt(data.last_succeeded_at, 10) : undefined,
     last_failed_at: data.last_failed_at ? parseInt(data.last_failed_at, 10) : undefined,
+    extractor: parseExtractor(data.extractor),
   };
 }
 
+export function parseExtractor(raw: string | undefined): CompiledExtractor | undefined {
+  if (!raw) return undefined;
+  try {
+    return JSON.parse(raw) as CompiledExtractor;
+  } catch {
+    return undefined;
+  }
+}
+
+/**
+ * Attach a compiled extractor to a pattern, or remove it (null) when the
+ * latest extraction could not be compiled.
+ */
+export async function setPatternExtractor(
+  patternId: string,
+  extractor: CompiledExtractor | null
+): Promise<void> {
+  const client = await getRedisClient();
+  if (extractor) {
+    await client.hSet(patternId, "extractor", JSON.stringify(extractor));
+  } else {
+    await client.hDel(patternId, "extractor");
+  }
+}
+
 export async function deletePattern(patternId: string): Promise<void> {
   const client = await getRedisClient();
-  await client.del(patternId);
+  const [urlPattern, target] = await client.hmGet(patternId, ["url_pattern", "target"]);
+  const keys = [patternId];
+  if (urlPattern && target) {
+    const key = patternKey(urlPattern, target);
+    // Only drop the pointer if it still refers to this pattern
+    if ((await client.get(key)) === patternId) keys.push(key);
+  }
+  await client.del(keys);
+}
+
+/**
+ * Delete patterns in one round trip. Each removed pattern's exact-key
+ * pointer is handed to the pattern it was merged into, or dropped, but only
+ * while it still refers to the removed pattern.
+ *
+ * KEYS = pattern ids, then their pattern_key pointers in the same order
+ * ARGV[i] = id that takes over pointer i, or "" to drop it
+ */
+const REMOVE_PATTERNS_SCRIPT = `
+local n = #KEYS / 2
+for i = 1, n do
+  redis.call('DEL', KEYS[i])
+  if redis.call('GET', KEYS[n + i]) == KEYS[i] then
+    if ARGV[i] ~= '' then
+      redis.call('SET', KEYS[n + i], ARGV[i])
+    else
+      redis.call('DEL', KEYS[n + i])
+    end
+  end
+end
+return n
+`;
+
+export interface PatternRemoval {
+  pattern: PagePattern;
+  /** The pattern this one was merged into; its exact key moves there */
+  mergedInto?: string;
+}
+
+export async function removePatterns(removals: PatternRemoval[]): Promise<void> {
+  if (removals.length === 0) return;
+  const client = await getRedisClient();
+  await client.eval(REMOVE_PATTERNS_SCRIPT, {
+    keys: [
+      ...removals.map((r) => r.pattern.id),
+      ...removals.map((r) => patternKey(r.pattern.url_pattern, r.pattern.target)),
+    ],
+    arguments: removals.map((r) => r.mergedInto ?? ""),
+  });
+}
+
+/**
+ * Fold the counts of near-duplicates into the pattern that absorbs them:
+ * successes and failures add up, and the latest success/failure times win.
+ * Call before removePatterns so an interruption can only double-count.
+ */
+export async function foldPatternCounts(
+  folds: { survivor: PagePattern; absorbed: PagePattern[] }[]
+): Promise<void> {
+  if (folds.length === 0) return;
+  const client = await getRedisClient();
+  const write = client.multi();
+  for (const { survivor, absorbed } of folds) {
+    const latest = (field: "last_succeeded_at" | "last_failed_at") =>
+      Math.max(survivor[field] ?? 0, ...absorbed.map((p) => p[field] ?? 0));
+    write.hIncrBy(survivor.id, "success_count", absorbed.reduce((n, p) => n + p.success_count, 0));
+    write.hIncrBy(survivor.id, "failure_count", absorbed.reduce((n, p) => n + p.failure_count, 0));
+    for (const field of ["last_succeeded_at", "last_failed_at"] as const) {
+      const at = latest(field);
+      if (at > 0) write.hSet(survivor.id, field, at.toString());
+    }
+  }
+  await write.execAsPipeline();
 }
 
 export async function getPatternCount(): Promise<number> {
@@ -0,0 +1,72 @@
+import { getRedisClient } from "./client";
+import type { SessionPoolStats } from "../browser/session-pool";
+
+const POOL_STATS_PREFIX = "pool_stats:";
+
+/**
+ * Browser session pools live in worker processes, so each worker publishes
+ * its pool's stats under `pool_stats:<consumer>` with a short TTL and
+ * readers (GET /api/metrics) sum whatever is still live. A worker that
+ * stops or dies drops out once its key expires.
+ */
+
+export interface ClusterPoolStats extends SessionPoolStats {
+  /** Workers whose pool stats are included */
+  workers: number;
+}
+
+export async function publishPoolStats(consumer: string, stats: SessionPoolStats, ttlSeconds: number): Promise<void> {
+  const client = await getRedisClient();
+  await client.set(`${POOL_STATS_PREFIX}${consumer}`, JSON.stringify(stats), { EX: ttlSeconds });
+}
+
+export async function removePoolStats(consumer: string): Promise<void> {
+  const client = await getRedisClient();
+  await client.del(`${POOL_STATS_PREFIX}${consumer}`);
+}
+
+/** Pool stats summed over every live worker; waits are lease-weighted, maxima are maxima. */
+export async function getClusterPoolStats(): Promise<ClusterPoolStats> {
+  const client = await getRedisClient();
+  const keys: string[] = [];
+  let cursor: string = "0";
+  do {
+    const reply = await client.scan(cursor, { MATCH: `${POOL_STATS_PREFIX}*`, COUNT: 100 });
+    cursor = reply.cursor as string;
+    keys.push(...(reply.keys as string[]));
+  } while (cursor !== "0");
+  const values = keys.length > 0 ? await client.mGet(keys) : [];
+
+  const total: ClusterPoolStats = {
+    workers: 0,
+    min: 0,
+    max: 0,
+    idle: 0,
+    busy: 0,
+    waiting: 0,
+    leases: 0,
+    reuses: 0,
+    created: 0,
+    recycled: 0,
+    discarded: 0,
+    avgWaitMs: 0,
+    maxWaitMs: 0,
+  };
+  let waitMsTotal = 0;
+  for (const value of values) {
+    if (!value) continue;
+    try {
+      const stats = JSON.parse(value) as SessionPoolStats;
+      total.workers++;
+      for (const field of ["min", "max", "idle", "busy", "waiting", "leases", "reuses", "created", "recycled", "discarded"] as const) {
+        total[field] += stats[field] || 0;
+      }
+      waitMsTotal += (stats.avgWaitMs || 0) * (stats.leases || 0);
+      total.maxWaitMs = Math.max(total.maxWaitMs, stats.maxWaitMs || 0);
+    } catch {
+      console.error("[PoolStats] Failed to parse published pool stats");
+    }
+  }
+  total.avgWaitMs = total.leases > 0 ? Math.round(waitMsTotal / total.leases) : 0;
+  return total;
+}
@@ -0,0 +1,364 @@
+import { getRedisClient, type RedisClient } from "./client";
+
+const QUEUE_KEY = "tasks:queue";
+const GROUP = "task-workers";
+const QUEUE_STATS_KEY = "tasks:queue:stats";
+const DEFERRED_KEY = "tasks:deferred";
+const TASK_PREFIX = "task:";
+
+/**
+ * Durable task queue on a Redis stream with one consumer group.
+ *
+ * POST /api/tasks XADDs a job; worker processes (src/worker.ts) XREADGROUP
+ * jobs up to their concurrency limit and XACK + XDEL them when the task is
+ * stored. A job a worker read but never acknowledged (crash, restart, lost
+ * heartbeat) stays in the group's pending list and is reclaimed by another
+ * worker with XAUTOCLAIM once it has been idle past the visibility timeout.
+ * Because acknowledged entries are deleted, XLEN is always waiting + in-flight.
+ *
+ * A job whose host is throttled (see engine/host-scheduler.ts) is moved to
+ * the `tasks:deferred` sorted set, scored by when to retry, and put back on
+ * the stream once due — so it neither pins a worker nor counts as a retry.
+ */
+
+export interface QueuedTask {
+  messageId: string;
+  taskId: string;
+  url: string;
+  target: string;
+  enqueuedAt: number;
+  /** Delivery count for this job, including this one */
+  deliveries: number;
+  /**
+   * Batch group jobs: the batch and its items, run in order in one browser
+   * session. `taskId`/`url`/`target` are the first item's.
+   */
+  batchId?: string;
+  group?: QueuedGroupItem[];
+  /** Who submitted it, and its fair-share start tag (lower starts first) */
+  submitter: string;
+  fairTag: number;
+  /** Times it was set aside because its host was throttled */
+  deferrals: number;
+}
+
+/** Fair-share placement of a job, from assignFairTag() */
+export interface QueueSchedule {
+  submitter: string;
+  fairTag: number;
+}
+
+export interface QueuedGroupItem {
+  index: number;
+  taskId: string;
+  url: string;
+  target: string;
+}
+
+export interface QueueStats {
+  /** Jobs not yet delivered to any worker */
+  depth: number;
+  /** Jobs delivered but not yet acknowledged */
+  inFlight: number;
+  consumers: number;
+  /** How long the oldest waiting job has been queued */
+  oldestWaitMs: number;
+  /** Mean time from enqueue to first delivery */
+  avgWaitMs: number;
+  /** Jobs set aside until their host accepts more work */
+  deferred: number;
+  lastWaitMs: number;
+  dequeued: number;
+  redelivered: number;
+  deadLettered: number;
+}
+
+interface StreamMessage {
+  id: string;
+  message: Record<string, string>;
+}
+
+let blockingClient: RedisClient | null = null;
+
+/**
+ * XREADGROUP BLOCK holds its connection, so reads use a dedicated one
+ * instead of the shared client every other module pipelines through.
+ */
+async function getBlockingClient(): Promise<RedisClient> {
+  if (blockingClient && blockingClient.isOpen) return blockingClient;
+  const client = await getRedisClient();
+  const blocking = client.duplicate();
+  blocking.on("error", (err) => {
+    console.error("[Queue] Blocking connection error:", err.message);
+  });
+  await blocking.connect();
+  blockingClient = blocking;
+  return blocking;
+}
+
+export async function ensureQueueGroup(): Promise<void> {
+  const client = await getRedisClient();
+  try {
+    await client.xGroupCreate(QUEUE_KEY, GROUP, "0", { MKSTREAM: true });
+    console.log(`[Queue] Created consumer group ${GROUP} on ${QUEUE_KEY}`);
+  } catch (error) {
+    if (!(error as Error).message.includes("BUSYGROUP")) throw error;
+  }
+}
+
+function scheduleFields(schedule?: QueueSchedule): Record<string, string> {
+  return schedule ? { submitter: schedule.submitter, fair_tag: schedule.fairTag.toString() } : {};
+}
+
+export async function enqueueTask(
+  task: { id: string; url: string; target: string },
+  schedule?: QueueSchedule
+): Promise<string> {
+  const client = await getRedisClient();
+  return client.xAdd(QUEUE_KEY, "*", {
+    task_id: task.id,
+    url: task.url,
+    target: task.target,
+    enqueued_at: Date.now().toString(),
+    ...scheduleFields(schedule),
+  });
+}
+
+/**
+ * One job for a batch group. Its deliveries are counted on the first item's
+ * task hash; its queue wait is recorded on every item.
+ */
+export async function enqueueTaskGroup(
+  batchId: string,
+  items: QueuedGroupItem[],
+  schedule?: QueueSchedule
+): Promise<string> {
+  const client = await getRedisClient();
+  return client.xAdd(QUEUE_KEY, "*", {
+    task_id: items[0].taskId,
+    url: items[0].url,
+    target: items[0].target,
+    batch_id: batchId,
+    group: JSON.stringify(items),
+    enqueued_at: Date.now().toString(),
+    ...scheduleFields(schedule),
+  });
+}
+
+function toQueuedTask(entry: StreamMessage, deliveries: number): QueuedTask {
+  return {
+    messageId: entry.id,
+    taskId: entry.message.task_id,
+    url: entry.message.url,
+    target: entry.message.target,
+    enqueuedAt: parseInt(entry.message.enqueued_at, 10) || parseInt(entry.id.split("-")[0], 10),
+    deliveries,
+    submitter: entry.message.submitter || "anonymous",
+    fairTag: parseFloat(entry.message.fair_tag || "0") || 0,
+    deferrals: parseInt(entry.message.deferrals || "0", 10) || 0,
+    ...(entry.message.group && {
+      batchId: entry.message.batch_id,
+      group: JSON.parse(entry.message.group) as QueuedGroupItem[],
+    }),
+  };
+}
+
+/**
+ * Count a delivery on the task hash; the first delivery also records the
+ * job's queue wait time. A job coming back from deferral is neither.
+ */
+async function recordDeliveries(entries: StreamMessage[]): Promise<QueuedTask[]> {
+  if (entries.length === 0) return [];
+  const client = await getRedisClient();
+  const pipeline = client.multi();
+  for (const entry of entries) {
+    pipeline.hIncrBy(`${TASK_PREFIX}${entry.message.task_id}`, "deliveries", 1);
+  }
+  const counts = (await pipeline.execAsPipeline()) as unknown as number[];
+  const tasks = entries.map((entry, i) => toQueuedTask(entry, counts[i]));
+
+  const now = Date.now();
+  const stats = client.multi();
+  for (const task of tasks) {
+    if (task.deferrals > 0 && task.deliveries === 1) continue;
+    if (task.deliveries === 1) {
+      const waitMs = Math.max(0, now - task.enqueuedAt);
+      const taskIds = task.group ? task.group.map((item) => item.taskId) : [task.taskId];
+      stats.hIncrBy(QUEUE_STATS_KEY, "dequeued", taskIds.length);
+      stats.hIncrBy(QUEUE_STATS_KEY, "wait_ms_total", waitMs * taskIds.length);
+      stats.hSet(QUEUE_STATS_KEY, "last_wait_ms", waitMs.toString());
+      for (const taskId of taskIds) {
+        stats.hSet(`${TASK_PREFIX}${taskId}`, "queue_wait_ms", waitMs.toString());
+      }
+    } else {
+      stats.hIncrBy(QUEUE_STATS_KEY, "redelivered", 1);
+    }
+  }
+  await stats.execAsPipeline();
+  return tasks;
+}
+
+/**
+ * Read up to `count` new jobs for `consumer`, blocking up to `blockMs`
+ * (0 returns at once).
+ */
+export async function readTasks(consumer: string, count: number, blockMs: number): Promise<QueuedTask[]> {
+  const client = await getBlockingClient();
+  const reply = (await client.xReadGroup(
+    GROUP,
+    consumer,
+    { key: QUEUE_KEY, id: ">" },
+    blockMs > 0 ? { COUNT: count, BLOCK: blockMs } : { COUNT: count }
+  )) as unknown as { name: string; messages: StreamMessage[] }[] | null;
+  const entries = reply?.flatMap((stream) => stream.messages) ?? [];
+  return recordDeliveries(entries);
+}
+
+/**
+ * Take over up to `count` jobs whose worker has not touched them for
+ * `visibilityTimeoutMs` — the redelivery path for orphaned tasks.
+ */
+export async function claimOrphanedTasks(
+  consumer: string,
+  visibilityTimeoutMs: number,
+  count: number
+): Promise<QueuedTask[]> {
+  const client = await getRedisClient();
+  const reply = (await client.xAutoClaim(QUEUE_KEY, GROUP, consumer, visibilityTimeoutMs, "0-0", {
+    COUNT: count,
+  })) as unknown as { messages: (StreamMessage | null)[] };
+  const entries = reply.messages.filter((m): m is StreamMessage => m !== null);
+  if (entries.length > 0) {
+    console.log(`[Queue] ${consumer} reclaimed ${entries.length} orphaned task(s)`);
+  }
+  return recordDeliveries(entries);
+}
+
+/**
+ * Reset the idle time of jobs this consumer is still working on, so they
+ * are not reclaimed while the task is merely slow.
+ */
+export async function extendVisibility(consumer: string, messageIds: string[]): Promise<void> {
+  if (messageIds.length === 0) return;
+  const client = await getRedisClient();
+  await client.xClaimJustId(QUEUE_KEY, GROUP, consumer, 0, messageIds);
+}
+
+export async function ackTask(messageId: string): Promise<void> {
+  const client = await getRedisClient();
+  await client.multi().xAck(QUEUE_KEY, GROUP, messageId).xDel(QUEUE_KEY, messageId).exec();
+}
+
+/** Acknowledge a job that exceeded its delivery limit without running it again. */
+export async function deadLetterTask(messageId: string): Promise<void> {
+  const client = await getRedisClient();
+  await client
+    .multi()
+    .xAck(QUEUE_KEY, GROUP, messageId)
+    .xDel(QUEUE_KEY, messageId)
+    .hIncrBy(QUEUE_STATS_KEY, "dead_lettered", 1)
+    .exec();
+}
+
+/**
+ * Take a delivered job off the stream until `retryAt`: it is acknowledged
+ * and parked in `tasks:deferred` with its fields and a bumped `deferrals`,
+ * and this delivery is uncounted so throttling never exhausts its retries.
+ */
+export async function deferTask(job: QueuedTask, retryAt: number): Promise<void> {
+  const fields: string[] = [
+    "task_id", job.taskId,
+    "url", job.url,
+    "target", job.target,
+    "enqueued_at", job.enqueuedAt.toString(),
+    "submitter", job.submitter,
+    "fair_tag", job.fairTag.toString(),
+    "deferrals", (job.deferrals + 1).toString(),
+  ];
+  if (job.group) fields.push("batch_id", job.batchId ?? "", "group", JSON.stringify(job.group));
+  const client = await getRedisClient();
+  await client
+    .multi()
+    .zAdd(DEFERRED_KEY, { score: retryAt, value: JSON.stringify(fields) })
+    .hIncrBy(`${TASK_PREFIX}${job.taskId}`, "deliveries", -1)
+    .xAck(QUEUE_KEY, GROUP, job.messageId)
+    .xDel(QUEUE_KEY, job.messageId)
+    .exec();
+}
+
+/**
+ * Move due deferred jobs back onto the stream, oldest first.
+ *
+ * KEYS[1] = deferred set, KEYS[2] = stream; ARGV = now (ms), max jobs
+ */
+const PROMOTE_DEFERRED_SCRIPT = `
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+  redis.call('XADD', KEYS[2], '*', unpack(cjson.decode(member)))
+  redis.call('ZREM', KEYS[1], member)
+end
+return #due
+`;
+
+export async function promoteDeferredTasks(limit: number = 100): Promise<number> {
+  const client = await getRedisClient();
+  const moved = await client.eval(PROMOTE_DEFERRED_SCRIPT, {
+    keys: [DEFERRED_KEY, QUEUE_KEY],
+    arguments: [Date.now().toString(), limit.toString()],
+  });
+  return Number(moved) || 0;
+}
+
+function parseInfoReply(reply: unknown): Record<string, unknown> {
+  if (Array.isArray(reply)) {
+    const out: Record<string, unknown> = {};
+    for (let i = 0; i + 1 < reply.length; i += 2) out[String(reply[i])] = reply[i + 1];
+    return out;
+  }
+  return (reply ?? {}) as Record<string, unknown>;
+}
+
+export async function getQueueStats(): Promise<QueueStats> {
+  const client = await getRedisClient();
+  const [length, groups, stats, deferred] = await Promise.all([
+    client.xLen(QUEUE_KEY),
+    client.sendCommand(["XINFO", "GROUPS", QUEUE_KEY]).catch(() => []) as Promise<unknown[]>,
+    client.hGetAll(QUEUE_STATS_KEY),
+    client.zCard(DEFERRED_KEY),
+  ]);
+  const group = (groups as unknown[]).map(parseInfoReply).find((g) => String(g.name) === GROUP);
+  const inFlight = group ? Number(group.pending) || 0 : 0;
+  const depth = Math.max(0, length - inFlight);
+
+  let oldestWaitMs = 0;
+  if (depth > 0 && group) {
+    const [oldest] = await client.xRange(QUEUE_KEY, `(${String(group["last-delivered-id"])}`, "+", { COUNT: 1 });
+    if (oldest) {
+      oldestWaitMs = Math.max(0, Date.now() - toQueuedTask(oldest as StreamMessage, 0).enqueuedAt);
+    }
+  }
+
+  const dequeued = parseInt(stats?.dequeued || "0", 10);
+  return {
+    depth,
+    inFlight,
+    consumers: group ? Number(group.consumers) || 0 : 0,
+    oldestWaitMs,
+    avgWaitMs: dequeued > 0 ? Math.round(parseInt(stats.wait_ms_total || "0", 10) / dequeued) : 0,
+    deferred,
+    lastWaitMs: parseInt(stats?.last_wait_ms || "0", 10),
+    dequeued,
+    redelivered: parseInt(stats?.redelivered || "0", 10),
+    deadLettered: parseInt(stats?.dead_lettered || "0", 10),
+  };
+}
+
+/** Remove a consumer on clean shutdown so XINFO only counts live workers. */
+export async function removeConsumer(consumer: string): Promise<void> {
+  const client = await getRedisClient();
+  await client.xGroupDelConsumer(QUEUE_KEY, GROUP, consumer);
+  if (blockingClient?.isOpen) {
+    await blockingClient.quit();
+    blockingClient = null;
+  }
+}
@@ -0,0 +1,123 @@
+import { createHash } from "crypto";
+import { RESP_TYPES } from "redis";
+import { getRedisClient } from "./client";
+
+const SCREENSHOT_PREFIX = "screenshot:";
+const REFS_PREFIX = "screenshot_refs:";
+
+/**
+ * Content-addressed screenshot store.
+ *
+ * Screenshots are written once as raw bytes under `screenshot:<sha256>` and
+ * task steps carry only a URL reference to them, so task documents stay a
+ * few KB instead of several MB of base64. Identical frames (e.g. a page that
+ * didn't change between attempts) are stored once.
+ *
+ * A blob lives as long as the tasks that reference it: it has no TTL, and
+ * `screenshot_refs:<sha256>` is the set of those task ids. Deleting a task
+ * (deleteTask) releases its references and drops blobs nobody else uses.
+ * A task that copies screenshot URLs from another (a coalesced follower)
+ * adds its own references with addScreenshotRefs.
+ */
+
+/**
+ * KEYS[1] = blob, KEYS[2] = refs set; ARGV[1] = bytes, ARGV[2] = task id
+ * PERSIST clears the expiry that blobs written before refcounting carry.
+ */
+const STORE_SCRIPT = `
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+redis.call('PERSIST', KEYS[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return 1
+`;
+
+/**
+ * KEYS[1] = blob, KEYS[2] = refs set; ARGV[1] = task id
+ * Returns 1 if the reference was added; a blob already freed stays freed.
+ */
+const ADD_REF_SCRIPT = `
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+`;
+
+/**
+ * KEYS[1] = blob, KEYS[2] = refs set; ARGV[1] = task id
+ * Returns 1 if the blob was deleted (last reference).
+ */
+const RELEASE_SCRIPT = `
+redis.call('SREM', KEYS[2], ARGV[1])
+if redis.call('SCARD', KEYS[2]) > 0 then return 0 end
+redis.call('DEL', KEYS[1], KEYS[2])
+return 1
+`;
+export async function storeScreenshot(taskId: string, base64: string): Promise<string> {
+  if (!base64) return "";
+  return storeScreenshotBytes(taskId, Buffer.from(base64, "base64"));
+}
+
+export async function storeScreenshotBytes(taskId: string, bytes: Buffer): Promise<string> {
+  if (bytes.length === 0) return "";
+  const hash = createHash("sha256").update(bytes).digest("hex");
+  const client = await getRedisClient();
+  await client.eval(STORE_SCRIPT, {
+    keys: [`${SCREENSHOT_PREFIX}${hash}`, `${REFS_PREFIX}${hash}`],
+    arguments: [bytes, taskId],
+  });
+  return screenshotUrl(taskId, hash);
+}
+
+/** Blob hashes referenced anywhere in serialized task data (URLs from screenshotUrl()) */
+export function screenshotHashes(serialized: string): string[] {
+  return [...new Set(Array.from(serialized.matchAll(/\/screenshots\/([a-f0-9]{64})/g), (m) => m[1]))];
+}
+
+/** Reference existing blobs from another task, so they outlive the task that stored them. */
+export async function addScreenshotRefs(taskId: string, hashes: string[]): Promise<void> {
+  if (hashes.length === 0) return;
+  const client = await getRedisClient();
+  const pipeline = client.multi();
+  for (const hash of hashes) {
+    pipeline.eval(ADD_REF_SCRIPT, {
+      keys: [`${SCREENSHOT_PREFIX}${hash}`, `${REFS_PREFIX}${hash}`],
+      arguments: [taskId],
+    });
+  }
+  await pipeline.execAsPipeline();
+}
+
+/** Drop a deleted task's references; returns how many blobs were freed. */
+export async function releaseTaskScreenshots(taskId: string, hashes: string[]): Promise<number> {
+  if (hashes.length === 0) return 0;
+  const client = await getRedisClient();
+  const pipeline = client.multi();
+  for (const hash of hashes) {
+    pipeline.eval(RELEASE_SCRIPT, {
+      keys: [`${SCREENSHOT_PREFIX}${hash}`, `${REFS_PREFIX}${hash}`],
+      arguments: [taskId],
+    });
+  }
+  const freed = (await pipeline.execAsPipeline()) as unknown as number[];
+  return freed.reduce((sum, n) => sum + (Number(n) || 0), 0);
+}
+
+export function screenshotUrl(taskId: string, hash: string): string {
+  return `/api/tasks/${taskId}/screenshots/${hash}`;
+}
+
+export async function getScreenshot(hash: string): Promise<Buffer | null> {
+  if (!/^[a-f0-9]{64}$/.test(hash)) return null;
+  const client = await getRedisClient();
+  const bytes = await client
+    .withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer })
+    .get(`${SCREENSHOT_PREFIX}${hash}`);
+  return bytes ?? null;
+}
+
+/** Sniff the image MIME type from its magic bytes. */
+export function screenshotContentType(bytes: Buffer): string {
+  if (bytes[0] === 0x89 && bytes[1] === 0x50) return "image/png";
+  if (bytes[0] === 0xff && bytes[1] === 0xd8) return "image/jpeg";
+  if (bytes.subarray(8, 12).toString("ascii") === "WEBP") return "image/webp";
+  return "application/octet-stream";
+}
@@ -0,0 +1,140 @@
+import { getRedisClient, type RedisClient } from "./client";
+import type { TaskResult, TaskStep } from "../utils/types";
+
+const CHANNEL_PREFIX = "task_events:";
+const BATCH_CHANNEL_PREFIX = "batch_events:";
+
+/**
+ * Incremental task updates pushed over Redis pub/sub.
+ * The SSE route sends one full snapshot on connect, then only these deltas.
+ */
+export type TaskEvent =
+  | { type: "step"; index: number; step: TaskStep }
+  | { type: "session"; session_url: string }
+  | { type: "status"; status: TaskResult["status"] }
+  | {
+      type: "quality";
+      index: number;
+      step: TaskStep;
+      quality_score?: number;
+      quality_summary?: string;
+    };
+
+export interface BatchProgress {
+  total: number;
+  completed: number;
+  succeeded: number;
+  failed: number;
+  running: number;
+}
+
+/**
+ * Batch updates, published by recordBatchItem (src/lib/redis/batches.ts):
+ * one `item` event per item status change, carrying the overall progress.
+ */
+export interface BatchEvent {
+  type: "item";
+  item: {
+    index: number;
+    task_id: string;
+    status: TaskResult["status"];
+    used_cached_pattern?: boolean;
+    pattern_id?: string;
+    duration_ms?: number;
+  };
+  progress: BatchProgress;
+}
+
+export function batchChannel(batchId: string): string {
+  return `${BATCH_CHANNEL_PREFIX}${batchId}`;
+}
+
+type TaskEventListener = (event: TaskEvent) => void;
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+type ChannelListener = (event: any) => void;
+
+let subscriber: RedisClient | null = null;
+let subscriberPromise: Promise<RedisClient> | null = null;
+const listeners = new Map<string, Set<ChannelListener>>();
+
+/**
+ * One shared subscriber connection per process; every open stream for every
+ * task fans out from it, so Redis sees one subscription per task per process
+ * rather than one poller per viewer.
+ */
+async function getSubscriber(): Promise<RedisClient> {
+  if (subscriber && subscriber.isOpen) return subscriber;
+  if (subscriberPromise) return subscriberPromise;
+  subscriberPromise = (async () => {
+    const client = await getRedisClient();
+    const sub = client.duplicate();
+    sub.on("error", (err) => {
+      console.error("[TaskEvents] Subscriber error:", err.message);
+    });
+    await sub.connect();
+    subscriber = sub;
+    subscriberPromise = null;
+    return sub;
+  })();
+  return subscriberPromise;
+}
+
+export async function publishTaskEvent(taskId: string, event: TaskEvent): Promise<void> {
+  const client = await getRedisClient();
+  await client.publish(`${CHANNEL_PREFIX}${taskId}`, JSON.stringify(event));
+}
+
+/**
+ * Subscribe to a task's events. Returns an unsubscribe function.
+ */
+export async function subscribeToTask(
+  taskId: string,
+  listener: TaskEventListener
+): Promise<() => Promise<void>> {
+  return subscribeToChannel(`${CHANNEL_PREFIX}${taskId}`, listener);
+}
+
+/**
+ * Subscribe to a batch's events. Returns an unsubscribe function.
+ */
+export async function subscribeToBatch(
+  batchId: string,
+  listener: (event: BatchEvent) => void
+): Promise<() => Promise<void>> {
+  return subscribeToChannel(batchChannel(batchId), listener);
+}
+
+async function subscribeToChannel(
+  channel: string,
+  listener: ChannelListener
+): Promise<() => Promise<void>> {
+  const sub = await getSubscriber();
+
+  let channelListeners = listeners.get(channel);
+  if (!channelListeners) {
+    channelListeners = new Set();
+    listeners.set(channel, channelListeners);
+    await sub.subscribe(channel, (message: string) => {
+      let event: unknown;
+      try {
+        event = JSON.parse(message);
+      } catch {
+        return;
+      }
+      for (const fn of listeners.get(channel) ?? []) {
+        fn(event);
+      }
+    });
+  }
+  channelListeners.add(listener);
+
+  return async () => {
+    const current = listeners.get(channel);
+    if (!current) return;
+    current.delete(listener);
+    if (current.size === 0) {
+      listeners.delete(channel);
+      await sub.unsubscribe(channel).catch(() => {});
+    }
+  };
+}
@@ -1,55 +1,316 @@
 import { getRedisClient } from "./client";
-import type { TaskResult } from "../utils/types";
+import { publishTaskEvent } from "./task-events";
+import { screenshotHashes, releaseTaskScreenshots } from "./screenshots";
+import type { TaskResult, TaskStep } from "../utils/types";
 
 const TASK_PREFIX = "task:";
 const TIMELINE_KEY = "tasks:timeline";
+const STATS_KEY = "tasks:stats";
+const STATS_MIGRATED_KEY = "tasks:stats:migrated";
+const STATS_MIGRATION_LOCK_KEY = "tasks:stats:migrating";
+const STATS_MIGRATION_LOCK_MS = 5 * 60 * 1000;
+const STEPS_SUFFIX = ":steps";
+const STEP_LOG_TTL_SECONDS = 24 * 60 * 60;
 
+function stepLogKey(taskId: string): string {
+  return `${TASK_PREFIX}${taskId}${STEPS_SUFFIX}`;
+}
+
+/**
+ * Atomically move a task's contribution to the `tasks:stats` counters.
+ *
+ * Each task hash remembers what it last contributed (status, cached,
+ * recovered) and to which generation of the stats hash (`counted`), so
+ * re-storing or re-statusing a task only applies the delta. This keeps
+ * getTaskStats() O(1) regardless of history length. A rebuild starts a new
+ * generation, so a task is counted in full exactly once per generation —
+ * whether the rebuild or a concurrent storeTask() gets to it first.
+ *
+ * KEYS[1] = task hash, KEYS[2] = stats hash
+ * ARGV[1] = status, ARGV[2] = cached ("1"/"0"), ARGV[3] = recovered ("1"/"0")
+ */
+const UPDATE_STATS_SCRIPT = `
+local old = redis.call('HMGET', KEYS[1], 'status', 'cached', 'recovered', 'counted')
+local status, cached, recovered = ARGV[1], ARGV[2], ARGV[3]
+local generation = redis.call('HGET', KEYS[2], 'generation') or '1'
+if old[4] ~= generation then
+  redis.call('HINCRBY', KEYS[2], 'total', 1)
+  old[1] = false
+  old[2] = '0'
+  old[3] = '0'
+end
+if old[1] ~= status then
+  if old[1] == 'success' then redis.call('HINCRBY', KEYS[2], 'successful', -1) end
+  if old[1] == 'failed' then redis.call('HINCRBY', KEYS[2], 'failed', -1) end
+  if status == 'success' then redis.call('HINCRBY', KEYS[2], 'successful', 1) end
+  if status == 'failed' then redis.call('HINCRBY', KEYS[2], 'failed', 1) end
+end
+if old[2] ~= cached then
+  redis.call('HINCRBY', KEYS[2], 'cached', cached == '1' and 1 or -1)
+end
+if old[3] ~= recovered then
+  redis.call('HINCRBY', KEYS[2], 'recovered', recovered == '1' and 1 or -1)
+end
+redis.call('HSET', KEYS[1], 'status', status, 'cached', cached, 'recovered', recovered, 'counted', generation)
+return 1
+`;
+
+/**
+ * Empty the stats hash and move it to the next generation.
+ * KEYS[1] = stats hash
+ */
+const RESET_STATS_SCRIPT = `
+local generation = tonumber(redis.call('HGET', KEYS[1], 'generation') or '1') + 1
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'generation', tostring(generation))
+return generation
+`;
+
+async function applyTaskStats(
+  taskId: string,
+  status: TaskResult["status"],
+  usedCache: boolean,
+  recoveryAttempted: boolean
+): Promise<void> {
+  const client = await getRedisClient();
+  const recovered = recoveryAttempted && status === "success";
+  await client.eval(UPDATE_STATS_SCRIPT, {
+    keys: [`${TASK_PREFIX}${taskId}`, STATS_KEY],
+    arguments: [status, usedCache ? "1" : "0", recovered ? "1" : "0"],
+  });
+}
+
+/**
+ * Take a task's contribution back out of `tasks:stats` and delete its hash.
+ * KEYS[1] = task hash, KEYS[2] = stats hash
+ */
+const REMOVE_TASK_SCRIPT = `
+local old = redis.call('HMGET', KEYS[1], 'status', 'cached', 'recovered', 'counted')
+if old[4] == (redis.call('HGET', KEYS[2], 'generation') or '1') then
+  redis.call('HINCRBY', KEYS[2], 'total', -1)
+  if old[1] == 'success' then redis.call('HINCRBY', KEYS[2], 'successful', -1) end
+  if old[1] == 'failed' then redis.call('HINCRBY', KEYS[2], 'failed', -1) end
+  if old[2] == '1' then redis.call('HINCRBY', KEYS[2], 'cached', -1) end
+  if old[3] == '1' then redis.call('HINCRBY', KEYS[2], 'recovered', -1) end
+end
+return redis.call('DEL', KEYS[1])
+`;
+
+/**
+ * Write the full task document. Any steps appended to the running-task step
+ * log are expected to already be folded into `task.steps` (getTask() merges
+ * them), so the log is dropped in the same MULTI — this is the compaction.
+ * A terminal document also sets `finalized`, which makes late appends (a
+ * progress flush still in flight) no-ops instead of duplicating steps.
+ */
 export async function storeTask(task: TaskResult): Promise<void> {
   const client = await getRedisClient();
   const key = `${TASK_PREFIX}${task.id}`;
-  await client.hSet(key, {
-    data: JSON.stringify(task),
-    created_at: task.created_at.toString(),
-    status: task.status,
-  });
-  await client.zAdd(TIMELINE_KEY, {
-    score: task.created_at,
-    value: task.id,
-  });
+  await applyTaskStats(task.id, task.status, task.used_cached_pattern, task.recovery_attempted);
+  await client
+    .multi()
+    .hSet(key, {
+      data: JSON.stringify(task),
+      created_at: task.created_at.toString(),
+      status: task.status,
+      doc_steps: task.steps.length.toString(),
+      finalized: task.status === "success" || task.status === "failed" ? "1" : "0",
+    })
+    .del(stepLogKey(task.id))
+    .zAdd(TIMELINE_KEY, {
+      score: task.created_at,
+      value: task.id,
+    })
+    .exec();
+  if (task.status === "success" || task.status === "failed") {
+    await publishTaskEvent(task.id, { type: "status", status: task.status }).catch(() => {});
+  }
   console.log(`[Tasks] Stored task ${task.id} (${task.status})`);
 }
 
+/**
+ * Delete a task: its hash, step log and timeline entry, its share of the
+ * counters, and its screenshot references (blobs no other task uses go
+ * with it). The learning-curve series keeps its point. Returns false if the
+ * task did not exist.
+ */
+export async function deleteTask(taskId: string): Promise<boolean> {
+  const client = await getRedisClient();
+  const key = `${TASK_PREFIX}${taskId}`;
+  const [data, loggedSteps] = await Promise.all([
+    client.hGet(key, "data"),
+    client.lRange(stepLogKey(taskId), 0, -1),
+  ]);
+  const deleted = await client.eval(REMOVE_TASK_SCRIPT, { keys: [key, STATS_KEY] });
+  await client.multi().del(stepLogKey(taskId)).zRem(TIMELINE_KEY, taskId).exec();
+  await releaseTaskScreenshots(taskId, screenshotHashes([data ?? "", ...loggedSteps].join("\n")));
+  return Number(deleted) > 0;
+}
+
+/**
+ * KEYS[1] = task hash; ARGV = step JSON, score ("" = none), summary ("" = none)
+ * Returns the step's index (the document's step count), or -1 if the task is gone.
+ */
+const SET_QUALITY_SCRIPT = `
+if redis.call('HEXISTS', KEYS[1], 'data') == 0 then return -1 end
+redis.call('HSET', KEYS[1], 'quality_step', ARGV[1])
+if ARGV[2] ~= '' then redis.call('HSET', KEYS[1], 'quality_score', ARGV[2]) else redis.call('HDEL', KEYS[1], 'quality_score') end
+if ARGV[3] ~= '' then redis.call('HSET', KEYS[1], 'quality_summary', ARGV[3]) else redis.call('HDEL', KEYS[1], 'quality_summary') end
+return tonumber(redis.call('HGET', KEYS[1], 'doc_steps') or '0')
+`;
+
+/**
+ * Attach a quality assessment (and its step) to a finished task without
+ * touching its status or stats — written by the async post-processor after
+ * the task was already served as complete. Kept in their own hash fields
+ * (merged by getTask), so this never rewrites the document a concurrent
+ * storeTask() may be writing. Open streams get a `quality` event.
+ */
+export async function setTaskQuality(
+  taskId: string,
+  qualityScore: number | undefined,
+  qualitySummary: string | undefined,
+  step: TaskStep
+): Promise<boolean> {
+  const client = await getRedisClient();
+  const index = Number(
+    await client.eval(SET_QUALITY_SCRIPT, {
+      keys: [`${TASK_PREFIX}${taskId}`],
+      arguments: [JSON.stringify(step), qualityScore?.toString() ?? "", qualitySummary ?? ""],
+    })
+  );
+  if (index < 0) return false;
+  await publishTaskEvent(taskId, {
+    type: "quality",
+    index,
+    step,
+    quality_score: qualityScore,
+    quality_summary: qualitySummary,
+  }).catch(() => {});
+  return true;
+}
+
+/** Overlay the quality fields setTaskQuality() keeps beside the document. */
+function mergeQuality(
+  task: TaskResult,
+  score: string | null,
+  summary: string | null,
+  stepJson: string | null
+): void {
+  if (score) task.quality_score = parseFloat(score);
+  if (summary) task.quality_summary = summary;
+  if (!stepJson) return;
+  const step = JSON.parse(stepJson) as TaskStep;
+  // A document re-stored from getTask() already carries it
+  if (!task.steps.some((s) => s.action === step.action && s.timestamp === step.timestamp)) {
+    task.steps = [...task.steps, step];
+  }
+}
+
+/**
+ * Read a task, merging in the running-task step log (if any) and the
+ * O(1)-updated `status` / `session_url` / `queue_wait_ms` / quality hash fields.
+ */
 export async function getTask(taskId: string): Promise<TaskResult | null> {
   const client = await getRedisClient();
-  const data = await client.hGet(`${TASK_PREFIX}${taskId}`, "data");
+  const key = `${TASK_PREFIX}${taskId}`;
+  const [fields, loggedSteps] = await Promise.all([
+    client.hmGet(key, [
+      "data",
+      "status",
+      "session_url",
+      "queue_wait_ms",
+      "quality_score",
+      "quality_summary",
+      "quality_step",
+    ]),
+    client.lRange(stepLogKey(taskId), 0, -1),
+  ]);
+  const [data, status, sessionUrl, queueWaitMs, qualityScore, qualitySummary, qualityStep] =
+    fields as (string | null)[];
   if (!data) return null;
   try {
-    return JSON.parse(data) as TaskResult;
+    const task = JSON.parse(data) as TaskResult;
+    if (status) task.status = status as TaskResult["status"];
+    if (sessionUrl && !task.session_url) task.session_url = sessionUrl;
+    if (queueWaitMs) task.queue_wait_ms = parseInt(queueWaitMs, 10);
+    if (loggedSteps.length > 0) {
+      const steps = loggedSteps.map((s) => JSON.parse(s) as TaskStep);
+      task.steps = [...task.steps, ...steps];
+      task.screenshots = [
+        ...task.screenshots,
+        ...steps.filter((s) => s.screenshot).map((s) => s.screenshot!),
+      ];
+    }
+    mergeQuality(task, qualityScore, qualitySummary, qualityStep);
+    return task;
   } catch {
     console.error(`[Tasks] Failed to parse task ${taskId}`);
     return null;
   }
 }
 
+/**
+ * Read only a task's status field (no JSON document parse).
+ */
+export async function getTaskStatus(taskId: string): Promise<TaskResult["status"] | null> {
+  const client = await getRedisClient();
+  const status = await client.hGet(`${TASK_PREFIX}${taskId}`, "status");
+  return (status as TaskResult["status"] | null) ?? null;
+}
+
+/**
+ * Fetch many tasks in a single pipelined round trip.
+ * Missing or unparseable tasks are skipped; order follows `taskIds`.
+ */
+export async function getTasks(taskIds: string[]): Promise<TaskResult[]> {
+  if (taskIds.length === 0) return [];
+  const client = await getRedisClient();
+  const pipeline = client.multi();
+  for (const id of taskIds) {
+    pipeline.hmGet(`${TASK_PREFIX}${id}`, ["data", "status", "quality_score", "quality_summary"]);
+  }
+  const replies = (await pipeline.execAsPipeline()) as unknown as (string | null)[][];
+
+  // Steps still in a running task's step log are left out here — list views
+  // only need the document — but the live `status` and quality score are overlaid.
+  const tasks: TaskResult[] = [];
+  replies.forEach(([data, status, qualityScore, qualitySummary], i) => {
+    if (!data) return;
+    try {
+      const task = JSON.parse(data) as TaskResult;
+      if (status) task.status = status as TaskResult["status"];
+      mergeQuality(task, qualityScore, qualitySummary, null);
+      tasks.push(task);
+    } catch {
+      console.error(`[Tasks] Failed to parse task ${taskIds[i]}`);
+    }
+  });
+  return tasks;
+}
+
 export async function listTasks(
   limit: number = 20,
   offset: number = 0
 ): Promise<{ tasks: TaskResult[]; total: number }> {
   const client = await getRedisClient();
-  const total = await client.zCard(TIMELINE_KEY);
-  const ids = await client.zRange(TIMELINE_KEY, "+inf", "-inf", {
-    BY: "SCORE",
-    REV: true,
-    LIMIT: { offset, count: limit },
-  });
-  const tasks: TaskResult[] = [];
-  for (const id of ids) {
-    const task = await getTask(id);
-    if (task) tasks.push(task);
-  }
+  const [total, ids] = await Promise.all([
+    client.zCard(TIMELINE_KEY),
+    client.zRange(TIMELINE_KEY, "+inf", "-inf", {
+      BY: "SCORE",
+      REV: true,
+      LIMIT: { offset, count: limit },
+    }),
+  ]);
+  const tasks = await getTasks(ids);
   return { tasks, total };
 }
 
+/**
+ * Read the incrementally maintained task counters (a single HGETALL).
+ * Tasks stored before the counters existed are folded in once by
+ * migrateTaskStats().
+ */
 export async function getTaskStats(): Promise<{
   total: number;
   successful: number;
@@ -57,55 +318,131 @@ export async function getTaskStats(): Promise<{
   cached: number;
   recovered: number;
 }> {
-  const { tasks } = await listTasks(1000, 0);
+  const client = await getRedisClient();
+  if (!(await client.exists(STATS_MIGRATED_KEY))) {
+    await migrateTaskStats();
+  }
+  const data = await client.hGetAll(STATS_KEY);
   return {
-    total: tasks.length,
-    successful: tasks.filter((t) => t.status === "success").length,
-    failed: tasks.filter((t) => t.status === "failed").length,
-    cached: tasks.filter((t) => t.used_cached_pattern).length,
-    recovered: tasks.filter(
-      (t) => t.recovery_attempted && t.status === "success"
-    ).length,
+    total: parseInt(data?.total || "0", 10),
+    successful: parseInt(data?.successful || "0", 10),
+    failed: parseInt(data?.failed || "0", 10),
+    cached: parseInt(data?.cached || "0", 10),
+    recovered: parseInt(data?.recovered || "0", 10),
   };
 }
 
+/**
+ * One-time fold of the existing task history into `tasks:stats`, gated on
+ * the `tasks:stats:migrated` marker rather than on the counters (which the
+ * first storeTask() after a deploy creates). An NX lock keeps concurrent
+ * first reads from rebuilding at once; a reader that loses it just sees the
+ * counters as they are until the winner finishes.
+ */
+async function migrateTaskStats(): Promise<void> {
+  const client = await getRedisClient();
+  const locked = await client.set(STATS_MIGRATION_LOCK_KEY, "1", { NX: true, PX: STATS_MIGRATION_LOCK_MS });
+  if (!locked) return;
+  try {
+    if (await client.exists(STATS_MIGRATED_KEY)) return;
+    if ((await client.zCard(TIMELINE_KEY)) > 0) await rebuildTaskStats();
+    await client.set(STATS_MIGRATED_KEY, Date.now().toString());
+  } finally {
+    await client.del(STATS_MIGRATION_LOCK_KEY);
+  }
+}
+
+/**
+ * Recompute `tasks:stats` from the full task history in pipelined batches.
+ * Used for migration and after bulk writes that bypass storeTask(). Safe
+ * alongside live writes: it starts a new stats generation, and each task is
+ * recounted only if nothing counted it in that generation yet.
+ */
+export async function rebuildTaskStats(batchSize: number = 500): Promise<void> {
+  const client = await getRedisClient();
+  await client.eval(RESET_STATS_SCRIPT, { keys: [STATS_KEY] });
+  const total = await client.zCard(TIMELINE_KEY);
+  for (let start = 0; start < total; start += batchSize) {
+    const ids = await client.zRange(TIMELINE_KEY, start, start + batchSize - 1);
+    const tasks = await getTasks(ids);
+    await Promise.all(
+      tasks.map((t) => applyTaskStats(t.id, t.status, t.used_cached_pattern, t.recovery_attempted))
+    );
+  }
+  console.log(`[Tasks] Rebuilt task stats from ${total} task(s)`);
+}
+
 export async function updateTaskStatus(
   taskId: string,
   status: "pending" | "running" | "success" | "failed"
 ): Promise<void> {
   const client = await getRedisClient();
   const key = `${TASK_PREFIX}${taskId}`;
-  await client.hSet(key, { status });
-  const data = await client.hGet(key, "data");
-  if (data) {
-    const task = JSON.parse(data) as TaskResult;
-    task.status = status;
-    await client.hSet(key, { data: JSON.stringify(task) });
-  }
+  // The bookkeeping fields written by applyTaskStats carry cached/recovered,
+  // so the status change never needs to parse or rewrite the task document;
+  // getTask() overlays the `status` field onto it.
+  const [cached, recovered] = (await client.hmGet(key, ["cached", "recovered"])) as (string | null)[];
+  await applyTaskStats(taskId, status, cached === "1", recovered === "1");
+  // A task run again (redelivered after it was stored) takes new steps
+  if (status === "pending" || status === "running") await client.hSet(key, "finalized", "0");
+  await publishTaskEvent(taskId, { type: "status", status }).catch(() => {});
 }
 
 /**
- * Update a running task's progress in Redis so the SSE stream can pick it up.
- * Only updates the JSON data field — does not touch timeline or status.
+ * Append steps to a running task's step log and publish each one as an
+ * incremental `step` event, in one atomic script. O(new steps) per call
+ * regardless of task size, and overlapping appends can't drop each other's
+ * steps the way read-modify-write of the JSON document could.
+ *
+ * Appends to a task whose final document is already stored are dropped.
+ *
+ * KEYS[1] = task hash, KEYS[2] = step log list
+ * ARGV[1] = channel, ARGV[2] = TTL seconds, ARGV[3..] = step JSON
+ */
+const APPEND_STEPS_SCRIPT = `
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if redis.call('HGET', KEYS[1], 'finalized') == '1' then return 0 end
+local base = tonumber(redis.call('HGET', KEYS[1], 'doc_steps') or '0')
+local len = 0
+for i = 3, #ARGV do
+  len = redis.call('RPUSH', KEYS[2], ARGV[i])
+  redis.call('PUBLISH', ARGV[1], '{"type":"step","index":' .. (base + len - 1) .. ',"step":' .. ARGV[i] .. '}')
+end
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+return len
+`;
+
+/**
+ * Record progress for a running task so the SSE stream can pick it up.
+ * `steps` are NEW steps only — they are appended, never rewritten.
+ * The session URL is a single hash field. Neither touches the task document.
  */
-export async function updateTaskProgress(
+export async function appendTaskProgress(
   taskId: string,
   updates: {
-    steps?: TaskResult["steps"];
-    screenshots?: string[];
+    steps?: TaskStep[];
     session_url?: string;
   }
 ): Promise<void> {
   const client = await getRedisClient();
   const key = `${TASK_PREFIX}${taskId}`;
-  const raw = await client.hGet(key, "data");
-  if (!raw) return;
   try {
-    const task = JSON.parse(raw) as TaskResult;
-    if (updates.steps) task.steps = updates.steps;
-    if (updates.screenshots) task.screenshots = updates.screenshots;
-    if (updates.session_url) task.session_url = updates.session_url;
-    await client.hSet(key, { data: JSON.stringify(task) });
+    if (updates.session_url) {
+      const isNew = await client.hSetNX(key, "session_url", updates.session_url);
+      if (isNew) {
+        await publishTaskEvent(taskId, { type: "session", session_url: updates.session_url });
+      }
+    }
+    if (updates.steps && updates.steps.length > 0) {
+      await client.eval(APPEND_STEPS_SCRIPT, {
+        keys: [key, stepLogKey(taskId)],
+        arguments: [
+          `task_events:${taskId}`,
+          STEP_LOG_TTL_SECONDS.toString(),
+          ...updates.steps.map((step) => JSON.stringify(step)),
+        ],
+      });
+    }
   } catch {
     // Non-critical — don't break the scraper if progress update fails
   }
@@ -1,90 +1,291 @@
-import { SCHEMA_FIELD_TYPE, SCHEMA_VECTOR_FIELD_ALGORITHM } from "redis";
+import { SCHEMA_FIELD_TYPE, SCHEMA_VECTOR_FIELD_ALGORITHM, RESP_TYPES } from "redis";
 import type { SearchReply } from "@redis/search";
 import { getRedisClient } from "./client";
-import { generateEmbedding } from "../embeddings/openai";
+import { generateEmbedding, generateEmbeddings, EMBEDDING_DIMENSIONS } from "../embeddings/openai";
+import { patternKey, parseExtractor, parsePatternHash } from "./patterns";
+import { urlPatternScope } from "../utils/url";
 import { createTracedOp } from "../tracing/weave";
 import type { PatternData, PagePattern } from "../utils/types";
 
 const INDEX_NAME = "idx:page_patterns";
 const PREFIX = "pattern:";
-const VECTOR_DIM = 1536;
+const VECTOR_DIM = EMBEDDING_DIMENSIONS;
+
+type VectorType = "FLOAT32" | "FLOAT16";
+
+/**
+ * FLOAT16 halves index memory and bandwidth per pattern; cosine ranking of
+ * normalized embeddings is essentially unchanged at half precision
+ * (see scripts/vector_index_bench.py). Changing it requires `npm run reindex`.
+ */
+const VECTOR_TYPE: VectorType =
+  (process.env.VECTOR_TYPE || "FLOAT32").toUpperCase() === "FLOAT16" ? "FLOAT16" : "FLOAT32";
+
+// HNSW graph degree and build-time candidate list (fixed at index creation)
+const HNSW_M = parseInt(process.env.VECTOR_HNSW_M || "16", 10);
+const HNSW_EF_CONSTRUCTION = parseInt(process.env.VECTOR_HNSW_EF_CONSTRUCTION || "200", 10);
+// Query-time candidate list; passed per query, so it can be tuned without re-indexing
+const HNSW_EF_RUNTIME = parseInt(process.env.VECTOR_HNSW_EF_RUNTIME || "10", 10);
+
+/**
+ * How narrowly KNN runs before widening: "host" searches the task's
+ * hostname first, "path" its hostname + leading path segment first, and
+ * "global" the whole index. A scoped search falls back to the next wider
+ * scope only when its subset has no patterns at all.
+ */
+const PATTERN_SEARCH_SCOPE = (["path", "host", "global"] as const).find(
+  (s) => s === (process.env.PATTERN_SEARCH_SCOPE || "host")
+) ?? "host";
+
+export type PatternSearchScope = "path" | "host" | "global";
+
+const REINDEX_BATCH_SIZE = 100;
+const REINDEX_WAIT_MS = 5 * 60 * 1000;
+
+const f32 = new Float32Array(1);
+const u32 = new Uint32Array(f32.buffer);
+
+/** IEEE 754 half-precision bits for `value`, rounded to nearest even. */
+function toFloat16Bits(value: number): number {
+  f32[0] = value;
+  const x = u32[0];
+  const sign = (x >>> 16) & 0x8000;
+  const exponent = ((x >>> 23) & 0xff) - 127 + 15;
+  const mantissa = x & 0x7fffff;
+  if (exponent >= 0x1f) {
+    // Overflow, Infinity or NaN
+    return sign | 0x7c00 | (((x >>> 23) & 0xff) === 0xff && mantissa ? 0x200 : 0);
+  }
+  // Subnormal halves shift the implicit leading bit into the mantissa
+  if (exponent < -10) return sign;
+  const full = exponent <= 0 ? mantissa | 0x800000 : mantissa;
+  const shift = exponent <= 0 ? 14 - exponent : 13;
+  const halfBit = 1 << (shift - 1);
+  const rest = full & ((halfBit << 1) - 1);
+  let bits = (exponent <= 0 ? 0 : exponent << 10) | (full >>> shift);
+  // Round half to even; a carry into the exponent is the correct result
+  if (rest > halfBit || (rest === halfBit && (bits & 1))) bits++;
+  return sign | bits;
+}
+
+function fromFloat16Bits(bits: number): number {
+  const sign = bits & 0x8000 ? -1 : 1;
+  const exponent = (bits >>> 10) & 0x1f;
+  const mantissa = bits & 0x3ff;
+  if (exponent === 0) return sign * mantissa * 2 ** -24;
+  if (exponent === 0x1f) return mantissa ? NaN : sign * Infinity;
+  return sign * (1 + mantissa / 1024) * 2 ** (exponent - 15);
+}
+
+/** Encode an embedding in the index's storage type. */
+function toVectorBlob(embedding: number[], type: VectorType = VECTOR_TYPE): Buffer {
+  if (type === "FLOAT32") return Buffer.from(new Float32Array(embedding).buffer);
+  const halves = new Uint16Array(embedding.length);
+  for (let i = 0; i < embedding.length; i++) halves[i] = toFloat16Bits(embedding[i]);
+  return Buffer.from(halves.buffer);
+}
+
+function fromVectorBlob(blob: Buffer, type: VectorType): number[] {
+  const aligned = blob.buffer.slice(blob.byteOffset, blob.byteOffset + blob.byteLength);
+  if (type === "FLOAT32") return Array.from(new Float32Array(aligned));
+  return Array.from(new Uint16Array(aligned), fromFloat16Bits);
+}
+
+export interface VectorIndexConfig {
+  dim: number;
+  type: VectorType;
+  m?: number;
+  efConstruction?: number;
+}
+
+/**
+ * Read the index's attributes from FT.INFO, keys lower-cased. Attribute
+ * entries come back as flat [key, value, ...] arrays or as maps depending
+ * on protocol.
+ */
+async function getIndexAttributes(): Promise<Record<string, unknown>[]> {
+  const client = await getRedisClient();
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  const info = (await client.ft.info(INDEX_NAME)) as any;
+  return (info.attributes ?? []).map((raw: unknown) => {
+    const attr: Record<string, unknown> = {};
+    if (Array.isArray(raw)) {
+      for (let i = 0; i + 1 < raw.length; i += 2) attr[String(raw[i]).toLowerCase()] = raw[i + 1];
+    } else {
+      for (const [k, v] of Object.entries(raw as Record<string, unknown>)) attr[k.toLowerCase()] = v;
+    }
+    return attr;
+  });
+}
+
+function attributeName(attr: Record<string, unknown>): string {
+  return String(attr.attribute ?? attr.identifier);
+}
+
+function toVectorConfig(attributes: Record<string, unknown>[]): VectorIndexConfig | null {
+  const attr = attributes.find((a) => attributeName(a) === "embedding");
+  if (!attr) return null;
+  return {
+    dim: Number(attr.dim),
+    type: String(attr.data_type).toUpperCase() === "FLOAT16" ? "FLOAT16" : "FLOAT32",
+    m: attr.m !== undefined ? Number(attr.m) : undefined,
+    efConstruction: attr.ef_construction !== undefined ? Number(attr.ef_construction) : undefined,
+  };
+}
+
+async function getIndexedVectorConfig(): Promise<VectorIndexConfig | null> {
+  return toVectorConfig(await getIndexAttributes());
+}
+
+/** Hash fields that let KNN be pre-filtered to a host or path subset. */
+function scopeFields(urlPattern: string): { host: string; path_prefix: string } {
+  const { host, pathPrefix } = urlPatternScope(urlPattern);
+  return { host, path_prefix: pathPrefix };
+}
+
+/** Escape a value for a TAG filter — punctuation (".", "/", "-") is syntax there. */
+function escapeTag(value: string): string {
+  return value.replace(/[^a-zA-Z0-9_]/g, "\\$&");
+}
+
+/**
+ * Add the host / path_prefix TAG fields to an index created before they
+ * existed, and populate them on every stored pattern.
+ */
+async function migrateScopeFields(): Promise<void> {
+  const client = await getRedisClient();
+  await client.ft.alter(INDEX_NAME, {
+    host: { type: SCHEMA_FIELD_TYPE.TAG },
+    path_prefix: { type: SCHEMA_FIELD_TYPE.TAG },
+  });
+  let backfilled = 0;
+  for await (const keys of client.scanIterator({ MATCH: `${PREFIX}*`, TYPE: "hash", COUNT: REINDEX_BATCH_SIZE })) {
+    if (keys.length === 0) continue;
+    const read = client.multi();
+    for (const key of keys) read.hGet(key, "url_pattern");
+    const urlPatterns = (await read.execAsPipeline()) as unknown as (string | null)[];
+    const write = client.multi();
+    urlPatterns.forEach((urlPattern, i) => {
+      if (!urlPattern) return;
+      write.hSet(keys[i], scopeFields(urlPattern));
+      backfilled++;
+    });
+    await write.execAsPipeline();
+  }
+  console.log(`[Redis] Added host/path_prefix fields to ${INDEX_NAME} (${backfilled} patterns backfilled)`);
+}
+
+function knnQuery(topK: number, filter: string = "*"): string {
+  return `${filter}=>[KNN ${topK} @embedding $BLOB EF_RUNTIME ${HNSW_EF_RUNTIME} AS vector_score]`;
+}
+
+async function createVectorIndex(): Promise<void> {
+  const client = await getRedisClient();
+  await client.ft.create(
+    INDEX_NAME,
+    {
+      url_pattern: { type: SCHEMA_FIELD_TYPE.TEXT, SORTABLE: true },
+      target: { type: SCHEMA_FIELD_TYPE.TEXT },
+      working_selector: { type: SCHEMA_FIELD_TYPE.TEXT },
+      approach: { type: SCHEMA_FIELD_TYPE.TAG },
+      host: { type: SCHEMA_FIELD_TYPE.TAG },
+      path_prefix: { type: SCHEMA_FIELD_TYPE.TAG },
+      created_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
+      success_count: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
+      failure_count: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
+      last_succeeded_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
+      last_failed_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
+      embedding: {
+        type: SCHEMA_FIELD_TYPE.VECTOR,
+        ALGORITHM: SCHEMA_VECTOR_FIELD_ALGORITHM.HNSW,
+        TYPE: VECTOR_TYPE,
+        DIM: VECTOR_DIM,
+        DISTANCE_METRIC: "COSINE",
+        M: HNSW_M,
+        EF_CONSTRUCTION: HNSW_EF_CONSTRUCTION,
+        EF_RUNTIME: HNSW_EF_RUNTIME,
+      },
+    },
+    { ON: "HASH", PREFIX: PREFIX }
+  );
+}
 
 export const ensureVectorIndex = createTracedOp(
   "ensureVectorIndex",
   async function ensureVectorIndex(): Promise<void> {
-    const client = await getRedisClient();
+    let attributes: Record<string, unknown>[];
     try {
-      await client.ft.info(INDEX_NAME);
+      attributes = await getIndexAttributes();
     } catch {
       console.log("[Redis] Creating vector index:", INDEX_NAME);
-      await client.ft.create(
-        INDEX_NAME,
-        {
-          url_pattern: { type: SCHEMA_FIELD_TYPE.TEXT, SORTABLE: true },
-          target: { type: SCHEMA_FIELD_TYPE.TEXT },
-          working_selector: { type: SCHEMA_FIELD_TYPE.TEXT },
-          approach: { type: SCHEMA_FIELD_TYPE.TAG },
-          created_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
-          success_count: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
-          failure_count: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
-          last_succeeded_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
-          last_failed_at: { type: SCHEMA_FIELD_TYPE.NUMERIC, SORTABLE: true },
-          embedding: {
-            type: SCHEMA_FIELD_TYPE.VECTOR,
-            ALGORITHM: SCHEMA_VECTOR_FIELD_ALGORITHM.HNSW,
-            TYPE: "FLOAT32",
-            DIM: VECTOR_DIM,
-            DISTANCE_METRIC: "COSINE",
-          },
-        },
-        { ON: "HASH", PREFIX: PREFIX }
+      await createVectorIndex();
+      console.log(
+        `[Redis] Vector index created successfully (${VECTOR_DIM}-dim ${VECTOR_TYPE}, M=${HNSW_M}, EF_CONSTRUCTION=${HNSW_EF_CONSTRUCTION})`
+      );
+      return;
+    }
+    if (!attributes.some((a) => attributeName(a) === "host")) {
+      await migrateScopeFields();
+    }
+    const indexed = toVectorConfig(attributes);
+    if (indexed && (indexed.dim !== VECTOR_DIM || indexed.type !== VECTOR_TYPE)) {
+      console.warn(
+        `[Redis] ${INDEX_NAME} stores ${indexed.dim}-dim ${indexed.type} vectors but ` +
+        `${VECTOR_DIM}-dim ${VECTOR_TYPE} is configured — vector search is disabled until \`npm run reindex\``
       );
-      console.log("[Redis] Vector index created successfully");
     }
   }
 );
 
+/**
+ * KNN over the patterns matching `filter` (a RediSearch pre-filter; "*" is
+ * the whole index). Throws on search errors so callers can decide.
+ */
+async function knnSearch(embeddingBuffer: Buffer, topK: number, filter: string = "*"): Promise<PagePattern[]> {
+  const client = await getRedisClient();
+  const results = await client.ft.search(
+    INDEX_NAME,
+    knnQuery(topK, filter),
+    {
+      PARAMS: { BLOB: embeddingBuffer },
+      SORTBY: { BY: "vector_score", DIRECTION: "ASC" },
+      DIALECT: 2,
+      RETURN: [
+        "url_pattern", "target", "working_selector",
+        "approach", "vector_score", "success_count", "failure_count",
+        "created_at", "last_succeeded_at", "last_failed_at", "extractor",
+      ],
+    }
+  ) as unknown as SearchReply;
+  if (!results.documents || results.documents.length === 0) {
+    return [];
+  }
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  return results.documents.map((doc: any) => ({
+    id: doc.id,
+    url_pattern: doc.value.url_pattern as string,
+    target: doc.value.target as string,
+    working_selector: doc.value.working_selector as string,
+    approach: doc.value.approach as "extract" | "act" | "agent",
+    success_count: parseInt(doc.value.success_count as string, 10) || 0,
+    failure_count: parseInt(doc.value.failure_count as string, 10) || 0,
+    created_at: parseInt(doc.value.created_at as string, 10) || 0,
+    last_succeeded_at: doc.value.last_succeeded_at ? parseInt(doc.value.last_succeeded_at as string, 10) : undefined,
+    last_failed_at: doc.value.last_failed_at ? parseInt(doc.value.last_failed_at as string, 10) : undefined,
+    extractor: parseExtractor(doc.value.extractor as string | undefined),
+    score: 1 - parseFloat(doc.value.vector_score as string) / 2,
+  }));
+}
+
 export const searchSimilarPatterns = createTracedOp(
   "searchSimilarPatterns",
   async function searchSimilarPatterns(
     queryText: string,
     topK: number = 3
   ): Promise<PagePattern[]> {
-    const client = await getRedisClient();
     const embedding = await generateEmbedding(queryText);
-    const embeddingBuffer = Buffer.from(new Float32Array(embedding).buffer);
     try {
-      const results = await client.ft.search(
-        INDEX_NAME,
-        `*=>[KNN ${topK} @embedding $BLOB AS vector_score]`,
-        {
-          PARAMS: { BLOB: embeddingBuffer },
-          SORTBY: { BY: "vector_score", DIRECTION: "ASC" },
-          DIALECT: 2,
-          RETURN: [
-            "url_pattern", "target", "working_selector",
-            "approach", "vector_score", "success_count", "failure_count",
-            "created_at", "last_succeeded_at", "last_failed_at",
-          ],
-        }
-      ) as unknown as SearchReply;
-      if (!results.documents || results.documents.length === 0) {
-        return [];
-      }
-      // eslint-disable-next-line @typescript-eslint/no-explicit-any
-      return results.documents.map((doc: any) => ({
-        id: doc.id,
-        url_pattern: doc.value.url_pattern as string,
-        target: doc.value.target as string,
-        working_selector: doc.value.working_selector as string,
-        approach: doc.value.approach as "extract" | "act" | "agent",
-        success_count: parseInt(doc.value.success_count as string, 10) || 0,
-        failure_count: parseInt(doc.value.failure_count as string, 10) || 0,
-        created_at: parseInt(doc.value.created_at as string, 10) || 0,
-        last_succeeded_at: doc.value.last_succeeded_at ? parseInt(doc.value.last_succeeded_at as string, 10) : undefined,
-        last_failed_at: doc.value.last_failed_at ? parseInt(doc.value.last_failed_at as string, 10) : undefined,
-        score: 1 - parseFloat(doc.value.vector_score as string) / 2,
-      }));
+      return await knnSearch(toVectorBlob(embedding), topK);
     } catch (error) {
       console.error("[Redis] Vector search failed:", error);
       return [];
@@ -96,20 +297,84 @@ export const searchSimilarPatterns = createTracedOp(
   }
 );
 
+/**
+ * Hybrid KNN for a task's URL: search the patterns of the same host (or
+ * host + leading path segment, per PATTERN_SEARCH_SCOPE) first, so other
+ * sites never crowd the candidates handed to composite re-ranking, and
+ * widen to the next scope only when the subset is empty. A selective
+ * pre-filter also lets RediSearch brute-force the small subset instead of
+ * walking the whole HNSW graph.
+ */
+export const searchPatternsForUrl = createTracedOp(
+  "searchPatternsForUrl",
+  async function searchPatternsForUrl(
+    urlPattern: string,
+    queryText: string,
+    topK: number = 10
+  ): Promise<{ patterns: PagePattern[]; scope: PatternSearchScope }> {
+    const embeddingBuffer = toVectorBlob(await generateEmbedding(queryText));
+    const { host, path_prefix: pathPrefix } = scopeFields(urlPattern);
+    const hostFilter = `@host:{${escapeTag(host)}}`;
+    const scopes: [PatternSearchScope, string][] = [];
+    if (PATTERN_SEARCH_SCOPE === "path") {
+      scopes.push(["path", `(${hostFilter} @path_prefix:{${escapeTag(pathPrefix)}})`]);
+    }
+    if (PATTERN_SEARCH_SCOPE !== "global" && host) {
+      scopes.push(["host", hostFilter]);
+    }
+    scopes.push(["global", "*"]);
+
+    for (const [scope, filter] of scopes) {
+      try {
+        const patterns = await knnSearch(embeddingBuffer, topK, filter);
+        if (patterns.length > 0 || scope === "global") return { patterns, scope };
+      } catch (error) {
+        console.error(`[Redis] Vector search (${scope}) failed:`, error);
+      }
+    }
+    return { patterns: [], scope: "global" };
+  },
+  {
+    callDisplayName: (urlPattern: string) => `vector_search:${urlPattern.substring(0, 40)}`,
+    summarize: (result: { patterns: PagePattern[]; scope: PatternSearchScope }) => ({
+      "webscout.search_scope": result.scope,
+      "webscout.candidates": result.patterns.length,
+    }),
+  }
+);
+
 export const storePattern = createTracedOp(
   "storePattern",
   async function storePattern(data: PatternData): Promise<string> {
     const client = await getRedisClient();
+    const key = patternKey(data.url_pattern, data.target);
+
+    // Exact identity already indexed — update in place without embedding
+    const indexedId = await client.get(key);
+    if (indexedId && (await client.exists(indexedId))) {
+      await Promise.all([
+        client.hIncrBy(indexedId, "success_count", 1),
+        client.hSet(indexedId, {
+          last_succeeded_at: Date.now().toString(),
+          working_selector: data.working_selector,
+        }),
+      ]);
+      console.log(`[Redis] Updated existing pattern: ${indexedId} (exact key)`);
+      return indexedId;
+    }
+
     const embeddingText = `${data.url_pattern} ${data.target}`;
     const embedding = await generateEmbedding(embeddingText);
-    const embeddingBuffer = Buffer.from(new Float32Array(embedding).buffer);
+    const embeddingBuffer = toVectorBlob(embedding);
+    const scope = scopeFields(data.url_pattern);
 
     // Check for an existing pattern with the same url_pattern + target to
     // avoid duplicates.  If found, update the existing pattern instead.
+    // Only the same host can hold the same url_pattern, so search just there.
     try {
       const existing = await client.ft.search(
         INDEX_NAME,
-        `*=>[KNN 1 @embedding $BLOB AS vector_score]`,
+        knnQuery(1, `@host:{${escapeTag(scope.host)}}`),
         {
           PARAMS: { BLOB: embeddingBuffer },
           SORTBY: { BY: "vector_score", DIRECTION: "ASC" },
@@ -135,6 +400,8 @@ export const storePattern = createTracedOp(
               last_succeeded_at: Date.now().toString(),
               working_selector: data.working_selector,
             }),
+            // Backfill the exact key for patterns stored before it existed
+            client.set(key, existingId),
           ]);
           console.log(`[Redis] Updated existing pattern: ${existingId} (similarity=${(similarity * 100).toFixed(1)}%)`);
           return existingId;
@@ -150,12 +417,14 @@ export const storePattern = createTracedOp(
       target: data.target,
       working_selector: data.working_selector,
       approach: data.approach,
+      ...scope,
       created_at: Date.now().toString(),
       success_count: "1",
       failure_count: "0",
       last_succeeded_at: Date.now().toString(),
       embedding: embeddingBuffer,
     });
+    await client.set(key, id);
     console.log(`[Redis] Stored new pattern: ${id}`);
     return id;
   },
@@ -202,3 +471,164 @@ export const updatePatternLastSuccess = createTracedOp(
     summarize: () => ({ "webscout.pattern_success_updated": 1 }),
   }
 );
+
+const SCANNED_FIELDS = [
+  "url_pattern", "target", "working_selector", "approach", "host",
+  "success_count", "failure_count", "created_at", "last_succeeded_at", "last_failed_at",
+  "embedding",
+] as const;
+
+export interface ScannedPattern {
+  pattern: PagePattern;
+  host: string;
+  /** Stored vector, or null when it isn't in the index's current format */
+  embedding: Buffer | null;
+}
+
+/**
+ * One SCAN step over the stored patterns: pass "0" to start a pass and the
+ * returned cursor to continue it; a returned "0" means the pass is complete.
+ * Hashes without a url_pattern (left behind when a counter update raced a
+ * delete) come back as `orphans`.
+ */
+export async function scanPatterns(
+  cursor: string,
+  count: number
+): Promise<{ cursor: string; patterns: ScannedPattern[]; orphans: string[] }> {
+  const client = await getRedisClient();
+  const binary = client.withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer });
+  const reply = await client.scan(cursor, { MATCH: `${PREFIX}*`, TYPE: "hash", COUNT: count });
+  const patterns: ScannedPattern[] = [];
+  const orphans: string[] = [];
+  if (reply.keys.length > 0) {
+    const read = binary.multi();
+    for (const key of reply.keys) read.hmGet(key, [...SCANNED_FIELDS]);
+    const rows = (await read.execAsPipeline()) as unknown as (Buffer | null)[][];
+    const vectorBytes = VECTOR_DIM * (VECTOR_TYPE === "FLOAT32" ? 4 : 2);
+    rows.forEach((row, i) => {
+      const data: Record<string, string | undefined> = {};
+      SCANNED_FIELDS.forEach((field, j) => {
+        if (field !== "embedding") data[field] = row[j]?.toString();
+      });
+      if (!data.url_pattern) {
+        orphans.push(reply.keys[i]);
+        return;
+      }
+      const blob = row[SCANNED_FIELDS.length - 1];
+      patterns.push({
+        pattern: parsePatternHash(reply.keys[i], data),
+        host: data.host ?? scopeFields(data.url_pattern).host,
+        embedding: blob && blob.length === vectorBytes ? blob : null,
+      });
+    });
+  }
+  return { cursor: String(reply.cursor), patterns, orphans };
+}
+
+/**
+ * Patterns on the same host whose vectors are at least `minSimilarity`
+ * close to this one (the pattern itself excluded), nearest first.
+ */
+export async function findNearDuplicates(
+  scanned: ScannedPattern,
+  minSimilarity: number,
+  topK: number = 5
+): Promise<PagePattern[]> {
+  if (!scanned.embedding || !scanned.host) return [];
+  const neighbours = await knnSearch(scanned.embedding, topK + 1, `@host:{${escapeTag(scanned.host)}}`);
+  return neighbours.filter((p) => p.id !== scanned.pattern.id && (p.score ?? 0) >= minSimilarity);
+}
+
+export interface ReindexResult {
+  patterns: number;
+  /** Vectors re-encoded in place (storage type change only) */
+  converted: number;
+  /** Vectors re-embedded from url_pattern + target (width change or unreadable) */
+  reembedded: number;
+  from: VectorIndexConfig | null;
+  to: VectorIndexConfig;
+  durationMs: number;
+}
+
+/**
+ * Rebuild idx:page_patterns with the configured width, storage type and HNSW
+ * parameters (`npm run reindex`).
+ *
+ * The index is dropped with its documents kept, every pattern's vector is
+ * rewritten in the new format, and the index is recreated, which makes
+ * RediSearch index all patterns again. When only the storage type changes
+ * the stored vectors are converted without embedding calls; a width change
+ * re-embeds `url_pattern target` in batches. Vector search finds nothing
+ * while this runs (exact pattern-key lookups keep working), and an
+ * interrupted run is safe to repeat.
+ */
+export async function reindexPatterns(): Promise<ReindexResult> {
+  const client = await getRedisClient();
+  const binary = client.withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer });
+  const started = Date.now();
+  const to: VectorIndexConfig = {
+    dim: VECTOR_DIM,
+    type: VECTOR_TYPE,
+    m: HNSW_M,
+    efConstruction: HNSW_EF_CONSTRUCTION,
+  };
+
+  const from = await getIndexedVectorConfig().catch(() => null);
+  if (from) {
+    await client.ft.dropIndex(INDEX_NAME);
+    console.log(`[Redis] Dropped ${INDEX_NAME} (${from.dim}-dim ${from.type}) for re-indexing`);
+  }
+  // Without the old index the stored format is unknown — re-embed everything
+  const sourceType = from?.dim === VECTOR_DIM ? from.type : null;
+  const sourceBytes = sourceType ? VECTOR_DIM * (sourceType === "FLOAT32" ? 4 : 2) : -1;
+
+  let patterns = 0;
+  let converted = 0;
+  let reembedded = 0;
+  for await (const keys of client.scanIterator({ MATCH: `${PREFIX}*`, TYPE: "hash", COUNT: REINDEX_BATCH_SIZE })) {
+    if (keys.length === 0) continue;
+    const read = binary.multi();
+    for (const key of keys) read.hmGet(key, ["url_pattern", "target", "embedding"]);
+    const rows = (await read.execAsPipeline()) as unknown as (Buffer | null)[][];
+
+    const write = client.multi();
+    const stale: { key: string; text: string }[] = [];
+    rows.forEach(([urlPattern, target, blob], i) => {
+      if (!urlPattern || !target) return;
+      patterns++;
+      write.hSet(keys[i], scopeFields(urlPattern.toString()));
+      if (blob && blob.length === sourceBytes) {
+        if (sourceType !== VECTOR_TYPE) {
+          write.hSet(keys[i], "embedding", toVectorBlob(fromVectorBlob(blob, sourceType!)));
+          converted++;
+        }
+        return;
+      }
+      stale.push({ key: keys[i], text: `${urlPattern.toString()} ${target.toString()}` });
+    });
+
+    if (stale.length > 0) {
+      const embeddings = await generateEmbeddings(stale.map((s) => s.text));
+      stale.forEach(({ key }, i) => write.hSet(key, "embedding", toVectorBlob(embeddings[i])));
+      reembedded += stale.length;
+    }
+    await write.execAsPipeline();
+    console.log(`[Redis] Re-index: ${patterns} patterns rewritten so far`);
+  }
+
+  await createVectorIndex();
+  const deadline = Date.now() + REINDEX_WAIT_MS;
+  while (Date.now() < deadline) {
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    const info = (await client.ft.info(INDEX_NAME)) as any;
+    if (Number(info.percent_indexed ?? 1) >= 1) break;
+    await new Promise((r) => setTimeout(r, 500));
+  }
+
+  const durationMs = Date.now() - started;
+  console.log(
+    `[Redis] Re-indexed ${patterns} patterns as ${VECTOR_DIM}-dim ${VECTOR_TYPE} ` +
+    `(${converted} converted, ${reembedded} re-embedded) in ${durationMs}ms`
+  );
+  return { patterns, converted, reembedded, from, to, durationMs };
+}
@@ -0,0 +1,89 @@
+import type { Page } from "@browserbasehq/stagehand";
+import { captureScreenshotBytes } from "./trace-context";
+import { storeScreenshotBytes } from "../redis/screenshots";
+
+export type ScreenshotPolicy = "always" | "on_failure" | "first_and_last" | "sampled";
+
+/**
+ * Which moments of a task get a screenshot:
+ *   - always:         every moment below (full demo traces)
+ *   - on_failure:     failed attempts, and the final page of a failed task
+ *   - first_and_last: the page after navigation and the final page
+ *   - sampled:        SCREENSHOT_SAMPLE_RATE of tasks get `always`, the rest `on_failure`
+ */
+const SCREENSHOT_POLICY = (process.env.SCREENSHOT_POLICY || "always") as ScreenshotPolicy;
+const SCREENSHOT_SAMPLE_RATE = parseFloat(process.env.SCREENSHOT_SAMPLE_RATE || "0.1");
+
+/**
+ * navigate: the page after load; failure: a failed extraction attempt;
+ * final: the page the task ended on (its result, or its last failure)
+ */
+export type CaptureMoment = "navigate" | "failure" | "final";
+
+export interface ScreenshotRecorder {
+  policy: Exclude<ScreenshotPolicy, "sampled">;
+  /** Whether the policy keeps a screenshot of this moment */
+  wants: (moment: CaptureMoment, failed?: boolean) => boolean;
+  /**
+   * Start capturing and storing a screenshot without waiting for it. Pass
+   * `base64` to store an image captured elsewhere (e.g. on a recovery page).
+   * Resolves to the screenshot URL, "" when it failed, or null when the
+   * policy skips this moment.
+   */
+  capture: (page: Page, moment: CaptureMoment, options?: { failed?: boolean; base64?: string }) => Promise<string> | null;
+  /** Wait for every capture started so far */
+  drain: () => Promise<void>;
+  /** Total time captures took (they overlap other work, so this is not wall time) */
+  totalMs: () => number;
+}
+
+/**
+ * Per-task screenshot recorder applying SCREENSHOT_POLICY. Captures run in
+ * the background: the browser renders and encodes the frame (JPEG/WebP at
+ * SCREENSHOT_QUALITY) while the scrape continues with its next step.
+ */
+export function createScreenshotRecorder(taskId: string): ScreenshotRecorder {
+  const policy: Exclude<ScreenshotPolicy, "sampled"> =
+    SCREENSHOT_POLICY === "sampled"
+      ? Math.random() < SCREENSHOT_SAMPLE_RATE ? "always" : "on_failure"
+      : SCREENSHOT_POLICY;
+  const pending = new Set<Promise<string>>();
+  let captureMs = 0;
+
+  const wants = (moment: CaptureMoment, failed: boolean = false): boolean => {
+    switch (policy) {
+      case "on_failure":
+        return moment === "failure" || (moment === "final" && failed);
+      case "first_and_last":
+        return moment === "navigate" || moment === "final";
+      default:
+        return true;
+    }
+  };
+
+  return {
+    policy,
+    wants,
+    capture: (page, moment, options = {}) => {
+      if (!wants(moment, options.failed)) return null;
+      const start = Date.now();
+      const shot = (async () => {
+        const bytes = options.base64
+          ? Buffer.from(options.base64, "base64")
+          : await captureScreenshotBytes(page);
+        return bytes ? storeScreenshotBytes(taskId, bytes) : "";
+      })()
+        .catch(() => "")
+        .finally(() => {
+          captureMs += Date.now() - start;
+          pending.delete(shot);
+        });
+      pending.add(shot);
+      return shot;
+    },
+    drain: async () => {
+      await Promise.all(pending);
+    },
+    totalMs: () => captureMs,
+  };
+}
@@ -1,19 +1,37 @@
 import type { Page } from "@browserbasehq/stagehand";
 import { createTracedOp } from "./weave";
 
-export const captureScreenshot = createTracedOp(
+/** jpeg | webp — both ~5-10x smaller than PNG for page screenshots */
+const SCREENSHOT_FORMAT = (process.env.SCREENSHOT_FORMAT || "jpeg") as "jpeg" | "webp";
+const SCREENSHOT_QUALITY = parseInt(process.env.SCREENSHOT_QUALITY || "70", 10);
+
+/**
+ * Viewport screenshot as raw image bytes (encoded by the browser), or null
+ * when the capture failed.
+ */
+export const captureScreenshotBytes = createTracedOp(
   "captureScreenshot",
-  async function captureScreenshot(page: Page): Promise<string> {
+  async function captureScreenshotBytes(page: Page): Promise<Buffer | null> {
     try {
-      const buffer = await page.screenshot({ type: "png", fullPage: false });
-      return buffer.toString("base64");
+      return await page.screenshot({
+        // Typed as png/jpeg only, but the format is forwarded to CDP, which also encodes WebP
+        type: SCREENSHOT_FORMAT as "jpeg",
+        quality: SCREENSHOT_QUALITY,
+        fullPage: false,
+      });
     } catch (error) {
       console.warn("[Trace] Screenshot failed:", (error as Error).message);
-      return "";
+      return null;
     }
   }
 );
 
+/** Base64 variant, for results carried as strings (RecoveryResult.screenshot) */
+export async function captureScreenshot(page: Page): Promise<string> {
+  const bytes = await captureScreenshotBytes(page);
+  return bytes ? bytes.toString("base64") : "";
+}
+
 export const captureDOMSnapshot = createTracedOp(
   "captureDOMSnapshot",
   async function captureDOMSnapshot(page: Page): Promise<string> {
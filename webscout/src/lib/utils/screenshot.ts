@@ -0,0 +1,11 @@
+/**
+ * Resolve a step/task screenshot value to an <img> src.
+ * New tasks store URL references (/api/tasks/{id}/screenshots/{hash});
+ * older tasks still carry inline base64 PNGs.
+ */
+export function screenshotSrc(value: string): string {
+  if (value.startsWith("/") || value.startsWith("http") || value.startsWith("data:")) {
+    return value;
+  }
+  return `data:image/png;base64,${value}`;
+}
@@ -9,13 +9,50 @@ export interface PagePattern {
   failure_count: number;
   last_succeeded_at?: number;
   last_failed_at?: number;
+  /** Deterministic replacement for the LLM extraction, when one could be compiled */
+  extractor?: CompiledExtractor;
   score?: number;
 }
 
+export interface ExtractorField {
+  /** CSS selector relative to the list item (or the document); "" is the element itself */
+  selector: string;
+  /** Read this attribute instead of the text content */
+  attr?: string;
+  /** Read the resolved DOM property (absolute URL) rather than the raw attribute */
+  absolute?: boolean;
+  /** Parse the text as a number */
+  type?: "number";
+}
+
+/**
+ * CSS selectors plus a field mapping that reproduce an extraction without
+ * the LLM (see engine/compiled-extractor.ts).
+ */
+export interface CompiledExtractor {
+  version: 1;
+  /** list: one entry per `root` match; record: named fields; text: one value */
+  kind: "list" | "record" | "text";
+  /** Wrap the output in an object under this key */
+  key?: string;
+  /** list: selector matching each item */
+  root?: string;
+  /** list: leading `root` matches that are not items */
+  skip?: number;
+  /** list: most items to return */
+  limit?: number;
+  /** list of records / record: field name -> where to read it */
+  fields?: Record<string, ExtractorField>;
+  /** text, or each item of a list of scalars */
+  value: ExtractorField;
+}
+
 export interface TaskRequest {
   url: string;
   target: string;
   id?: string;
+  /** Accept a stored result of an identical task completed this many seconds ago */
+  max_age?: number;
 }
 
 export interface TaskResult {
@@ -33,6 +70,18 @@ export interface TaskResult {
   session_url?: string;
   quality_score?: number;
   quality_summary?: string;
+  /** Time spent in the task queue before a worker picked it up */
+  queue_wait_ms?: number;
+  /**
+   * Milliseconds per scrape phase: init, lookup (pattern search), browser
+   * (lease, overlapping the lookup), browser_wait (blocked on it after the
+   * lookup) and navigate — keys are `<phase>_ms`
+   */
+  phase_timings?: Record<string, number>;
+  /** Set when the task did not run itself: it shared an identical in-flight task or a cached result */
+  served_from?: "coalesced" | "result_cache";
+  /** The task whose run produced this task's result, when served_from is set */
+  source_task_id?: string;
   screenshots: string[];
   steps: TaskStep[];
   created_at: number;
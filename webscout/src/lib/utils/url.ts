@@ -31,3 +31,13 @@ export function normalizeUrl(url: string): string {
     return url;
   }
 }
+
+/**
+ * Hostname and leading path segment of a pattern from extractUrlPattern(),
+ * used to scope vector search: "books.toscrape.com/catalogue/*" →
+ * { host: "books.toscrape.com", pathPrefix: "/catalogue" }.
+ */
+export function urlPatternScope(urlPattern: string): { host: string; pathPrefix: string } {
+  const [host, first] = urlPattern.split("/");
+  return { host, pathPrefix: `/${first ?? ""}` };
+}
@@ -0,0 +1,40 @@
+/**
+ * Pattern vector index migration.
+ *
+ *   npm run reindex
+ *
+ * Rebuilds idx:page_patterns after changing EMBEDDING_DIMENSIONS,
+ * VECTOR_TYPE or the VECTOR_HNSW_* build settings (see reindexPatterns in
+ * src/lib/redis/vectors.ts). Stop workers first: vector search finds no
+ * patterns until the new index is built.
+ */
+
+for (const file of [".env.local", ".env"]) {
+  try {
+    process.loadEnvFile(file);
+  } catch {
+    // File not present
+  }
+}
+
+async function main(): Promise<void> {
+  const { reindexPatterns } = await import("./lib/redis/vectors");
+  const { disconnectRedis } = await import("./lib/redis/client");
+
+  const result = await reindexPatterns();
+  const describe = (c: typeof result.to | null) =>
+    c ? `${c.dim}-dim ${c.type}${c.m !== undefined ? ` M=${c.m} EF_CONSTRUCTION=${c.efConstruction}` : ""}` : "no index";
+  console.log(`[Reindex] ${describe(result.from)} -> ${describe(result.to)}`);
+  console.log(
+    `[Reindex] ${result.patterns} patterns (${result.converted} converted, ` +
+    `${result.reembedded} re-embedded) in ${(result.durationMs / 1000).toFixed(1)}s`
+  );
+  await disconnectRedis();
+}
+
+main().catch((error) => {
+  console.error("[Reindex] Failed:", error);
+  process.exit(1);
+});
+
+export {};
@@ -0,0 +1,53 @@
+/**
+ * Task queue worker process.
+ *
+ *   npm run worker
+ *
+ * Runs queued scrape tasks (see src/lib/redis/queue.ts) with at most
+ * WORKER_CONCURRENCY in flight. Scale throughput by starting more workers;
+ * each one joins the same consumer group.
+ */
+
+// Next.js loads .env.local for the web tier; the worker does it itself,
+// before importing modules that read configuration at load time
+for (const file of [".env.local", ".env"]) {
+  try {
+    process.loadEnvFile(file);
+  } catch {
+    // File not present
+  }
+}
+
+async function main(): Promise<void> {
+  const { startTaskWorker } = await import("./lib/engine/task-worker");
+  const { drainSessionPool } = await import("./lib/browser/session-pool");
+  const { drainPostProcessing } = await import("./lib/engine/post-processor");
+  const { schedulePatternMaintenance } = await import("./lib/engine/pattern-pruner");
+  const { disconnectRedis } = await import("./lib/redis/client");
+
+  const worker = await startTaskWorker();
+  const maintenance = schedulePatternMaintenance();
+
+  let shuttingDown = false;
+  const shutdown = async (signal: string) => {
+    if (shuttingDown) return;
+    shuttingDown = true;
+    console.log(`[Worker] ${signal} received — finishing in-flight tasks`);
+    await worker.stop();
+    await maintenance.stop();
+    await drainSessionPool();
+    await drainPostProcessing();
+    await disconnectRedis();
+    process.exit(0);
+  };
+
+  process.on("SIGINT", () => void shutdown("SIGINT"));
+  process.on("SIGTERM", () => void shutdown("SIGTERM"));
+}
+
+main().catch((error) => {
+  console.error("[Worker] Fatal error:", error);
+  process.exit(1);
+});
+
+export {};